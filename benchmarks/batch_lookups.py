@@ -0,0 +1,149 @@
+"""
+Benchmark loading a dashboard page of challenges or miners one request per item versus one batch request.
+
+Usage:
+    python -m benchmarks.batch_lookups
+    python -m benchmarks.batch_lookups --page-size 50 --pages 20 --output batch.json
+    python -m benchmarks.batch_lookups --use-env --no-seed     # reuse the database in the AWS_RDS_* env vars
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py), seeds it (see benchmarks/seed.py) and
+runs the API under uvicorn. Each page is --page-size random challenge IDs (or miner hotkeys), loaded as
+individual /codegen-challenge (/single-miner-responses) requests, sequentially and --concurrency at a
+time as a browser would, and as one /codegen-challenge/batch (/single-miner-responses/batch) request.
+"cold" clears the cache before every page; "after batch" loads the page with single requests right after
+a batch request for it, which should be served from the per-item cache entries the batch filled.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.e2e import Client, percentile, wait_for_server
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import SeedConfig, miner_hotkey, seed
+
+
+def single_requests(client: Client, path: str, parameter: str, values: list, concurrency: int) -> None:
+    def one(value):
+        status, _ = client.request('GET', path, {parameter: value, 'dedupe_patches': 'true'})
+        if status >= 500:
+            raise RuntimeError(f"{path} returned {status}")
+
+    if concurrency == 1:
+        for value in values:
+            one(value)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, values))
+
+
+def batch_request(client: Client, path: str, parameter: str, values: list) -> None:
+    status, _ = client.request('GET', f"{path}/batch", {f"{parameter}s": ','.join(values), 'dedupe_patches': 'true'})
+    if status != 200:
+        raise RuntimeError(f"{path}/batch returned {status}")
+
+
+def measure_page_loads(client: Client, name: str, path: str, parameter: str, pages: list, concurrency: int) -> list:
+    scenarios = [
+        (f"{len(pages[0])} x {path}, sequential", 'cold', lambda page: single_requests(client, path, parameter, page, 1)),
+        (f"{len(pages[0])} x {path}, {concurrency} concurrent", 'cold', lambda page: single_requests(client, path, parameter, page, concurrency)),
+        (f"1 x {path}/batch", 'cold', lambda page: batch_request(client, path, parameter, page)),
+        (f"{len(pages[0])} x {path}, sequential", 'after batch', lambda page: single_requests(client, path, parameter, page, 1)),
+    ]
+    results = []
+    for scenario, cache, load in scenarios:
+        latencies = []
+        for page in pages:
+            client.request('POST', '/retrieval/cache/clear')
+            if cache == 'after batch':
+                batch_request(client, path, parameter, page)
+            start = time.perf_counter()
+            load(page)
+            latencies.append((time.perf_counter() - start) * 1000)
+        result = {
+            'entity': name,
+            'scenario': scenario,
+            'cache': cache,
+            'pages': len(pages),
+            'page_p50_ms': percentile(latencies, 0.5),
+            'page_p90_ms': percentile(latencies, 0.9),
+        }
+        print(f"{scenario:<52} {cache:<11} page p50={result['page_p50_ms']:8.1f}ms p90={result['page_p90_ms']:8.1f}ms")
+        results.append(result)
+    return results
+
+
+def run(args, db_env: dict) -> dict:
+    config = SeedConfig(challenges=args.challenges, miners=args.miners, responses_per_challenge=args.responses_per_challenge, days=1, seed=args.seed)
+    os.environ.update(db_env)
+
+    if not args.no_seed:
+        from src.db.operations import DatabaseManager
+        db = DatabaseManager()
+        start = time.perf_counter()
+        counts = seed(db, config)
+        db.close_all_connections()
+        print(f"seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+    env = {**os.environ, **db_env, 'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', '')}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    try:
+        client = Client(args.port)
+        wait_for_server(client)
+        rng = random.Random(args.seed)
+        challenge_ids = [f"bench-challenge-{index:08d}" for index in range(config.challenges)]
+        miners = [miner_hotkey(index) for index in range(config.miners)]
+        challenge_pages = [rng.sample(challenge_ids, min(args.page_size, len(challenge_ids))) for _ in range(args.pages)]
+        miner_pages = [rng.sample(miners, min(args.page_size, len(miners))) for _ in range(args.pages)]
+        results = (
+            measure_page_loads(client, 'challenges', '/retrieval/codegen-challenge', 'challenge_id', challenge_pages, args.concurrency)
+            + measure_page_loads(client, 'miners', '/retrieval/single-miner-responses', 'miner_hotkey', miner_pages, args.concurrency)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {'config': {**vars(config), 'page_size': args.page_size, 'pages': args.pages, 'concurrency': args.concurrency}, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=200)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--responses-per-challenge', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=50, help='Challenges or miners per page')
+    parser.add_argument('--pages', type=int, default=20, help='Page loads per scenario')
+    parser.add_argument('--concurrency', type=int, default=6, help='Parallel single requests, as a browser would make')
+    parser.add_argument('--port', type=int, default=8097)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--use-env', action='store_true', help='Use the database in the AWS_RDS_* env vars instead of a temporary cluster')
+    parser.add_argument('--no-seed', action='store_true', help='Skip seeding (with --use-env, reuse an already seeded database)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    if args.use_env:
+        from src.utils.config import load_env
+        load_env()
+        keys = ['AWS_RDS_PLATFORM_ENDPOINT', 'AWS_RDS_PORT', 'AWS_MASTER_USERNAME', 'AWS_MASTER_PASSWORD', 'AWS_RDS_PLATFORM_DB_NAME', 'AWS_RDS_SSLMODE']
+        report = run(args, {key: os.environ[key] for key in keys if key in os.environ})
+    else:
+        with LocalPostgres() as db_env:
+            report = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
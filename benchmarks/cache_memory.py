@@ -0,0 +1,137 @@
+"""
+Benchmark API memory while the cache fills with large results, with and without the cache's memory cap.
+
+Usage:
+    python -m benchmarks.cache_memory
+    python -m benchmarks.cache_memory --challenges 400 --keys 40 --cap-mb 128 --output cache_memory.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py), seeds it as benchmarks/e2e.py does and,
+for each mode, runs the API under uvicorn and requests --keys distinct all-time, 150-miner
+/retrieval/miner-responses results (the largest entries the cache holds), reporting the server's
+resident memory and the cache's estimated bytes as they accumulate, then the latency of cache hits
+on one of them. Modes:
+- count only: the memory cap and compaction effectively off, as when the cache was bounded by count
+- capped: CACHE_MAX_MB=--cap-mb, with large results compacted
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.e2e import Client, percentile, rss_mb, wait_for_server
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import SeedConfig, seed
+
+MODES = {
+    'count only': {'CACHE_MAX_MB': '1000000', 'CACHE_COMPACT_KB': '1000000000'},
+    'capped': {},
+}
+
+
+def cache_stats(client: Client) -> dict:
+    status, body = client.request('GET', '/retrieval/cache/stats')
+    if status != 200:
+        raise RuntimeError(f"/retrieval/cache/stats returned {status}")
+    return json.loads(body)['cache_stats']
+
+
+def run(args, db_env: dict) -> list:
+    config = SeedConfig(challenges=args.challenges, miners=args.miners, seed=args.seed)
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    print(f"seeded {seed(db, config)}")
+    db.close_all_connections()
+
+    results = []
+    for mode, overrides in MODES.items():
+        env = {
+            **os.environ, **db_env,
+            'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', ''),
+            'CACHE_MAX_MB': str(args.cap_mb),
+            # Only the requests below should fill the cache
+            'SCHEDULER_ENABLED': 'false',
+            **overrides,
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+        )
+        try:
+            client = Client(args.port)
+            wait_for_server(client)
+            time.sleep(args.settle)
+            samples = [{'keys': 0, **rss_mb(server.pid), 'cache_mb': cache_stats(client)['bytes'] / 1e6}]
+            for index in range(args.keys):
+                # Each min_score is a distinct cache key; all miners qualify, so every result is full size
+                params = {'max_miners': 150, 'hours': -1, 'min_score': index / 1e6, 'sort_by_score': 'true'}
+                status, _ = client.request('GET', '/retrieval/miner-responses', params)
+                if status != 200:
+                    raise RuntimeError(f"/retrieval/miner-responses returned {status}")
+                if (index + 1) % args.sample_every == 0:
+                    samples.append({'keys': index + 1, **rss_mb(server.pid), 'cache_mb': cache_stats(client)['bytes'] / 1e6})
+
+            params = {'max_miners': 150, 'hours': -1, 'min_score': (args.keys - 1) / 1e6, 'sort_by_score': 'true'}
+            latencies = []
+            for _ in range(args.hits):
+                start = time.perf_counter()
+                client.request('GET', '/retrieval/miner-responses', params)
+                latencies.append((time.perf_counter() - start) * 1000)
+            stats = cache_stats(client)
+        finally:
+            server.terminate()
+            server.wait()
+
+        result = {
+            'mode': mode,
+            'samples': samples,
+            'final_rss_mb': samples[-1]['rss_mb'],
+            'peak_rss_mb': samples[-1]['peak_rss_mb'],
+            'cache_entries': stats['cache_size'],
+            'cache_mb': stats['bytes'] / 1e6,
+            'evictions': stats['evictions'],
+            'compacted': stats['compacted'],
+            'prefixes': stats['prefixes'],
+            'hit_p50_ms': percentile(latencies, 0.5),
+            'hit_p95_ms': percentile(latencies, 0.95),
+        }
+        print(f"{mode}:")
+        for sample in samples:
+            print(f"  {sample['keys']:>4} keys  rss {sample['rss_mb']:7.1f}MB  cache estimate {sample['cache_mb']:7.1f}MB")
+        print(
+            f"  {result['cache_entries']} entries, {result['evictions']} evicted, {result['compacted']} compacted; "
+            f"peak rss {result['peak_rss_mb']:.1f}MB; hit p50 {result['hit_p50_ms']:.1f}ms p95 {result['hit_p95_ms']:.1f}ms"
+        )
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=400)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--keys', type=int, default=40, help='Distinct large results requested')
+    parser.add_argument('--sample-every', type=int, default=10, help='Report memory after this many keys')
+    parser.add_argument('--cap-mb', type=float, default=128, help='CACHE_MAX_MB in the capped mode')
+    parser.add_argument('--hits', type=int, default=20, help='Cache hits timed at the end')
+    parser.add_argument('--settle', type=float, default=3, help='Seconds after startup before measuring')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        results = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), 'results': results}, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
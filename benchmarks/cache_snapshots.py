@@ -0,0 +1,178 @@
+"""
+Benchmark database load right after a restart, with and without a cache snapshot.
+
+Usage:
+    python -m benchmarks.cache_snapshots
+    python -m benchmarks.cache_snapshots --warmup 30 --seconds 60 --rate 20 --output cache_snapshots.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) and seeds it as benchmarks/e2e.py does.
+For each mode, an API server serves --warmup seconds of a steady dashboard-like mix of requests
+(challenge listings and details, miner leaderboards over several windows, single-miner pages), is
+stopped the way a deploy stops it, and a new server is started in its place that serves the same mix
+for --seconds. With snapshots, both servers share a CACHE_SNAPSHOT_PATH, so the second starts from the
+first's cache; without, it starts cold. Reports the SQL statements the second server ran during startup
+and during the measured window, in total and per --bucket seconds (from /retrieval/slow-queries, which
+counts every statement), its cache hit rate and request latency.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.e2e import Client, percentile, wait_for_server
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import SeedConfig, miner_hotkey, seed
+
+
+def request_mix(config: SeedConfig, rng: random.Random):
+    """An endless sequence of (path, params), spread over a few hundred cache keys."""
+    while True:
+        kind = rng.random()
+        if kind < 0.4:
+            yield '/retrieval/codegen-challenge', {'challenge_id': f"bench-challenge-{rng.randrange(config.challenges):08d}"}
+        elif kind < 0.7:
+            yield '/retrieval/single-miner-responses', {'miner_hotkey': miner_hotkey(rng.randrange(config.miners))}
+        elif kind < 0.9:
+            yield '/retrieval/miner-responses', {'max_miners': rng.choice([5, 25, 150]), 'hours': rng.choice([24, 72, 168]), 'sort_by_score': 'true'}
+        else:
+            yield '/retrieval/codegen-challenges', {'max_challenges': rng.choice([10, 50, 100])}
+
+
+def statements(client: Client) -> int:
+    status, body = client.request('GET', '/retrieval/slow-queries', {'limit': 1})
+    if status != 200:
+        raise RuntimeError(f"/retrieval/slow-queries returned {status}")
+    return json.loads(body)['slow_query_stats']['statements']
+
+
+def serve(client: Client, mix, seconds: float, rate: float, bucket: float = 0) -> tuple:
+    """Send requests from mix at a steady rate for `seconds`. Returns their latencies in ms and, if
+    bucket is set, the statement count at the end of every bucket seconds."""
+    latencies, counts = [], []
+    start = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - start < seconds:
+        path, params = next(mix)
+        begin = time.perf_counter()
+        status, _ = client.request('GET', path, params)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}")
+        latencies.append((time.perf_counter() - begin) * 1000)
+        sent += 1
+        if bucket and time.perf_counter() - start >= bucket * (len(counts) + 1):
+            counts.append(statements(client))
+        delay = start + sent / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return latencies, counts
+
+
+def start_server(args, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+
+
+def run(args, db_env: dict) -> list:
+    config = SeedConfig(challenges=args.challenges, miners=args.miners, seed=args.seed)
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    counts = seed(db, config)
+    db.close_all_connections()
+    print(f"seeded {counts}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('without snapshot', 'with snapshot'):
+            snapshot_path = os.path.join(directory, 'cache.pkl') if mode == 'with snapshot' else ''
+            env = {
+                **os.environ, **db_env,
+                'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', ''),
+                'CACHE_SNAPSHOT_PATH': snapshot_path,
+                # Only the shutdown snapshot matters here
+                'CACHE_SNAPSHOT_INTERVAL': '0',
+            }
+            rng = random.Random(args.seed)
+            mix = request_mix(config, rng)
+
+            server = start_server(args, env)
+            try:
+                client = Client(args.port)
+                wait_for_server(client)
+                serve(client, mix, args.warmup, args.rate)
+            finally:
+                server.terminate()
+                server.wait()
+
+            server = start_server(args, env)
+            try:
+                client = Client(args.port)
+                wait_for_server(client)
+                # Let the startup loads (hot set, rolling stats, warm-up) finish, so they count as startup
+                time.sleep(args.settle)
+                at_start = statements(client)
+                # The statement count requests themselves run no SQL
+                latencies, counts = serve(client, mix, args.seconds, args.rate, args.bucket)
+                during = statements(client) - at_start
+                _, body = client.request('GET', '/retrieval/cache/stats')
+                cache_stats = json.loads(body)['cache_stats']
+            finally:
+                server.terminate()
+                server.wait()
+
+            result = {
+                'mode': mode,
+                'restored_entries': cache_stats['snapshots']['restored'],
+                'startup_statements': at_start,
+                'window_statements': during,
+                'requests': len(latencies),
+                'statements_per_request': during / len(latencies),
+                'statements_per_bucket': [count - previous for previous, count in zip([at_start] + counts, counts)],
+                'hit_rate': cache_stats['hit_rate'],
+                'p50_ms': percentile(latencies, 0.5),
+                'p95_ms': percentile(latencies, 0.95),
+                'max_ms': max(latencies),
+            }
+            print(
+                f"{mode:<17} restored {result['restored_entries']:>4}  startup {at_start:>5} statements  "
+                f"first {args.seconds:.0f}s {during:>6} statements ({result['statements_per_request']:.2f}/request)  "
+                f"hit rate {result['hit_rate']:.1%}  p50 {result['p50_ms']:.1f}ms  p95 {result['p95_ms']:.1f}ms"
+            )
+            print(f"{'':<17} statements per {args.bucket:.0f}s: {result['statements_per_bucket']}")
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=200)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--warmup', type=float, default=30, help='Seconds of traffic before the restart')
+    parser.add_argument('--seconds', type=float, default=60, help='Seconds of traffic measured after the restart')
+    parser.add_argument('--settle', type=float, default=3, help='Seconds after startup before measuring')
+    parser.add_argument('--bucket', type=float, default=10, help='Also report statements per this many seconds')
+    parser.add_argument('--rate', type=float, default=20, help='Requests per second')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        results = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), 'results': results}, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
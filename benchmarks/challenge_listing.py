@@ -0,0 +1,279 @@
+"""
+Benchmark challenge listings served from the precomputed challenge_score_stats rows against counting
+each challenge's responses per request.
+
+Usage:
+    python -m benchmarks.challenge_listing
+    python -m benchmarks.challenge_listing --challenges 100000 --responses-per-challenge 10 --repeat 5 --output challenge_listing.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) and fills it with --challenges codegen
+challenges spread over --days days, each answered by --responses-per-challenge miners except the newest
+--unanswered. It fills challenge_score_stats as migration 009 does (timed), then times each listing
+--repeat times: as it was before the stats table (every challenge with its responses counted, filtered,
+sorted and cut to max_challenges in Python for /retrieval/codegen-challenges) and through the uncached
+DatabaseManager methods. It also times uploads of --batch responses to one challenge, first stored then
+re-scored, and the score stats refresh they include. Exits non-zero if the two give different listings
+or if any challenge's stats differ from its responses.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import psycopg2
+
+from benchmarks.e2e import percentile
+from benchmarks.postgres import LocalPostgres
+from benchmarks.surrogate_keys import timed
+
+# Challenge listing queries as they were, aggregating responses on every request
+COUNTED_CHALLENGES = """
+    SELECT c.challenge_id, c.type, c.validator_hotkey, c.created_at, cc.problem_statement, cc.dynamic_checklist,
+        cc.repository_url, cc.commit_hash, cc.context_file_paths, COALESCE(counts.response_count, 0) AS response_count
+    FROM challenges c
+    INNER JOIN codegen_challenges cc ON c.challenge_id = cc.challenge_id
+    LEFT JOIN challenge_keys ck ON ck.challenge_id = c.challenge_id
+    LEFT JOIN (
+        SELECT challenge_key, COUNT(*) AS response_count
+        FROM responses
+        WHERE evaluated = TRUE AND score IS NOT NULL
+        GROUP BY challenge_key
+    ) counts ON counts.challenge_key = ck.id
+    WHERE c.type = 'codegen'
+"""
+COUNTED_CHALLENGE = """
+    SELECT c.challenge_id, c.type, c.validator_hotkey, c.created_at, cc.problem_statement, cc.dynamic_checklist,
+        cc.repository_url, cc.commit_hash, cc.context_file_paths, COUNT(r.challenge_key) AS response_count
+    FROM challenges c
+    INNER JOIN codegen_challenges cc ON c.challenge_id = cc.challenge_id
+    LEFT JOIN challenge_keys ck ON ck.challenge_id = c.challenge_id
+    LEFT JOIN responses r ON r.challenge_key = ck.id AND r.evaluated = TRUE AND r.score IS NOT NULL
+    WHERE c.challenge_id = %s AND c.type = 'codegen'
+    GROUP BY c.challenge_id, c.type, c.validator_hotkey, c.created_at, cc.problem_statement, cc.dynamic_checklist,
+        cc.repository_url, cc.commit_hash, cc.context_file_paths
+"""
+
+# Challenges whose stored stats differ from their responses
+STALE_STATS = """
+    WITH actual AS (
+        SELECT challenge_key, COUNT(*) AS response_count, AVG(score) AS mean_score,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY score) AS median_score
+        FROM responses
+        WHERE evaluated = TRUE AND score IS NOT NULL
+        GROUP BY challenge_key
+    )
+    SELECT COUNT(*)
+    FROM actual a
+    FULL JOIN challenge_score_stats s ON s.challenge_key = a.challenge_key
+    WHERE COALESCE(a.response_count, 0) <> COALESCE(s.response_count, 0)
+        OR abs(a.mean_score - s.mean_score) > 1e-9
+        OR abs(a.median_score - s.median_score) > 1e-9
+"""
+
+
+def load(cursor, args) -> None:
+    cursor.execute("SELECT setseed(%s)", (args.seed / 2**31,))
+    cursor.execute("""
+        INSERT INTO hotkeys (hotkey)
+        SELECT '5' || left(md5('miner-' || index) || md5('hotkey-' || index), 47)
+        FROM generate_series(0, %s) AS index
+        ORDER BY index
+    """, (args.miners - 1,))
+    cursor.execute("""
+        INSERT INTO challenges (challenge_id, type, validator_hotkey, created_at)
+        SELECT md5('challenge-' || index)::uuid::text, 'codegen', '5Validator',
+            NOW() - make_interval(secs => (%s - index) * %s * 86400.0 / %s)
+        FROM generate_series(0, %s) AS index
+    """, (args.challenges, args.days, args.challenges, args.challenges - 1))
+    # Problem statements of a realistic length, so listing every challenge costs what it does in production
+    cursor.execute("""
+        INSERT INTO codegen_challenges (challenge_id, problem_statement, dynamic_checklist, repository_url, context_file_paths)
+        SELECT challenge_id, repeat('Fix the failing test in the parser module. ', 40), '["tests pass"]',
+            'https://github.com/example/repo', '["src/parser.py"]'
+        FROM challenges
+    """)
+    cursor.execute("INSERT INTO challenge_keys (challenge_id) SELECT challenge_id FROM challenges ORDER BY created_at")
+    cursor.execute("""
+        INSERT INTO responses (challenge_key, miner_key, challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, evaluated, score, evaluated_at)
+        SELECT ck.id, h.id, c.challenge_id, h.hotkey, h.id, round((random() * 600)::numeric, 3), c.created_at,
+            c.created_at + INTERVAL '10 minutes', TRUE, CASE WHEN random() < 0.05 THEN NULL ELSE random() END,
+            c.created_at + INTERVAL '20 minutes'
+        FROM challenges c
+        JOIN challenge_keys ck ON ck.challenge_id = c.challenge_id
+        CROSS JOIN generate_series(0, %s) AS slot
+        JOIN hotkeys h ON h.id = 1 + (ck.id * 7919 + slot) %% %s
+        WHERE ck.id <= %s
+    """, (args.responses_per_challenge - 1, args.miners, args.challenges - args.unanswered))
+    for table in ('challenges', 'codegen_challenges', 'challenge_keys', 'hotkeys', 'responses'):
+        cursor.execute(f"VACUUM ANALYZE {table}")
+
+
+def counted_row(row) -> dict:
+    """A challenge row as the API returned it before score stats."""
+    return {
+        'challenge_id': row[0],
+        'type': row[1],
+        'validator_hotkey': row[2],
+        'created_at': row[3],
+        'problem_statement': row[4],
+        'dynamic_checklist': json.loads(row[5]) if row[5] else None,
+        'repository_url': row[6],
+        'commit_hash': row[7],
+        'context_file_paths': json.loads(row[8]) if row[8] else None,
+        'response_count': row[9]
+    }
+
+
+def listing(rows: list) -> list:
+    return [(row['challenge_id'], row['response_count']) for row in rows]
+
+
+def run(args, db_env: dict) -> dict:
+    os.environ.update(db_env)
+    from src.db.models import CodegenChallenge, CodegenResponse
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    conn = psycopg2.connect(
+        host=db_env['AWS_RDS_PLATFORM_ENDPOINT'], port=db_env['AWS_RDS_PORT'],
+        user=db_env['AWS_MASTER_USERNAME'], dbname=db_env['AWS_RDS_PLATFORM_DB_NAME']
+    )
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    start = time.perf_counter()
+    load(cursor, args)
+    cursor.execute("SELECT COUNT(*) FROM responses")
+    report = {'responses': cursor.fetchone()[0]}
+    print(f"loaded {args.challenges} challenges and {report['responses']} responses in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    cursor.execute("SELECT refresh_challenge_score_stats(array_agg(DISTINCT challenge_key)) FROM responses")
+    backfilled = cursor.fetchone()[0]
+    report['backfill_s'] = time.perf_counter() - start
+    cursor.execute("ANALYZE challenge_score_stats")
+    print(f"backfilled challenge_score_stats for {backfilled} challenges in {report['backfill_s']:.1f}s")
+
+    def counted(sql, params=None):
+        def query():
+            cursor.execute(sql, params)
+            return [counted_row(row) for row in cursor.fetchall()]
+        return query
+
+    def counted_latest(max_challenges):
+        # What /retrieval/codegen-challenges did with every challenge
+        def query():
+            challenges = [challenge for challenge in counted(COUNTED_CHALLENGES)() if challenge['response_count'] > 0]
+            challenges.sort(key=lambda challenge: challenge['created_at'], reverse=True)
+            return challenges[:max_challenges]
+        return query
+
+    cursor.execute("SELECT challenge_id FROM challenges ORDER BY created_at DESC LIMIT 1 OFFSET %s", (args.unanswered + 10,))
+    challenge_id = cursor.fetchone()[0]
+    uncached_latest = DatabaseManager.get_latest_codegen_challenges.__wrapped__
+    uncached_challenges = DatabaseManager.get_codegen_challenges.__wrapped__
+    scenarios = [
+        ('/codegen-challenges (latest 5)', counted_latest(5), lambda: uncached_latest(db, max_challenges=5)),
+        ('/codegen-challenges?max_challenges=150', counted_latest(150), lambda: uncached_latest(db, max_challenges=150)),
+        ('one challenge', counted(COUNTED_CHALLENGE, (challenge_id,)), lambda: uncached_challenges(db, challenge_id=challenge_id)),
+        ('every challenge', counted(COUNTED_CHALLENGES), lambda: uncached_challenges(db)),
+    ]
+
+    report['listings'] = {}
+    mismatches = 0
+    print(f"\n{'listing':<42} {'counted p50':>12} {'precomputed p50':>16} {'speedup':>8}")
+    for name, counted_fn, stats_fn in scenarios:
+        counted_result, counted_timing = timed(counted_fn, args.repeat)
+        stats_result, stats_timing = timed(stats_fn, args.repeat)
+        # Only the latest listings have an order
+        same = listing(counted_result) == listing(stats_result) if 'latest' in name or 'max_challenges' in name \
+            else sorted(listing(counted_result)) == sorted(listing(stats_result))
+        mismatches += not same
+        report['listings'][name] = {'counted': counted_timing, 'precomputed': stats_timing, 'rows': len(stats_result), 'same_results': same}
+        print(
+            f"{name:<42} {counted_timing['p50_ms']:>10.1f}ms {stats_timing['p50_ms']:>14.1f}ms "
+            f"{counted_timing['p50_ms'] / stats_timing['p50_ms']:>7.1f}x{'' if same else '  RESULTS DIFFER'}"
+        )
+
+    # Uploads pay for the refresh of the challenges they touch
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    store_ms, rescore_ms, refresh_ms = [], [], []
+    for index in range(args.repeat):
+        upload_challenge = f"listing-bench-{index}"
+        db.store_codegen_challenges([CodegenChallenge(
+            challenge_id=upload_challenge, type='codegen', validator_hotkey='5Validator', created_at=now,
+            problem_statement='Fix the bug', dynamic_checklist='[]', repository_url='https://github.com/example/repo',
+            commit_hash=None, context_file_paths='[]'
+        )], warm_caches=False)
+        responses = [
+            CodegenResponse(
+                challenge_id=upload_challenge, miner_hotkey=f"5Miner{miner:042d}", node_id=miner, processing_time=30.0,
+                received_at=now, completed_at=now, evaluated=True, score=(miner * 0.37 + index) % 1, evaluated_at=now,
+                response_patch=f"+patch {index} {miner}"
+            )
+            for miner in range(args.batch)
+        ]
+        start = time.perf_counter()
+        db.store_codegen_responses(responses, warm_caches=False)
+        store_ms.append((time.perf_counter() - start) * 1000)
+        for response in responses:
+            response.score = 1 - response.score
+        start = time.perf_counter()
+        db.store_codegen_responses(responses, warm_caches=False)
+        rescore_ms.append((time.perf_counter() - start) * 1000)
+        challenge_key = db._lookup_keys(cursor, db._challenge_keys, [upload_challenge])[upload_challenge]
+        refresh_conn = db.get_connection()
+        try:
+            start = time.perf_counter()
+            db._refresh_challenge_score_stats(refresh_conn, [challenge_key])
+            refresh_ms.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.return_connection(refresh_conn)
+    report['uploads'] = {
+        'store_p50_ms': percentile(store_ms, 0.5),
+        'rescore_p50_ms': percentile(rescore_ms, 0.5),
+        'refresh_p50_ms': percentile(refresh_ms, 0.5),
+    }
+    print(
+        f"\nupload of {args.batch} responses to one challenge: store p50 {report['uploads']['store_p50_ms']:.1f}ms, "
+        f"re-score p50 {report['uploads']['rescore_p50_ms']:.1f}ms, of which the stats refresh p50 {report['uploads']['refresh_p50_ms']:.1f}ms"
+    )
+
+    cursor.execute(STALE_STATS)
+    report['stale_stats'] = cursor.fetchone()[0]
+    print(f"challenges whose stats differ from their responses: {report['stale_stats']}")
+    report['mismatches'] = mismatches
+
+    conn.close()
+    db.close_all_connections()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=100_000)
+    parser.add_argument('--responses-per-challenge', type=int, default=10)
+    parser.add_argument('--miners', type=int, default=250)
+    parser.add_argument('--unanswered', type=int, default=50, help='Newest challenges without responses')
+    parser.add_argument('--days', type=int, default=365, help='Challenges are spread over this many days')
+    parser.add_argument('--batch', type=int, default=250, help='Responses per timed upload')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each listing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        report = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), **report}, output, indent=2, default=str)
+        print(f"wrote {args.output}")
+    if report['mismatches'] or report['stale_stats']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
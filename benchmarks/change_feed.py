@@ -0,0 +1,191 @@
+"""
+Compare keeping a mirror in sync by re-downloading the capped listings with incremental /retrieval/changes syncs.
+
+Usage:
+    python -m benchmarks.change_feed
+    python -m benchmarks.change_feed --challenges 150 --new-responses 200 --reevaluated 100 --output change_feed.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py), seeds it as benchmarks/e2e.py does and
+runs the API under uvicorn. A mirror first syncs everything from /retrieval/changes. Then, for each of
+--rounds rounds, --new-responses responses and new scores for --reevaluated existing ones are uploaded,
+and the mirror catches up twice: by re-downloading /retrieval/codegen-challenges and every listed
+/retrieval/codegen-challenge, as it has to without a change feed, and by paging /retrieval/changes from
+its cursor. Reports the bytes downloaded, requests sent and SQL statements run (from
+/retrieval/slow-queries, which counts every statement) for each, and checks that the incremental sync
+saw every uploaded response.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.e2e import Client, wait_for_server
+from benchmarks.patch_dedup import make_patch
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import SeedConfig, seed
+
+
+def statements(client: Client) -> int:
+    status, body = client.request('GET', '/retrieval/slow-queries', {'limit': 1})
+    if status != 200:
+        raise RuntimeError(f"/retrieval/slow-queries returned {status}")
+    return json.loads(body)['slow_query_stats']['statements']
+
+
+def measured(client: Client, sync) -> dict:
+    """Run sync(get), where get sends a GET and returns the parsed body, and count what it cost."""
+    cost = {'requests': 0, 'bytes': 0}
+
+    def get(path, params):
+        status, body = client.request('GET', path, params)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}: {body[:200]}")
+        cost['requests'] += 1
+        cost['bytes'] += len(body)
+        return json.loads(body)
+
+    before = statements(client)
+    start = time.perf_counter()
+    result = sync(get)
+    cost['seconds'] = time.perf_counter() - start
+    cost['statements'] = statements(client) - before
+    return cost, result
+
+
+def full_download(get) -> set:
+    listing = get('/retrieval/codegen-challenges', {'max_challenges': 150})
+    keys = set()
+    for challenge in listing['challenges']:
+        detail = get('/retrieval/codegen-challenge', {'challenge_id': challenge['challenge_id'], 'dedupe_patches': 'true'})
+        keys.update((response['challenge_id'], response['miner_hotkey'], response['score']) for response in detail['responses'])
+    return keys
+
+
+def incremental(cursor, limit: int):
+    def sync(get) -> tuple:
+        nonlocal cursor
+        keys = set()
+        while True:
+            params = {'limit': limit, 'types': 'challenge,response'}
+            if cursor:
+                params['cursor'] = cursor
+            page = get('/retrieval/changes', params)
+            keys.update(
+                (change['data']['challenge_id'], change['data']['miner_hotkey'], change['data']['score'])
+                for change in page['changes'] if change['kind'] == 'response'
+            )
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                return cursor, keys
+    return sync
+
+
+def update(client: Client, db, rng: random.Random, challenge_ids: list, round_number: int, args) -> set:
+    """Upload new responses and re-evaluations of existing ones through the ingestion route, so the
+    server invalidates its caches. Returns their (challenge_id, miner_hotkey, score)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT challenge_id, miner_hotkey FROM responses WHERE miner_hotkey NOT LIKE 'feed-miner-%%' ORDER BY random() LIMIT %s",
+                (args.reevaluated,)
+            )
+            existing = cursor.fetchall()
+    finally:
+        db.return_connection(conn)
+    keys = [(rng.choice(challenge_ids), f"feed-miner-{round_number}-{index:05d}") for index in range(args.new_responses)] + existing
+    responses = [
+        {
+            'challenge_id': challenge_id,
+            'miner_hotkey': miner_hotkey,
+            'node_id': 1,
+            'processing_time': 1.0,
+            'received_at': now,
+            'completed_at': now,
+            'evaluated': True,
+            'score': round(rng.random(), 6),
+            'evaluated_at': now,
+            'response_patch': make_patch(rng, 3000),
+        }
+        for challenge_id, miner_hotkey in keys
+    ]
+    status, body = client.request('POST', '/ingestion/codegen-responses', body=responses)
+    if status != 200:
+        raise RuntimeError(f"/ingestion/codegen-responses returned {status}: {body[:200]}")
+    return {(response['challenge_id'], response['miner_hotkey'], response['score']) for response in responses}
+
+
+def run(args, db_env: dict) -> list:
+    config = SeedConfig(challenges=args.challenges, miners=args.miners, seed=args.seed)
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    print(f"seeded {seed(db, config)}")
+    challenge_ids = [f"bench-challenge-{index:08d}" for index in range(config.challenges)]
+    rng = random.Random(args.seed)
+
+    env = {**os.environ, **db_env, 'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', '')}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    results = []
+    try:
+        client = Client(args.port)
+        wait_for_server(client)
+        cost, (cursor, _) = measured(client, incremental(None, args.limit))
+        print(f"initial sync from /retrieval/changes: {cost['requests']} requests, {cost['bytes'] / 1e6:.1f}MB, {cost['statements']} statements, {cost['seconds']:.2f}s")
+
+        for round_number in range(args.rounds):
+            expected = update(client, db, rng, challenge_ids, round_number, args)
+            full, _ = measured(client, full_download)
+            changes, (cursor, seen) = measured(client, incremental(cursor, args.limit))
+            missing = expected - seen
+            result = {'round': round_number, 'changed_responses': len(expected), 'full': full, 'changes': changes, 'missing': len(missing)}
+            for mode in ('full', 'changes'):
+                print(
+                    f"round {round_number} {mode:<8} {result[mode]['requests']:>5} requests  {result[mode]['bytes'] / 1e6:8.2f}MB  "
+                    f"{result[mode]['statements']:>6} statements  {result[mode]['seconds'] * 1000:8.1f}ms"
+                )
+            print(f"round {round_number} incremental sync saw {len(expected) - len(missing)}/{len(expected)} changed responses")
+            results.append(result)
+    finally:
+        server.terminate()
+        server.wait()
+        db.close_all_connections()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=150)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--new-responses', type=int, default=200, help='New responses uploaded per round')
+    parser.add_argument('--reevaluated', type=int, default=100, help='Existing responses re-scored per round')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=500, help='Page size for /retrieval/changes')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        results = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), 'results': results}, output, indent=2)
+        print(f"wrote {args.output}")
+    if any(result['missing'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
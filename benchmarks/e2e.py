@@ -0,0 +1,303 @@
+"""
+End-to-end benchmark of every /ingestion/* and /retrieval/* route against a seeded local Postgres.
+
+Usage:
+    python -m benchmarks.e2e --output before.json
+    python -m benchmarks.e2e --challenges 1000 --miners 150 --requests 100 --concurrency 8 --output after.json
+    python -m benchmarks.e2e --use-env --no-seed        # reuse the database in the AWS_RDS_* env vars
+    python -m benchmarks.e2e --compare before.json after.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py), seeds it (see benchmarks/seed.py),
+runs the API under uvicorn in a subprocess and measures latency percentiles, throughput and server
+memory (RSS) per route. Retrieval routes run twice: "cold" clears the cache before every request,
+"warm" primes it once first. Results are written as JSON for comparing runs.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.patch_dedup import make_patch
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import SeedConfig, miner_hotkey, seed, validator_hotkey
+
+
+class Client:
+    """Keep-alive HTTP client, one connection per thread."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, params: dict = None, body=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=300)
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            return response.status, data
+        except (http.client.HTTPException, ConnectionError):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def rss_mb(pid: int) -> dict:
+    """Current and peak resident memory of a process, from /proc."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':', 1)
+                    values[key] = int(value.split()[0]) / 1024
+    except FileNotFoundError:
+        pass
+    return {'rss_mb': values.get('VmRSS'), 'peak_rss_mb': values.get('VmHWM')}
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def ingestion_scenarios(config: SeedConfig, rng: random.Random):
+    """Each factory returns a fresh request body, so ingestion never hits ON CONFLICT short cuts."""
+    counter = iter(range(10**9))
+
+    def challenge(kind):
+        index = next(counter)
+        body = {
+            'challenge_id': f"e2e-{kind}-{os.getpid()}-{index}",
+            'type': kind,
+            'validator_hotkey': validator_hotkey(index % config.validators),
+            'created_at': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+            'problem_statement': 'Benchmark problem statement ' * 20,
+            'dynamic_checklist': '[]',
+            'repository_url': 'https://github.com/example/bench',
+            'commit_hash': None,
+            'context_file_paths': '[]',
+        }
+        return body
+
+    def responses(kind, count=20):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        challenge_id = f"bench-challenge-{rng.randrange(config.challenges):08d}"
+        return [
+            {
+                'challenge_id': challenge_id,
+                'miner_hotkey': f"e2e-miner-{next(counter)}",
+                'node_id': 1,
+                'processing_time': 12.5,
+                'received_at': (now - timedelta(seconds=60)).isoformat(),
+                'completed_at': now.isoformat(),
+                'evaluated': True,
+                'score': rng.random(),
+                'evaluated_at': now.isoformat(),
+                'response_patch': make_patch(rng, config.patch_bytes_median),
+            }
+            for _ in range(count)
+        ]
+
+    def scores(count=50):
+        return [
+            {'type': 'weight', 'validator_hotkey': validator_hotkey(rng.randrange(config.validators)), 'miner_hotkey': miner_hotkey(rng.randrange(config.miners)), 'score': rng.random()}
+            for _ in range(count)
+        ]
+
+    return [
+        ('POST /ingestion/codegen-challenges', 'POST', '/ingestion/codegen-challenges', None, lambda: [challenge('codegen') for _ in range(5)]),
+        ('POST /ingestion/regression-challenges', 'POST', '/ingestion/regression-challenges', None, lambda: [challenge('regression') for _ in range(5)]),
+        ('POST /ingestion/codegen-responses', 'POST', '/ingestion/codegen-responses', None, lambda: responses('codegen')),
+        ('POST /ingestion/regression-responses', 'POST', '/ingestion/regression-responses', None, lambda: responses('regression')),
+        ('POST /ingestion/scores-list', 'POST', '/ingestion/scores-list', None, scores),
+    ]
+
+
+def retrieval_scenarios(config: SeedConfig, rng: random.Random):
+    return [
+        ('GET /retrieval/codegen-challenge', 'GET', '/retrieval/codegen-challenge', lambda: {'challenge_id': f"bench-challenge-{rng.randrange(min(config.challenges, 20)):08d}"}, None),
+        ('GET /retrieval/codegen-challenges', 'GET', '/retrieval/codegen-challenges', lambda: {'max_challenges': 50}, None),
+        ('GET /retrieval/miner-responses', 'GET', '/retrieval/miner-responses', lambda: {'max_miners': 5}, None),
+        ('GET /retrieval/miner-responses (150 miners, 7d)', 'GET', '/retrieval/miner-responses', lambda: {'max_miners': 150, 'hours': 168, 'sort_by_score': 'true'}, None),
+        ('GET /retrieval/single-miner-responses', 'GET', '/retrieval/single-miner-responses', lambda: {'miner_hotkey': miner_hotkey(rng.randrange(min(config.miners, 10)))}, None),
+        ('GET /retrieval/cache/stats', 'GET', '/retrieval/cache/stats', lambda: {}, None),
+    ]
+
+
+def run_scenario(client: Client, server_pid: int, name: str, method: str, path: str, params, body, cache: str, requests: int, concurrency: int) -> dict:
+    if cache == 'warm':
+        client.request(method, path, params() if params else None, body() if body else None)
+
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        if cache == 'cold':
+            client.request('POST', '/retrieval/cache/clear')
+        request_params = params() if params else None
+        request_body = body() if body else None
+        start = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, request_params, request_body)
+            failed = status >= 500
+        except Exception:
+            failed = True
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    memory_before = rss_mb(server_pid)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    memory_after = rss_mb(server_pid)
+
+    result = {
+        'scenario': name,
+        'cache': cache,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.50),
+        'p90_ms': percentile(latencies, 0.90),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': statistics.fmean(latencies),
+        'throughput_rps': requests / wall,
+        'rss_mb': memory_after['rss_mb'],
+        'rss_delta_mb': (memory_after['rss_mb'] or 0) - (memory_before['rss_mb'] or 0),
+        'peak_rss_mb': memory_after['peak_rss_mb'],
+    }
+    print(f"{name:<52} {cache:<5} p50={result['p50_ms']:8.1f}ms p99={result['p99_ms']:8.1f}ms "
+          f"{result['throughput_rps']:7.1f} req/s  rss={result['rss_mb'] or 0:6.1f}MB errors={errors}")
+    return result
+
+
+def wait_for_server(client: Client, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if client.request('GET', '/docs')[0] == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.1)
+    raise RuntimeError('API server did not start')
+
+
+def run(args, db_env: dict) -> dict:
+    config = SeedConfig(
+        challenges=args.challenges, miners=args.miners, validators=args.validators,
+        responses_per_challenge=args.responses_per_challenge, patch_bytes_median=args.patch_bytes, seed=args.seed
+    )
+    os.environ.update(db_env)
+
+    if not args.no_seed:
+        from src.db.operations import DatabaseManager
+        db = DatabaseManager()
+        start = time.perf_counter()
+        counts = seed(db, config)
+        db.close_all_connections()
+        print(f"seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+    env = {**os.environ, **db_env, 'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', '')}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    results = []
+    try:
+        client = Client(args.port)
+        wait_for_server(client)
+        rng = random.Random(args.seed)
+        for name, method, path, params, body in retrieval_scenarios(config, rng):
+            for cache in ('cold', 'warm'):
+                results.append(run_scenario(client, server.pid, name, method, path, params, body, cache, args.requests, args.concurrency))
+        for name, method, path, params, body in ingestion_scenarios(config, rng):
+            results.append(run_scenario(client, server.pid, name, method, path, params, body, 'n/a', args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {**vars(config), 'requests': args.requests, 'concurrency': args.concurrency},
+        'results': results,
+    }
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    baseline = {(result['scenario'], result['cache']): result for result in before['results']}
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for result in after['results']:
+        previous = baseline.get((result['scenario'], result['cache']))
+        if previous is None:
+            continue
+        def change(key):
+            return (result[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+        print(f"{result['scenario']:<52} {result['cache']:<5} p50 {change('p50_ms'):+7.1f}%  p99 {change('p99_ms'):+7.1f}%  "
+              f"throughput {change('throughput_rps'):+7.1f}%  rss {result['rss_mb'] - previous['rss_mb']:+7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=200)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--validators', type=int, default=10)
+    parser.add_argument('--responses-per-challenge', type=int, default=40)
+    parser.add_argument('--patch-bytes', type=int, default=3000, help='Median patch size in bytes')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--use-env', action='store_true', help='Use the database in the AWS_RDS_* env vars instead of a temporary cluster')
+    parser.add_argument('--no-seed', action='store_true', help='Skip seeding (with --use-env, reuse an already seeded database)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two result files and exit')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.use_env:
+        from src.utils.config import load_env
+        load_env()
+        keys = ['AWS_RDS_PLATFORM_ENDPOINT', 'AWS_RDS_PORT', 'AWS_MASTER_USERNAME', 'AWS_MASTER_PASSWORD', 'AWS_RDS_PLATFORM_DB_NAME', 'AWS_RDS_SSLMODE']
+        report = run(args, {key: os.environ[key] for key in keys if key in os.environ})
+    else:
+        with LocalPostgres() as db_env:
+            report = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Benchmark the /retrieval/events live feed with thousands of idle subscribers.
+
+Usage:
+    python -m benchmarks.events --subscribers 5000
+    python -m benchmarks.events --subscribers 2000 --batches 20 --batch-size 50 --output events.json
+    python -m benchmarks.events --use-env                  # use the database in the AWS_RDS_* env vars
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) and the API under uvicorn, times
+codegen-response ingestion with no subscribers, then opens --subscribers SSE connections and reports
+server memory per subscriber, ingestion latency with every subscriber attached, and fan-out latency:
+the time from posting a batch until each subscriber has received all of that batch's events.
+Subscribers run on one asyncio loop in this process, so on small machines the fan-out figures include
+the client's own scheduling delay.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.e2e import Client, percentile, rss_mb, wait_for_server
+from benchmarks.postgres import LocalPostgres
+
+CHALLENGE_ID = 'events-bench-challenge'
+
+
+def challenge_body() -> list:
+    return [{
+        'challenge_id': CHALLENGE_ID,
+        'type': 'codegen',
+        'validator_hotkey': 'events-bench-validator',
+        'created_at': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        'problem_statement': 'Events benchmark',
+        'dynamic_checklist': '[]',
+        'repository_url': 'https://github.com/example/bench',
+        'commit_hash': None,
+        'context_file_paths': '[]',
+    }]
+
+
+def responses_body(batch: int, size: int) -> list:
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    return [
+        {
+            'challenge_id': CHALLENGE_ID,
+            'miner_hotkey': f"events-miner-{batch}-{index}",
+            'completed_at': now,
+            'evaluated': True,
+            'score': 0.5,
+            'evaluated_at': now,
+            'response_patch': f"+events benchmark {batch} {index}\n",
+        }
+        for index in range(size)
+    ]
+
+
+class Subscriber:
+    """One idle SSE connection that counts the events it receives."""
+
+    def __init__(self):
+        self.events = 0
+        self.target = None
+        self.reached = None
+        self.reached_event = asyncio.Event()
+
+    async def connect(self, port: int) -> None:
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+        self.writer.write(
+            f"GET /retrieval/events?types=response_evaluated HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+        headers = await self.reader.readuntil(b"\r\n\r\n")
+        if not headers.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(headers.split(b"\r\n", 1)[0].decode())
+
+    def expect(self, target: int) -> None:
+        self.target = target
+        self.reached = None
+        self.reached_event.clear()
+
+    async def read(self) -> None:
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                return
+            self.events += data.count(b"\nevent: response_evaluated\n")
+            if self.target is not None and self.events >= self.target and self.reached is None:
+                self.reached = time.perf_counter()
+                self.reached_event.set()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def post(client: Client, path: str, body) -> float:
+    start = time.perf_counter()
+    status, data = await asyncio.get_running_loop().run_in_executor(None, client.request, 'POST', path, None, body)
+    if status != 200:
+        raise RuntimeError(f"{path} returned {status}: {data[:200]}")
+    return (time.perf_counter() - start) * 1000
+
+
+async def measure(args, client: Client, server_pid: int) -> dict:
+    report = {}
+    await post(client, '/ingestion/codegen-challenges', challenge_body())
+
+    baseline = [await post(client, '/ingestion/codegen-responses', responses_body(-batch - 1, args.batch_size)) for batch in range(args.batches)]
+    report['ingest_no_subscribers_p50_ms'] = percentile(baseline, 0.5)
+
+    rss_before = rss_mb(server_pid)['rss_mb']
+    subscribers = [Subscriber() for _ in range(args.subscribers)]
+    start = time.perf_counter()
+    for offset in range(0, len(subscribers), 200):
+        await asyncio.gather(*(subscriber.connect(args.port) for subscriber in subscribers[offset:offset + 200]))
+    report['connect_s'] = time.perf_counter() - start
+    readers = [asyncio.create_task(subscriber.read()) for subscriber in subscribers]
+    await asyncio.sleep(1)
+    rss_after = rss_mb(server_pid)['rss_mb']
+    report['server_rss_before_mb'] = rss_before
+    report['server_rss_with_subscribers_mb'] = rss_after
+    report['server_kb_per_subscriber'] = (rss_after - rss_before) * 1024 / args.subscribers
+
+    ingest, fan_out_p50, fan_out_max = [], [], []
+    for batch in range(args.batches):
+        for subscriber in subscribers:
+            subscriber.expect(subscriber.events + args.batch_size)
+        sent = time.perf_counter()
+        ingest.append(await post(client, '/ingestion/codegen-responses', responses_body(batch, args.batch_size)))
+        await asyncio.wait_for(asyncio.gather(*(subscriber.reached_event.wait() for subscriber in subscribers)), timeout=60)
+        delays = [(subscriber.reached - sent) * 1000 for subscriber in subscribers]
+        fan_out_p50.append(percentile(delays, 0.5))
+        fan_out_max.append(max(delays))
+        print(f"  batch {batch + 1}/{args.batches}: ingest {ingest[-1]:.1f}ms, all subscribers after {fan_out_max[-1]:.1f}ms", end='\r')
+    print()
+    report.update({
+        'ingest_with_subscribers_p50_ms': percentile(ingest, 0.5),
+        'fan_out_p50_ms': percentile(fan_out_p50, 0.5),
+        'fan_out_last_subscriber_p50_ms': percentile(fan_out_max, 0.5),
+        'fan_out_last_subscriber_max_ms': max(fan_out_max),
+    })
+
+    status, data = await asyncio.get_running_loop().run_in_executor(None, client.request, 'GET', '/retrieval/events/stats')
+    report['hub'] = json.loads(data)['event_stats']
+
+    for subscriber in subscribers:
+        subscriber.close()
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+    return report
+
+
+def raise_file_limit(needed: int) -> None:
+    """Each subscriber holds a socket in this process and in the server (which inherits the limit)."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard) if hard != resource.RLIM_INFINITY else needed, hard))
+
+
+def run(args, db_env: dict) -> dict:
+    raise_file_limit(args.subscribers + 1024)
+    env = {**os.environ, **db_env, 'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', '')}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning', '--backlog', '4096', '--timeout-graceful-shutdown', '5',
+         '--timeout-keep-alive', '600'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    try:
+        client = Client(args.port)
+        wait_for_server(client)
+        return {'config': vars(args), 'results': asyncio.run(measure(args, client, server.pid))}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--batches', type=int, default=20, help='Ingestion batches to time')
+    parser.add_argument('--batch-size', type=int, default=20, help='Evaluated responses per batch (one event each)')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--use-env', action='store_true', help='Use the database in the AWS_RDS_* env vars instead of a temporary cluster')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    if args.use_env:
+        from src.utils.config import load_env
+        load_env()
+        keys = ['AWS_RDS_PLATFORM_ENDPOINT', 'AWS_RDS_PORT', 'AWS_MASTER_USERNAME', 'AWS_MASTER_PASSWORD', 'AWS_RDS_PLATFORM_DB_NAME', 'AWS_RDS_SSLMODE']
+        report = run(args, {key: os.environ[key] for key in keys if key in os.environ})
+    else:
+        with LocalPostgres() as db_env:
+            report = run(args, db_env)
+
+    print(json.dumps(report['results'], indent=2))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark the in-memory response hot set against the miner responses CTE.
+
+Usage:
+    python -m benchmarks.hot_set
+    python -m benchmarks.hot_set --responses 2000000 --days 7 --miners 500 --output hot_set.json
+    python -m benchmarks.hot_set --no-db        # in-memory part only
+
+Generates --responses graded codegen responses spread uniformly over the last --days days across --miners
+miners, loads the last 24 hours of them into a ResponseHotSet and reports its memory footprint (its own
+accounting and the tracemalloc delta of loading it) and query latency for the dashboard queries. Unless
+--no-db, it also COPYs every response into a temporary Postgres cluster (see benchmarks/postgres.py) and
+times the same queries through the uncached DatabaseManager.get_miner_responses CTE.
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from benchmarks.e2e import percentile
+from benchmarks.postgres import LocalPostgres
+from benchmarks.search import copy_rows
+from benchmarks.seed import miner_hotkey
+from src.utils.hot_set import ResponseHotSet
+
+QUERIES = [
+    ('default dashboard (24h, 5 miners)', dict(hours=24, max_miners=5)),
+    ('top 150 by score (24h)', dict(hours=24, max_miners=150, sort_by_score=True)),
+    ('min_score 0.6, min 20 responses, top 50 (24h)', dict(hours=24, min_score=0.6, min_response_count=20, max_miners=50, sort_by_score=True)),
+    ('last hour, top 150 by score', dict(hours=1, max_miners=150, sort_by_score=True)),
+    ('single miner (24h)', dict(hours=24, max_miners=1, miner_hotkeys=[miner_hotkey(7)])),
+]
+
+PATCHES = 1000
+
+
+def generate(args):
+    """Columns of the synthetic responses, newest last."""
+    rng = np.random.default_rng(args.seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    age_seconds = np.sort(rng.uniform(0, args.days * 86400, args.responses))[::-1]
+    return {
+        'now': now,
+        'age_seconds': age_seconds,
+        'score': rng.random(args.responses),
+        'processing_time': rng.uniform(5, 600, args.responses).round(3),
+        'patch': rng.integers(0, PATCHES, args.responses),
+    }
+
+
+def rows(data, args, max_age_hours=None):
+    """Response rows; each challenge gets responses from --responses-per-challenge distinct miners."""
+    per_challenge = args.responses_per_challenge
+    for index in range(args.responses):
+        miner = (index // per_challenge * 7919 + index % per_challenge) % args.miners
+        age = float(data['age_seconds'][index])
+        if max_age_hours is not None and age > max_age_hours * 3600:
+            continue
+        completed_at = data['now'] - timedelta(seconds=age)
+        processing_time = float(data['processing_time'][index])
+        yield (
+            f"hot-challenge-{index // per_challenge:08d}",
+            miner_hotkey(miner),
+            miner,
+            processing_time,
+            completed_at - timedelta(seconds=processing_time),
+            completed_at,
+            float(data['score'][index]),
+            completed_at + timedelta(seconds=30),
+            f"{int(data['patch'][index]):064x}",
+            None,
+        )
+
+
+def time_calls(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': percentile(samples, 0.5), 'p99_ms': percentile(samples, 0.99)}
+
+
+def run_memory(args, data) -> dict:
+    recent = list(rows(data, args, max_age_hours=24))
+    since = data['now'] - timedelta(hours=24)
+    hot_set = ResponseHotSet(retention_hours=24)
+    start = time.perf_counter()
+    hot_set.load(recent, since)
+    load_s = time.perf_counter() - start
+
+    # Load again under tracemalloc (slower) to measure what the hot set allocates
+    hot_set = ResponseHotSet(retention_hours=24)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    hot_set.load(recent, since)
+    traced = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+
+    stats = hot_set.get_stats()
+    report = {
+        'rows': stats['rows'],
+        'miners': stats['miners'],
+        'load_s': load_s,
+        'memory_bytes': stats['memory_bytes'],
+        'accounted_mb': stats['total_memory_mb'],
+        'tracemalloc_mb': traced / 2**20,
+        'bytes_per_row': traced / max(stats['rows'], 1),
+        'queries': {},
+    }
+    print(f"hot set: {stats['rows']} rows, {report['tracemalloc_mb']:.1f}MB ({report['bytes_per_row']:.0f} bytes/row), loaded in {load_s:.1f}s")
+    for name, params in QUERIES:
+        timing = time_calls(lambda: hot_set.query(**params), args.repeat)
+        report['queries'][name] = timing
+        print(f"  {name:<50} p50={timing['p50_ms']:8.3f}ms p99={timing['p99_ms']:8.3f}ms")
+    return report
+
+
+def run_db(args, data, db_env) -> dict:
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    conn = db.get_connection()
+    conn.autocommit = True
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO challenges (challenge_id, type, validator_hotkey, created_at)
+                SELECT 'hot-challenge-' || lpad(index::text, 8, '0'), 'codegen', 'validator', NOW()
+                FROM generate_series(0, %s) AS index
+            """, (args.responses // args.responses_per_challenge,))
+            copy_rows(cursor, 'response_patches', 'patch_hash, patch, size', ((f"{index:064x}", f"+patch {index}\n", 10) for index in range(PATCHES)))
+            batch = []
+            for row in rows(data, args):
+                batch.append(row)
+                if len(batch) == 50_000:
+                    load_batch(cursor, batch)
+                    batch = []
+            load_batch(cursor, batch)
+            cursor.execute("ANALYZE")
+    finally:
+        db.return_connection(conn)
+    report = {'load_s': time.perf_counter() - start, 'queries': {}}
+    print(f"database: {args.responses} responses over {args.days} days, loaded in {report['load_s']:.1f}s")
+
+    uncached_get_miner_responses = DatabaseManager.get_miner_responses.__wrapped__
+    for name, params in QUERIES:
+        timing = time_calls(lambda: uncached_get_miner_responses(db, **params), args.sql_repeat)
+        report['queries'][name] = timing
+        print(f"  {name:<50} p50={timing['p50_ms']:8.3f}ms p99={timing['p99_ms']:8.3f}ms")
+    db.close_all_connections()
+    return report
+
+
+def load_batch(cursor, batch) -> None:
+    copy_rows(cursor, 'responses', 'challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, evaluated, score, evaluated_at', (
+        (challenge_id, hotkey, node_id, processing_time, received_at, completed_at, 't', score, evaluated_at)
+        for challenge_id, hotkey, node_id, processing_time, received_at, completed_at, score, evaluated_at, _, _ in batch
+    ))
+    copy_rows(cursor, 'codegen_responses', 'challenge_id, miner_hotkey, patch_hash', (
+        (challenge_id, hotkey, patch_hash) for challenge_id, hotkey, *_, patch_hash, _ in batch
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=500_000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--miners', type=int, default=250)
+    parser.add_argument('--responses-per-challenge', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200, help='Timed calls per hot set query')
+    parser.add_argument('--sql-repeat', type=int, default=10, help='Timed calls per SQL query')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-db', action='store_true', help='Skip the SQL comparison')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+    if args.responses_per_challenge > args.miners:
+        parser.error('--responses-per-challenge cannot exceed --miners')
+
+    data = generate(args)
+    report = {'config': vars(args), 'hot_set': run_memory(args, data)}
+    if not args.no_db:
+        with LocalPostgres() as db_env:
+            report['sql'] = run_db(args, data, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Benchmark MinHash/LSH near-duplicate detection over response patches.
+
+Usage:
+    python -m benchmarks.near_duplicates --patches 100000
+    python -m benchmarks.near_duplicates --patches 1000000 --no-db --output near_duplicates.json
+    python -m benchmarks.near_duplicates --patches 100000 --use-env   # load into the AWS_RDS_* database
+
+Generates synthetic patches (see benchmarks/search.py) and plants lightly edited copies: --copy-rate of
+the patches are copies of an earlier patch with 1 to --max-edits added lines rewritten, and patches are
+spread over --miners miners, so a miner query covers every band key of that miner's responses.
+Reports signature throughput, in-memory LSH index build time, per-query candidate lookup against a
+brute-force scan of every signature, and recall/precision on the planted pairs (ground truth is the exact
+Jaccard similarity of the shingle sets). Unless --no-db, it then loads patch_minhashes into a temporary
+Postgres cluster and times the GIN-indexed band lookup and the /retrieval/near-duplicates miner query.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmarks.e2e import percentile
+from benchmarks.postgres import LocalPostgres
+from benchmarks.search import copy_rows, make_text, vocabulary
+from benchmarks.seed import miner_hotkey
+from src.utils.minhash import patch_minhasher
+
+
+def base_patch(args, words, cum_weights, index: int) -> str:
+    rng = random.Random(args.seed * 1_000_003 + index)
+    return make_text(rng, words, cum_weights, int(rng.lognormvariate(0, 0.5) * args.patch_bytes), patch=True)
+
+
+def plant(args) -> dict:
+    """copy index -> source index, for --copy-rate of the patches."""
+    rng = random.Random(args.seed)
+    copies = {}
+    for index in range(1, args.patches):
+        if rng.random() < args.copy_rate:
+            copies[index] = rng.randrange(index)
+    return copies
+
+
+def edited_copy(args, words, cum_weights, source: str, index: int) -> str:
+    rng = random.Random(-index)
+    lines = source.splitlines()
+    added = [position for position, line in enumerate(lines) if line.startswith('+')]
+    for position in rng.sample(added, min(len(added), rng.randint(1, args.max_edits))):
+        a, b, c = rng.choices(words, cum_weights=cum_weights, k=3)
+        lines[position] = f"+    {a} = {b}({c})"
+    return '\n'.join(lines)
+
+
+def patch_text(args, words, cum_weights, copies: dict, index: int) -> str:
+    if index in copies:
+        source = patch_text(args, words, cum_weights, copies, copies[index])
+        return edited_copy(args, words, cum_weights, source, index)
+    return base_patch(args, words, cum_weights, index)
+
+
+def exact_jaccard(first: str, second: str) -> float:
+    a, b = set(patch_minhasher.shingles(first).tolist()), set(patch_minhasher.shingles(second).tolist())
+    return len(a & b) / len(a | b)
+
+
+def compute_signatures(args, words, cum_weights, copies: dict):
+    signatures = np.zeros((args.patches, patch_minhasher.num_perm), dtype=np.uint32)
+    bands = np.zeros((args.patches, patch_minhasher.bands), dtype=np.int64)
+    generate_s = signature_s = 0.0
+    for index in range(args.patches):
+        start = time.perf_counter()
+        patch = patch_text(args, words, cum_weights, copies, index)
+        generate_s += time.perf_counter() - start
+        start = time.perf_counter()
+        signature = patch_minhasher.signature(patch)
+        bands[index] = patch_minhasher.band_keys(signature)
+        signature_s += time.perf_counter() - start
+        signatures[index] = signature
+        if index % 10_000 == 0:
+            print(f"  signed {index}/{args.patches} patches", end='\r')
+    print()
+    return signatures, bands, {'signature_s': signature_s, 'signatures_per_s': args.patches / signature_s, 'generate_s': generate_s}
+
+
+def build_index(bands: np.ndarray):
+    """Every band key sorted, with the patch it came from: the in-memory equivalent of the GIN index."""
+    keys = bands.ravel()
+    order = np.argsort(keys, kind='stable')
+    return keys[order], order // bands.shape[1]
+
+
+def lsh_query(index_arrays, signatures: np.ndarray, bands: np.ndarray, index: int, threshold: float) -> set:
+    sorted_keys, owners = index_arrays
+    starts = np.searchsorted(sorted_keys, bands[index], side='left')
+    ends = np.searchsorted(sorted_keys, bands[index], side='right')
+    candidates = {other for start, end in zip(starts, ends) for other in owners[start:end].tolist() if other != index}
+    return {
+        other for other in candidates
+        if patch_minhasher.similarity(signatures[index], signatures[other]) >= threshold
+    }
+
+
+def brute_force_query(signatures: np.ndarray, index: int, threshold: float) -> set:
+    similarity = (signatures == signatures[index]).sum(axis=1) / signatures.shape[1]
+    matches = set(np.flatnonzero(similarity >= threshold).tolist())
+    matches.discard(index)
+    return matches
+
+
+def run_memory(args, words, cum_weights, copies, signatures, bands) -> dict:
+    start = time.perf_counter()
+    lsh_index = build_index(bands)
+    report = {'index_build_s': time.perf_counter() - start, 'buckets': int(np.unique(lsh_index[0]).size)}
+
+    rng = random.Random(args.seed + 1)
+    queries = rng.sample(sorted(copies), min(args.queries, len(copies)))
+    lsh_ms, brute_ms = [], []
+    for index in queries:
+        start = time.perf_counter()
+        lsh_query(lsh_index, signatures, bands, index, args.threshold)
+        lsh_ms.append((time.perf_counter() - start) * 1000)
+        if len(brute_ms) < args.brute_force_queries:
+            start = time.perf_counter()
+            brute_force_query(signatures, index, args.threshold)
+            brute_ms.append((time.perf_counter() - start) * 1000)
+    report.update({
+        'lsh_query_p50_ms': percentile(lsh_ms, 0.5),
+        'lsh_query_p99_ms': percentile(lsh_ms, 0.99),
+        'brute_force_query_p50_ms': percentile(brute_ms, 0.5),
+    })
+
+    # Recall: planted pairs that really are near-duplicates and are found through the buckets.
+    # Precision: reported pairs whose exact Jaccard similarity clears the threshold.
+    true_pairs = found = reported = correct = 0
+    for index in queries[:args.accuracy_queries]:
+        copy = patch_text(args, words, cum_weights, copies, index)
+        source = copies[index]
+        matches = lsh_query(lsh_index, signatures, bands, index, args.threshold)
+        if exact_jaccard(copy, patch_text(args, words, cum_weights, copies, source)) >= args.threshold:
+            true_pairs += 1
+            found += source in matches
+        for other in matches:
+            reported += 1
+            correct += exact_jaccard(copy, patch_text(args, words, cum_weights, copies, other)) >= args.threshold
+    report.update({
+        'planted_pairs_checked': len(queries[:args.accuracy_queries]),
+        'planted_pairs_above_threshold': true_pairs,
+        'recall': found / true_pairs if true_pairs else None,
+        'precision': correct / reported if reported else None,
+    })
+    return report
+
+
+def load(db, args, words, cum_weights, copies, signatures, bands) -> dict:
+    per_challenge = 100
+    conn = db.get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            start = time.perf_counter()
+            cursor.execute("""
+                INSERT INTO challenges (challenge_id, type, validator_hotkey, created_at)
+                SELECT 'dup-challenge-' || lpad(index::text, 8, '0'), 'codegen', 'validator', NOW()
+                FROM generate_series(0, %s) AS index
+            """, (args.patches // per_challenge,))
+            for batch_start in range(0, args.patches, args.batch_size):
+                indexes = range(batch_start, min(batch_start + args.batch_size, args.patches))
+                patches = {index: patch_text(args, words, cum_weights, copies, index) for index in indexes}
+                copy_rows(cursor, 'response_patches', 'patch_hash, patch, size', (
+                    (f"{index:064x}", patch, len(patch.encode())) for index, patch in patches.items()
+                ))
+                copy_rows(cursor, 'patch_minhashes', 'patch_hash, signature, bands', (
+                    (f"{index:064x}", '\\x' + patch_minhasher.to_bytes(signatures[index]).hex(), '{' + ','.join(map(str, bands[index].tolist())) + '}')
+                    for index in indexes
+                ))
+                rows = [(f"dup-challenge-{index // per_challenge:08d}", miner_hotkey(index % args.miners), index) for index in indexes]
+                copy_rows(cursor, 'responses', 'challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, evaluated', (
+                    (challenge_id, hotkey, node_id, 30, '2025-01-01', '2025-01-01', 'f') for challenge_id, hotkey, node_id in rows
+                ))
+                copy_rows(cursor, 'codegen_responses', 'challenge_id, miner_hotkey, patch_hash', (
+                    (challenge_id, hotkey, f"{node_id:064x}") for challenge_id, hotkey, node_id in rows
+                ))
+                print(f"  loaded {indexes[-1] + 1}/{args.patches} patches", end='\r')
+            print()
+            load_s = time.perf_counter() - start
+            cursor.execute("ANALYZE")
+            cursor.execute("SELECT pg_relation_size('idx_patch_minhashes_bands'), pg_total_relation_size('patch_minhashes')")
+            index_bytes, table_bytes = cursor.fetchone()
+    finally:
+        db.return_connection(conn)
+    return {'load_s': load_s, 'bands_index_mb': index_bytes / 2**20, 'patch_minhashes_total_mb': table_bytes / 2**20}
+
+
+def run_db(args, db_env, words, cum_weights, copies, signatures, bands) -> dict:
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    from src.endpoints.retrieval import find_near_duplicates
+    db = DatabaseManager()
+    report = load(db, args, words, cum_weights, copies, signatures, bands)
+
+    rng = random.Random(args.seed + 2)
+    queries = rng.sample(sorted(copies), min(args.queries, len(copies)))
+    band_ms, endpoint_ms = [], []
+    for index in queries:
+        start = time.perf_counter()
+        db.get_responses_sharing_bands(bands[index].tolist(), exclude_miner_hotkey=miner_hotkey(index % args.miners))
+        band_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        find_near_duplicates(db, None, miner_hotkey(index % args.miners), args.threshold, -1)
+        endpoint_ms.append((time.perf_counter() - start) * 1000)
+    report.update({
+        'band_lookup_p50_ms': percentile(band_ms, 0.5),
+        'band_lookup_p99_ms': percentile(band_ms, 0.99),
+        'miner_query_p50_ms': percentile(endpoint_ms, 0.5),
+        'miner_query_p99_ms': percentile(endpoint_ms, 0.99),
+    })
+    db.close_all_connections()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patches', type=int, default=100_000)
+    parser.add_argument('--miners', type=int, default=5000, help='Patches are spread round-robin over this many miners')
+    parser.add_argument('--copy-rate', type=float, default=0.01, help='Fraction of patches that are edited copies of an earlier one')
+    parser.add_argument('--max-edits', type=int, default=2, help='Most added lines rewritten in a copy')
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--vocabulary', type=int, default=50_000)
+    parser.add_argument('--patch-bytes', type=int, default=800, help='Median patch size in bytes')
+    parser.add_argument('--queries', type=int, default=200, help='Planted copies to query')
+    parser.add_argument('--brute-force-queries', type=int, default=20)
+    parser.add_argument('--accuracy-queries', type=int, default=200, help='Planted copies checked against exact Jaccard similarity')
+    parser.add_argument('--batch-size', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-db', action='store_true', help='Only run the in-memory benchmark')
+    parser.add_argument('--use-env', action='store_true', help='Use the database in the AWS_RDS_* env vars instead of a temporary cluster')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    words, cum_weights = vocabulary(args.vocabulary)
+    copies = plant(args)
+    print(f"{args.patches} patches, {len(copies)} planted copies")
+    signatures, bands, report = compute_signatures(args, words, cum_weights, copies)
+    report = {'config': vars(args), 'signatures': report}
+    report['memory'] = run_memory(args, words, cum_weights, copies, signatures, bands)
+    print(json.dumps(report['signatures'], indent=2))
+    print(json.dumps(report['memory'], indent=2))
+
+    if not args.no_db:
+        if args.use_env:
+            from src.utils.config import load_env
+            load_env()
+            keys = ['AWS_RDS_PLATFORM_ENDPOINT', 'AWS_RDS_PORT', 'AWS_MASTER_USERNAME', 'AWS_MASTER_PASSWORD', 'AWS_RDS_PLATFORM_DB_NAME', 'AWS_RDS_SSLMODE']
+            report['db'] = run_db(args, {key: os.environ[key] for key in keys if key in os.environ}, words, cum_weights, copies, signatures, bands)
+        else:
+            with LocalPostgres() as db_env:
+                report['db'] = run_db(args, db_env, words, cum_weights, copies, signatures, bands)
+        print(json.dumps(report['db'], indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
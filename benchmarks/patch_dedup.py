@@ -0,0 +1,122 @@
+"""
+Estimate storage savings and query payload change from content-addressed response patches.
+
+Usage:
+    python -m benchmarks.patch_dedup --challenges 500 --miners 150
+    python -m benchmarks.patch_dedup --copy-rate 0.3   # fraction of miners that copy a popular patch
+
+Builds a synthetic dataset where each challenge has a handful of popular solutions that many
+miners submit verbatim, plus miners with their own unique patches. Reports bytes stored inline
+(one patch per response row) against bytes stored once per distinct patch, with and without zlib,
+and the json_agg payload a /retrieval/miner-responses page has to move and parse.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from src.db.patches import patch_hash, encode_patch
+
+PATCH_LINES = [
+    "-    return None\n",
+    "+    if value is None:\n+        raise ValueError('value must be set')\n",
+    "+    result = [item for item in items if item.enabled]\n",
+    "-    for i in range(len(items)):\n-        process(items[i])\n+    for item in items:\n+        process(item)\n",
+    "+from typing import Optional\n",
+    "+    logger.debug(f'processing {name}')\n",
+]
+
+
+def make_patch(rng: random.Random, target_bytes: int) -> str:
+    header = f"diff --git a/src/module_{rng.randint(0, 99)}.py b/src/module_{rng.randint(0, 99)}.py\n"
+    parts = [header, f"@@ -{rng.randint(1, 500)},7 +{rng.randint(1, 500)},9 @@\n"]
+    size = sum(len(part) for part in parts)
+    while size < target_bytes:
+        line = rng.choice(PATCH_LINES).replace('items', rng.choice(['items', 'rows', 'entries', 'nodes']))
+        parts.append(line)
+        size += len(line)
+    return ''.join(parts)
+
+
+def build_dataset(challenges: int, miners: int, solutions_per_challenge: int, copy_rate: float, seed: int):
+    rng = random.Random(seed)
+    rows = []
+    for challenge_index in range(challenges):
+        solutions = [
+            make_patch(rng, int(rng.lognormvariate(8, 0.6)))
+            for _ in range(solutions_per_challenge)
+        ]
+        weights = [1 / (rank + 1) for rank in range(solutions_per_challenge)]
+        for miner_index in range(miners):
+            if rng.random() < copy_rate:
+                patch = rng.choices(solutions, weights)[0]
+            else:
+                patch = make_patch(rng, int(rng.lognormvariate(8, 0.6)))
+            rows.append((f"challenge-{challenge_index}", f"5Miner{miner_index:044d}", patch))
+    return rows
+
+
+def report_storage(rows) -> None:
+    inline_bytes = sum(len(patch.encode('utf-8')) for _, _, patch in rows)
+    distinct = {}
+    for _, _, patch in rows:
+        distinct.setdefault(patch_hash(patch), patch)
+    deduped_bytes = sum(len(patch.encode('utf-8')) for patch in distinct.values())
+    hash_ref_bytes = len(rows) * 64
+
+    compressed_bytes = 0
+    for patch in distinct.values():
+        text, compressed = encode_patch(patch, compression='zlib')
+        compressed_bytes += len(compressed) if compressed is not None else len(text.encode('utf-8'))
+
+    print(f"responses: {len(rows)}  distinct patches: {len(distinct)} ({len(distinct) / len(rows):.1%})")
+    print(f"  inline patches:           {inline_bytes / 1e6:10.1f} MB")
+    print(f"  content-addressed:        {(deduped_bytes + hash_ref_bytes) / 1e6:10.1f} MB ({1 - (deduped_bytes + hash_ref_bytes) / inline_bytes:.1%} saved)")
+    print(f"  content-addressed + zlib: {(compressed_bytes + hash_ref_bytes) / 1e6:10.1f} MB ({1 - (compressed_bytes + hash_ref_bytes) / inline_bytes:.1%} saved)")
+
+
+def report_payload(rows, miners_per_page: int) -> None:
+    by_miner = {}
+    for challenge_id, miner_hotkey, patch in rows:
+        by_miner.setdefault(miner_hotkey, []).append((challenge_id, patch))
+    page = sorted(by_miner)[:miners_per_page]
+
+    inline_rows = [
+        [{'challenge_id': challenge_id, 'miner_hotkey': miner, 'score': 0.5, 'response_patch': patch} for challenge_id, patch in by_miner[miner]]
+        for miner in page
+    ]
+    hashed_rows = [
+        [{'challenge_id': challenge_id, 'miner_hotkey': miner, 'score': 0.5, 'response_patch': None, 'patch_hash': patch_hash(patch)} for challenge_id, patch in by_miner[miner]]
+        for miner in page
+    ]
+    distinct_patches = {patch_hash(patch): patch for miner in page for _, patch in by_miner[miner]}
+
+    for name, payload in [('inline', json.dumps(inline_rows)), ('hashed', json.dumps(hashed_rows))]:
+        start = time.perf_counter()
+        json.loads(payload)
+        parse_ms = (time.perf_counter() - start) * 1000
+        print(f"  json_agg payload ({name}): {len(payload) / 1e6:8.1f} MB, parse {parse_ms:.1f}ms")
+    dictionary_bytes = sum(len(patch) for patch in distinct_patches.values())
+    print(f"  patch dictionary for page: {len(distinct_patches)} patches, {dictionary_bytes / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=300)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--solutions-per-challenge', type=int, default=8)
+    parser.add_argument('--copy-rate', type=float, default=0.6)
+    parser.add_argument('--miners-per-page', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rows = build_dataset(args.challenges, args.miners, args.solutions_per_challenge, args.copy_rate, args.seed)
+    print("Storage")
+    report_storage(rows)
+    print(f"Miner responses page ({args.miners_per_page} miners)")
+    report_payload(rows, args.miners_per_page)
+
+
+if __name__ == '__main__':
+    main()
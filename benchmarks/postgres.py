@@ -0,0 +1,98 @@
+"""
+Throwaway local Postgres for benchmarks.
+
+Starts a fresh cluster with initdb/pg_ctl from PATH (or PG_BIN) in a temporary directory on a
+free port, creates the database, and applies src/db/postgres_schema.sql plus every migration in
+src/db/migrations. Postgres refuses to run as root, so run the benchmarks as a regular user.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from pathlib import Path
+
+import psycopg2
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_FILES = [REPO_ROOT / 'src' / 'db' / 'postgres_schema.sql'] + sorted((REPO_ROOT / 'src' / 'db' / 'migrations').glob('*.sql'))
+
+
+def _binary(name: str) -> str:
+    bin_dir = os.getenv('PG_BIN')
+    path = os.path.join(bin_dir, name) if bin_dir else shutil.which(name)
+    if not path or not os.path.exists(path):
+        raise RuntimeError(f"Could not find {name}; put the Postgres binaries on PATH or set PG_BIN")
+    return path
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def apply_schema(env: dict) -> None:
+    """Apply the schema and migrations with psql to the database described by the AWS_RDS_* variables in env."""
+    psql_env = {
+        **os.environ,
+        'PGHOST': env['AWS_RDS_PLATFORM_ENDPOINT'],
+        'PGPORT': env['AWS_RDS_PORT'],
+        'PGUSER': env['AWS_MASTER_USERNAME'],
+        'PGPASSWORD': env['AWS_MASTER_PASSWORD'],
+        'PGDATABASE': env['AWS_RDS_PLATFORM_DB_NAME'],
+        'PGSSLMODE': env['AWS_RDS_SSLMODE'],
+    }
+    for schema_file in SCHEMA_FILES:
+        subprocess.run(
+            [_binary('psql'), '-q', '-v', 'ON_ERROR_STOP=1', '-f', str(schema_file)],
+            check=True, env=psql_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+
+class LocalPostgres:
+    """Context manager that runs a temporary Postgres cluster and yields AWS_RDS_* env vars for it."""
+
+    def __init__(self, database: str = 'ridges_bench'):
+        self.database = database
+        self.port = _free_port()
+        self.data_dir = None
+
+    def __enter__(self) -> dict:
+        self.data_dir = tempfile.mkdtemp(prefix='ridges-pg-')
+        subprocess.run(
+            [_binary('initdb'), '-D', self.data_dir, '-U', 'postgres', '--auth=trust'],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        subprocess.run(
+            [_binary('pg_ctl'), '-D', self.data_dir, '-o', f"-p {self.port} -k {self.data_dir}",
+             '-l', os.path.join(self.data_dir, 'postgres.log'), '-w', 'start'],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        admin = psycopg2.connect(host='127.0.0.1', port=self.port, user='postgres', dbname='postgres')
+        admin.autocommit = True
+        with admin.cursor() as cursor:
+            cursor.execute(f'CREATE DATABASE "{self.database}"')
+        admin.close()
+
+        env = self.env()
+        apply_schema(env)
+        return env
+
+    def env(self) -> dict:
+        return {
+            'AWS_RDS_PLATFORM_ENDPOINT': '127.0.0.1',
+            'AWS_RDS_PORT': str(self.port),
+            'AWS_MASTER_USERNAME': 'postgres',
+            'AWS_MASTER_PASSWORD': '',
+            'AWS_RDS_PLATFORM_DB_NAME': self.database,
+            'AWS_RDS_SSLMODE': 'disable',
+        }
+
+    def __exit__(self, *exc) -> None:
+        subprocess.run(
+            [_binary('pg_ctl'), '-D', self.data_dir, '-m', 'fast', '-w', 'stop'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        shutil.rmtree(self.data_dir, ignore_errors=True)
@@ -0,0 +1,168 @@
+"""
+Check that cancelled retrieval requests release their database connections right away.
+
+Usage:
+    python -m benchmarks.query_cancellation
+    python -m benchmarks.query_cancellation --query-seconds 30 --deadline 3
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) and runs the API under uvicorn with
+one extra route, /retrieval/slow-stand-in, a stand-in for a slow query such as a large
+get_miner_responses: it runs SELECT pg_sleep(seconds) through the retrieval bulkhead and a pool
+connection, like any DatabaseManager method. Then:
+- disconnect: a client sends a request for a --query-seconds query and hangs up after a second
+- deadline: a client waits on a --query-seconds query while the server's RETRIEVAL_DEADLINE passes (504)
+- completed: a short query runs to completion (200, nothing cancelled)
+After each, it reports how long the connection stayed checked out (from /retrieval/db/stats) and
+whether the query was still running on the server (from pg_stat_activity). Exits non-zero if a
+connection or a query outlived its request by more than --max-release seconds.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import psycopg2
+from fastapi import Depends
+
+from benchmarks.e2e import Client, wait_for_server
+from benchmarks.postgres import LocalPostgres
+from src.db.operations import DatabaseManager
+from src.main import app
+from src.utils.bulkhead import retrieval_bulkhead
+from src.utils.dependencies import get_db
+
+
+def slow_query(db: DatabaseManager, seconds: float) -> int:
+    """Stand-in for a slow DatabaseManager read, with the same connection handling."""
+    conn = None
+    try:
+        conn = db.get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_sleep(%s)", (seconds,))
+        return 1
+    except Exception as e:
+        print(f"Error running slow query: {str(e)}")
+        return 0
+    finally:
+        if conn:
+            db.return_connection(conn)
+
+
+async def slow_stand_in(seconds: float, db: DatabaseManager = Depends(get_db)):
+    return {"status": "success", "result": await retrieval_bulkhead.run(slow_query, db, seconds)}
+
+
+app.add_api_route("/retrieval/slow-stand-in", slow_stand_in, methods=["GET"])
+
+
+def connections_in_use(client: Client) -> int:
+    status, body = client.request('GET', '/retrieval/db/stats')
+    if status != 200:
+        raise RuntimeError(f"/retrieval/db/stats returned {status}")
+    return json.loads(body)['pool_stats']['workloads']['retrieval']['in_use']
+
+
+def running_sleeps(db_env: dict) -> int:
+    conn = psycopg2.connect(
+        host=db_env['AWS_RDS_PLATFORM_ENDPOINT'], port=db_env['AWS_RDS_PORT'],
+        user=db_env['AWS_MASTER_USERNAME'], dbname=db_env['AWS_RDS_PLATFORM_DB_NAME']
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE state = 'active' AND query LIKE 'SELECT pg_sleep%%'")
+            return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def raw_request(port: int, path: str) -> socket.socket:
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+    return sock
+
+
+def wait_for_release(client: Client, db_env: dict, since: float, timeout: float) -> tuple:
+    """Seconds from `since` until no retrieval connection is checked out and no pg_sleep is running."""
+    while time.perf_counter() - since < timeout:
+        if connections_in_use(client) == 0 and running_sleeps(db_env) == 0:
+            return time.perf_counter() - since, True
+        time.sleep(0.02)
+    return time.perf_counter() - since, False
+
+
+def run(args, db_env: dict) -> list:
+    env = {
+        **os.environ, **db_env,
+        'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', ''),
+        'RETRIEVAL_DEADLINE': str(args.deadline),
+    }
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'benchmarks.query_cancellation:app', '--port', str(args.port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    results = []
+    try:
+        client = Client(args.port)
+        wait_for_server(client)
+        path = f"/retrieval/slow-stand-in?seconds={args.query_seconds}"
+
+        # disconnect: hang up while the query runs
+        sock = raw_request(args.port, path)
+        time.sleep(1)
+        in_use_before = connections_in_use(client)
+        sock.close()
+        released_after, released = wait_for_release(client, db_env, time.perf_counter(), args.max_release + 5)
+        results.append({'case': 'disconnect', 'status': None, 'in_use_while_running': in_use_before, 'released_after_s': released_after, 'released': released and released_after <= args.max_release})
+
+        # deadline: wait for the server to give up
+        start = time.perf_counter()
+        status, _ = Client(args.port).request('GET', path)
+        answered_after = time.perf_counter() - start
+        released_after, released = wait_for_release(client, db_env, time.perf_counter(), args.max_release + 5)
+        results.append({'case': 'deadline', 'status': status, 'answered_after_s': answered_after, 'released_after_s': released_after, 'released': status == 504 and released and released_after <= args.max_release})
+
+        # completed: a query within the deadline is left alone
+        status, _ = Client(args.port).request('GET', '/retrieval/slow-stand-in?seconds=0.2')
+        released_after, released = wait_for_release(client, db_env, time.perf_counter(), args.max_release + 5)
+        results.append({'case': 'completed', 'status': status, 'released_after_s': released_after, 'released': status == 200 and released})
+
+        status, body = client.request('GET', '/retrieval/cancellations/stats')
+        stats = json.loads(body)['cancellation_stats']
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"retrieval connections in use while the disconnect case's query ran: {results[0]['in_use_while_running']}")
+    for result in results:
+        print(f"{result['case']:<11} status {str(result['status']):<5} connection and query released after {result['released_after_s'] * 1000:7.1f}ms  {'ok' if result['released'] else 'FAILED'}")
+    print(f"cancellation stats: {stats}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query-seconds', type=float, default=30, help='Duration of the stand-in slow query')
+    parser.add_argument('--deadline', type=float, default=3, help='RETRIEVAL_DEADLINE for the server')
+    parser.add_argument('--max-release', type=float, default=1, help='Seconds a connection may outlive its cancelled request')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        results = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), 'results': results}, output, indent=2)
+        print(f"wrote {args.output}")
+    if not all(result['released'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
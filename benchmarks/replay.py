@@ -0,0 +1,217 @@
+"""
+Replay recorded traffic against a running API instance.
+
+Usage:
+    TRAFFIC_RECORD_PATH=traffic.jsonl uvicorn src.main:app      # record (on the server being observed)
+    python -m benchmarks.replay traffic.jsonl --speed 1         # replay at recorded pace
+    python -m benchmarks.replay traffic.jsonl --speed 10 --url http://127.0.0.1:8000 --output replay.json
+
+Requests are re-issued at their recorded offsets divided by --speed. Anonymized query values are
+mapped onto entities created by benchmarks/seed.py, and ingestion bodies are synthesized with the
+recorded item counts and patch sizes. While replaying, /retrieval/db/stats is polled to report
+connection pool saturation. Reports latency percentiles and error rates per route.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.e2e import Client, percentile
+from benchmarks.patch_dedup import make_patch
+from benchmarks.seed import SeedConfig, miner_hotkey, validator_hotkey
+
+ENTITY_PARAMS = {
+    'miner_hotkey': lambda index, config: miner_hotkey(index % config.miners),
+    'validator_hotkey': lambda index, config: validator_hotkey(index % config.validators),
+    'challenge_id': lambda index, config: f"bench-challenge-{index % config.challenges:08d}",
+}
+
+
+def map_query(query: dict, config: SeedConfig) -> dict:
+    params = {}
+    for key, value in query.items():
+        if isinstance(value, str) and value.startswith('~') and key in ENTITY_PARAMS:
+            value = ENTITY_PARAMS[key](int(value[1:], 16), config)
+        elif isinstance(value, bool):
+            value = str(value).lower()
+        params[key] = value
+    return params
+
+
+def synthesize_body(record: dict, config: SeedConfig, rng: random.Random, counter):
+    """Build a request body with the recorded number of items and mean patch size."""
+    if 'n' not in record:
+        return None
+    path = record['u']
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    items = []
+    for _ in range(record['n']):
+        index = next(counter)
+        if path.endswith('-challenges'):
+            kind = 'regression' if 'regression' in path else 'codegen'
+            items.append({
+                'challenge_id': f"replay-{kind}-{index}", 'type': kind,
+                'validator_hotkey': validator_hotkey(index % config.validators), 'created_at': now.isoformat(),
+                'problem_statement': 'Replayed problem statement', 'dynamic_checklist': '[]',
+                'repository_url': 'https://github.com/example/replay', 'commit_hash': None, 'context_file_paths': '[]',
+            })
+        elif path.endswith('-responses'):
+            items.append({
+                'challenge_id': f"bench-challenge-{rng.randrange(config.challenges):08d}",
+                'miner_hotkey': f"replay-miner-{index}", 'node_id': 1, 'processing_time': 10.0,
+                'received_at': (now - timedelta(seconds=60)).isoformat(), 'completed_at': now.isoformat(),
+                'evaluated': True, 'score': rng.random(), 'evaluated_at': now.isoformat(),
+                'response_patch': make_patch(rng, record.get('p', 2000)),
+            })
+        elif path.endswith('/scores-list'):
+            items.append({
+                'type': 'weight', 'validator_hotkey': validator_hotkey(rng.randrange(config.validators)),
+                'miner_hotkey': miner_hotkey(rng.randrange(config.miners)), 'score': rng.random(),
+            })
+    return items
+
+
+class PoolMonitor(threading.Thread):
+    """Polls the API's connection pool statistics in the background."""
+
+    def __init__(self, client: Client, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.client = client
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                status, body = self.client.request('GET', '/retrieval/db/stats')
+                if status == 200:
+                    self.samples.append(json.loads(body)['pool_stats'])
+            except Exception:
+                pass
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        in_use = [sample['in_use'] for sample in self.samples]
+        return {
+            'max_connections': last['max_connections'],
+            'mean_in_use': statistics.fmean(in_use),
+            'max_in_use_sampled': max(in_use),
+            'peak_in_use': last['peak_in_use'],
+            'saturated_fraction': sum(1 for value in in_use if value >= last['max_connections']) / len(in_use),
+            'exhausted_errors': last['exhausted'] - first['exhausted'],
+        }
+
+
+def replay(records, client: Client, config: SeedConfig, speed: float, workers: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    counter = iter(range(10**12))
+    results = defaultdict(lambda: {'latencies': [], 'recorded': [], 'errors': 0, 'lag': []})
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def issue(record):
+        scheduled = record['t'] / speed
+        delay = scheduled - (time.perf_counter() - start)
+        if delay > 0:
+            time.sleep(delay)
+        with lock:
+            body = synthesize_body(record, config, rng, counter)
+        params = map_query(record.get('q', {}), config)
+        lag = (time.perf_counter() - start) - scheduled
+        request_start = time.perf_counter()
+        try:
+            status, _ = client.request(record['m'], record['u'], params, body)
+            failed = status >= 500 or status == 429
+        except Exception:
+            failed = True
+        elapsed = (time.perf_counter() - request_start) * 1000
+        with lock:
+            route = results[f"{record['m']} {record['u']}"]
+            route['latencies'].append(elapsed)
+            route['recorded'].append(record.get('ms', 0))
+            route['errors'] += failed
+            route['lag'].append(lag * 1000)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(issue, records))
+    wall = time.perf_counter() - start
+
+    report = {}
+    for route, data in sorted(results.items()):
+        report[route] = {
+            'requests': len(data['latencies']),
+            'error_rate': data['errors'] / len(data['latencies']),
+            'p50_ms': percentile(data['latencies'], 0.5),
+            'p95_ms': percentile(data['latencies'], 0.95),
+            'p99_ms': percentile(data['latencies'], 0.99),
+            'recorded_p50_ms': percentile(data['recorded'], 0.5),
+            'max_start_lag_ms': max(data['lag']),
+        }
+    return {'wall_seconds': wall, 'routes': report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help='Traffic log written via TRAFFIC_RECORD_PATH')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier, e.g. 10 for 10x')
+    parser.add_argument('--workers', type=int, default=64, help='Maximum concurrent in-flight requests')
+    parser.add_argument('--challenges', type=int, default=SeedConfig.challenges, help='Seeded challenge count to map IDs onto')
+    parser.add_argument('--miners', type=int, default=SeedConfig.miners)
+    parser.add_argument('--validators', type=int, default=SeedConfig.validators)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    with open(args.log) as log:
+        records = sorted((json.loads(line) for line in log if line.strip()), key=lambda record: record['t'])
+    if not records:
+        print('no records to replay')
+        return
+    base = records[0]['t']
+    for record in records:
+        record['t'] -= base
+
+    url = urllib.parse.urlparse(args.url)
+    client = Client(url.port or 80)
+    config = SeedConfig(challenges=args.challenges, miners=args.miners, validators=args.validators)
+
+    monitor = PoolMonitor(Client(url.port or 80))
+    monitor.start()
+    report = replay(records, client, config, args.speed, args.workers, args.seed)
+    monitor.stop()
+    report['pool'] = monitor.summary()
+    report['speed'] = args.speed
+
+    print(f"replayed {len(records)} requests at {args.speed}x in {report['wall_seconds']:.1f}s")
+    for route, data in report['routes'].items():
+        print(f"  {route:<45} n={data['requests']:<6} errors={data['error_rate']:6.1%} "
+              f"p50={data['p50_ms']:8.1f}ms p95={data['p95_ms']:8.1f}ms p99={data['p99_ms']:8.1f}ms "
+              f"(recorded p50 {data['recorded_p50_ms']:.1f}ms)")
+    if report['pool']:
+        pool = report['pool']
+        print(f"  pool: mean in use {pool['mean_in_use']:.1f}/{pool['max_connections']}, peak {pool['peak_in_use']}, "
+              f"saturated {pool['saturated_fraction']:.1%} of samples, {pool['exhausted_errors']} exhausted errors")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Profile building miner response rows with and without pydantic validation.
+
+Usage:
+    python -m benchmarks.response_rows --miners 150 --responses-per-miner 300
+    python -m benchmarks.response_rows --profile   # print the top cProfile entries for each path
+
+Rows are generated in the shape `get_miner_responses` receives from json_agg. The
+"validated" path is the previous behaviour: one CodegenResponse per row, then FastAPI's
+jsonable_encoder. The "trusted" path hands the rows straight to FastJSONResponse.
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from src.db.models import CodegenResponse
+from src.utils.serialization import FastJSONResponse
+
+
+def build_rows(miners: int, responses_per_miner: int, patch_bytes: int, seed: int) -> str:
+    """Return the miner rows as JSON text, the way Postgres hands json_agg output to psycopg2."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    rows = []
+    for miner_index in range(miners):
+        miner_hotkey = f"5Miner{miner_index:044d}"
+        responses = []
+        for response_index in range(responses_per_miner):
+            completed_at = now - timedelta(seconds=rng.randint(0, 86400))
+            responses.append({
+                'challenge_id': f"challenge-{response_index}",
+                'miner_hotkey': miner_hotkey,
+                'node_id': miner_index,
+                'processing_time': rng.random() * 60,
+                'received_at': (completed_at - timedelta(seconds=30)).isoformat(),
+                'completed_at': completed_at.isoformat(),
+                'evaluated': True,
+                'score': rng.random(),
+                'evaluated_at': (completed_at + timedelta(seconds=30)).isoformat(),
+                'response_patch': 'x' * patch_bytes,
+            })
+        rows.append((miner_hotkey, len(responses), 0.5, responses))
+    return json.dumps(rows)
+
+
+def validated_request(raw_rows: str):
+    rows = json.loads(raw_rows)
+    miners = [
+        {
+            "miner_hotkey": row[0],
+            "response_count": row[1],
+            "average_score": row[2],
+            "responses": [CodegenResponse(**response) for response in row[3]]
+        }
+        for row in rows
+    ]
+    return json.dumps(jsonable_encoder(miners)).encode()
+
+
+def trusted_request(raw_rows: str):
+    rows = json.loads(raw_rows)
+    miners = [
+        {
+            "miner_hotkey": row[0],
+            "response_count": row[1],
+            "average_score": row[2],
+            "responses": row[3]
+        }
+        for row in rows
+    ]
+    return FastJSONResponse(content=miners).body
+
+
+def measure(name: str, fn, raw_rows: str, repeat: int, profile: bool) -> float:
+    cpu_times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn(raw_rows)
+        cpu_times.append(time.process_time() - start)
+    cpu_ms = min(cpu_times) * 1000
+    print(f"{name:<10} cpu per request: {cpu_ms:.1f}ms (best of {repeat})")
+
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(fn, raw_rows)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(12)
+    return cpu_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--responses-per-miner', type=int, default=300)
+    parser.add_argument('--patch-bytes', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', action='store_true')
+    args = parser.parse_args()
+
+    raw_rows = build_rows(args.miners, args.responses_per_miner, args.patch_bytes, args.seed)
+    print(f"{args.miners} miners x {args.responses_per_miner} responses")
+    before = measure('validated', validated_request, raw_rows, args.repeat, args.profile)
+    after = measure('trusted', trusted_request, raw_rows, args.repeat, args.profile)
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
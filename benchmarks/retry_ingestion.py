@@ -0,0 +1,235 @@
+"""
+Benchmark the database cost of validators retrying ingestion uploads.
+
+Usage:
+    python -m benchmarks.retry_ingestion
+    python -m benchmarks.retry_ingestion --batches 40 --batch-size 50 --retries 3 --output retries.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) with autovacuum off for the response
+tables and runs the API under uvicorn. --batches batches of --batch-size codegen responses are uploaded
+unevaluated and then again evaluated, as validators do, and every upload is retried --retries times:
+over HTTP with an Idempotency-Key (what a retrying validator sends), and straight through
+DatabaseManager.store_codegen_responses (a retry that reaches another worker or outlives the replay cache).
+For each phase it reports WAL bytes written, growth of the responses table and the dead tuples a
+VACUUM then removes from it, so runs before and after a change can be compared.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+
+from benchmarks.e2e import Client, percentile, wait_for_server
+from benchmarks.patch_dedup import make_patch
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import miner_hotkey, validator_hotkey
+
+TABLES = ('responses', 'codegen_responses')
+
+
+def generate(args):
+    """(challenges, unevaluated responses, evaluated responses) JSON payloads per batch."""
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    batches = []
+    for batch in range(args.batches):
+        challenges, pending, evaluated = [], [], []
+        for index in range(args.batch_size // args.miners_per_challenge):
+            challenge_id = f"retry-challenge-{batch:04d}-{index:04d}"
+            created_at = now - timedelta(minutes=rng.randint(10, 600))
+            challenges.append({
+                'challenge_id': challenge_id,
+                'type': 'codegen',
+                'validator_hotkey': validator_hotkey(0),
+                'created_at': created_at.isoformat(),
+                'problem_statement': 'Fix the failing retry behaviour',
+                'dynamic_checklist': '["tests pass"]',
+                'repository_url': 'https://github.com/example/repo',
+                'commit_hash': f"{rng.getrandbits(160):040x}",
+                'context_file_paths': '["src/main.py"]',
+            })
+            for miner in rng.sample(range(args.miners), args.miners_per_challenge):
+                completed_at = created_at + timedelta(seconds=rng.randint(30, 600))
+                response = {
+                    'challenge_id': challenge_id,
+                    'miner_hotkey': miner_hotkey(miner),
+                    'node_id': miner,
+                    'processing_time': 30.0,
+                    'received_at': (completed_at - timedelta(seconds=30)).isoformat(),
+                    'completed_at': completed_at.isoformat(),
+                    'evaluated': False,
+                    'score': None,
+                    'evaluated_at': None,
+                    'response_patch': make_patch(rng, args.patch_bytes),
+                }
+                pending.append(response)
+                evaluated.append({**response, 'evaluated': True, 'score': rng.random(), 'evaluated_at': (completed_at + timedelta(seconds=60)).isoformat()})
+        batches.append((challenges, pending, evaluated))
+    return batches
+
+
+def post(port: int, path: str, body, idempotency_key: str) -> int:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        conn.request('POST', path, body=json.dumps(body).encode(), headers={'Content-Type': 'application/json', 'Idempotency-Key': idempotency_key})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def table_bytes(cursor) -> int:
+    cursor.execute("SELECT sum(pg_relation_size(relname::regclass)) FROM unnest(%s::text[]) AS relname", (list(TABLES),))
+    return int(cursor.fetchone()[0])
+
+
+def vacuum_dead_tuples(conn) -> int:
+    """VACUUM the response tables and return how many dead tuples it removed."""
+    removed = 0
+    with conn.cursor() as cursor:
+        for table in TABLES:
+            del conn.notices[:]
+            cursor.execute(f"VACUUM (VERBOSE) {table}")
+            for notice in conn.notices:
+                match = re.search(r"tuples: (\d+) removed", notice)
+                if match:
+                    removed += int(match.group(1))
+    return removed
+
+
+def measure(conn, name: str, upload) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_current_wal_lsn()")
+        wal_start = cursor.fetchone()[0]
+        size_start = table_bytes(cursor)
+        start = time.perf_counter()
+        latencies = upload()
+        elapsed = time.perf_counter() - start
+        cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (wal_start,))
+        wal_bytes = int(cursor.fetchone()[0])
+        growth = table_bytes(cursor) - size_start
+    dead = vacuum_dead_tuples(conn)
+    result = {
+        'phase': name,
+        'uploads': len(latencies),
+        'seconds': elapsed,
+        'upload_p50_ms': percentile(latencies, 0.5),
+        'wal_bytes': wal_bytes,
+        'table_growth_bytes': growth,
+        'dead_tuples': dead,
+    }
+    print(f"{name:<44} uploads={len(latencies):4d} p50={result['upload_p50_ms']:7.1f}ms wal={wal_bytes / 1024:9.1f}KB growth={growth / 1024:8.1f}KB dead={dead:6d}")
+    return result
+
+
+def run(args, db_env: dict) -> dict:
+    os.environ.update(db_env)
+    from src.db.models import CodegenResponse
+    from src.db.operations import DatabaseManager
+
+    batches = generate(args)
+    conn = psycopg2.connect(
+        host=db_env['AWS_RDS_PLATFORM_ENDPOINT'], port=db_env['AWS_RDS_PORT'], user=db_env['AWS_MASTER_USERNAME'],
+        password=db_env['AWS_MASTER_PASSWORD'], dbname=db_env['AWS_RDS_PLATFORM_DB_NAME']
+    )
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f"ALTER TABLE {table} SET (autovacuum_enabled = false)")
+
+    env = {**os.environ, **db_env, 'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', '')}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+    )
+    db = DatabaseManager()
+    try:
+        wait_for_server(Client(args.port))
+        keys = {}
+
+        def http_uploads(payload_index: int, repeats: int):
+            def upload():
+                latencies = []
+                for batch, payloads in enumerate(batches):
+                    key = keys.setdefault((batch, payload_index), str(uuid.uuid4()))
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        status = post(args.port, '/ingestion/codegen-responses', payloads[payload_index], key)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        if status != 200:
+                            raise RuntimeError(f"/ingestion/codegen-responses returned {status}")
+                return latencies
+            return upload
+
+        def direct_uploads(payload_index: int):
+            models = [[CodegenResponse(**response) for response in payloads[payload_index]] for payloads in batches]
+
+            def upload():
+                latencies = []
+                for responses in models:
+                    for _ in range(args.retries):
+                        start = time.perf_counter()
+                        if db.store_codegen_responses(responses) != 1:
+                            raise RuntimeError("store_codegen_responses failed")
+                        latencies.append((time.perf_counter() - start) * 1000)
+                return latencies
+            return upload
+
+        for challenges, _, _ in batches:
+            post(args.port, '/ingestion/codegen-challenges', challenges, str(uuid.uuid4()))
+        vacuum_dead_tuples(conn)
+
+        results = [
+            measure(conn, 'unevaluated upload', http_uploads(1, 1)),
+            measure(conn, f"{args.retries} retries over HTTP (Idempotency-Key)", http_uploads(1, args.retries)),
+            measure(conn, f"{args.retries} retries via store_codegen_responses", direct_uploads(1)),
+            measure(conn, 'evaluated upload', http_uploads(2, 1)),
+            measure(conn, f"{args.retries} retries over HTTP (Idempotency-Key)", http_uploads(2, args.retries)),
+            measure(conn, f"{args.retries} retries via store_codegen_responses", direct_uploads(2)),
+        ]
+    finally:
+        server.terminate()
+        server.wait()
+        db.close_all_connections()
+        conn.close()
+
+    return {'config': vars(args), 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=50, help='Responses per upload')
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--miners-per-challenge', type=int, default=10)
+    parser.add_argument('--patch-bytes', type=int, default=2000)
+    parser.add_argument('--retries', type=int, default=3, help='Times each upload is re-sent')
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+    if args.batch_size < args.miners_per_challenge or args.miners_per_challenge > args.miners:
+        parser.error('--miners-per-challenge must be at most --batch-size and --miners')
+
+    with LocalPostgres() as db_env:
+        report = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark rolling-window miner statistics against the miner responses CTE.
+
+Usage:
+    python -m benchmarks.rolling_window --miners 150 --responses-per-hour 200
+    python -m benchmarks.rolling_window --sql   # also time the SQL CTE (uses AWS_RDS_* env vars)
+
+The in-memory part runs on a synthetic week of responses, after checking each window
+against a brute-force pass with the CTE's exact `NOW() - INTERVAL` cutoff. The SQL part runs the
+uncached `get_miner_responses` query against whatever database the environment points at.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.utils.rolling_stats import RollingMinerStats
+
+WINDOWS = [1, 24, 24 * 7]
+
+
+def _time_calls(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[int(len(samples) * 0.95) - 1] if len(samples) > 1 else samples[0],
+    }
+
+
+def build_engine(miners: int, responses_per_hour: int, seed: int):
+    """Returns the engine and the (miner_hotkey, completed_at, score) rows recorded in it."""
+    rng = random.Random(seed)
+    engine = RollingMinerStats(retention_hours=24 * 7)
+    now = datetime.now(timezone.utc)
+    hotkeys = [f"5Miner{index:044d}" for index in range(miners)]
+    rows = []
+    for hour in range(engine.retention_hours):
+        for index in range(responses_per_hour):
+            completed_at = now - timedelta(hours=hour, seconds=rng.randint(0, 3599))
+            miner_hotkey, score = rng.choice(hotkeys), rng.random()
+            engine.record(f"challenge-{hour}-{index}", miner_hotkey, completed_at, score)
+            rows.append((miner_hotkey, completed_at, score))
+    engine.mark_loaded(now - timedelta(hours=engine.retention_hours))
+    return engine, rows
+
+
+def check_engine(engine: RollingMinerStats, rows) -> None:
+    for hours in WINDOWS:
+        window = engine.window(hours)
+        start = datetime.now(timezone.utc) - timedelta(hours=hours)
+        expected = {}
+        for miner_hotkey, completed_at, score in rows:
+            if completed_at >= start:
+                expected.setdefault(miner_hotkey, []).append(score)
+        assert set(window) == set(expected), f"window={hours}h selected different miners"
+        for miner_hotkey, scores in expected.items():
+            stats = window[miner_hotkey]
+            assert stats.response_count == len(scores), f"window={hours}h count mismatch for {miner_hotkey}"
+            assert abs(stats.score_sum - sum(scores)) < 1e-6, f"window={hours}h sum mismatch for {miner_hotkey}"
+            assert (stats.min_score, stats.max_score) == (min(scores), max(scores))
+    print(f"Windows {WINDOWS} match the exact cutoff")
+
+
+def bench_engine(engine: RollingMinerStats, repeat: int) -> None:
+    print(f"In-memory rolling stats ({engine.get_stats()['responses']} responses, {engine.get_stats()['buckets']} buckets)")
+    for hours in WINDOWS:
+        timing = _time_calls(lambda: engine.query(hours=hours, sort_by_score=True, max_miners=150), repeat)
+        print(f"  window={hours:>4}h  median={timing['median_ms']:.3f}ms  p95={timing['p95_ms']:.3f}ms")
+
+
+def bench_sql(repeat: int) -> None:
+    from src.db.operations import DatabaseManager
+
+    db = DatabaseManager()
+    uncached_get_miner_responses = DatabaseManager.get_miner_responses.__wrapped__
+    print("SQL miner responses CTE (uncached)")
+    for hours in WINDOWS:
+        timing = _time_calls(lambda: uncached_get_miner_responses(db, hours=hours, sort_by_score=True, max_miners=150), repeat)
+        print(f"  window={hours:>4}h  median={timing['median_ms']:.3f}ms  p95={timing['p95_ms']:.3f}ms")
+    db.close_all_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--miners', type=int, default=150)
+    parser.add_argument('--responses-per-hour', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sql', action='store_true', help='Also time the SQL CTE against the configured database')
+    args = parser.parse_args()
+
+    engine, rows = build_engine(args.miners, args.responses_per_hour, args.seed)
+    check_engine(engine, rows)
+    bench_engine(engine, args.repeat)
+    if args.sql:
+        bench_sql(max(1, args.repeat // 10))
+
+
+if __name__ == '__main__':
+    main()
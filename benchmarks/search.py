@@ -0,0 +1,235 @@
+"""
+Benchmark full-text search over challenges and response patches.
+
+Usage:
+    python -m benchmarks.search --patches 1000000             # temporary Postgres, 1M distinct patches
+    python -m benchmarks.search --patches 100000 --repeats 50 --output search.json
+    python -m benchmarks.search --use-env --no-load           # reuse a database loaded by an earlier run
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) and bulk-loads challenges and one
+codegen response per distinct patch. Patch and problem statement words are drawn from a Zipf-distributed
+vocabulary, so queries can target rare, medium and common terms. Loading goes through COPY and the same
+to_tsvector() expression as ingestion, with the GIN indexes in place, so the load rate is the cost of
+incremental index maintenance. Queries run through DatabaseManager.search_challenges/search_responses.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from benchmarks.e2e import percentile
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import miner_hotkey, validator_hotkey
+
+STEMS = ['parse', 'cache', 'retry', 'token', 'buffer', 'schema', 'socket', 'render', 'queue', 'config', 'encode', 'merge']
+
+
+def vocabulary(size: int):
+    words = [f"{STEMS[index % len(STEMS)]}{index}" for index in range(size)]
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(size)))
+    return words, cum_weights
+
+
+def make_text(rng: random.Random, words, cum_weights, target_bytes: int, patch: bool) -> str:
+    lines = [f"diff --git a/src/{rng.choice(words[:200])}.py b/src/{rng.choice(words[:200])}.py\n"] if patch else []
+    size = 0
+    while size < target_bytes:
+        a, b, c = rng.choices(words, cum_weights=cum_weights, k=3)
+        line = f"{rng.choice('+-')}    {a} = {b}({c})\n" if patch else f"{a} {b} {c} "
+        lines.append(line)
+        size += len(line)
+    return ''.join(lines)
+
+
+def copy_rows(cursor, table: str, columns: str, rows) -> None:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(
+            '\\N' if value is None else str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+            for value in row
+        ) + '\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+def load(db, args, words, cum_weights) -> dict:
+    """Bulk-load challenges and responses. Each response gets its own patch."""
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    per_challenge = max(1, args.patches // args.challenges)
+    conn = db.get_connection()
+    conn.autocommit = True
+    timings = {}
+    try:
+        with conn.cursor() as cursor:
+            start = time.perf_counter()
+            challenge_rows, codegen_rows = [], []
+            for index in range(args.challenges):
+                challenge_id = f"search-challenge-{index:08d}"
+                created_at = now - timedelta(seconds=rng.randint(0, 30 * 86400))
+                challenge_rows.append((challenge_id, 'codegen', validator_hotkey(index % args.validators), created_at))
+                codegen_rows.append((
+                    challenge_id, make_text(rng, words, cum_weights, args.statement_bytes, patch=False), '[]',
+                    f"https://github.com/example/{words[index % 500]}-service", None, '[]'
+                ))
+            copy_rows(cursor, 'challenges', 'challenge_id, type, validator_hotkey, created_at', challenge_rows)
+            copy_rows(cursor, 'codegen_challenges', 'challenge_id, problem_statement, dynamic_checklist, repository_url, commit_hash, context_file_paths', codegen_rows)
+            timings['challenges_s'] = time.perf_counter() - start
+
+            cursor.execute("CREATE TEMP TABLE bench_patches (index INTEGER, patch TEXT)")
+            start = time.perf_counter()
+            generate_s = 0.0
+            for batch_start in range(0, args.patches, args.batch_size):
+                generate_start = time.perf_counter()
+                rows = [
+                    (index, make_text(rng, words, cum_weights, int(rng.lognormvariate(0, 0.5) * args.patch_bytes), patch=True))
+                    for index in range(batch_start, min(batch_start + args.batch_size, args.patches))
+                ]
+                generate_s += time.perf_counter() - generate_start
+                copy_rows(cursor, 'bench_patches', 'index, patch', rows)
+                cursor.execute("""
+                    INSERT INTO response_patches (patch_hash, patch, size, search_vector)
+                    SELECT encode(sha256(convert_to(patch, 'UTF8')), 'hex'), patch, octet_length(patch), to_tsvector('simple', left(patch, 100000))
+                    FROM bench_patches
+                    ON CONFLICT (patch_hash) DO NOTHING
+                """)
+                cursor.execute("""
+                    INSERT INTO responses (challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, evaluated, score, evaluated_at)
+                    SELECT
+                        'search-challenge-' || lpad((index / %(per)s %% %(challenges)s)::text, 8, '0'),
+                        '5Miner' || lpad((index %% %(per)s)::text, 42, '0'),
+                        index %% %(per)s, 30, %(now)s - (index %% 2592000) * INTERVAL '1 second', %(now)s - (index %% 2592000) * INTERVAL '1 second',
+                        TRUE, random(), %(now)s
+                    FROM bench_patches
+                    ON CONFLICT DO NOTHING
+                """, {'per': per_challenge, 'challenges': args.challenges, 'now': now})
+                cursor.execute("""
+                    INSERT INTO codegen_responses (challenge_id, miner_hotkey, patch_hash)
+                    SELECT
+                        'search-challenge-' || lpad((index / %(per)s %% %(challenges)s)::text, 8, '0'),
+                        '5Miner' || lpad((index %% %(per)s)::text, 42, '0'),
+                        encode(sha256(convert_to(patch, 'UTF8')), 'hex')
+                    FROM bench_patches
+                    ON CONFLICT DO NOTHING
+                """, {'per': per_challenge, 'challenges': args.challenges})
+                cursor.execute("TRUNCATE bench_patches")
+                done = min(batch_start + args.batch_size, args.patches)
+                print(f"  loaded {done}/{args.patches} patches ({done / (time.perf_counter() - start - generate_s):.0f}/s in the database)", end='\r')
+            print()
+            timings['patches_s'] = time.perf_counter() - start - generate_s
+            timings['patches_per_s'] = args.patches / timings['patches_s']
+            cursor.execute("ANALYZE")
+            cursor.execute("""
+                SELECT pg_relation_size('idx_response_patches_search'), pg_relation_size('idx_codegen_challenges_search'),
+                       pg_total_relation_size('response_patches')
+            """)
+            patch_index, challenge_index, patch_table = cursor.fetchone()
+            timings.update({
+                'patch_index_mb': patch_index / 2**20,
+                'challenge_index_mb': challenge_index / 2**20,
+                'response_patches_total_mb': patch_table / 2**20,
+            })
+    finally:
+        db.return_connection(conn)
+    return timings
+
+
+def query_scenarios(words, args):
+    """(name, search method, term generator, extra kwargs)"""
+    size = len(words)
+    rare = lambda rng: rng.choice(words[size // 2:])
+    medium = lambda rng: rng.choice(words[100:1000])
+    common = lambda rng: rng.choice(words[:10])
+    return [
+        ('responses: rare term', 'search_responses', rare, {}),
+        ('responses: medium term', 'search_responses', medium, {}),
+        ('responses: common term', 'search_responses', common, {}),
+        ('responses: two medium terms (AND)', 'search_responses', lambda rng: f"{medium(rng)} {medium(rng)}", {}),
+        ('responses: medium term OR rare term', 'search_responses', lambda rng: f"{medium(rng)} or {rare(rng)}", {}),
+        ('responses: medium term, one miner', 'search_responses', medium, {'miner_hotkey': miner_hotkey(7)}),
+        ('responses: medium term, last 24h', 'search_responses', medium, {'since': datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=24)}),
+        ('responses: medium term, page 5', 'search_responses', medium, {'offset': 80}),
+        ('challenges: rare term', 'search_challenges', rare, {}),
+        ('challenges: medium term', 'search_challenges', medium, {}),
+        ('challenges: common term', 'search_challenges', common, {}),
+    ]
+
+
+def run_queries(db, words, args) -> list:
+    rng = random.Random(args.seed + 1)
+    results = []
+    for name, method, term, kwargs in query_scenarios(words, args):
+        search = getattr(db, method)
+        search(term(rng), limit=21, **kwargs)  # warm-up
+        latencies, counts = [], []
+        for _ in range(args.repeats):
+            query = term(rng)
+            start = time.perf_counter()
+            rows = search(query, limit=21, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+            counts.append(len(rows))
+        result = {
+            'scenario': name,
+            'p50_ms': percentile(latencies, 0.5),
+            'p95_ms': percentile(latencies, 0.95),
+            'max_ms': max(latencies),
+            'mean_results': statistics.fmean(counts),
+        }
+        results.append(result)
+        print(f"{name:<42} p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  max {result['max_ms']:8.1f}ms  results {result['mean_results']:5.1f}")
+    return results
+
+
+def run(args, db_env: dict) -> dict:
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    words, cum_weights = vocabulary(args.vocabulary)
+    report = {'config': vars(args)}
+    if not args.no_load:
+        report['load'] = load(db, args, words, cum_weights)
+        print(json.dumps(report['load'], indent=2))
+    report['queries'] = run_queries(db, words, args)
+    db.close_all_connections()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patches', type=int, default=1_000_000, help='Distinct patches (one response each)')
+    parser.add_argument('--challenges', type=int, default=10_000)
+    parser.add_argument('--validators', type=int, default=10)
+    parser.add_argument('--vocabulary', type=int, default=50_000, help='Distinct identifiers used in patches and problem statements')
+    parser.add_argument('--patch-bytes', type=int, default=800, help='Median patch size in bytes')
+    parser.add_argument('--statement-bytes', type=int, default=1500)
+    parser.add_argument('--batch-size', type=int, default=20_000)
+    parser.add_argument('--repeats', type=int, default=30, help='Queries per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--use-env', action='store_true', help='Use the database in the AWS_RDS_* env vars instead of a temporary cluster')
+    parser.add_argument('--no-load', action='store_true', help='Skip loading (with --use-env, reuse an already loaded database)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    if args.use_env:
+        from src.utils.config import load_env
+        load_env()
+        keys = ['AWS_RDS_PLATFORM_ENDPOINT', 'AWS_RDS_PORT', 'AWS_MASTER_USERNAME', 'AWS_MASTER_PASSWORD', 'AWS_RDS_PLATFORM_DB_NAME', 'AWS_RDS_SSLMODE']
+        report = run(args, {key: os.environ[key] for key in keys if key in os.environ})
+    else:
+        with LocalPostgres() as db_env:
+            report = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
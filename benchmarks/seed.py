@@ -0,0 +1,135 @@
+"""
+Seed a database with a synthetic subnet dataset through DatabaseManager's store_* methods.
+
+Usage:
+    python -m benchmarks.seed --challenges 500 --miners 150 --validators 10
+
+Uses the AWS_RDS_* environment variables, like the API. Challenges are spread over the last
+--days days; each challenge gets a response from --responses-per-challenge random miners with
+lognormally sized patches (some copied between miners), and every validator posts a score for
+every miner per score type.
+"""
+
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.patch_dedup import make_patch
+from src.db.models import CodegenChallenge, CodegenResponse, Score
+from src.db.operations import DatabaseManager
+
+SCORE_TYPES = ['trueskill', 'float_grader', 'weight']
+
+
+@dataclass
+class SeedConfig:
+    challenges: int = 200
+    miners: int = 150
+    validators: int = 10
+    responses_per_challenge: int = 40
+    days: int = 7
+    patch_bytes_median: int = 3000
+    copy_rate: float = 0.3
+    batch_size: int = 200
+    seed: int = 0
+
+
+def miner_hotkey(index: int) -> str:
+    return f"5Miner{index:042d}"
+
+
+def validator_hotkey(index: int) -> str:
+    return f"5Validator{index:038d}"
+
+
+def generate(config: SeedConfig):
+    """Yield (challenges, responses, scores) batches for the configured dataset."""
+    rng = random.Random(config.seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    miners = [miner_hotkey(index) for index in range(config.miners)]
+    validators = [validator_hotkey(index) for index in range(config.validators)]
+    sigma = 0.6
+
+    challenges, responses = [], []
+    for index in range(config.challenges):
+        created_at = now - timedelta(seconds=rng.randint(0, config.days * 86400))
+        challenge = CodegenChallenge(
+            challenge_id=f"bench-challenge-{index:08d}",
+            type='codegen',
+            validator_hotkey=rng.choice(validators),
+            created_at=created_at,
+            problem_statement=f"Fix the failing behaviour in module {index % 97}: " + ' '.join(rng.choice(['parser', 'cache', 'retry', 'timeout', 'encoding', 'pagination']) for _ in range(60)),
+            dynamic_checklist='["tests pass", "no regressions"]',
+            repository_url=f"https://github.com/example/repo-{index % 25}",
+            commit_hash=f"{rng.getrandbits(160):040x}",
+            context_file_paths='["src/main.py"]',
+        )
+        challenges.append(challenge)
+
+        popular = make_patch(rng, int(rng.lognormvariate(0, sigma) * config.patch_bytes_median))
+        for miner in rng.sample(miners, min(config.responses_per_challenge, len(miners))):
+            received_at = created_at + timedelta(seconds=rng.randint(1, 60))
+            completed_at = received_at + timedelta(seconds=rng.randint(5, 600))
+            patch = popular if rng.random() < config.copy_rate else make_patch(rng, int(rng.lognormvariate(0, sigma) * config.patch_bytes_median))
+            responses.append(CodegenResponse(
+                challenge_id=challenge.challenge_id,
+                miner_hotkey=miner,
+                node_id=miners.index(miner),
+                processing_time=(completed_at - received_at).total_seconds(),
+                received_at=received_at,
+                completed_at=completed_at,
+                evaluated=True,
+                score=rng.random(),
+                evaluated_at=completed_at + timedelta(seconds=rng.randint(1, 120)),
+                response_patch=patch,
+            ))
+
+        if len(challenges) >= config.batch_size:
+            yield challenges, responses, []
+            challenges, responses = [], []
+
+    if challenges:
+        yield challenges, responses, []
+
+    scores = [
+        Score(type=score_type, validator_hotkey=validator, miner_hotkey=miner, score=rng.random())
+        for score_type in SCORE_TYPES
+        for validator in validators
+        for miner in miners
+    ]
+    for start in range(0, len(scores), config.batch_size):
+        yield [], [], scores[start:start + config.batch_size]
+
+
+def seed(db: DatabaseManager, config: SeedConfig) -> dict:
+    """Store the synthetic dataset. Returns row counts."""
+    counts = {'challenges': 0, 'responses': 0, 'scores': 0}
+    for challenges, responses, scores in generate(config):
+        if challenges:
+            db.store_codegen_challenges(challenges)
+            counts['challenges'] += len(challenges)
+        for start in range(0, len(responses), config.batch_size):
+            batch = responses[start:start + config.batch_size]
+            db.store_codegen_responses(batch)
+            counts['responses'] += len(batch)
+        if scores:
+            db.store_scores(scores)
+            counts['scores'] += len(scores)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = SeedConfig()
+    for field, default in vars(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    config = SeedConfig(**vars(parser.parse_args()))
+
+    db = DatabaseManager()
+    print(seed(db, config))
+    db.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure API process cold start: import cost and time to first successful request.
+
+Usage:
+    python -m benchmarks.startup                 # import time breakdown + time to first request
+    python -m benchmarks.startup --top 25 --port 8099
+
+Import cost comes from `python -X importtime -c "import src.main"`. Time to first request
+launches uvicorn in a subprocess and polls /docs until it answers. The database is only
+touched from the lifespan hook, so both numbers are meaningful without a reachable database.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def import_time(top: int) -> None:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.main'],
+        capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # import time:       self [us] |  cumulative | imported package
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        entries.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    total_us = max(cumulative for cumulative, _, name in entries if name.strip() == 'src.main')
+    print(f"import src.main: {total_us / 1000:.1f}ms cumulative")
+    print(f"  top {top} imports by cumulative time:")
+    for cumulative, self_us, name in sorted(entries, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:9.1f}ms  {self_us / 1000:8.1f}ms self  {name}")
+
+
+def time_to_first_request(port: int, timeout: float) -> None:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(port), '--log-level', 'warning'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/docs", timeout=1) as response:
+                    if response.status == 200:
+                        print(f"time to first request: {(time.perf_counter() - start) * 1000:.1f}ms")
+                        return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        print(f"server did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    import_time(args.top)
+    time_to_first_request(args.port, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
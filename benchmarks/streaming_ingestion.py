@@ -0,0 +1,157 @@
+"""
+Benchmark server memory for large response uploads, buffered versus streamed.
+
+Usage:
+    python -m benchmarks.streaming_ingestion
+    python -m benchmarks.streaming_ingestion --items 10000 100000 --patch-bytes 1000 --output streaming.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py). For each upload size in --items and
+each route, a fresh API server is started under uvicorn and sent one upload of that many codegen
+responses to /ingestion/codegen-responses (parsed as a whole) or /ingestion/codegen-responses/stream
+(parsed and stored incrementally). The body is generated and sent chunked, so the client never holds
+it. Reports the server's peak RSS above its idle RSS, and the upload time.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.e2e import Client, rss_mb, wait_for_server
+from benchmarks.patch_dedup import make_patch
+from benchmarks.postgres import LocalPostgres
+from benchmarks.seed import miner_hotkey, validator_hotkey
+
+ROUTES = ('/ingestion/codegen-responses', '/ingestion/codegen-responses/stream')
+
+
+def json_array(items, batch: int = 100):
+    """Encode items as a JSON array, a few items per chunk."""
+    yield b'['
+    first = True
+    pending = []
+    for item in items:
+        pending.append(json.dumps(item))
+        if len(pending) == batch:
+            yield ((',' if not first else '') + ','.join(pending)).encode()
+            first, pending = False, []
+    if pending:
+        yield ((',' if not first else '') + ','.join(pending)).encode()
+    yield b']'
+
+
+def challenges(prefix: str, count: int, now: datetime):
+    for index in range(count):
+        yield {
+            'challenge_id': f"{prefix}-{index:06d}",
+            'type': 'codegen',
+            'validator_hotkey': validator_hotkey(0),
+            'created_at': (now - timedelta(hours=1)).isoformat(),
+            'problem_statement': 'Fix the failing behaviour',
+            'dynamic_checklist': '["tests pass"]',
+            'repository_url': 'https://github.com/example/repo',
+            'commit_hash': None,
+            'context_file_paths': '["src/main.py"]',
+        }
+
+
+def responses(prefix: str, count: int, args, patches: list, now: datetime):
+    rng = random.Random(args.seed)
+    for index in range(count):
+        challenge, miner = divmod(index, args.miners)
+        completed_at = now - timedelta(minutes=30)
+        yield {
+            'challenge_id': f"{prefix}-{challenge:06d}",
+            'miner_hotkey': miner_hotkey(miner),
+            'node_id': miner,
+            'processing_time': 60.0,
+            'received_at': (completed_at - timedelta(seconds=60)).isoformat(),
+            'completed_at': completed_at.isoformat(),
+            'evaluated': True,
+            'score': rng.random(),
+            'evaluated_at': (completed_at + timedelta(seconds=30)).isoformat(),
+            'response_patch': rng.choice(patches),
+        }
+
+
+def upload(port: int, path: str, chunks) -> tuple:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=3600)
+    try:
+        conn.request('POST', path, body=chunks, headers={'Content-Type': 'application/json'}, encode_chunked=True)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def run(args, db_env: dict) -> list:
+    os.environ.update(db_env)
+    env = {**os.environ, **db_env, 'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY', '')}
+    rng = random.Random(args.seed)
+    patches = [make_patch(rng, args.patch_bytes) for _ in range(args.distinct_patches)]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    results = []
+    for items in args.items:
+        for path in ROUTES:
+            prefix = f"stream-{items}-{'stream' if path.endswith('/stream') else 'buffered'}"
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(args.port), '--log-level', 'warning'],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None
+            )
+            try:
+                wait_for_server(Client(args.port))
+                status, body = upload(args.port, '/ingestion/codegen-challenges/stream', json_array(challenges(prefix, -(-items // args.miners), now)))
+                if status != 200:
+                    raise RuntimeError(f"storing challenges returned {status}: {body[:200]}")
+                time.sleep(1)
+                idle = rss_mb(server.pid)
+                start = time.perf_counter()
+                status, body = upload(args.port, path, json_array(responses(prefix, items, args, patches, now)))
+                seconds = time.perf_counter() - start
+                if status != 200:
+                    raise RuntimeError(f"{path} returned {status}: {body[:200]}")
+                peak = rss_mb(server.pid)
+            finally:
+                server.terminate()
+                server.wait()
+            result = {
+                'items': items,
+                'route': path,
+                'idle_rss_mb': idle['rss_mb'],
+                'peak_rss_mb': peak['peak_rss_mb'],
+                'peak_above_idle_mb': peak['peak_rss_mb'] - idle['rss_mb'],
+                'seconds': seconds,
+            }
+            print(f"{items:>7} items  {path:<40} peak +{result['peak_above_idle_mb']:7.1f}MB (idle {idle['rss_mb']:.0f}MB)  {seconds:6.1f}s")
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, nargs='+', default=[10_000, 100_000], help='Responses per upload')
+    parser.add_argument('--patch-bytes', type=int, default=1000)
+    parser.add_argument('--distinct-patches', type=int, default=1000, help='Patches are drawn from this many distinct texts')
+    parser.add_argument('--miners', type=int, default=50, help='Responses per challenge')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show server logs')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        results = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), 'results': results}, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
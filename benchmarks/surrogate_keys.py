@@ -0,0 +1,381 @@
+"""
+Compare the response tables keyed on text identifiers with the same tables keyed on integer surrogate keys.
+
+Usage:
+    python -m benchmarks.surrogate_keys
+    python -m benchmarks.surrogate_keys --responses 1000000 --miners 250 --repeat 5 --output surrogate_keys.json
+
+Starts a temporary Postgres cluster (see benchmarks/postgres.py) whose schema keys responses and
+codegen_responses on (challenge_key, miner_key), and fills it with --responses graded responses: every
+one of --miners miners (SS58-length hotkeys) answering every challenge (UUID challenge IDs), spread over
+--days days. The same rows are copied into a text_keys schema holding the tables as they were before
+008_surrogate_keys.sql, keyed and indexed on (challenge_id, miner_hotkey). Both layouts' indexes are
+built after loading. Reports the size of every index and table, then times each query --repeat times
+against both: the text-keyed queries as they were, and the keyed ones through the uncached
+DatabaseManager methods. Exits non-zero if any pair of queries returns different results.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import psycopg2
+
+from benchmarks.e2e import percentile
+from benchmarks.postgres import LocalPostgres
+
+TABLES = ['responses', 'codegen_responses']
+
+TEXT_KEYED_SCHEMA = """
+    CREATE SCHEMA text_keys;
+    CREATE TABLE text_keys.responses (
+        challenge_id TEXT NOT NULL,
+        miner_hotkey TEXT NOT NULL,
+        node_id INTEGER,
+        processing_time DOUBLE PRECISION,
+        received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        evaluated BOOLEAN DEFAULT FALSE,
+        score DOUBLE PRECISION,
+        evaluated_at TIMESTAMP,
+        change_seq BIGINT NOT NULL,
+        changed_at TIMESTAMPTZ NOT NULL
+    );
+    CREATE TABLE text_keys.codegen_responses (
+        challenge_id TEXT NOT NULL,
+        miner_hotkey TEXT NOT NULL,
+        response_patch TEXT,
+        patch_hash TEXT
+    );
+"""
+
+TEXT_KEYED_INDEXES = """
+    ALTER TABLE text_keys.responses ADD PRIMARY KEY (challenge_id, miner_hotkey);
+    ALTER TABLE text_keys.codegen_responses ADD PRIMARY KEY (challenge_id, miner_hotkey);
+    ALTER TABLE text_keys.codegen_responses ADD FOREIGN KEY (challenge_id, miner_hotkey) REFERENCES text_keys.responses (challenge_id, miner_hotkey);
+    CREATE INDEX idx_responses_evaluated_completed_at ON text_keys.responses (completed_at) WHERE evaluated = TRUE AND score IS NOT NULL;
+    CREATE INDEX idx_responses_miner_completed_at ON text_keys.responses (miner_hotkey, completed_at);
+    CREATE INDEX idx_responses_change_seq ON text_keys.responses (change_seq) INCLUDE (changed_at, challenge_id, miner_hotkey);
+    CREATE INDEX idx_codegen_responses_patch_hash ON text_keys.codegen_responses (patch_hash);
+"""
+
+JOIN_COUNT = {
+    'text': """
+        SELECT COUNT(*) FROM responses r
+        JOIN codegen_responses cr ON r.challenge_id = cr.challenge_id AND r.miner_hotkey = cr.miner_hotkey
+        WHERE r.evaluated = TRUE AND r.score IS NOT NULL
+    """,
+    'keys': """
+        SELECT COUNT(*) FROM responses r
+        JOIN codegen_responses cr ON r.challenge_key = cr.challenge_key AND r.miner_key = cr.miner_key
+        WHERE r.evaluated = TRUE AND r.score IS NOT NULL
+    """,
+}
+
+# get_codegen_challenge_responses and get_codegen_challenges (response counts) as they were
+TEXT_CHALLENGE_RESPONSES = """
+    SELECT r.miner_hotkey, r.node_id, r.processing_time, r.received_at, r.completed_at, r.evaluated, r.score, r.evaluated_at, cr.response_patch, cr.patch_hash
+    FROM responses r
+    JOIN codegen_responses cr ON r.challenge_id = cr.challenge_id AND r.miner_hotkey = cr.miner_hotkey
+    WHERE r.challenge_id = %s AND r.evaluated = TRUE AND r.score IS NOT NULL
+    ORDER BY r.completed_at DESC
+"""
+TEXT_CHALLENGE_COUNTS = """
+    SELECT c.challenge_id, COUNT(r.challenge_id)
+    FROM challenges c
+    INNER JOIN codegen_challenges cc ON c.challenge_id = cc.challenge_id
+    LEFT JOIN responses r ON c.challenge_id = r.challenge_id AND r.evaluated = TRUE AND r.score IS NOT NULL
+    WHERE c.type = 'codegen'
+    GROUP BY c.challenge_id
+"""
+
+
+def text_miner_responses(cursor, miner_hotkey: str = None, max_miners: int = 5, hours: int = 24, sort_by_score: bool = False) -> list:
+    """get_miner_responses as it was, grouping and joining on the text columns."""
+    query = """
+        WITH time_bucket AS (
+            SELECT r.miner_hotkey, r.challenge_id, r.node_id, r.processing_time, r.received_at, r.completed_at,
+                r.evaluated, r.score, r.evaluated_at, cr.response_patch, cr.patch_hash
+            FROM responses r
+            JOIN codegen_responses cr ON r.challenge_id = cr.challenge_id AND r.miner_hotkey = cr.miner_hotkey
+            WHERE r.evaluated = TRUE AND r.score IS NOT NULL
+    """
+    params = []
+    if hours != -1:
+        query += " AND r.completed_at >= NOW() - INTERVAL '%s hours'"
+        params.append(hours)
+    if miner_hotkey:
+        query += " AND r.miner_hotkey = %s"
+        params.append(miner_hotkey)
+    query += """
+        ),
+        miner_stats AS (
+            SELECT miner_hotkey, COUNT(*) AS response_count, AVG(score) AS average_score
+            FROM time_bucket GROUP BY miner_hotkey HAVING COUNT(*) >= 0 AND AVG(score) >= 0
+        ),
+        miner_responses AS (
+            SELECT t.miner_hotkey, json_agg(json_build_object(
+                'challenge_id', t.challenge_id, 'miner_hotkey', t.miner_hotkey, 'node_id', t.node_id,
+                'processing_time', t.processing_time, 'received_at', t.received_at, 'completed_at', t.completed_at,
+                'evaluated', t.evaluated, 'score', t.score, 'evaluated_at', t.evaluated_at,
+                'response_patch', t.response_patch, 'patch_hash', t.patch_hash
+            ) ORDER BY t.completed_at DESC) AS responses
+            FROM time_bucket t JOIN miner_stats ms ON t.miner_hotkey = ms.miner_hotkey
+            GROUP BY t.miner_hotkey
+        )
+        SELECT mr.miner_hotkey, ms.response_count, ms.average_score, mr.responses
+        FROM miner_responses mr JOIN miner_stats ms ON mr.miner_hotkey = ms.miner_hotkey
+    """
+    query += " ORDER BY ms.average_score DESC, mr.miner_hotkey" if sort_by_score else " ORDER BY mr.miner_hotkey"
+    query += " LIMIT %s"
+    params.append(max_miners)
+    cursor.execute(query, params)
+    return [
+        {'miner_hotkey': row[0], 'response_count': row[1], 'average_score': row[2], 'responses': row[3]}
+        for row in cursor.fetchall()
+    ]
+
+
+def load(cursor, args) -> dict:
+    challenges = args.responses // args.miners
+    cursor.execute("SELECT setseed(%s)", (args.seed / 2**31,))
+    # SS58-length (48 character) hotkeys and UUID challenge IDs, as on the subnet
+    cursor.execute("""
+        INSERT INTO hotkeys (hotkey)
+        SELECT '5' || left(translate(encode(sha256(('miner-' || index)::bytea), 'base64'), '+/=0OIl', 'abcdefg'), 47)
+        FROM generate_series(0, %s) AS index
+        ORDER BY index
+    """, (args.miners - 1,))
+    cursor.execute("""
+        INSERT INTO challenges (challenge_id, type, validator_hotkey, created_at)
+        SELECT md5('challenge-' || index)::uuid::text, 'codegen', '5Validator', NOW() - make_interval(secs => (%s - index) * %s * 86400.0 / %s)
+        FROM generate_series(0, %s) AS index
+    """, (challenges, args.days, challenges, challenges - 1))
+    cursor.execute("""
+        INSERT INTO codegen_challenges (challenge_id, problem_statement, dynamic_checklist, repository_url, context_file_paths)
+        SELECT challenge_id, 'Fix the bug', '[]', 'https://github.com/example/repo', '[]' FROM challenges
+    """)
+    cursor.execute("INSERT INTO challenge_keys (challenge_id) SELECT challenge_id FROM challenges ORDER BY created_at")
+    cursor.execute("""
+        INSERT INTO response_patches (patch_hash, patch, size)
+        SELECT md5('patch-' || index) || md5('hash-' || index), '+patch ' || index, 10
+        FROM generate_series(0, %s) AS index
+    """, (args.patches - 1,))
+    cursor.execute("""
+        INSERT INTO responses (challenge_key, miner_key, challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, evaluated, score, evaluated_at)
+        SELECT ck.id, h.id, c.challenge_id, h.hotkey, h.id, round((random() * 600)::numeric, 3), c.created_at, completed_at,
+            TRUE, CASE WHEN random() < 0.05 THEN NULL ELSE random() END, completed_at
+        FROM challenges c
+        JOIN challenge_keys ck ON ck.challenge_id = c.challenge_id
+        CROSS JOIN hotkeys h
+        CROSS JOIN LATERAL (SELECT c.created_at + random() * INTERVAL '1 hour' + h.id * INTERVAL '1 microsecond') AS generated (at)
+        -- Nothing completes in the hour after the 24h window starts, so its contents don't change while the benchmark runs
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN generated.at > NOW() - INTERVAL '24 hours' AND generated.at <= NOW() - INTERVAL '23 hours'
+                THEN generated.at - INTERVAL '1 hour' ELSE generated.at END
+        ) AS t (completed_at)
+    """)
+    cursor.execute("""
+        INSERT INTO codegen_responses (challenge_key, miner_key, challenge_id, miner_hotkey, patch_hash)
+        SELECT r.challenge_key, r.miner_key, r.challenge_id, r.miner_hotkey,
+            md5('patch-' || ((r.challenge_key * 7919 + r.miner_key) %% %s)) || md5('hash-' || ((r.challenge_key * 7919 + r.miner_key) %% %s))
+        FROM responses r
+    """, (args.patches, args.patches))
+    # Challenge listings read their response counts from here
+    cursor.execute("SELECT refresh_challenge_score_stats(array_agg(id)) FROM challenge_keys")
+
+    cursor.execute(TEXT_KEYED_SCHEMA)
+    cursor.execute("""
+        INSERT INTO text_keys.responses
+        SELECT challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, evaluated, score, evaluated_at, change_seq, changed_at
+        FROM responses
+    """)
+    cursor.execute("INSERT INTO text_keys.codegen_responses SELECT challenge_id, miner_hotkey, response_patch, patch_hash FROM codegen_responses")
+    # Both layouts' indexes built in bulk, so their sizes compare like for like
+    cursor.execute(TEXT_KEYED_INDEXES)
+    for table in TABLES:
+        cursor.execute(f"REINDEX TABLE {table}")
+    for table in TABLES + ['hotkeys', 'challenge_keys', 'challenges']:
+        cursor.execute(f"VACUUM ANALYZE {table}")
+        if table in TABLES:
+            cursor.execute(f"VACUUM ANALYZE text_keys.{table}")
+    return {'challenges': challenges, 'miners': args.miners, 'responses': challenges * args.miners}
+
+
+def sizes(cursor) -> dict:
+    """Bytes of each table and its indexes, in both layouts, plus the dictionaries."""
+    report = {}
+    for schema in ('text_keys', 'public'):
+        layout = 'text' if schema == 'text_keys' else 'keys'
+        report[layout] = {}
+        for table in TABLES:
+            cursor.execute("""
+                SELECT c.relname, pg_relation_size(i.indexrelid)
+                FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = %s::regclass
+                ORDER BY c.relname
+            """, (f"{schema}.{table}",))
+            indexes = dict(cursor.fetchall())
+            cursor.execute("SELECT pg_relation_size(%s::regclass)", (f"{schema}.{table}",))
+            report[layout][table] = {'heap': cursor.fetchone()[0], 'indexes': indexes}
+    cursor.execute("SELECT pg_total_relation_size('hotkeys') + pg_total_relation_size('challenge_keys')")
+    report['keys']['dictionaries'] = cursor.fetchone()[0]
+    return report
+
+
+def timed(fn, repeat: int):
+    result = fn()  # Warm-up, and the result compared between layouts
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, {'p50_ms': percentile(samples, 0.5), 'min_ms': min(samples), 'max_ms': max(samples)}
+
+
+def normalized(miners: list) -> list:
+    return [
+        (miner['miner_hotkey'], miner['response_count'], round(miner['average_score'], 9), sorted(miner['responses'], key=lambda response: response['challenge_id']))
+        for miner in miners
+    ]
+
+
+def run(args, db_env: dict) -> dict:
+    os.environ.update(db_env)
+    from src.db.operations import DatabaseManager
+    db = DatabaseManager()
+    text_conn = psycopg2.connect(
+        host=db_env['AWS_RDS_PLATFORM_ENDPOINT'], port=db_env['AWS_RDS_PORT'],
+        user=db_env['AWS_MASTER_USERNAME'], dbname=db_env['AWS_RDS_PLATFORM_DB_NAME']
+    )
+    text_conn.autocommit = True
+    text_cursor = text_conn.cursor()
+
+    start = time.perf_counter()
+    loaded = load(text_cursor, args)
+    print(f"loaded {loaded['responses']} responses ({loaded['challenges']} challenges x {loaded['miners']} miners) into both layouts in {time.perf_counter() - start:.1f}s")
+    text_cursor.execute("SET search_path = text_keys, public")
+
+    report = {'loaded': loaded, 'sizes': sizes(text_cursor), 'queries': {}}
+    print(f"\n{'table / index':<52} {'text keys':>12} {'integer keys':>14}")
+    totals = {'text': 0, 'keys': report['sizes']['keys']['dictionaries']}
+    for table in TABLES:
+        for layout in ('text', 'keys'):
+            totals[layout] += report['sizes'][layout][table]['heap'] + sum(report['sizes'][layout][table]['indexes'].values())
+        print(f"{table + ' (heap)':<52} {report['sizes']['text'][table]['heap'] / 2**20:>10.1f}MB {report['sizes']['keys'][table]['heap'] / 2**20:>12.1f}MB")
+        text_indexes = report['sizes']['text'][table]['indexes']
+        key_indexes = report['sizes']['keys'][table]['indexes']
+        for name in sorted(set(text_indexes) | set(key_indexes)):
+            text_size = f"{text_indexes[name] / 2**20:>10.1f}MB" if name in text_indexes else f"{'-':>12}"
+            key_size = f"{key_indexes[name] / 2**20:>12.1f}MB" if name in key_indexes else f"{'-':>14}"
+            print(f"  {name:<50} {text_size} {key_size}")
+        for layout in ('text', 'keys'):
+            report['sizes'][layout][table]['index_total'] = sum(report['sizes'][layout][table]['indexes'].values())
+        print(f"  {'all indexes':<50} {report['sizes']['text'][table]['index_total'] / 2**20:>10.1f}MB {report['sizes']['keys'][table]['index_total'] / 2**20:>12.1f}MB")
+    print(f"{'hotkeys + challenge_keys dictionaries':<52} {'-':>12} {report['sizes']['keys']['dictionaries'] / 2**20:>12.1f}MB")
+    print(f"{'total':<52} {totals['text'] / 2**20:>10.1f}MB {totals['keys'] / 2**20:>12.1f}MB")
+    report['sizes']['totals'] = totals
+
+    uncached_get_miner_responses = DatabaseManager.get_miner_responses.__wrapped__
+    uncached_get_challenge_responses = DatabaseManager.get_codegen_challenge_responses.__wrapped__
+    uncached_get_challenges = DatabaseManager.get_codegen_challenges.__wrapped__
+    text_cursor.execute("SELECT hotkey FROM hotkeys ORDER BY id LIMIT 1 OFFSET 7")
+    miner = text_cursor.fetchone()[0]
+    text_cursor.execute("SELECT challenge_id FROM challenges ORDER BY created_at DESC LIMIT 1 OFFSET 3")
+    challenge = text_cursor.fetchone()[0]
+
+    def keyed_join_count():
+        conn = db.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(JOIN_COUNT['keys'])
+                return cursor.fetchone()[0]
+        finally:
+            db.return_connection(conn)
+
+    def text_query(sql, params=None):
+        def run_query():
+            text_cursor.execute(sql, params)
+            return text_cursor.fetchall()
+        return run_query
+
+    scenarios = [
+        ('join responses to codegen_responses (count)', text_query(JOIN_COUNT['text']), keyed_join_count, lambda result: result if isinstance(result, int) else result[0][0]),
+        (
+            'miner responses, all time, top 5 by score',
+            lambda: text_miner_responses(text_cursor, hours=-1, max_miners=5, sort_by_score=True),
+            lambda: uncached_get_miner_responses(db, hours=-1, max_miners=5, sort_by_score=True),
+            normalized,
+        ),
+        (
+            'miner responses, 24h, top 150 by score',
+            lambda: text_miner_responses(text_cursor, hours=24, max_miners=150, sort_by_score=True),
+            lambda: uncached_get_miner_responses(db, hours=24, max_miners=150, sort_by_score=True),
+            normalized,
+        ),
+        (
+            'one miner, all time',
+            lambda: text_miner_responses(text_cursor, miner_hotkey=miner, hours=-1, max_miners=1),
+            lambda: uncached_get_miner_responses(db, miner_hotkey=miner, hours=-1, max_miners=1),
+            normalized,
+        ),
+        (
+            'one challenge\'s responses',
+            text_query(TEXT_CHALLENGE_RESPONSES, (challenge,)),
+            lambda: uncached_get_challenge_responses(db, challenge),
+            lambda result: sorted((row[0], row[6]) if isinstance(row, tuple) else (row['miner_hotkey'], row['score']) for row in result),
+        ),
+        (
+            'response counts of every challenge',
+            text_query(TEXT_CHALLENGE_COUNTS),
+            lambda: uncached_get_challenges(db),
+            lambda result: sorted(tuple(row) if isinstance(row, tuple) else (row['challenge_id'], row['response_count']) for row in result),
+        ),
+    ]
+
+    print(f"\n{'query':<48} {'text keys p50':>14} {'integer keys p50':>17} {'speedup':>8}")
+    mismatches = 0
+    for name, text_fn, keyed_fn, compare in scenarios:
+        text_result, text_timing = timed(text_fn, args.repeat)
+        keyed_result, keyed_timing = timed(keyed_fn, args.repeat)
+        same = compare(text_result) == compare(keyed_result)
+        mismatches += not same
+        report['queries'][name] = {'text': text_timing, 'keys': keyed_timing, 'same_results': same}
+        print(
+            f"{name:<48} {text_timing['p50_ms']:>12.1f}ms {keyed_timing['p50_ms']:>15.1f}ms "
+            f"{text_timing['p50_ms'] / keyed_timing['p50_ms']:>7.2f}x{'' if same else '  RESULTS DIFFER'}"
+        )
+    report['interning_stats'] = db.get_interning_stats()
+    report['mismatches'] = mismatches
+
+    text_conn.close()
+    db.close_all_connections()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=1_000_000)
+    parser.add_argument('--miners', type=int, default=250)
+    parser.add_argument('--days', type=int, default=30, help='Challenges are spread over this many days')
+    parser.add_argument('--patches', type=int, default=10_000, help='Distinct patches the responses refer to')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each query per layout')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    with LocalPostgres() as db_env:
+        report = run(args, db_env)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), **report}, output, indent=2, default=str)
+        print(f"wrote {args.output}")
+    if report['mismatches']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark ingestion wire formats: bytes uploaded and server-side decode time per 1k responses.
+
+Usage:
+    python -m benchmarks.wire_formats
+    python -m benchmarks.wire_formats --responses 1000 --repeats 20 --output wire_formats.json
+
+Generates --responses codegen responses with synthetic patches (lognormal sizes, as in
+benchmarks/patch_dedup.py) and encodes them as JSON and MessagePack, each uncompressed, gzip'd and
+zstd'd. For each encoding it reports the upload size, the client's encode time and the server's decode
+time, all scaled to 1k responses. Decoding runs through IngestionRequest the way the ingestion routes do:
+the body arrives in 64KB messages, and either the buffered routes' parse (json() and validation of the
+whole list, as FastAPI does it) or the streaming routes' parse (array_reader() and per-item validation).
+No database is involved.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import msgpack
+import zstandard
+from pydantic import TypeAdapter
+
+from benchmarks.patch_dedup import make_patch
+from benchmarks.seed import miner_hotkey
+from src.db.models import CodegenResponse
+from src.utils.wire_formats import IngestionRequest
+
+MESSAGE_BYTES = 64 * 1024
+
+ENCODINGS = [
+    ('json', 'application/json', None),
+    ('json + gzip', 'application/json', 'gzip'),
+    ('json + zstd', 'application/json', 'zstd'),
+    ('msgpack', 'application/msgpack', None),
+    ('msgpack + gzip', 'application/msgpack', 'gzip'),
+    ('msgpack + zstd', 'application/msgpack', 'zstd'),
+]
+
+
+def generate(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    responses = []
+    for index in range(count):
+        completed_at = now - timedelta(minutes=rng.randint(1, 600))
+        responses.append({
+            'challenge_id': f"wire-challenge-{index // 10:05d}",
+            'miner_hotkey': miner_hotkey(rng.randrange(250)),
+            'node_id': rng.randrange(250),
+            'processing_time': rng.uniform(5, 300),
+            'received_at': (completed_at - timedelta(seconds=60)).isoformat(),
+            'completed_at': completed_at.isoformat(),
+            'evaluated': True,
+            'score': rng.random(),
+            'evaluated_at': (completed_at + timedelta(seconds=30)).isoformat(),
+            'response_patch': make_patch(rng, int(rng.lognormvariate(8, 0.6))),
+        })
+    return responses
+
+
+def encode(responses: list, content_type: str, encoding: str) -> bytes:
+    body = msgpack.packb(responses) if content_type == 'application/msgpack' else json.dumps(responses).encode()
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return body
+
+
+def request_for(body: bytes, content_type: str, encoding: str) -> IngestionRequest:
+    headers = [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())]
+    if encoding:
+        headers.append((b'content-encoding', encoding.encode()))
+    scope = {'type': 'http', 'method': 'POST', 'path': '/ingestion/codegen-responses', 'query_string': b'', 'headers': headers}
+    offsets = iter(range(0, len(body), MESSAGE_BYTES))
+
+    async def receive():
+        start = next(offsets, len(body))
+        return {'type': 'http.request', 'body': body[start:start + MESSAGE_BYTES], 'more_body': start + MESSAGE_BYTES < len(body)}
+
+    return IngestionRequest(scope, receive)
+
+
+async def decode_buffered(body: bytes, content_type: str, encoding: str, adapter: TypeAdapter) -> int:
+    request = request_for(body, content_type, encoding)
+    return len(adapter.validate_python(await request.json()))
+
+
+async def decode_streamed(body: bytes, content_type: str, encoding: str) -> int:
+    request = request_for(body, content_type, encoding)
+    reader = request.array_reader()
+    count = 0
+    async for chunk in request.stream():
+        for item in reader.feed(chunk):
+            CodegenResponse.model_validate(item)
+            count += 1
+    for item in reader.close():
+        CodegenResponse.model_validate(item)
+        count += 1
+    return count
+
+
+def timed(func, repeats: int) -> float:
+    """Median milliseconds of func() over repeats runs."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run(args) -> List[dict]:
+    responses = generate(args.responses, args.seed)
+    adapter = TypeAdapter(List[CodegenResponse])
+    scale = 1000 / args.responses
+    loop = asyncio.new_event_loop()
+    results = []
+    print(f"{'encoding':<16} {'bytes/1k':>12} {'ratio':>6} {'encode ms/1k':>13} {'buffered decode ms/1k':>22} {'streamed decode ms/1k':>22}")
+    plain = None
+    for name, content_type, encoding in ENCODINGS:
+        body = encode(responses, content_type, encoding)
+        plain = plain or len(body)
+        for decode in (decode_buffered(body, content_type, encoding, adapter), decode_streamed(body, content_type, encoding)):
+            if loop.run_until_complete(decode) != len(responses):
+                raise RuntimeError(f"{name} did not decode to {len(responses)} responses")
+        result = {
+            'encoding': name,
+            'bytes_per_1k': len(body) * scale,
+            'ratio_to_json': plain / len(body),
+            'encode_ms_per_1k': timed(lambda: encode(responses, content_type, encoding), args.repeats) * scale,
+            'buffered_decode_ms_per_1k': timed(lambda: loop.run_until_complete(decode_buffered(body, content_type, encoding, adapter)), args.repeats) * scale,
+            'streamed_decode_ms_per_1k': timed(lambda: loop.run_until_complete(decode_streamed(body, content_type, encoding)), args.repeats) * scale,
+        }
+        print(f"{name:<16} {result['bytes_per_1k']:>12,.0f} {result['ratio_to_json']:>6.1f} {result['encode_ms_per_1k']:>13.1f} {result['buffered_decode_ms_per_1k']:>22.1f} {result['streamed_decode_ms_per_1k']:>22.1f}")
+        results.append(result)
+    loop.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=20, help='Timed runs per measurement (median is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'config': vars(args), 'results': results}, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+-- Move response patches into the content-addressed response_patches table.
+-- Safe to re-run: only rows without a patch_hash are migrated.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/001_content_addressed_patches.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS response_patches (
+    patch_hash TEXT PRIMARY KEY,
+    patch TEXT,
+    compressed_patch BYTEA,
+    size INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CHECK ((patch IS NULL) <> (compressed_patch IS NULL))
+);
+
+ALTER TABLE codegen_responses ALTER COLUMN response_patch DROP NOT NULL;
+ALTER TABLE codegen_responses ADD COLUMN IF NOT EXISTS patch_hash TEXT REFERENCES response_patches(patch_hash);
+ALTER TABLE regression_responses ADD COLUMN IF NOT EXISTS patch_hash TEXT REFERENCES response_patches(patch_hash);
+
+INSERT INTO response_patches (patch_hash, patch, size)
+SELECT DISTINCT ON (patch_hash) patch_hash, response_patch, octet_length(response_patch)
+FROM (
+    SELECT encode(sha256(convert_to(response_patch, 'UTF8')), 'hex') AS patch_hash, response_patch
+    FROM codegen_responses
+    WHERE patch_hash IS NULL AND response_patch IS NOT NULL
+    UNION ALL
+    SELECT encode(sha256(convert_to(response_patch, 'UTF8')), 'hex') AS patch_hash, response_patch
+    FROM regression_responses
+    WHERE patch_hash IS NULL AND response_patch IS NOT NULL
+) AS patches
+ON CONFLICT (patch_hash) DO NOTHING;
+
+UPDATE codegen_responses
+SET patch_hash = encode(sha256(convert_to(response_patch, 'UTF8')), 'hex'),
+    response_patch = NULL
+WHERE patch_hash IS NULL AND response_patch IS NOT NULL;
+
+UPDATE regression_responses
+SET patch_hash = encode(sha256(convert_to(response_patch, 'UTF8')), 'hex'),
+    response_patch = NULL
+WHERE patch_hash IS NULL AND response_patch IS NOT NULL;
+
+COMMIT;
+
+-- Reclaim the space of the rewritten rows
+VACUUM (ANALYZE) codegen_responses;
+VACUUM (ANALYZE) regression_responses;
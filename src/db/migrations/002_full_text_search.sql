@@ -0,0 +1,28 @@
+-- Full-text search over challenge problem statements, repository URLs and response patches.
+-- Safe to re-run. Compressed patches cannot be tokenized in SQL; their search vectors are filled
+-- in by DatabaseManager.backfill_patch_search_vectors(), which the API runs on startup.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/002_full_text_search.sql
+
+BEGIN;
+
+ALTER TABLE codegen_challenges ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', left(problem_statement, 100000)), 'A') ||
+        setweight(to_tsvector('simple', regexp_replace(repository_url, '[^[:alnum:]]+', ' ', 'g')), 'B')
+    ) STORED;
+
+ALTER TABLE response_patches ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+UPDATE response_patches
+SET search_vector = to_tsvector('simple', left(patch, 100000))
+WHERE search_vector IS NULL AND patch IS NOT NULL;
+
+COMMIT;
+
+CREATE INDEX IF NOT EXISTS idx_codegen_challenges_search ON codegen_challenges USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_response_patches_search ON response_patches USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_response_patches_unindexed ON response_patches (patch_hash) WHERE search_vector IS NULL;
+CREATE INDEX IF NOT EXISTS idx_codegen_responses_patch_hash ON codegen_responses (patch_hash);
+
+ANALYZE codegen_challenges;
+ANALYZE response_patches;
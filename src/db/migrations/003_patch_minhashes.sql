@@ -0,0 +1,17 @@
+-- MinHash signatures and LSH band keys of response patches, for near-duplicate (copy) detection.
+-- Safe to re-run. Signatures are computed in Python; DatabaseManager.backfill_patch_minhashes(),
+-- which the API runs on startup, fills them in for patches stored before this migration.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/003_patch_minhashes.sql
+
+CREATE TABLE IF NOT EXISTS patch_minhashes (
+    patch_hash TEXT PRIMARY KEY REFERENCES response_patches(patch_hash),
+    signature BYTEA NOT NULL,
+    bands BIGINT[] NOT NULL
+);
+
+-- Band keys are effectively random, so a pending list would hold thousands of unmerged entries that
+-- every lookup scans linearly; insert into the index directly instead (16 keys per new patch).
+CREATE INDEX IF NOT EXISTS idx_patch_minhashes_bands ON patch_minhashes USING GIN (bands) WITH (fastupdate = off);
+
+-- Near-duplicate checks for one miner start from that miner's recent responses
+CREATE INDEX IF NOT EXISTS idx_responses_miner_completed_at ON responses (miner_hotkey, completed_at);
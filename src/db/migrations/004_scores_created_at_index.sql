@@ -0,0 +1,6 @@
+-- Time-window index on scores, for bootstrapping the validator agreement matrices on startup
+-- (DatabaseManager.load_score_agreement reads the last week of scores).
+-- Safe to re-run. CONCURRENTLY avoids blocking score ingestion while it builds; run it outside a transaction.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/004_scores_created_at_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_scores_created_at ON scores (created_at);
@@ -0,0 +1,14 @@
+-- Data version counters, one per cached data set. Store methods bump a version when they write to its
+-- tables, so a cache snapshot restored after a restart can discard entries computed before the write
+-- (see CacheManager.snapshot in src/utils/cache.py).
+-- Safe to re-run.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/005_data_versions.sql
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (name) VALUES ('challenges'), ('challenge_responses'), ('miner_responses')
+ON CONFLICT (name) DO NOTHING;
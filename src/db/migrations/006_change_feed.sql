@@ -0,0 +1,31 @@
+-- Change sequence for the /retrieval/changes feed. Every insert into challenges, responses and scores,
+-- and every re-evaluation of a response, takes the next value of change_seq and records when it did
+-- (changed_at), so consumers can ask for everything that changed after a position.
+-- The sequence must keep CACHE 1: the feed relies on values being handed out in time order.
+-- Safe to re-run. Backfilling rewrites the three tables once; run it off-peak, outside a transaction
+-- (CONCURRENTLY index builds).
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/006_change_feed.sql
+
+CREATE SEQUENCE IF NOT EXISTS change_seq;
+
+ALTER TABLE challenges ADD COLUMN IF NOT EXISTS change_seq BIGINT, ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+ALTER TABLE responses ADD COLUMN IF NOT EXISTS change_seq BIGINT, ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+ALTER TABLE scores ADD COLUMN IF NOT EXISTS change_seq BIGINT, ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+
+-- Defaults first, so rows inserted while the backfill runs are numbered too
+ALTER TABLE challenges ALTER COLUMN change_seq SET DEFAULT nextval('change_seq'), ALTER COLUMN changed_at SET DEFAULT clock_timestamp();
+ALTER TABLE responses ALTER COLUMN change_seq SET DEFAULT nextval('change_seq'), ALTER COLUMN changed_at SET DEFAULT clock_timestamp();
+ALTER TABLE scores ALTER COLUMN change_seq SET DEFAULT nextval('change_seq'), ALTER COLUMN changed_at SET DEFAULT clock_timestamp();
+
+UPDATE challenges SET change_seq = nextval('change_seq'), changed_at = clock_timestamp() WHERE change_seq IS NULL;
+UPDATE responses SET change_seq = nextval('change_seq'), changed_at = clock_timestamp() WHERE change_seq IS NULL;
+UPDATE scores SET change_seq = nextval('change_seq'), changed_at = clock_timestamp() WHERE change_seq IS NULL;
+
+ALTER TABLE challenges ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+ALTER TABLE responses ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+ALTER TABLE scores ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+
+-- Pages of the feed are read from these alone (index-only scans)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenges_change_seq ON challenges (change_seq) INCLUDE (changed_at, challenge_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_responses_change_seq ON responses (change_seq) INCLUDE (changed_at, challenge_id, miner_hotkey);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_scores_change_seq ON scores (change_seq) INCLUDE (changed_at, id);
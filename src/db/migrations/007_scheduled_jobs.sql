@@ -0,0 +1,16 @@
+-- Last run of each scheduled job that runs in one process at a time (see src/utils/scheduler.py).
+-- The process holding the job's advisory lock reads it to skip a run another worker has just done.
+-- Safe to re-run.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/007_scheduled_jobs.sql
+
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    name TEXT PRIMARY KEY,
+    worker TEXT,
+    last_started_at TIMESTAMPTZ,
+    last_finished_at TIMESTAMPTZ,
+    last_status TEXT,
+    last_duration_ms DOUBLE PRECISION,
+    last_error TEXT,
+    runs BIGINT NOT NULL DEFAULT 0,
+    failures BIGINT NOT NULL DEFAULT 0
+);
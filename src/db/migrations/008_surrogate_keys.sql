@@ -0,0 +1,191 @@
+-- Integer surrogate keys for hotkeys and challenge IDs. The hotkeys and challenge_keys dictionary
+-- tables give every hotkey and challenge ID a compact integer key; the hot tables store the keys next
+-- to the text columns and are keyed, indexed and joined on them (see src/utils/interning.py).
+-- DatabaseManager supplies the keys on insert; a trigger fills them in for any other writer.
+-- Safe to re-run. Backfilling rewrites responses, codegen_responses, regression_responses, scores and
+-- validator_versions once and the key swap locks the response tables; run it off-peak with ingestion stopped.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/008_surrogate_keys.sql
+
+CREATE TABLE IF NOT EXISTS hotkeys (
+    id SERIAL PRIMARY KEY,
+    hotkey TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS challenge_keys (
+    id SERIAL PRIMARY KEY,
+    challenge_id TEXT NOT NULL UNIQUE
+);
+
+CREATE OR REPLACE FUNCTION intern_hotkey(value TEXT) RETURNS INTEGER AS $$
+DECLARE
+    key INTEGER;
+BEGIN
+    IF value IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT id INTO key FROM hotkeys WHERE hotkey = value;
+    IF key IS NULL THEN
+        INSERT INTO hotkeys (hotkey) VALUES (value) ON CONFLICT (hotkey) DO NOTHING RETURNING id INTO key;
+        IF key IS NULL THEN
+            SELECT id INTO key FROM hotkeys WHERE hotkey = value;
+        END IF;
+    END IF;
+    RETURN key;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION intern_challenge_id(value TEXT) RETURNS INTEGER AS $$
+DECLARE
+    key INTEGER;
+BEGIN
+    IF value IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT id INTO key FROM challenge_keys WHERE challenge_id = value;
+    IF key IS NULL THEN
+        INSERT INTO challenge_keys (challenge_id) VALUES (value) ON CONFLICT (challenge_id) DO NOTHING RETURNING id INTO key;
+        IF key IS NULL THEN
+            SELECT id INTO key FROM challenge_keys WHERE challenge_id = value;
+        END IF;
+    END IF;
+    RETURN key;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fill_response_keys() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.challenge_key IS NULL THEN
+        NEW.challenge_key := intern_challenge_id(NEW.challenge_id);
+    END IF;
+    IF NEW.miner_key IS NULL THEN
+        NEW.miner_key := intern_hotkey(NEW.miner_hotkey);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fill_score_keys() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.validator_key IS NULL THEN
+        NEW.validator_key := intern_hotkey(NEW.validator_hotkey);
+    END IF;
+    IF NEW.miner_key IS NULL THEN
+        NEW.miner_key := intern_hotkey(NEW.miner_hotkey);
+    END IF;
+    IF NEW.challenge_key IS NULL THEN
+        NEW.challenge_key := intern_challenge_id(NEW.challenge_id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fill_validator_version_keys() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.validator_key IS NULL THEN
+        NEW.validator_key := intern_hotkey(NEW.validator_hotkey);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE responses ADD COLUMN IF NOT EXISTS challenge_key INTEGER, ADD COLUMN IF NOT EXISTS miner_key INTEGER;
+ALTER TABLE codegen_responses ADD COLUMN IF NOT EXISTS challenge_key INTEGER, ADD COLUMN IF NOT EXISTS miner_key INTEGER;
+ALTER TABLE regression_responses ADD COLUMN IF NOT EXISTS challenge_key INTEGER, ADD COLUMN IF NOT EXISTS miner_key INTEGER;
+ALTER TABLE scores ADD COLUMN IF NOT EXISTS validator_key INTEGER, ADD COLUMN IF NOT EXISTS miner_key INTEGER, ADD COLUMN IF NOT EXISTS challenge_key INTEGER;
+ALTER TABLE validator_versions ADD COLUMN IF NOT EXISTS validator_key INTEGER;
+
+-- Triggers first, so rows inserted while the backfill runs get their keys too
+DROP TRIGGER IF EXISTS fill_response_keys ON responses;
+CREATE TRIGGER fill_response_keys BEFORE INSERT ON responses FOR EACH ROW EXECUTE FUNCTION fill_response_keys();
+DROP TRIGGER IF EXISTS fill_response_keys ON codegen_responses;
+CREATE TRIGGER fill_response_keys BEFORE INSERT ON codegen_responses FOR EACH ROW EXECUTE FUNCTION fill_response_keys();
+DROP TRIGGER IF EXISTS fill_response_keys ON regression_responses;
+CREATE TRIGGER fill_response_keys BEFORE INSERT ON regression_responses FOR EACH ROW EXECUTE FUNCTION fill_response_keys();
+DROP TRIGGER IF EXISTS fill_score_keys ON scores;
+CREATE TRIGGER fill_score_keys BEFORE INSERT ON scores FOR EACH ROW EXECUTE FUNCTION fill_score_keys();
+DROP TRIGGER IF EXISTS fill_validator_version_keys ON validator_versions;
+CREATE TRIGGER fill_validator_version_keys BEFORE INSERT ON validator_versions FOR EACH ROW EXECUTE FUNCTION fill_validator_version_keys();
+
+INSERT INTO hotkeys (hotkey)
+SELECT hotkey FROM (
+    SELECT miner_hotkey FROM responses WHERE miner_key IS NULL
+    UNION SELECT validator_hotkey FROM scores WHERE validator_key IS NULL
+    UNION SELECT miner_hotkey FROM scores WHERE miner_key IS NULL
+    UNION SELECT validator_hotkey FROM validator_versions WHERE validator_key IS NULL
+) AS missing (hotkey)
+ORDER BY hotkey
+ON CONFLICT (hotkey) DO NOTHING;
+
+INSERT INTO challenge_keys (challenge_id)
+SELECT challenge_id FROM (
+    SELECT challenge_id FROM responses WHERE challenge_key IS NULL
+    UNION SELECT challenge_id FROM scores WHERE challenge_key IS NULL AND challenge_id IS NOT NULL
+) AS missing (challenge_id)
+ORDER BY challenge_id
+ON CONFLICT (challenge_id) DO NOTHING;
+
+UPDATE responses t SET challenge_key = ck.id, miner_key = h.id
+FROM challenge_keys ck, hotkeys h
+WHERE t.challenge_key IS NULL AND ck.challenge_id = t.challenge_id AND h.hotkey = t.miner_hotkey;
+UPDATE codegen_responses t SET challenge_key = ck.id, miner_key = h.id
+FROM challenge_keys ck, hotkeys h
+WHERE t.challenge_key IS NULL AND ck.challenge_id = t.challenge_id AND h.hotkey = t.miner_hotkey;
+UPDATE regression_responses t SET challenge_key = ck.id, miner_key = h.id
+FROM challenge_keys ck, hotkeys h
+WHERE t.challenge_key IS NULL AND ck.challenge_id = t.challenge_id AND h.hotkey = t.miner_hotkey;
+UPDATE scores t SET
+    validator_key = (SELECT id FROM hotkeys WHERE hotkey = t.validator_hotkey),
+    miner_key = (SELECT id FROM hotkeys WHERE hotkey = t.miner_hotkey),
+    challenge_key = (SELECT id FROM challenge_keys WHERE challenge_id = t.challenge_id)
+WHERE t.miner_key IS NULL;
+UPDATE validator_versions t SET validator_key = h.id
+FROM hotkeys h
+WHERE t.validator_key IS NULL AND h.hotkey = t.validator_hotkey;
+
+ALTER TABLE responses ALTER COLUMN challenge_key SET NOT NULL, ALTER COLUMN miner_key SET NOT NULL;
+ALTER TABLE codegen_responses ALTER COLUMN challenge_key SET NOT NULL, ALTER COLUMN miner_key SET NOT NULL;
+ALTER TABLE regression_responses ALTER COLUMN challenge_key SET NOT NULL, ALTER COLUMN miner_key SET NOT NULL;
+ALTER TABLE scores ALTER COLUMN validator_key SET NOT NULL, ALTER COLUMN miner_key SET NOT NULL;
+ALTER TABLE validator_versions ALTER COLUMN validator_key SET NOT NULL;
+
+-- Key the response tables on the integer pair; the text primary keys and the foreign keys on them go
+BEGIN;
+ALTER TABLE codegen_responses DROP CONSTRAINT IF EXISTS codegen_responses_challenge_id_miner_hotkey_fkey;
+ALTER TABLE regression_responses DROP CONSTRAINT IF EXISTS regression_responses_challenge_id_miner_hotkey_fkey;
+ALTER TABLE codegen_responses DROP CONSTRAINT IF EXISTS codegen_responses_pkey;
+ALTER TABLE regression_responses DROP CONSTRAINT IF EXISTS regression_responses_pkey;
+ALTER TABLE responses DROP CONSTRAINT IF EXISTS responses_pkey;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'responses_keys_pkey') THEN
+        ALTER TABLE responses ADD CONSTRAINT responses_keys_pkey PRIMARY KEY (challenge_key, miner_key);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'codegen_responses_keys_pkey') THEN
+        ALTER TABLE codegen_responses ADD CONSTRAINT codegen_responses_keys_pkey PRIMARY KEY (challenge_key, miner_key);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'regression_responses_keys_pkey') THEN
+        ALTER TABLE regression_responses ADD CONSTRAINT regression_responses_keys_pkey PRIMARY KEY (challenge_key, miner_key);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'codegen_responses_keys_fkey') THEN
+        ALTER TABLE codegen_responses ADD CONSTRAINT codegen_responses_keys_fkey
+            FOREIGN KEY (challenge_key, miner_key) REFERENCES responses (challenge_key, miner_key);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'regression_responses_keys_fkey') THEN
+        ALTER TABLE regression_responses ADD CONSTRAINT regression_responses_keys_fkey
+            FOREIGN KEY (challenge_key, miner_key) REFERENCES responses (challenge_key, miner_key);
+    END IF;
+END $$;
+COMMIT;
+
+-- Integer versions of the text-keyed response indexes
+DROP INDEX IF EXISTS idx_responses_miner_completed_at;
+DROP INDEX IF EXISTS idx_responses_change_seq;
+CREATE INDEX IF NOT EXISTS idx_responses_miner_key_completed_at ON responses (miner_key, completed_at);
+CREATE INDEX IF NOT EXISTS idx_responses_change_seq_keys ON responses (change_seq) INCLUDE (changed_at, challenge_key, miner_key);
+
+-- Reclaim the space of the rewritten rows
+VACUUM (ANALYZE) responses;
+VACUUM (ANALYZE) codegen_responses;
+VACUUM (ANALYZE) regression_responses;
+VACUUM (ANALYZE) scores;
+VACUUM (ANALYZE) validator_versions;
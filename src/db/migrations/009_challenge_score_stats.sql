@@ -0,0 +1,82 @@
+-- Precomputed per-challenge score distributions (see challenge_score_stats in postgres_schema.sql),
+-- served with challenge listings instead of counting responses per request, and an index for listing
+-- the latest challenges. Backfills every challenge that has responses.
+-- Safe to re-run.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/009_challenge_score_stats.sql
+
+CREATE TABLE IF NOT EXISTS challenge_score_stats (
+    challenge_key INTEGER PRIMARY KEY,                 -- challenge_keys.id
+    response_count INTEGER NOT NULL DEFAULT 0,         -- Evaluated responses with a score
+    mean_score DOUBLE PRECISION,
+    min_score DOUBLE PRECISION,
+    p10_score DOUBLE PRECISION,
+    p25_score DOUBLE PRECISION,
+    median_score DOUBLE PRECISION,
+    p75_score DOUBLE PRECISION,
+    p90_score DOUBLE PRECISION,
+    max_score DOUBLE PRECISION,
+    score_histogram INTEGER[] NOT NULL DEFAULT '{}',   -- Scores in 10 bins of width 0.1 from 0 to 1; scores outside it count in the end bins
+    median_processing_time DOUBLE PRECISION,           -- Of the same responses
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recompute the stats of the given challenges from their responses; returns the number of rows written
+CREATE OR REPLACE FUNCTION refresh_challenge_score_stats(keys INTEGER[]) RETURNS INTEGER AS $$
+    WITH graded AS (
+        SELECT k.key AS challenge_key, r.score, r.processing_time
+        FROM unnest(keys) AS k (key)
+        LEFT JOIN responses r ON r.challenge_key = k.key AND r.evaluated = TRUE AND r.score IS NOT NULL
+    ),
+    per_challenge AS (
+        SELECT
+            challenge_key,
+            COUNT(score) AS response_count,
+            AVG(score) AS mean_score,
+            MIN(score) AS min_score,
+            MAX(score) AS max_score,
+            percentile_cont(ARRAY[0.1, 0.25, 0.5, 0.75, 0.9]) WITHIN GROUP (ORDER BY score) AS percentiles,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY processing_time) AS median_processing_time,
+            array_agg(LEAST(GREATEST(width_bucket(score, 0, 1, 10), 1), 10)) FILTER (WHERE score IS NOT NULL) AS bins
+        FROM graded
+        GROUP BY challenge_key
+    ),
+    written AS (
+        INSERT INTO challenge_score_stats (
+            challenge_key, response_count, mean_score, min_score, p10_score, p25_score, median_score,
+            p75_score, p90_score, max_score, score_histogram, median_processing_time, updated_at
+        )
+        SELECT
+            challenge_key, response_count, mean_score, min_score, percentiles[1], percentiles[2], percentiles[3],
+            percentiles[4], percentiles[5], max_score,
+            ARRAY(
+                SELECT COUNT(bin)::integer
+                FROM generate_series(1, 10) AS i
+                LEFT JOIN unnest(bins) AS bin ON bin = i
+                GROUP BY i
+                ORDER BY i
+            ),
+            median_processing_time, CURRENT_TIMESTAMP
+        FROM per_challenge
+        ON CONFLICT (challenge_key) DO UPDATE SET
+            response_count = EXCLUDED.response_count,
+            mean_score = EXCLUDED.mean_score,
+            min_score = EXCLUDED.min_score,
+            p10_score = EXCLUDED.p10_score,
+            p25_score = EXCLUDED.p25_score,
+            median_score = EXCLUDED.median_score,
+            p75_score = EXCLUDED.p75_score,
+            p90_score = EXCLUDED.p90_score,
+            max_score = EXCLUDED.max_score,
+            score_histogram = EXCLUDED.score_histogram,
+            median_processing_time = EXCLUDED.median_processing_time,
+            updated_at = EXCLUDED.updated_at
+        RETURNING 1
+    )
+    SELECT COUNT(*)::integer FROM written;
+$$ LANGUAGE sql;
+
+-- Latest challenges first (challenge listings)
+CREATE INDEX IF NOT EXISTS idx_challenges_created_at ON challenges (created_at);
+
+SELECT refresh_challenge_score_stats(array_agg(DISTINCT challenge_key)) FROM responses;
+ANALYZE challenge_score_stats;
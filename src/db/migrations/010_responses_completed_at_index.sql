@@ -0,0 +1,9 @@
+-- Time-window index on evaluated responses, for the miner responses CTE's `completed_at >= NOW() - INTERVAL`
+-- filter and for bootstrapping the rolling miner stats on startup (DatabaseManager.load_rolling_miner_stats
+-- reads the last week of evaluated responses).
+-- Safe to re-run. CONCURRENTLY avoids blocking response ingestion while it builds; run it outside a transaction.
+-- Run with: psql "$DATABASE_URL" -f src/db/migrations/010_responses_completed_at_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_responses_evaluated_completed_at
+    ON responses (completed_at)
+    WHERE evaluated = TRUE AND score IS NOT NULL;
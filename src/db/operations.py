@@ -1,76 +1,261 @@
 import os
 import psycopg2
 from psycopg2 import pool
-from dotenv import load_dotenv
+from psycopg2.extras import execute_values
 import json
 from src.db.models import CodegenChallenge, RegressionChallenge, CodegenResponse, RegressionResponse, ValidatorVersion, Score, Agent
-from src.utils.cache import cached, cache_manager, invalidate_cache_pattern
-from typing import List, Dict
+from src.utils.bulkhead import connection_budgets, current_workload
+from src.utils.cache import cached, cache_manager, get_many, invalidate_cache_pattern
+from src.utils.cancellation import current_cancel_scope
+from src.utils.config import load_env
+from src.utils.events import event_hub
+from src.utils.hot_set import response_hot_set
+from src.utils.interning import KeyInterner
+from src.utils.score_agreement import score_agreement
+from src.utils.rolling_stats import rolling_miner_stats
+from src.db.patches import patch_hash, encode_patch, decode_patch, search_text, patch_cache
+from src.db.query_log import TracedCursor
+from typing import Any, Callable, Iterable, List, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import threading
+import time
 import atexit
 from src.utils.logging import get_logger
-
-load_dotenv()
+from src.utils.minhash import patch_minhasher
+from src.utils.tracing import span
 
 logger = get_logger(__name__)
 
+# Change feed kinds: table, and the key columns kept in its change_seq index
+CHANGE_FEED_KINDS = {
+    'challenge': ('challenges', 'challenge_id'),
+    'response': ('responses', 'challenge_key, miner_key'),
+    'score': ('scores', 'id'),
+}
+# Open transactions older than this are not waited for by the change feed (no store statement runs this long)
+CHANGE_FEED_MAX_WRITE_SECONDS = 600
+# A challenge or response without its codegen/regression row is held back this long for it
+CHANGE_FEED_DETAIL_GRACE_SECONDS = 60
+# Change feed kinds read by sync_in_memory_stores: responses and scores feed the in-memory stores,
+# and all three are published as live events when they were written through another worker
+IN_MEMORY_SYNC_KINDS = ['challenge', 'response', 'score']
+
+# Codegen challenges with their precomputed score distributions (challenge_score_stats); see _codegen_challenge_row
+CODEGEN_CHALLENGES_SELECT = """
+    SELECT
+        c.challenge_id,
+        c.type,
+        c.validator_hotkey,
+        c.created_at,
+        cc.problem_statement,
+        cc.dynamic_checklist,
+        cc.repository_url,
+        cc.commit_hash,
+        cc.context_file_paths,
+        COALESCE(s.response_count, 0),
+        s.mean_score, s.min_score, s.p10_score, s.p25_score, s.median_score, s.p75_score, s.p90_score, s.max_score,
+        s.score_histogram,
+        s.median_processing_time
+    FROM challenges c
+    INNER JOIN codegen_challenges cc ON c.challenge_id = cc.challenge_id
+    LEFT JOIN challenge_keys ck ON ck.challenge_id = c.challenge_id
+    LEFT JOIN challenge_score_stats s ON s.challenge_key = ck.id
+"""
+
+# First key of the advisory locks taken by run_scheduled_job (the second is a hash of the job name)
+SCHEDULER_LOCK_NAMESPACE = 72570
+
 class DatabaseManager:
-    _instance = None
-    _lock = threading.Lock()
-    _pool = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(DatabaseManager, cls).__new__(cls)
-                    cls._instance._initialize_pool()
-        return cls._instance
+    """Owns the connection pools for one process.
+    Constructing a DatabaseManager does not connect; call open() (done in the FastAPI lifespan,
+    after any worker fork) or let the first get_connection() open the pools lazily.
+    There is one pool per workload class (see src/utils/bulkhead.py); connections are taken from
+    the pool of the workload the calling code runs under.
+    """
 
-    def _initialize_pool(self):
-        """Initialize the connection pool."""
+    def __init__(self, pool_budgets: Optional[Dict[str, int]] = None):
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._pool_pid = None
+        self._pool_budgets = dict(pool_budgets or connection_budgets())
+        self._pool_stats = {
+            workload: {
+                'checkouts': 0,
+                'exhausted': 0,
+                'in_use': 0,
+                'peak_in_use': 0,
+            }
+            for workload in self._pool_budgets
+        }
+        self._peak_in_use = 0
+        # id() of each checked-out connection -> workload class of the pool it was taken from
+        self._checkouts: Dict[int, str] = {}
+        self._checkout_lock = threading.Lock()
+        # One slot per connection of each pool; checkouts wait up to pool_timeout seconds for a free one
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self.pool_timeout = 10.0
+        # Integer keys of hotkeys and challenge IDs, cached both ways (see src/utils/interning.py)
+        self._hotkeys = KeyInterner('hotkeys', 'hotkey')
+        self._challenge_keys = KeyInterner('challenge_keys', 'challenge_id')
+        # Change feed position the in-memory stores have been brought up to (see sync_in_memory_stores)
+        self._sync_lock = threading.Lock()
+        self._sync_seq: Optional[int] = None
+
+    def __str__(self):
+        # Stable representation so cache keys for bound methods don't depend on object addresses
+        return "DatabaseManager"
+
+    def open(self) -> bool:
+        """Open the connection pools for the current process. Returns True on success."""
         try:
-            self._pool = psycopg2.pool.ThreadedConnectionPool(
-                minconn=1,
-                maxconn=20,
-                host=os.getenv('AWS_RDS_PLATFORM_ENDPOINT'),
-                user=os.getenv('AWS_MASTER_USERNAME'),
-                password=os.getenv('AWS_MASTER_PASSWORD'),
-                database=os.getenv('AWS_RDS_PLATFORM_DB_NAME'),
-                sslmode='require'
-            )
-            # Register cleanup function
-            atexit.register(self.close_all_connections)
-        except Exception as e:
-            print(f"Error initializing connection pool: {str(e)}")
-            raise
+            self._initialize_pool()
+            return True
+        except Exception:
+            return False
+
+    def _initialize_pool(self):
+        """Initialize one connection pool per workload class."""
+        with self._lock:
+            if self._pools and self._pool_pid == os.getpid():
+                return
+            load_env()
+            self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', self.pool_timeout))
+            pools = {}
+            try:
+                for workload, maxconn in self._pool_budgets.items():
+                    pools[workload] = psycopg2.pool.ThreadedConnectionPool(
+                        minconn=1,
+                        maxconn=maxconn,
+                        host=os.getenv('AWS_RDS_PLATFORM_ENDPOINT'),
+                        port=int(os.getenv('AWS_RDS_PORT', '5432')),
+                        user=os.getenv('AWS_MASTER_USERNAME'),
+                        password=os.getenv('AWS_MASTER_PASSWORD'),
+                        database=os.getenv('AWS_RDS_PLATFORM_DB_NAME'),
+                        # RDS requires TLS; local databases (e.g. the benchmark suite) can set AWS_RDS_SSLMODE=disable
+                        sslmode=os.getenv('AWS_RDS_SSLMODE', 'require'),
+                        application_name=f"ridges-api-{workload}",
+                        # Times every statement for request traces and the slow-query log
+                        cursor_factory=TracedCursor
+                    )
+                self._pools = pools
+                self._slots = {workload: threading.BoundedSemaphore(maxconn) for workload, maxconn in self._pool_budgets.items()}
+                self._pool_pid = os.getpid()
+                self._reset_checkouts()
+                # Register cleanup function
+                atexit.register(self.close_all_connections)
+            except Exception as e:
+                for created in pools.values():
+                    created.closeall()
+                print(f"Error initializing connection pool: {str(e)}")
+                raise
 
     def get_connection(self):
-        """Get a connection from the pool."""
-        if self._pool is None:
-            raise Exception("Connection pool not initialized")
-        return self._pool.getconn()
+        """Get a connection from the current workload's pool, opening the pools on first use in this process.
+        A pool inherited across fork() is never reused, since its sockets belong to the parent.
+        Inside a cancellable bulkhead call the connection is registered with the call's CancelScope,
+        so cancelling the request cancels the statement running on it.
+        psycopg2 pools raise as soon as every connection is checked out, so a checkout first waits up to
+        pool_timeout seconds (DB_POOL_TIMEOUT) for one of the pool's slots and raises PoolError after that.
+        """
+        if not self._pools or self._pool_pid != os.getpid():
+            self._initialize_pool()
+        workload = current_workload.get()
+        if workload not in self._pools:
+            workload = 'admin'
+        stats = self._pool_stats[workload]
+        slots = self._slots[workload]
+        with span("pool checkout", workload=workload):
+            if not slots.acquire(timeout=self.pool_timeout):
+                stats['exhausted'] += 1
+                raise pool.PoolError(f"No {workload} connection free within {self.pool_timeout}s")
+            try:
+                conn = self._pools[workload].getconn()
+            except Exception:
+                slots.release()
+                raise
+        with self._checkout_lock:
+            self._checkouts[id(conn)] = workload
+            stats['checkouts'] += 1
+            stats['in_use'] += 1
+            stats['peak_in_use'] = max(stats['peak_in_use'], stats['in_use'])
+            self._peak_in_use = max(self._peak_in_use, sum(workload_stats['in_use'] for workload_stats in self._pool_stats.values()))
+        scope = current_cancel_scope.get()
+        if scope is not None:
+            scope.attach(conn)
+        return conn
 
     def return_connection(self, conn):
-        """Return a connection to the pool."""
-        if self._pool is None:
+        """Return a connection to the pool it was taken from."""
+        scope = current_cancel_scope.get()
+        if scope is not None:
+            scope.detach(conn)
+        if not self._pools or self._pool_pid != os.getpid():
             return
-        self._pool.putconn(conn)
+        with self._checkout_lock:
+            workload = self._checkouts.pop(id(conn), None)
+            if workload is None:
+                # Not taken from the current pools (e.g. returned twice, or opened before they were reset)
+                return
+            self._pool_stats[workload]['in_use'] -= 1
+        try:
+            self._pools[workload].putconn(conn)
+        finally:
+            self._slots[workload].release()
+
+    def _reset_checkouts(self):
+        # Connections of closed or inherited pools are never returned to the new ones
+        with self._checkout_lock:
+            self._checkouts.clear()
+            for stats in self._pool_stats.values():
+                stats['in_use'] = 0
+
+    def get_pool_stats(self) -> Dict:
+        """Connection pool usage, in total and per workload class, as counted by get_connection and
+        return_connection. 'exhausted' counts checkouts that found no connection free within pool_timeout."""
+        is_open = bool(self._pools) and self._pool_pid == os.getpid()
+        with self._checkout_lock:
+            workloads = {
+                workload: {
+                    **self._pool_stats[workload],
+                    'max_connections': maxconn,
+                }
+                for workload, maxconn in self._pool_budgets.items()
+            }
+        return {
+            'checkouts': sum(stats['checkouts'] for stats in workloads.values()),
+            'exhausted': sum(stats['exhausted'] for stats in workloads.values()),
+            'peak_in_use': self._peak_in_use,
+            'open': is_open,
+            'in_use': sum(stats['in_use'] for stats in workloads.values()) if is_open else 0,
+            'max_connections': sum(self._pool_budgets.values()),
+            'workloads': workloads,
+        }
+
+    def get_interning_stats(self) -> Dict:
+        """Size and hit rate of the hotkey and challenge ID key caches."""
+        return {
+            'hotkeys': self._hotkeys.get_stats(),
+            'challenge_keys': self._challenge_keys.get_stats(),
+        }
 
     def close_all_connections(self):
-        """Close all connections in the pool."""
-        if self._pool:
-            self._pool.closeall()
-            self._pool = None
+        """Close all connections in every pool."""
+        if self._pools and self._pool_pid == os.getpid():
+            for connection_pool in self._pools.values():
+                connection_pool.closeall()
+        self._pools = {}
+        self._pool_pid = None
+        self._reset_checkouts()
 
     def close(self):
         """Deprecated method for backward compatibility."""
         pass
 
-    def store_codegen_challenges(self, challenges: List[CodegenChallenge]) -> int:
+    def store_codegen_challenges(self, challenges: List[CodegenChallenge], warm_caches: bool = True) -> int:
         """Store multiple codegen challenges in the database (AWS Postgres RDS).
         Uses a single INSERT statement with multiple VALUES for optimal performance.
         Duplicate entries will be silently ignored.
+        Invalidated cache entries are re-warmed unless warm_caches is False (see store_streamed_items).
         Returns 1 on success, 0 on failure.
         """
         if not challenges:
@@ -109,8 +294,10 @@ class DatabaseManager:
                     INSERT INTO challenges (challenge_id, type, validator_hotkey, created_at)
                     VALUES {','.join([challenges_values_template] * len(challenges))}
                     ON CONFLICT (challenge_id) DO NOTHING
+                    RETURNING challenge_id
                 """
                 cursor.execute(challenges_query, challenges_flat_values)
+                new_challenge_ids = {row[0] for row in cursor.fetchall()}
 
                 # Single INSERT for codegen_challenges table
                 codegen_query = f"""
@@ -120,11 +307,19 @@ class DatabaseManager:
                     )
                     VALUES {','.join([codegen_values_template] * len(challenges))}
                     ON CONFLICT (challenge_id) DO NOTHING
+                    RETURNING challenge_id
                 """
                 cursor.execute(codegen_query, codegen_flat_values)
-            
+                new_challenge_ids.update(row[0] for row in cursor.fetchall())
+
+            # A retried upload of challenges that are already stored changes nothing
+            if not new_challenge_ids:
+                return 1
+
             # Invalidate related caches when new data is added
-            invalidate_cache_pattern("challenges")
+            self._invalidate_data(conn, ["challenges"], warm_caches)
+
+            self._publish_challenges(challenges, 'codegen', new_challenge_ids)
             
             return 1
         except Exception as e:
@@ -134,10 +329,11 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
 
-    def store_regression_challenges(self, challenges: List[RegressionChallenge]) -> int:
+    def store_regression_challenges(self, challenges: List[RegressionChallenge], warm_caches: bool = True) -> int:
         """Store multiple regression challenges in the database (AWS Postgres RDS).
         Uses a single INSERT statement with multiple VALUES for optimal performance.
         Duplicate entries will be silently ignored.
+        Invalidated cache entries are re-warmed unless warm_caches is False (see store_streamed_items).
         Returns 1 on success, 0 on failure.
         """
         if not challenges:
@@ -175,8 +371,10 @@ class DatabaseManager:
                     INSERT INTO challenges (challenge_id, type, validator_hotkey, created_at)
                     VALUES {','.join([challenges_values_template] * len(challenges))}
                     ON CONFLICT (challenge_id) DO NOTHING
+                    RETURNING challenge_id
                 """
                 cursor.execute(challenges_query, challenges_flat_values)
+                new_challenge_ids = {row[0] for row in cursor.fetchall()}
 
                 # Single INSERT for regression_challenges table
                 regression_query = f"""
@@ -186,11 +384,19 @@ class DatabaseManager:
                     )
                     VALUES {','.join([regression_values_template] * len(challenges))}
                     ON CONFLICT (challenge_id) DO NOTHING
+                    RETURNING challenge_id
                 """
                 cursor.execute(regression_query, regression_flat_values)
-            
+                new_challenge_ids.update(row[0] for row in cursor.fetchall())
+
+            # A retried upload of challenges that are already stored changes nothing
+            if not new_challenge_ids:
+                return 1
+
             # Invalidate related caches when new data is added
-            invalidate_cache_pattern("challenges")
+            self._invalidate_data(conn, ["challenges"], warm_caches)
+
+            self._publish_challenges(challenges, 'regression', new_challenge_ids)
             
             return 1
         except Exception as e:
@@ -200,11 +406,411 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
 
-    def store_codegen_responses(self, responses: List[CodegenResponse]) -> int:
+    def _invalidate_data(self, conn, names: List[str], warm_caches: bool) -> None:
+        """Bump the data versions of the written data sets, then invalidate their cache entries.
+        Snapshots read versions before collecting entries (see CacheManager.snapshot), so bumping first
+        leaves only the instant before the invalidation in which a stale entry could be saved with the
+        new version. Names are cache key patterns."""
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE data_versions SET version = version + 1, updated_at = NOW()
+                    WHERE name = ANY(%s)
+                """, (names,))
+        except Exception as e:
+            print(f"Error bumping data versions: {str(e)}")
+        for name in names:
+            invalidate_cache_pattern(name, warm=warm_caches)
+
+    def get_data_versions(self) -> Optional[Dict[str, int]]:
+        """Current version of each cached data set, e.g. {'challenges': 12, ...}.
+        Returns None on failure, so callers can tell an unreadable table from an empty one.
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT name, version FROM data_versions")
+                return {name: version for name, version in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting data versions: {str(e)}")
+            return None
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def run_scheduled_job(self, name: str, min_interval: float, job: Callable[[], Any], worker: str) -> str:
+        """Run a scheduled job in at most one process at a time, and at most once per min_interval
+        seconds across processes. The job's session advisory lock is held on a connection of its own
+        for the whole run (and released by the server if this process dies); under it, the job's
+        row in scheduled_jobs tells whether another worker has run it recently.
+        Returns 'succeeded' or 'failed' (the job raised), 'locked' (running elsewhere), 'recent'
+        (ran elsewhere within min_interval) or 'error' (the lock or bookkeeping failed).
+        """
+        conn = None
+        locked = False
+        try:
+            conn = self.get_connection()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", (SCHEDULER_LOCK_NAMESPACE, name))
+                locked = cursor.fetchone()[0]
+                if not locked:
+                    return 'locked'
+                cursor.execute("""
+                    SELECT last_started_at > now() - make_interval(secs => %s)
+                    FROM scheduled_jobs
+                    WHERE name = %s
+                """, (min_interval, name))
+                row = cursor.fetchone()
+                if row and row[0]:
+                    return 'recent'
+                cursor.execute("""
+                    INSERT INTO scheduled_jobs (name, worker, last_started_at, last_status)
+                    VALUES (%s, %s, now(), 'running')
+                    ON CONFLICT (name) DO UPDATE SET
+                        worker = EXCLUDED.worker,
+                        last_started_at = EXCLUDED.last_started_at,
+                        last_status = EXCLUDED.last_status
+                """, (name, worker))
+
+                start = time.perf_counter()
+                error = None
+                try:
+                    job()
+                except Exception as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+                status = 'failed' if error else 'succeeded'
+                cursor.execute("""
+                    UPDATE scheduled_jobs SET
+                        last_finished_at = now(),
+                        last_status = %s,
+                        last_duration_ms = %s,
+                        last_error = %s,
+                        runs = runs + 1,
+                        failures = failures + %s
+                    WHERE name = %s
+                """, (status, (time.perf_counter() - start) * 1000, error, int(error is not None), name))
+                if error:
+                    logger.warning(f"Scheduled job {name} failed: {error}")
+                return status
+        except Exception as e:
+            print(f"Error running scheduled job {name}: {str(e)}")
+            return 'error'
+        finally:
+            if conn:
+                try:
+                    if locked and not conn.closed:
+                        with conn.cursor() as cursor:
+                            cursor.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", (SCHEDULER_LOCK_NAMESPACE, name))
+                    conn.autocommit = False
+                except Exception as e:
+                    print(f"Error releasing scheduled job lock {name}: {str(e)}")
+                self.return_connection(conn)
+
+    def get_scheduled_jobs(self) -> List[Dict]:
+        """Last run of each job run through run_scheduled_job, by any worker."""
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT name, worker, last_started_at, last_finished_at, last_status,
+                        last_duration_ms, last_error, runs, failures
+                    FROM scheduled_jobs
+                    ORDER BY name
+                """)
+                return [
+                    {
+                        'name': row[0],
+                        'worker': row[1],
+                        'last_started_at': row[2],
+                        'last_finished_at': row[3],
+                        'last_status': row[4],
+                        'last_duration_ms': row[5],
+                        'last_error': row[6],
+                        'runs': row[7],
+                        'failures': row[8],
+                    }
+                    for row in cursor.fetchall()
+                ]
+        except Exception as e:
+            print(f"Error getting scheduled jobs: {str(e)}")
+            return []
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def vacuum_tables(self, tables: List[str] = None) -> int:
+        """VACUUM (ANALYZE) the given tables (by default those read with index-only scans by the change
+        feed, whose visibility maps insert-mostly tables otherwise leave stale for long stretches).
+        Returns the number of tables vacuumed; raises if one fails, so a scheduled run counts as failed."""
+        tables = tables or [table for table, _ in CHANGE_FEED_KINDS.values()]
+        conn = None
+        try:
+            conn = self.get_connection()
+            # VACUUM can't run inside a transaction block
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                for table in tables:
+                    cursor.execute(f"VACUUM (ANALYZE) {table}")
+            return len(tables)
+        finally:
+            if conn:
+                conn.autocommit = False
+                self.return_connection(conn)
+
+    def _publish_challenges(self, challenges, challenge_type: str, new_challenge_ids) -> None:
+        """Publish a live 'challenge' event for each challenge that was not already stored."""
+        event_hub.publish([
+            ('challenge', {
+                'challenge_id': challenge.challenge_id,
+                'type': challenge_type,
+                'validator_hotkey': challenge.validator_hotkey,
+                'created_at': challenge.created_at
+            })
+            for challenge in challenges if challenge.challenge_id in new_challenge_ids
+        ])
+
+    def _publish_responses(self, responses, response_type: str) -> None:
+        """Publish a live event per stored response: 'response_evaluated' once it carries a score, else 'response'."""
+        event_hub.publish([
+            ('response_evaluated' if response.evaluated and response.score is not None else 'response', {
+                'challenge_id': response.challenge_id,
+                'type': response_type,
+                'miner_hotkey': response.miner_hotkey,
+                'node_id': response.node_id,
+                'completed_at': response.completed_at,
+                'evaluated': response.evaluated,
+                'score': response.score,
+                'evaluated_at': response.evaluated_at
+            })
+            for response in responses
+        ])
+
+    @staticmethod
+    def _change_event(change: Dict) -> Tuple[str, Dict]:
+        """The live event for a change feed entry, as the store methods publish it."""
+        data = change['data']
+        if change['kind'] == 'challenge':
+            return ('challenge', {
+                'challenge_id': data['challenge_id'],
+                'type': data['type'],
+                'validator_hotkey': data['validator_hotkey'],
+                'created_at': data['created_at']
+            })
+        if change['kind'] == 'response':
+            return ('response_evaluated' if data['evaluated'] and data['score'] is not None else 'response', {
+                'challenge_id': data['challenge_id'],
+                'type': data['type'],
+                'miner_hotkey': data['miner_hotkey'],
+                'node_id': data['node_id'],
+                'completed_at': data['completed_at'],
+                'evaluated': data['evaluated'],
+                'score': data['score'],
+                'evaluated_at': data['evaluated_at']
+            })
+        return ('score', {
+            'type': data['type'],
+            'validator_hotkey': data['validator_hotkey'],
+            'miner_hotkey': data['miner_hotkey'],
+            'challenge_id': data['challenge_id'],
+            'score': data['score']
+        })
+
+    def _store_response_patches(self, cursor, patches: List[Optional[str]]) -> List[Optional[str]]:
+        """Store patch texts once in the content-addressed response_patches table.
+        Only patches whose hash is not already stored are sent to the database.
+        Returns the patch hash for each input patch (None where the patch is None).
+        """
+        hashes = [patch_hash(patch) if patch is not None else None for patch in patches]
+        unique = {key: patch for key, patch in zip(hashes, patches) if key is not None}
+        if not unique:
+            return hashes
+
+        cursor.execute(
+            "SELECT patch_hash FROM response_patches WHERE patch_hash = ANY(%s)",
+            (list(unique),)
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+        new_patches = {key: patch for key, patch in unique.items() if key not in existing}
+        patch_values = [
+            (key, *encode_patch(patch), len(patch.encode('utf-8')), search_text(patch))
+            for key, patch in new_patches.items()
+        ]
+        if patch_values:
+            # The search vector is built here from the plain text, since compressed patches can't be tokenized in SQL
+            cursor.executemany("""
+                INSERT INTO response_patches (patch_hash, patch, compressed_patch, size, search_vector)
+                VALUES (%s, %s, %s, %s, to_tsvector('simple', %s))
+                ON CONFLICT (patch_hash) DO NOTHING
+            """, patch_values)
+            self._store_patch_minhashes(cursor, new_patches)
+        return hashes
+
+    def _store_patch_minhashes(self, cursor, patches: Dict[str, str]) -> None:
+        """Store MinHash signatures and LSH band keys for near-duplicate detection, keyed by patch hash."""
+        minhash_values = []
+        for key, patch in patches.items():
+            signature = patch_minhasher.signature(patch)
+            minhash_values.append((key, patch_minhasher.to_bytes(signature), patch_minhasher.band_keys(signature)))
+        cursor.executemany("""
+            INSERT INTO patch_minhashes (patch_hash, signature, bands)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (patch_hash) DO NOTHING
+        """, minhash_values)
+
+    @staticmethod
+    def _load_keys(cursor, interner: KeyInterner, values: List[str]) -> Dict[str, int]:
+        cursor.execute(f"SELECT id, {interner.column} FROM {interner.table} WHERE {interner.column} = ANY(%s)", (values,))
+        pairs = cursor.fetchall()
+        interner.add(pairs)
+        return {value: key for key, value in pairs}
+
+    def _intern(self, cursor, interner: KeyInterner, values: Iterable[Optional[str]]) -> Dict[str, int]:
+        """Keys of values (None is skipped), adding values that aren't in interner's dictionary table yet.
+        Cached values need no statement; values new to the database are inserted, then read back."""
+        keys, missing = interner.keys_of(values)
+        if missing:
+            loaded = self._load_keys(cursor, interner, missing)
+            new = [value for value in missing if value not in loaded]
+            if new:
+                # Sorted (see keys_of), so writers adding the same values at once take their locks in the same order
+                cursor.execute(f"""
+                    INSERT INTO {interner.table} ({interner.column})
+                    SELECT unnest(%s::text[])
+                    ON CONFLICT ({interner.column}) DO NOTHING
+                """, (new,))
+                loaded.update(self._load_keys(cursor, interner, new))
+            keys.update(loaded)
+        return keys
+
+    def _lookup_keys(self, cursor, interner: KeyInterner, values: Iterable[Optional[str]]) -> Dict[str, int]:
+        """Keys of values, leaving out values the dictionary table doesn't hold (nothing refers to them)."""
+        keys, missing = interner.keys_of(values)
+        if missing:
+            keys.update(self._load_keys(cursor, interner, missing))
+        return keys
+
+    def _lookup_values(self, cursor, interner: KeyInterner, keys: Iterable[Optional[int]]) -> Dict[int, str]:
+        """Values of keys read from the hot tables."""
+        values, missing = interner.values_of(keys)
+        if missing:
+            cursor.execute(f"SELECT id, {interner.column} FROM {interner.table} WHERE id = ANY(%s)", (missing,))
+            pairs = cursor.fetchall()
+            interner.add(pairs)
+            values.update(pairs)
+        return values
+
+    def _response_keys(self, cursor, responses) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """(challenge_key, miner_key) of each response's (challenge_id, miner_hotkey)."""
+        challenge_keys = self._intern(cursor, self._challenge_keys, [response.challenge_id for response in responses])
+        miner_keys = self._intern(cursor, self._hotkeys, [response.miner_hotkey for response in responses])
+        return {
+            (response.challenge_id, response.miner_hotkey): (challenge_keys[response.challenge_id], miner_keys[response.miner_hotkey])
+            for response in responses
+        }
+
+    def _refresh_challenge_score_stats(self, conn, challenge_keys: List[int]) -> None:
+        """Recompute the score distributions of the given challenges from their responses (see
+        refresh_challenge_score_stats in postgres_schema.sql), a primary key range scan of each.
+        Their challenge_score_stats rows are locked first, in key order, and recomputed by the next
+        statement, whose snapshot includes the responses of every upload that refreshed them before;
+        so however concurrent uploads to a challenge interleave, the last refresh sees all of them.
+        A failure is logged rather than raised, since the responses are already stored.
+        """
+        challenge_keys = sorted(set(challenge_keys))
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO challenge_score_stats (challenge_key)
+                    SELECT unnest(%s::integer[])
+                    ON CONFLICT (challenge_key) DO NOTHING
+                """, (challenge_keys,))
+                cursor.execute("""
+                    SELECT challenge_key FROM challenge_score_stats
+                    WHERE challenge_key = ANY(%s)
+                    ORDER BY challenge_key
+                    FOR UPDATE
+                """, (challenge_keys,))
+                cursor.execute("SELECT refresh_challenge_score_stats(%s::integer[])", (challenge_keys,))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error refreshing challenge score stats: {str(e)}")
+        finally:
+            conn.autocommit = True
+
+    def _upsert_responses(self, cursor, responses, keys: Dict[Tuple[str, str], Tuple[int, int]]) -> set:
+        """Insert responses into the responses table and update the evaluation fields of existing rows
+        only where they differ. Unlike ON CONFLICT DO UPDATE, unchanged rows are neither rewritten nor
+        locked, so a retried upload writes no dead tuples or WAL for them. Re-evaluated rows take a new
+        change_seq, so they reappear in the change feed (see get_changes).
+        The last occurrence of a response repeated within the batch wins, as with row-by-row upserts.
+        Rows are matched on their integer keys (see _response_keys).
+        Returns the (challenge_id, miner_hotkey) keys that were inserted or updated.
+        """
+        responses_values = {
+            (response.challenge_id, response.miner_hotkey): (
+                *keys[(response.challenge_id, response.miner_hotkey)],
+                response.challenge_id,
+                response.miner_hotkey,
+                response.node_id,
+                response.processing_time,
+                response.received_at,
+                response.completed_at,
+                response.evaluated,
+                response.score,
+                response.evaluated_at
+            )
+            for response in responses
+        }
+        changed = execute_values(cursor, """
+            WITH incoming (
+                challenge_key, miner_key, challenge_id, miner_hotkey, node_id, processing_time,
+                received_at, completed_at, evaluated, score, evaluated_at
+            ) AS (
+                VALUES %s
+            ),
+            updated AS (
+                UPDATE responses r SET
+                    evaluated = i.evaluated,
+                    score = i.score,
+                    evaluated_at = i.evaluated_at,
+                    change_seq = nextval('change_seq'),
+                    changed_at = clock_timestamp()
+                FROM incoming i
+                WHERE r.challenge_key = i.challenge_key
+                    AND r.miner_key = i.miner_key
+                    AND (r.evaluated, r.score, r.evaluated_at) IS DISTINCT FROM (i.evaluated, i.score, i.evaluated_at)
+                RETURNING r.challenge_id, r.miner_hotkey
+            ),
+            inserted AS (
+                INSERT INTO responses (
+                    challenge_key, miner_key, challenge_id, miner_hotkey, node_id, processing_time,
+                    received_at, completed_at, evaluated, score, evaluated_at
+                )
+                SELECT * FROM incoming
+                ON CONFLICT (challenge_key, miner_key) DO NOTHING
+                RETURNING challenge_id, miner_hotkey
+            )
+            SELECT challenge_id, miner_hotkey FROM updated
+            UNION ALL
+            SELECT challenge_id, miner_hotkey FROM inserted
+        """, list(responses_values.values()),
+            template="(%s::integer, %s::integer, %s, %s, %s::integer, %s::double precision, %s::timestamp, %s::timestamp, %s::boolean, %s::double precision, %s::timestamp)",
+            page_size=len(responses_values), fetch=True)
+        return set(changed)
+
+    def store_codegen_responses(self, responses: List[CodegenResponse], warm_caches: bool = True) -> int:
         """Store multiple codegen responses in the database (AWS Postgres RDS).
-        This stores the responses in both the responses and codegen_responses tables.
+        This stores the responses in both the responses and codegen_responses tables,
+        with the patch text stored once in response_patches and referenced by hash.
         On conflict, only updates evaluation-related fields (evaluated, score, evaluated_at).
         Uses executemany for better performance.
+        Invalidated cache entries are re-warmed unless warm_caches is False (see store_streamed_items).
         Returns 1 on success, 0 on failure.
         """
         if not responses:
@@ -215,55 +821,76 @@ class DatabaseManager:
             conn = self.get_connection()
             conn.autocommit = True
             with conn.cursor() as cursor:
-                    # Prepare data for responses table
-                    responses_values = [
-                        (
-                            response.challenge_id,
-                            response.miner_hotkey,
-                            response.node_id,
-                            response.processing_time,
-                            response.received_at,
-                            response.completed_at,
-                            response.evaluated,
-                            response.score,
-                            response.evaluated_at
-                        )
-                        for response in responses
-                    ]
+                    # Insert new responses and update changed evaluations; retried rows are left alone
+                    keys = self._response_keys(cursor, responses)
+                    changed = self._upsert_responses(cursor, responses, keys)
 
-                    # Insert or update into responses table
-                    cursor.executemany("""
-                        INSERT INTO responses (
-                            challenge_id, miner_hotkey, node_id, processing_time,
-                            received_at, completed_at, evaluated, score, evaluated_at
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (challenge_id, miner_hotkey) DO UPDATE SET
-                            evaluated = EXCLUDED.evaluated,
-                            score = EXCLUDED.score,
-                            evaluated_at = EXCLUDED.evaluated_at
-                    """, responses_values)
+                    # Store each distinct patch once, keyed by its content hash
+                    patch_hashes = self._store_response_patches(
+                        cursor, [response.response_patch for response in responses]
+                    )
 
                     # Prepare data for codegen_responses table
                     codegen_values = [
                         (
+                            *keys[(response.challenge_id, response.miner_hotkey)],
                             response.challenge_id,
                             response.miner_hotkey,
-                            response.response_patch
+                            response_patch_hash
                         )
-                        for response in responses
+                        for response, response_patch_hash in zip(responses, patch_hashes)
                     ]
 
                     # Insert into codegen_responses table, ignore on conflict
-                    cursor.executemany("""
-                        INSERT INTO codegen_responses (challenge_id, miner_hotkey, response_patch)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (challenge_id, miner_hotkey) DO NOTHING
-                    """, codegen_values)
+                    changed.update(execute_values(cursor, """
+                        INSERT INTO codegen_responses (challenge_key, miner_key, challenge_id, miner_hotkey, patch_hash)
+                        VALUES %s
+                        ON CONFLICT (challenge_key, miner_key) DO NOTHING
+                        RETURNING challenge_id, miner_hotkey
+                    """, codegen_values, page_size=len(codegen_values), fetch=True))
+
+            # Recompute the score distributions of the challenges whose responses changed
+            if changed:
+                self._refresh_challenge_score_stats(conn, [keys[key][0] for key in changed])
+
+            # Retried uploads that change nothing leave caches, in-memory state and subscribers alone
+            changed_responses = [
+                (response, response_patch_hash)
+                for response, response_patch_hash in zip(responses, patch_hashes)
+                if (response.challenge_id, response.miner_hotkey) in changed
+            ]
+            if not changed_responses:
+                return 1
+            responses = [response for response, _ in changed_responses]
+
+            # Keep the in-memory rolling window in step with the database
+            for response in responses:
+                rolling_miner_stats.record(
+                    response.challenge_id,
+                    response.miner_hotkey,
+                    response.completed_at,
+                    response.score if response.evaluated else None
+                )
+            response_hot_set.record_many(
+                (
+                    response.challenge_id,
+                    response.miner_hotkey,
+                    response.node_id,
+                    response.processing_time,
+                    response.received_at,
+                    response.completed_at,
+                    response.score if response.evaluated else None,
+                    response.evaluated_at,
+                    response_patch_hash,
+                    None
+                )
+                for response, response_patch_hash in changed_responses
+            )
             
-            # Invalidate caches when responses are updated
-            invalidate_cache_pattern("challenge_responses")
-            invalidate_cache_pattern("miner_responses")
+            # Invalidate caches when responses are updated (challenge listings carry response counts)
+            self._invalidate_data(conn, ["challenges", "challenge_responses", "miner_responses"], warm_caches)
+
+            self._publish_responses(responses, 'codegen')
             
             return 1
         except Exception as e:
@@ -273,11 +900,13 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
 
-    def store_regression_responses(self, responses: List[RegressionResponse]) -> int:
+    def store_regression_responses(self, responses: List[RegressionResponse], warm_caches: bool = True) -> int:
         """Store multiple regression responses in the database (AWS Postgres RDS).
-        This stores the responses in both the responses and regression_responses tables.
+        This stores the responses in both the responses and regression_responses tables,
+        with the patch text stored once in response_patches and referenced by hash.
         On conflict, only updates evaluation-related fields (evaluated, score, evaluated_at).
         Uses executemany for better performance.
+        Invalidated cache entries are re-warmed unless warm_caches is False (see store_streamed_items).
         Returns 1 on success, 0 on failure.
         """
         if not responses:
@@ -288,55 +917,47 @@ class DatabaseManager:
             conn = self.get_connection()
             conn.autocommit = True
             with conn.cursor() as cursor:
-                    # Prepare data for responses table
-                    responses_values = [
-                        (
-                            response.challenge_id,
-                            response.miner_hotkey,
-                            response.node_id,
-                            response.processing_time,
-                            response.received_at,
-                            response.completed_at,
-                            response.evaluated,
-                            response.score,
-                            response.evaluated_at
-                        )
-                        for response in responses
-                    ]
+                    # Insert new responses and update changed evaluations; retried rows are left alone
+                    keys = self._response_keys(cursor, responses)
+                    changed = self._upsert_responses(cursor, responses, keys)
 
-                    # Insert or update into responses table
-                    cursor.executemany("""
-                        INSERT INTO responses (
-                            challenge_id, miner_hotkey, node_id, processing_time,
-                            received_at, completed_at, evaluated, score, evaluated_at
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (challenge_id, miner_hotkey) DO UPDATE SET
-                            evaluated = EXCLUDED.evaluated,
-                            score = EXCLUDED.score,
-                            evaluated_at = EXCLUDED.evaluated_at
-                    """, responses_values)
+                    # Store each distinct patch once, keyed by its content hash
+                    patch_hashes = self._store_response_patches(
+                        cursor, [response.response_patch for response in responses]
+                    )
 
                     # Prepare data for regression_responses table
                     regression_values = [
                         (
+                            *keys[(response.challenge_id, response.miner_hotkey)],
                             response.challenge_id,
                             response.miner_hotkey,
-                            response.response_patch
+                            response_patch_hash
                         )
-                        for response in responses
+                        for response, response_patch_hash in zip(responses, patch_hashes)
                     ]
 
                     # Insert into regression_responses table, ignore on conflict
-                    cursor.executemany("""
-                        INSERT INTO regression_responses (challenge_id, miner_hotkey, response_patch)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (challenge_id, miner_hotkey) DO NOTHING
-                    """, regression_values)
+                    changed.update(execute_values(cursor, """
+                        INSERT INTO regression_responses (challenge_key, miner_key, challenge_id, miner_hotkey, patch_hash)
+                        VALUES %s
+                        ON CONFLICT (challenge_key, miner_key) DO NOTHING
+                        RETURNING challenge_id, miner_hotkey
+                    """, regression_values, page_size=len(regression_values), fetch=True))
+
+            # Recompute the score distributions of the challenges whose responses changed
+            if changed:
+                self._refresh_challenge_score_stats(conn, [keys[key][0] for key in changed])
+
+            # Retried uploads that change nothing leave caches and subscribers alone
+            responses = [response for response in responses if (response.challenge_id, response.miner_hotkey) in changed]
+            if not responses:
+                return 1
             
-            # Invalidate caches when responses are updated
-            invalidate_cache_pattern("challenge_responses")
-            invalidate_cache_pattern("miner_responses")
+            # Invalidate caches when responses are updated (challenge listings carry response counts)
+            self._invalidate_data(conn, ["challenges", "challenge_responses", "miner_responses"], warm_caches)
+
+            self._publish_responses(responses, 'regression')
             
             return 1
         except Exception as e:
@@ -355,10 +976,12 @@ class DatabaseManager:
             conn = self.get_connection()
             conn.autocommit = True
             with conn.cursor() as cursor:
+                    validator_keys = self._intern(cursor, self._hotkeys, [validator_version.validator_hotkey])
                     cursor.execute("""
-                        INSERT INTO validator_versions (validator_hotkey, version, timestamp)
-                        VALUES (%s, %s, %s)
+                        INSERT INTO validator_versions (validator_key, validator_hotkey, version, timestamp)
+                        VALUES (%s, %s, %s, %s)
                     """, (
+                        validator_keys[validator_version.validator_hotkey],
                         validator_version.validator_hotkey,
                         validator_version.version,
                         validator_version.timestamp
@@ -371,28 +994,618 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
 
-    def store_scores(self, scores: List[Score]) -> None:
+    def store_scores(self, scores: List[Score]) -> int:
         """Store multiple scores in the database (AWS Postgres RDS).
         Uses a single INSERT statement with multiple VALUES for optimal performance.
+        Returns 1 on success, 0 on failure.
         """
+        if not scores:
+            return 0
+
         conn = None
         try:
             conn = self.get_connection()
             conn.autocommit = True
             with conn.cursor() as cursor:
-                    values_template = "(%s, %s, %s, %s, %s)"
+                    hotkey_keys = self._intern(cursor, self._hotkeys, [hotkey for score in scores for hotkey in (score.validator_hotkey, score.miner_hotkey)])
+                    challenge_keys = self._intern(cursor, self._challenge_keys, [score.challenge_id for score in scores])
+                    values_template = "(%s, %s, %s, %s, %s, %s, %s, %s)"
                     values_list = [
-                        (score.type, score.validator_hotkey, score.miner_hotkey, score.score, score.challenge_id)
+                        (
+                            score.type, hotkey_keys[score.validator_hotkey], score.validator_hotkey, hotkey_keys[score.miner_hotkey],
+                            score.miner_hotkey, score.score, challenge_keys.get(score.challenge_id), score.challenge_id
+                        )
                         for score in scores
                     ]
                     flat_values = [val for tup in values_list for val in tup]
                     query = f"""
-                        INSERT INTO scores (type, validator_hotkey, miner_hotkey, score, challenge_id)
+                        INSERT INTO scores (type, validator_key, validator_hotkey, miner_key, miner_hotkey, score, challenge_key, challenge_id)
                         VALUES {','.join([values_template] * len(scores))}
+                        RETURNING type, validator_hotkey, miner_hotkey, score, EXTRACT(EPOCH FROM created_at)::float8
                     """
                     cursor.execute(query, flat_values)
+                    stored = cursor.fetchall()
+
+            # Keep the validator agreement matrices in step with the database
+            score_agreement.record_many(stored)
+
+            event_hub.publish([
+                ('score', {
+                    'type': score.type,
+                    'validator_hotkey': score.validator_hotkey,
+                    'miner_hotkey': score.miner_hotkey,
+                    'challenge_id': score.challenge_id,
+                    'score': score.score
+                })
+                for score in scores
+            ])
+            return 1
         except Exception as e:
             print(f"Error storing scores: {str(e)}")
+            return 0
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def load_score_agreement(self) -> int:
+        """Bootstrap the validator agreement matrices from the database (AWS Postgres RDS).
+        Loads each validator's latest score for each miner, per score type, within the retention window.
+        Returns the number of scores loaded, or -1 on failure.
+        """
+        since = datetime.now(timezone.utc) - timedelta(hours=score_agreement.retention_hours)
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    position = self._settled_change_seq(cursor)
+                    cursor.execute("""
+                        SELECT DISTINCT ON (type, validator_key, miner_key)
+                            type, validator_key, miner_key, score, EXTRACT(EPOCH FROM created_at)::float8
+                        FROM scores
+                        WHERE created_at >= %s
+                        ORDER BY type, validator_key, miner_key, created_at DESC
+                    """, (since.replace(tzinfo=None),))
+                    rows = cursor.fetchall()
+                    hotkeys = self._lookup_values(cursor, self._hotkeys, [key for row in rows for key in (row[1], row[2])])
+
+            count = score_agreement.load(
+                (score_type, hotkeys[validator_key], hotkeys[miner_key], score, created_at)
+                for score_type, validator_key, miner_key, score, created_at in rows
+            )
+            self._mark_synced(position)
+            return count
+        except Exception as e:
+            print(f"Error loading score agreement: {str(e)}")
+            return -1
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def load_rolling_miner_stats(self) -> int:
+        """Bootstrap the rolling miner stats engine from the database (AWS Postgres RDS).
+        Loads every evaluated codegen response completed within the engine's retention window.
+        Returns the number of responses loaded, or -1 on failure.
+        """
+        since = datetime.now(timezone.utc) - timedelta(hours=rolling_miner_stats.retention_hours)
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    position = self._settled_change_seq(cursor)
+                    cursor.execute("""
+                        SELECT r.challenge_key, r.miner_key, r.completed_at, r.score
+                        FROM responses r
+                        JOIN codegen_responses cr
+                            ON r.challenge_key = cr.challenge_key
+                            AND r.miner_key = cr.miner_key
+                        WHERE r.evaluated = TRUE
+                            AND r.score IS NOT NULL
+                            AND r.completed_at >= %s
+                    """, (since.replace(tzinfo=None),))
+                    rows = cursor.fetchall()
+                    challenge_ids = self._lookup_values(cursor, self._challenge_keys, [row[0] for row in rows])
+                    hotkeys = self._lookup_values(cursor, self._hotkeys, [row[1] for row in rows])
+
+            rolling_miner_stats.clear()
+            for challenge_key, miner_key, completed_at, score in rows:
+                rolling_miner_stats.record(challenge_ids[challenge_key], hotkeys[miner_key], completed_at, score)
+            rolling_miner_stats.mark_loaded(since)
+            self._mark_synced(position)
+            return len(rows)
+        except Exception as e:
+            print(f"Error loading rolling miner stats: {str(e)}")
+            return -1
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def load_response_hot_set(self) -> int:
+        """Bootstrap the response hot set from the database (AWS Postgres RDS).
+        Loads every evaluated codegen response completed within the hot set's retention window,
+        with patch text only for rows stored before content addressing.
+        Returns the number of responses loaded, or -1 on failure.
+        """
+        since = datetime.now(timezone.utc) - timedelta(hours=response_hot_set.retention_hours)
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    position = self._settled_change_seq(cursor)
+                    cursor.execute("""
+                        SELECT
+                            r.challenge_id,
+                            r.miner_hotkey,
+                            r.node_id,
+                            r.processing_time,
+                            r.received_at,
+                            r.completed_at,
+                            r.score,
+                            r.evaluated_at,
+                            cr.patch_hash,
+                            CASE WHEN cr.patch_hash IS NULL THEN cr.response_patch END
+                        FROM responses r
+                        JOIN codegen_responses cr
+                            ON r.challenge_key = cr.challenge_key
+                            AND r.miner_key = cr.miner_key
+                        WHERE r.evaluated = TRUE
+                            AND r.score IS NOT NULL
+                            AND r.completed_at >= %s
+                    """, (since.replace(tzinfo=None),))
+                    rows = cursor.fetchall()
+
+            count = response_hot_set.load(rows, since)
+            self._mark_synced(position)
+            return count
+        except Exception as e:
+            print(f"Error loading response hot set: {str(e)}")
+            return -1
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def _settled_change_seq(self, cursor) -> int:
+        """Change feed position up to which every change is committed, read before an in-memory store
+        is loaded. Whatever the load doesn't see was written after it, and is applied by sync_in_memory_stores."""
+        # A second of slack, as concurrent writers may take change_seq and changed_at in a slightly different order
+        before = self._change_feed_horizon(cursor) - timedelta(seconds=1)
+        position = 0
+        for kind in IN_MEMORY_SYNC_KINDS:
+            table, _ = CHANGE_FEED_KINDS[kind]
+            cursor.execute(f"SELECT MAX(change_seq) FROM {table} WHERE changed_at < %s", (before,))
+            position = max(position, cursor.fetchone()[0] or 0)
+        return position
+
+    def _mark_synced(self, position: int) -> None:
+        # Syncing resumes from the earliest load; changes a store already holds are applied again harmlessly
+        with self._sync_lock:
+            self._sync_seq = position if self._sync_seq is None else min(self._sync_seq, position)
+
+    def sync_in_memory_stores(self, limit: int = 1000) -> int:
+        """Apply responses and scores written since the in-memory stores were loaded to the rolling
+        miner stats, the response hot set and the validator agreement matrices.
+        Ingestion only updates the stores of the worker that served it, so every worker runs this
+        periodically (the sync-in-memory-stores job) to pick up the other workers' writes from the
+        change feed. Changes this worker stored itself are applied again, which leaves the stores as they were.
+        The changes are also published to this worker's event hub, which skips those it already published.
+        Returns the number of changes applied, or -1 on failure.
+        """
+        applied = 0
+        while True:
+            after_seq = self._sync_seq
+            if after_seq is None:
+                # Nothing loaded yet; each load reads the current data
+                return applied
+            page = self.get_changes(after_seq=after_seq, limit=limit, kinds=IN_MEMORY_SYNC_KINDS)
+            if page is None:
+                return -1
+
+            # Only codegen responses are held in memory, as in store_codegen_responses
+            responses = [change['data'] for change in page['changes'] if change['kind'] == 'response' and change['data']['type'] == 'codegen']
+            scores = [change['data'] for change in page['changes'] if change['kind'] == 'score']
+            for response in responses:
+                rolling_miner_stats.record(
+                    response['challenge_id'],
+                    response['miner_hotkey'],
+                    response['completed_at'],
+                    response['score'] if response['evaluated'] else None
+                )
+            response_hot_set.record_many(
+                (
+                    response['challenge_id'],
+                    response['miner_hotkey'],
+                    response['node_id'],
+                    response['processing_time'],
+                    response['received_at'],
+                    response['completed_at'],
+                    response['score'] if response['evaluated'] else None,
+                    response['evaluated_at'],
+                    response['patch_hash'],
+                    response['response_patch'] if response['patch_hash'] is None else None
+                )
+                for response in responses
+            )
+            # created_at is a UTC TIMESTAMP; the matrices take epoch seconds, as load_score_agreement reads them
+            score_agreement.record_many(
+                (score['type'], score['validator_hotkey'], score['miner_hotkey'], score['score'], score['created_at'].replace(tzinfo=timezone.utc).timestamp())
+                for score in scores
+            )
+            event_hub.publish_changes([self._change_event(change) for change in page['changes']])
+            applied += len(page['changes'])
+
+            with self._sync_lock:
+                # Unless a store was (re)loaded meanwhile and moved the position back
+                if self._sync_seq == after_seq:
+                    self._sync_seq = page['last_seq']
+            if not page['has_more']:
+                return applied
+
+    def get_response_patches(self, patch_hashes: List[str]) -> Dict[str, str]:
+        """Resolve patch hashes to patch text, decompressing as needed.
+        Patches are immutable, so resolved text is kept in an LRU and only missing hashes hit the database.
+        Returns a dict of patch_hash -> patch; unknown hashes are omitted.
+        """
+        patches = patch_cache.get_many(patch_hashes)
+        missing = [key for key in set(patch_hashes) if key not in patches]
+        if not missing:
+            return patches
+
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT patch_hash, patch, compressed_patch
+                        FROM response_patches
+                        WHERE patch_hash = ANY(%s)
+                    """, (missing,))
+                    loaded = {row[0]: decode_patch(row[1], row[2]) for row in cursor.fetchall()}
+            patch_cache.set_many(loaded)
+            patches.update(loaded)
+            return patches
+        except Exception as e:
+            print(f"Error getting response patches: {str(e)}")
+            return patches
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def backfill_patch_search_vectors(self, batch_size: int = 200) -> int:
+        """Fill in search vectors for stored patches that have none (compressed patches migrated
+        by 002_full_text_search.sql, which SQL alone can't tokenize).
+        Returns the number of patches indexed, or -1 on failure.
+        """
+        indexed = 0
+        conn = None
+        try:
+            conn = self.get_connection()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                    while True:
+                        cursor.execute("""
+                            SELECT patch_hash, patch, compressed_patch
+                            FROM response_patches
+                            WHERE search_vector IS NULL
+                            LIMIT %s
+                        """, (batch_size,))
+                        rows = cursor.fetchall()
+                        if not rows:
+                            break
+                        cursor.executemany(
+                            "UPDATE response_patches SET search_vector = to_tsvector('simple', %s) WHERE patch_hash = %s",
+                            [(search_text(decode_patch(row[1], row[2])), row[0]) for row in rows]
+                        )
+                        indexed += len(rows)
+            if indexed:
+                logger.info(f"Indexed {indexed} response patches for search")
+            return indexed
+        except Exception as e:
+            print(f"Error backfilling patch search vectors: {str(e)}")
+            return -1
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def backfill_patch_minhashes(self, batch_size: int = 500) -> int:
+        """Compute MinHash signatures for stored patches that have none (patches stored before
+        003_patch_minhashes.sql). Walks response_patches in patch_hash order so each batch resumes
+        where the previous one stopped. Returns the number of patches processed, or -1 on failure.
+        """
+        processed = 0
+        last_hash = ''
+        conn = None
+        try:
+            conn = self.get_connection()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                    while True:
+                        cursor.execute("""
+                            SELECT rp.patch_hash, rp.patch, rp.compressed_patch
+                            FROM response_patches rp
+                            WHERE rp.patch_hash > %s
+                                AND NOT EXISTS (SELECT 1 FROM patch_minhashes m WHERE m.patch_hash = rp.patch_hash)
+                            ORDER BY rp.patch_hash
+                            LIMIT %s
+                        """, (last_hash, batch_size))
+                        rows = cursor.fetchall()
+                        if not rows:
+                            break
+                        self._store_patch_minhashes(cursor, {row[0]: decode_patch(row[1], row[2]) for row in rows})
+                        processed += len(rows)
+                        last_hash = rows[-1][0]
+            if processed:
+                logger.info(f"Computed MinHash signatures for {processed} response patches")
+            return processed
+        except Exception as e:
+            print(f"Error backfilling patch minhashes: {str(e)}")
+            return -1
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def _minhash_rows(self, rows) -> List[Dict]:
+        return [
+            {
+                'challenge_id': row[0],
+                'miner_hotkey': row[1],
+                'patch_hash': row[2],
+                'completed_at': row[3],
+                'score': row[4],
+                'signature': patch_minhasher.from_bytes(bytes(row[5])),
+                'bands': row[6]
+            }
+            for row in rows
+        ]
+
+    def get_response_minhashes(self, challenge_id: str = None, miner_hotkey: str = None, hours: int = 168) -> List[Dict]:
+        """Retrieve codegen responses with their patch's MinHash signature and LSH band keys (AWS Postgres RDS),
+        for one challenge or for one miner's responses completed in the last `hours` hours (-1 for all time).
+        Responses whose patch has no signature yet are omitted.
+        """
+        query = """
+            SELECT r.challenge_id, r.miner_hotkey, cr.patch_hash, r.completed_at, r.score, m.signature, m.bands
+            FROM responses r
+            JOIN codegen_responses cr ON r.challenge_key = cr.challenge_key AND r.miner_key = cr.miner_key
+            JOIN patch_minhashes m ON m.patch_hash = cr.patch_hash
+        """
+        params = []
+        if challenge_id:
+            query += " WHERE r.challenge_key = %s"
+        else:
+            query += " WHERE r.miner_key = %s"
+            if hours != -1:
+                query += " AND r.completed_at >= NOW() - INTERVAL '%s hours'"
+                params.append(hours)
+
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    if challenge_id:
+                        key = self._lookup_keys(cursor, self._challenge_keys, [challenge_id]).get(challenge_id)
+                    else:
+                        key = self._lookup_keys(cursor, self._hotkeys, [miner_hotkey]).get(miner_hotkey)
+                    if key is None:
+                        return []
+                    cursor.execute(query, [key, *params])
+                    return self._minhash_rows(cursor.fetchall())
+        except Exception as e:
+            print(f"Error getting response minhashes: {str(e)}")
+            return []
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def get_responses_sharing_bands(self, bands: List[int], exclude_miner_hotkey: str = None, limit: int = 5000) -> List[Dict]:
+        """Retrieve codegen responses whose patch shares at least one LSH bucket with the given band keys
+        (AWS Postgres RDS), via the GIN index on patch_minhashes.bands. These are near-duplicate
+        candidates; callers compare signatures to confirm.
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    # Postgres has no statistics for random band keys and assumes each one matches 0.5% of
+                    # patches, so a literal array of a few hundred keys looks like the whole table and gets
+                    # a sequential scan. Passing the keys through a subquery hides their count and keeps the
+                    # GIN lookup; collecting the matching hashes into an array first keeps the joins on indexes.
+                    cursor.execute("""
+                        SELECT r.challenge_id, r.miner_hotkey, cr.patch_hash, r.completed_at, r.score, m.signature, m.bands
+                        FROM codegen_responses cr
+                        JOIN patch_minhashes m ON m.patch_hash = cr.patch_hash
+                        JOIN responses r ON r.challenge_key = cr.challenge_key AND r.miner_key = cr.miner_key
+                        WHERE cr.patch_hash = ANY(ARRAY(
+                            SELECT patch_hash FROM patch_minhashes WHERE bands && (SELECT %s::BIGINT[])
+                        ))
+                        AND r.miner_key IS DISTINCT FROM %s
+                        LIMIT %s
+                    """, (list(bands), self._lookup_keys(cursor, self._hotkeys, [exclude_miner_hotkey]).get(exclude_miner_hotkey), limit))
+                    return self._minhash_rows(cursor.fetchall())
+        except Exception as e:
+            print(f"Error getting responses sharing LSH bands: {str(e)}")
+            return []
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def search_challenges(self, query: str, validator_hotkey: str = None, miner_hotkey: str = None, since: datetime = None, until: datetime = None, limit: int = 20, offset: int = 0, max_candidates: int = 5000) -> List[Dict]:
+        """Full-text search over codegen challenge problem statements and repository URLs (AWS Postgres RDS).
+        query uses web search syntax ("quoted phrases", -excluded, OR). Results are ranked by relevance,
+        problem statement matches weighing more than repository matches, and include a highlighted snippet.
+        miner_hotkey restricts results to challenges that miner responded to; since/until filter on created_at.
+        Only the first max_candidates matches are ranked, so results for very common terms are approximate
+        rather than ranking (and reading) every matching row.
+        """
+        conditions = ["cc.search_vector @@ q.query"]
+        params = [query]
+        if validator_hotkey:
+            conditions.append("c.validator_hotkey = %s")
+            params.append(validator_hotkey)
+        if miner_hotkey:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM challenge_keys ck JOIN responses r ON r.challenge_key = ck.id"
+                " WHERE ck.challenge_id = c.challenge_id AND r.miner_key = %s)"
+            )
+            miner_param = len(params)
+            params.append(None)  # The miner's key, looked up below
+        if since:
+            conditions.append("c.created_at >= %s")
+            params.append(since)
+        if until:
+            conditions.append("c.created_at < %s")
+            params.append(until)
+        params.extend([max_candidates, limit, offset])
+
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    if miner_hotkey:
+                        params[miner_param] = self._lookup_keys(cursor, self._hotkeys, [miner_hotkey]).get(miner_hotkey)
+                        if params[miner_param] is None:
+                            return []
+                    cursor.execute(f"""
+                        WITH candidates AS (
+                            SELECT c.challenge_id, c.validator_hotkey, c.created_at, cc.repository_url, cc.commit_hash,
+                                cc.problem_statement, cc.search_vector, q.query
+                            FROM codegen_challenges cc
+                            JOIN challenges c ON c.challenge_id = cc.challenge_id
+                            CROSS JOIN websearch_to_tsquery('english', %s) AS q(query)
+                            WHERE {" AND ".join(conditions)}
+                            LIMIT %s
+                        ),
+                        ranked AS (
+                            SELECT *, ts_rank_cd(search_vector, query) AS rank
+                            FROM candidates
+                            ORDER BY rank DESC, created_at DESC
+                            LIMIT %s OFFSET %s
+                        )
+                        SELECT
+                            challenge_id,
+                            validator_hotkey,
+                            created_at,
+                            repository_url,
+                            commit_hash,
+                            ts_headline('english', problem_statement, query, 'MaxFragments=2, MaxWords=25, MinWords=10') AS snippet,
+                            rank
+                        FROM ranked
+                        ORDER BY rank DESC, created_at DESC
+                    """, params)
+                    return [
+                        {
+                            'challenge_id': row[0],
+                            'validator_hotkey': row[1],
+                            'created_at': row[2],
+                            'repository_url': row[3],
+                            'commit_hash': row[4],
+                            'snippet': row[5],
+                            'rank': row[6]
+                        }
+                        for row in cursor.fetchall()
+                    ]
+        except Exception as e:
+            print(f"Error searching codegen challenges: {str(e)}")
+            return []
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    def search_responses(self, query: str, validator_hotkey: str = None, miner_hotkey: str = None, since: datetime = None, until: datetime = None, limit: int = 20, offset: int = 0, max_candidates: int = 5000) -> List[Dict]:
+        """Full-text search over codegen response patches (AWS Postgres RDS).
+        Each distinct patch is indexed once in response_patches; matches are joined back to every response
+        that submitted the patch. Results are ranked by relevance and reference the patch by patch_hash.
+        validator_hotkey filters on the challenge's validator; since/until filter on the response's completed_at.
+        As in search_challenges, only the first max_candidates matches are ranked.
+        """
+        conditions = []
+        filter_params = []
+        if validator_hotkey:
+            conditions.append("c.validator_hotkey = %s")
+            filter_params.append(validator_hotkey)
+        if miner_hotkey:
+            conditions.append("r.miner_key = %s")
+            miner_param = 1 + len(filter_params)  # Its position in params, after the query
+            filter_params.append(None)  # The miner's key, looked up below
+        if since:
+            conditions.append("r.completed_at >= %s")
+            filter_params.append(since)
+        if until:
+            conditions.append("r.completed_at < %s")
+            filter_params.append(until)
+
+        if conditions:
+            # Filters live on the responses, so rank matching responses directly
+            sql = f"""
+                WITH candidates AS (
+                    SELECT r.challenge_id, r.miner_hotkey, c.validator_hotkey, r.completed_at, r.score,
+                        cr.patch_hash, rp.search_vector, q.query
+                    FROM response_patches rp
+                    CROSS JOIN websearch_to_tsquery('simple', %s) AS q(query)
+                    JOIN codegen_responses cr ON cr.patch_hash = rp.patch_hash
+                    JOIN responses r ON r.challenge_key = cr.challenge_key AND r.miner_key = cr.miner_key
+                    JOIN challenges c ON c.challenge_id = r.challenge_id
+                    WHERE rp.search_vector @@ q.query AND {" AND ".join(conditions)}
+                    LIMIT %s
+                )
+                SELECT challenge_id, miner_hotkey, validator_hotkey, completed_at, score, patch_hash,
+                    ts_rank_cd(search_vector, query) AS rank
+                FROM candidates
+                ORDER BY rank DESC, completed_at DESC
+                LIMIT %s OFFSET %s
+            """
+            params = [query, *filter_params, max_candidates, limit, offset]
+        else:
+            # Rank matching patches first and only join the best ones back to their responses,
+            # which is most of the cost when a term matches thousands of patches
+            sql = """
+                WITH candidates AS (
+                    SELECT rp.patch_hash, rp.search_vector, q.query
+                    FROM response_patches rp
+                    CROSS JOIN websearch_to_tsquery('simple', %s) AS q(query)
+                    WHERE rp.search_vector @@ q.query
+                    LIMIT %s
+                ),
+                top_patches AS (
+                    SELECT patch_hash, ts_rank_cd(search_vector, query) AS rank
+                    FROM candidates
+                    WHERE EXISTS (SELECT 1 FROM codegen_responses cr WHERE cr.patch_hash = candidates.patch_hash)
+                    ORDER BY rank DESC
+                    LIMIT %s
+                )
+                SELECT r.challenge_id, r.miner_hotkey, c.validator_hotkey, r.completed_at, r.score, cr.patch_hash, tp.rank
+                FROM top_patches tp
+                JOIN codegen_responses cr ON cr.patch_hash = tp.patch_hash
+                JOIN responses r ON r.challenge_key = cr.challenge_key AND r.miner_key = cr.miner_key
+                JOIN challenges c ON c.challenge_id = r.challenge_id
+                ORDER BY tp.rank DESC, r.completed_at DESC
+                LIMIT %s OFFSET %s
+            """
+            # Every top patch has at least one response, so offset + limit patches fill the page
+            params = [query, max_candidates, offset + limit, limit, offset]
+
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                    if miner_hotkey:
+                        params[miner_param] = self._lookup_keys(cursor, self._hotkeys, [miner_hotkey]).get(miner_hotkey)
+                        if params[miner_param] is None:
+                            return []
+                    cursor.execute(sql, params)
+                    return [
+                        {
+                            'challenge_id': row[0],
+                            'miner_hotkey': row[1],
+                            'validator_hotkey': row[2],
+                            'completed_at': row[3],
+                            'score': row[4],
+                            'patch_hash': row[5],
+                            'rank': row[6]
+                        }
+                        for row in cursor.fetchall()
+                    ]
+        except Exception as e:
+            print(f"Error searching codegen responses: {str(e)}")
+            return []
         finally:
             if conn:
                 self.return_connection(conn)
@@ -400,8 +1613,9 @@ class DatabaseManager:
     @cached("challenges")
     def get_codegen_challenges(self, challenge_id: str = None) -> List[Dict]:
         """Retrieve codegen challenges from the database (AWS Postgres RDS), including response_count for each challenge.
-        Returns a list of dicts matching the original output format.
+        Returns a list of dicts matching the original output format, plus each challenge's score distribution.
         response_count only includes responses where evaluated is TRUE and score is not NULL.
+        Counts and distributions are read from challenge_score_stats, not aggregated from responses.
         """
         logger.debug(f"Fetching codegen challenges from database (challenge_id={challenge_id})")
         conn = None
@@ -409,86 +1623,119 @@ class DatabaseManager:
             conn = self.get_connection()
             with conn.cursor() as cursor:
                     if challenge_id:
-                        cursor.execute("""
-                            SELECT 
-                                c.challenge_id,
-                                c.type,
-                                c.validator_hotkey,
-                                c.created_at,
-                                cc.problem_statement,
-                                cc.dynamic_checklist,
-                                cc.repository_url,
-                                cc.commit_hash,
-                                cc.context_file_paths,
-                                COUNT(r.challenge_id) AS response_count
-                            FROM challenges c
-                            INNER JOIN codegen_challenges cc ON c.challenge_id = cc.challenge_id
-                            LEFT JOIN responses r ON c.challenge_id = r.challenge_id AND r.evaluated = TRUE AND r.score IS NOT NULL
+                        cursor.execute(CODEGEN_CHALLENGES_SELECT + """
                             WHERE c.challenge_id = %s AND c.type = 'codegen'
-                            GROUP BY
-                                c.challenge_id, c.type, c.validator_hotkey, c.created_at,
-                                cc.problem_statement, cc.dynamic_checklist, cc.repository_url,
-                                cc.commit_hash, cc.context_file_paths
                         """, (challenge_id,))
                     else:
-                        cursor.execute("""
-                            SELECT 
-                                c.challenge_id,
-                                c.type,
-                                c.validator_hotkey,
-                                c.created_at,
-                                cc.problem_statement,
-                                cc.dynamic_checklist,
-                                cc.repository_url,
-                                cc.commit_hash,
-                                cc.context_file_paths,
-                                COUNT(r.challenge_id) AS response_count
-                            FROM challenges c
-                            INNER JOIN codegen_challenges cc ON c.challenge_id = cc.challenge_id
-                            LEFT JOIN responses r ON c.challenge_id = r.challenge_id AND r.evaluated = TRUE AND r.score IS NOT NULL
+                        cursor.execute(CODEGEN_CHALLENGES_SELECT + """
                             WHERE c.type = 'codegen'
-                            GROUP BY
-                                c.challenge_id, c.type, c.validator_hotkey, c.created_at,
-                                cc.problem_statement, cc.dynamic_checklist, cc.repository_url,
-                                cc.commit_hash, cc.context_file_paths
                         """)
                     rows = cursor.fetchall()
                     if not rows:
                         return []
-                    results = []
-                    for row in rows:
-                        result = {
-                            'challenge_id': row[0],
-                            'type': row[1],
-                            'validator_hotkey': row[2],
-                            'created_at': row[3],
-                            'problem_statement': row[4],
-                            'dynamic_checklist': json.loads(row[5]) if row[5] else None,
-                            'repository_url': row[6],
-                            'commit_hash': row[7],
-                            'context_file_paths': json.loads(row[8]) if row[8] else None,
-                            'response_count': row[9]
-                        }
-                        results.append(result)
-                    return results
+                    return [self._codegen_challenge_row(row) for row in rows]
         except Exception as e:
             print(f"Error getting codegen challenges: {str(e)}")
             return []
         finally:
             if conn:
                 self.return_connection(conn)
-        
+
+    @cached("challenges")
+    def get_latest_codegen_challenges(self, max_challenges: int = 5) -> List[Dict]:
+        """The max_challenges most recently created codegen challenges that have evaluated responses,
+        newest first, in the format of get_codegen_challenges. Walks challenges by creation time and
+        stops once it has enough, so its cost doesn't grow with the number of challenges stored.
+        """
+        logger.debug(f"Fetching the latest {max_challenges} codegen challenges from database")
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                cursor.execute(CODEGEN_CHALLENGES_SELECT + """
+                    WHERE c.type = 'codegen' AND s.response_count > 0
+                    ORDER BY c.created_at DESC
+                    LIMIT %s
+                """, (max_challenges,))
+                return [self._codegen_challenge_row(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting latest codegen challenges: {str(e)}")
+            return []
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    @staticmethod
+    def _codegen_challenge_row(row) -> Dict:
+        return {
+            'challenge_id': row[0],
+            'type': row[1],
+            'validator_hotkey': row[2],
+            'created_at': row[3],
+            'problem_statement': row[4],
+            'dynamic_checklist': json.loads(row[5]) if row[5] else None,
+            'repository_url': row[6],
+            'commit_hash': row[7],
+            'context_file_paths': json.loads(row[8]) if row[8] else None,
+            'response_count': row[9],
+            # None until the challenge has an evaluated response
+            'score_stats': {
+                'mean': row[10],
+                'min': row[11],
+                'p10': row[12],
+                'p25': row[13],
+                'median': row[14],
+                'p75': row[15],
+                'p90': row[16],
+                'max': row[17],
+                'histogram': row[18],
+            } if row[9] else None,
+            'median_processing_time': row[19]
+        }
+
+    def get_codegen_challenges_by_ids(self, challenge_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Batch form of get_codegen_challenges(challenge_id=...).
+        Uncached IDs are loaded with one query, and each result is cached under the same key as the
+        single-ID call, so later single lookups hit. Returns challenge_id -> challenge (None if not found).
+        """
+        results = get_many(DatabaseManager.get_codegen_challenges, self, 'challenge_id', challenge_ids, self._fetch_codegen_challenges, default=[])
+        return {challenge_id: rows[0] if rows else None for challenge_id, rows in results.items()}
+
+    def _fetch_codegen_challenges(self, challenge_ids: List[str]) -> Dict[str, List[Dict]]:
+        logger.debug(f"Fetching {len(challenge_ids)} codegen challenges from database")
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                cursor.execute(CODEGEN_CHALLENGES_SELECT + """
+                    WHERE c.challenge_id = ANY(%s) AND c.type = 'codegen'
+                """, (list(challenge_ids),))
+                return {row[0]: [self._codegen_challenge_row(row)] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting codegen challenges by id: {str(e)}")
+            return {}
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    
     @cached("challenge_responses")
-    def get_codegen_challenge_responses(self, challenge_id: str) -> List[CodegenResponse]:
+    def get_codegen_challenge_responses(self, challenge_id: str) -> List[Dict]:
         """Retrieve a codegen challenge response from the database (AWS Postgres RDS).
         Returns a list of dictionaries containing the response.
         Only returns responses that have been evaluated (evaluated=true) and have a non-null score.
+        Rows come from our own database, so they are returned as plain dicts without model validation.
+        response_patch is only set for rows stored before content addressing; otherwise resolve
+        patch_hash with get_response_patches.
         """
         logger.debug(f"Fetching challenge responses from database (challenge_id={challenge_id})")
         conn = None
         try:
             conn = self.get_connection()
             with conn.cursor() as cursor:
+                    challenge_key = self._lookup_keys(cursor, self._challenge_keys, [challenge_id]).get(challenge_id)
+                    if challenge_key is None:
+                        return []
                     cursor.execute("""
                         SELECT 
                             r.miner_hotkey,
@@ -499,34 +1746,19 @@ class DatabaseManager:
                             r.evaluated,
                             r.score,
                             r.evaluated_at,
-                            cr.response_patch
+                            cr.response_patch,
+                            cr.patch_hash
                         FROM responses r
                         JOIN codegen_responses cr 
-                            ON r.challenge_id = cr.challenge_id 
-                            AND r.miner_hotkey = cr.miner_hotkey
-                        WHERE r.challenge_id = %s
+                            ON r.challenge_key = cr.challenge_key 
+                            AND r.miner_key = cr.miner_key
+                        WHERE r.challenge_key = %s
                             AND r.evaluated = TRUE
                             AND r.score IS NOT NULL
                         ORDER BY r.completed_at DESC
-                    """, (challenge_id,))
+                    """, (challenge_key,))
                     rows = cursor.fetchall()
-                    
-                    responses = []
-                    for row in rows:
-                        response_dict = {
-                            'challenge_id': challenge_id,
-                            'miner_hotkey': row[0],
-                            'node_id': row[1],
-                            'processing_time': row[2],
-                            'received_at': row[3],
-                            'completed_at': row[4],
-                            'evaluated': row[5],
-                            'score': row[6],
-                            'evaluated_at': row[7],
-                            'response_patch': row[8]
-                        }
-                        responses.append(CodegenResponse(**response_dict))
-                    return responses
+                    return [self._challenge_response_row(challenge_id, row) for row in rows]
         except Exception as e:
             print(f"Error getting codegen challenge response: {str(e)}")
             return []
@@ -534,11 +1766,77 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
 
+    @staticmethod
+    def _challenge_response_row(challenge_id: str, row) -> Dict:
+        return {
+            'challenge_id': challenge_id,
+            'miner_hotkey': row[0],
+            'node_id': row[1],
+            'processing_time': row[2],
+            'received_at': row[3],
+            'completed_at': row[4],
+            'evaluated': row[5],
+            'score': row[6],
+            'evaluated_at': row[7],
+            'response_patch': row[8],
+            'patch_hash': row[9]
+        }
+
+    def get_codegen_challenge_responses_by_ids(self, challenge_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Batch form of get_codegen_challenge_responses, filling the same per-challenge cache entries.
+        Returns challenge_id -> responses (an empty list for challenges without graded responses).
+        """
+        return get_many(DatabaseManager.get_codegen_challenge_responses, self, 'challenge_id', challenge_ids, self._fetch_codegen_challenge_responses, default=[])
+
+    def _fetch_codegen_challenge_responses(self, challenge_ids: List[str]) -> Dict[str, List[Dict]]:
+        logger.debug(f"Fetching challenge responses from database for {len(challenge_ids)} challenges")
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                challenge_keys = self._lookup_keys(cursor, self._challenge_keys, challenge_ids)
+                if not challenge_keys:
+                    return {}
+                cursor.execute("""
+                    SELECT 
+                        r.challenge_id,
+                        r.miner_hotkey,
+                        r.node_id,
+                        r.processing_time,
+                        r.received_at,
+                        r.completed_at,
+                        r.evaluated,
+                        r.score,
+                        r.evaluated_at,
+                        cr.response_patch,
+                        cr.patch_hash
+                    FROM responses r
+                    JOIN codegen_responses cr 
+                        ON r.challenge_key = cr.challenge_key 
+                        AND r.miner_key = cr.miner_key
+                    WHERE r.challenge_key = ANY(%s)
+                        AND r.evaluated = TRUE
+                        AND r.score IS NOT NULL
+                    ORDER BY r.challenge_key, r.completed_at DESC
+                """, (list(challenge_keys.values()),))
+                responses: Dict[str, List[Dict]] = {}
+                for row in cursor.fetchall():
+                    responses.setdefault(row[0], []).append(self._challenge_response_row(row[0], row[1:]))
+                return responses
+        except Exception as e:
+            print(f"Error getting codegen challenge responses by id: {str(e)}")
+            return {}
+        finally:
+            if conn:
+                self.return_connection(conn)
+
     @cached("miner_responses")
-    def get_miner_responses(self, challenge_id: str = None, miner_hotkey: str = None, min_score: float = 0, min_response_count: int = 0, sort_by_score: bool = False, max_miners: int = 5, hours: int = 24) -> List[Dict]:
+    def get_miner_responses(self, challenge_id: str = None, miner_hotkey: str = None, min_score: float = 0, min_response_count: int = 0, sort_by_score: bool = False, max_miners: int = 5, hours: int = 24, miner_hotkeys: List[str] = None) -> List[Dict]:
         """Retrieve codegen responses from the database (AWS Postgres RDS).
         Returns a list of dictionaries containing miner information and their responses.
         Only includes responses where evaluated is TRUE and score is not NULL.
+        Responses are the json_agg rows as-is (timestamps already ISO strings), without model validation.
+        As with get_codegen_challenge_responses, patch text is referenced by patch_hash.
         
         Additional parameters:
         - min_score: Minimum average score for miners to be included
@@ -546,6 +1844,7 @@ class DatabaseManager:
         - sort_by_score: Whether to sort miners by average score
         - max_miners: Maximum number of miners to return
         - hours: Number of hours to look back (-1 for all time)
+        - miner_hotkeys: Restrict the query to these miners (e.g. preselected by the rolling stats engine)
         """
         logger.debug(f"Fetching miner responses from database (challenge_id={challenge_id}, miner_hotkey={miner_hotkey}, params=min_score:{min_score},count:{min_response_count},sort:{sort_by_score},max:{max_miners},hours:{hours})")
         conn = None
@@ -556,6 +1855,7 @@ class DatabaseManager:
                     base_query = """
                         WITH RECURSIVE time_bucket AS (
                             SELECT 
+                                r.miner_key,
                                 r.miner_hotkey,
                                 r.challenge_id,
                                 r.node_id,
@@ -565,11 +1865,12 @@ class DatabaseManager:
                                 r.evaluated,
                                 r.score,
                                 r.evaluated_at,
-                                cr.response_patch
+                                cr.response_patch,
+                                cr.patch_hash
                             FROM responses r
                             JOIN codegen_responses cr 
-                                ON r.challenge_id = cr.challenge_id 
-                                AND r.miner_hotkey = cr.miner_hotkey
+                                ON r.challenge_key = cr.challenge_key 
+                                AND r.miner_key = cr.miner_key
                             WHERE r.evaluated = TRUE 
                                 AND r.score IS NOT NULL
                     """
@@ -581,28 +1882,41 @@ class DatabaseManager:
                     else:
                         params = []
 
-                    # Add challenge_id or miner_hotkey filter if provided
+                    # Add challenge_id or miner_hotkey filter if provided, by key; no rows refer to unknown ones
                     if challenge_id:
-                        base_query += " AND r.challenge_id = %s"
-                        params.append(challenge_id)
+                        challenge_key = self._lookup_keys(cursor, self._challenge_keys, [challenge_id]).get(challenge_id)
+                        if challenge_key is None:
+                            return []
+                        base_query += " AND r.challenge_key = %s"
+                        params.append(challenge_key)
                     elif miner_hotkey:
-                        base_query += " AND r.miner_hotkey = %s"
-                        params.append(miner_hotkey)
+                        miner_key = self._lookup_keys(cursor, self._hotkeys, [miner_hotkey]).get(miner_hotkey)
+                        if miner_key is None:
+                            return []
+                        base_query += " AND r.miner_key = %s"
+                        params.append(miner_key)
+
+                    if miner_hotkeys is not None:
+                        miner_keys = self._lookup_keys(cursor, self._hotkeys, miner_hotkeys)
+                        if not miner_keys:
+                            return []
+                        base_query += " AND r.miner_key = ANY(%s)"
+                        params.append(list(miner_keys.values()))
 
                     base_query += """
                         ),
                         miner_stats AS (
                             SELECT 
-                                miner_hotkey,
+                                miner_key,
                                 COUNT(*) as response_count,
                                 AVG(score) as average_score
                             FROM time_bucket
-                            GROUP BY miner_hotkey
+                            GROUP BY miner_key
                             HAVING COUNT(*) >= %s AND AVG(score) >= %s
                         ),
                         miner_responses AS (
                             SELECT 
-                                t.miner_hotkey,
+                                t.miner_key,
                                 json_agg(
                                     json_build_object(
                                         'challenge_id', t.challenge_id,
@@ -614,28 +1928,31 @@ class DatabaseManager:
                                         'evaluated', t.evaluated,
                                         'score', t.score,
                                         'evaluated_at', t.evaluated_at,
-                                        'response_patch', t.response_patch
+                                        'response_patch', t.response_patch,
+                                        'patch_hash', t.patch_hash
                                     )
                                     ORDER BY t.completed_at DESC
                                 ) as responses
                             FROM time_bucket t
-                            JOIN miner_stats ms ON t.miner_hotkey = ms.miner_hotkey
-                            GROUP BY t.miner_hotkey
+                            JOIN miner_stats ms ON t.miner_key = ms.miner_key
+                            GROUP BY t.miner_key
                         )
                         SELECT 
-                            mr.miner_hotkey,
+                            h.hotkey,
                             ms.response_count,
                             ms.average_score,
                             mr.responses
                         FROM miner_responses mr
-                        JOIN miner_stats ms ON mr.miner_hotkey = ms.miner_hotkey
+                        JOIN miner_stats ms ON mr.miner_key = ms.miner_key
+                        JOIN hotkeys h ON h.id = mr.miner_key
                     """
 
-                    # Add final sorting
+                    # Add final sorting. Hotkeys are compared by code point (COLLATE "C"), not the database's
+                    # locale, so the in-memory hot set and rolling stats select and order miners the same way
                     if sort_by_score:
-                        base_query += " ORDER BY ms.average_score DESC, mr.miner_hotkey"
+                        base_query += ' ORDER BY ms.average_score DESC, h.hotkey COLLATE "C"'
                     else:
-                        base_query += " ORDER BY mr.miner_hotkey"
+                        base_query += ' ORDER BY h.hotkey COLLATE "C"'
 
                     # Add final limit
                     base_query += " LIMIT %s"
@@ -651,7 +1968,7 @@ class DatabaseManager:
                             "miner_hotkey": row[0],
                             "response_count": row[1],
                             "average_score": row[2],
-                            "responses": [CodegenResponse(**response) for response in row[3]]
+                            "responses": row[3]
                         }
                         for row in rows
                     ]
@@ -662,3 +1979,197 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
 
+
+    def get_miner_responses_by_hotkeys(self, miner_hotkeys: List[str]) -> Dict[str, Optional[Dict]]:
+        """Batch form of get_miner_responses(miner_hotkey=...) with its default filters (last 24 hours).
+        Uncached miners are aggregated in one query, and each miner is cached under the same key as the
+        single-miner call. Returns miner_hotkey -> miner dict (None for miners without graded responses).
+        """
+        def fetch(missing: List[str]) -> Dict[str, List[Dict]]:
+            # The undecorated query, so the combined result isn't cached (or warmed) under its own key
+            miners = DatabaseManager.get_miner_responses.__wrapped__(self, miner_hotkeys=missing, max_miners=len(missing))
+            return {miner['miner_hotkey']: [miner] for miner in miners}
+
+        results = get_many(DatabaseManager.get_miner_responses, self, 'miner_hotkey', miner_hotkeys, fetch, default=[])
+        return {miner_hotkey: rows[0] if rows else None for miner_hotkey, rows in results.items()}
+
+    def get_changes(self, after_seq: int = 0, limit: int = 500, kinds: List[str] = None) -> Optional[Dict]:
+        """A page of the change feed: challenges, responses and scores created or re-evaluated after
+        position after_seq of the change_seq sequence, oldest first.
+
+        Each table's next positions are found with an index-only scan of its change_seq index, and
+        only the rows on the page are then read. Sequence values are handed out before the writing
+        statement commits, so a value can become visible after a higher one; the page therefore ends
+        before any row written at or after the start of a transaction that is still open (the settle
+        horizon), and before a challenge or response whose codegen/regression row has not been written
+        yet (it is stored by the following statement; after CHANGE_FEED_DETAIL_GRACE_SECONDS the row is
+        sent without it). Transactions open for longer than CHANGE_FEED_MAX_WRITE_SECONDS are not waited for.
+
+        Returns {'changes': [{'kind', 'data'}], 'last_seq', 'has_more'}, or None on failure.
+        """
+        kinds = kinds or list(CHANGE_FEED_KINDS)
+        conn = None
+        try:
+            conn = self.get_connection()
+            with conn.cursor() as cursor:
+                # The horizon is read before the page, so any transaction that commits rows
+                # the page can't see was already open (or not yet started) at this point
+                horizon = self._change_feed_horizon(cursor)
+
+                positions = []
+                for kind in kinds:
+                    table, keys = CHANGE_FEED_KINDS[kind]
+                    cursor.execute(f"""
+                        SELECT change_seq, changed_at, {keys}
+                        FROM {table}
+                        WHERE change_seq > %s
+                        ORDER BY change_seq
+                        LIMIT %s
+                    """, (after_seq, limit + 1))
+                    positions.extend((row[0], row[1], kind, row[2:]) for row in cursor.fetchall())
+                positions.sort(key=lambda position: position[0])
+                has_more = len(positions) > limit
+                positions = positions[:limit]
+
+                rows = {
+                    'challenge': self._change_feed_challenges(cursor, [key[0] for _, _, kind, key in positions if kind == 'challenge']),
+                    'response': self._change_feed_responses(cursor, [key for _, _, kind, key in positions if kind == 'response']),
+                    'score': self._change_feed_scores(cursor, [key[0] for _, _, kind, key in positions if kind == 'score']),
+                }
+
+            changes = []
+            last_seq = after_seq
+            for seq, changed_at, kind, key in positions:
+                data = rows[kind].get(tuple(key) if kind == 'response' else key[0])
+                pending_detail = data is not None and data['type'] is None and changed_at >= horizon - timedelta(seconds=CHANGE_FEED_DETAIL_GRACE_SECONDS)
+                if changed_at >= horizon or pending_detail:
+                    # Not settled yet: the consumer polls again from last_seq
+                    has_more = False
+                    break
+                last_seq = seq
+                if data is not None:
+                    changes.append({'kind': kind, 'data': data})
+            return {'changes': changes, 'last_seq': last_seq, 'has_more': has_more}
+        except Exception as e:
+            print(f"Error getting changes: {str(e)}")
+            return None
+        finally:
+            if conn:
+                self.return_connection(conn)
+
+    @staticmethod
+    def _change_feed_horizon(cursor) -> datetime:
+        """Start of the oldest transaction still open in another session, or now; changes made before
+        it are committed. Transactions open for longer than CHANGE_FEED_MAX_WRITE_SECONDS are ignored."""
+        cursor.execute("""
+            SELECT GREATEST(
+                COALESCE(MIN(xact_start), clock_timestamp()),
+                clock_timestamp() - make_interval(secs => %s)
+            )
+            FROM pg_stat_activity
+            WHERE datname = current_database()
+                AND pid <> pg_backend_pid()
+                AND backend_type = 'client backend'
+                AND xact_start IS NOT NULL
+        """, (CHANGE_FEED_MAX_WRITE_SECONDS,))
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def _change_feed_challenges(cursor, challenge_ids: List[str]) -> Dict[str, Dict]:
+        if not challenge_ids:
+            return {}
+        cursor.execute("""
+            SELECT
+                c.challenge_id,
+                CASE WHEN cc.challenge_id IS NOT NULL THEN 'codegen' WHEN rc.challenge_id IS NOT NULL THEN 'regression' END,
+                c.validator_hotkey,
+                c.created_at,
+                COALESCE(cc.problem_statement, rc.problem_statement),
+                cc.dynamic_checklist,
+                COALESCE(cc.repository_url, rc.repository_url),
+                COALESCE(cc.commit_hash, rc.commit_hash),
+                COALESCE(cc.context_file_paths, rc.context_file_paths)
+            FROM challenges c
+            LEFT JOIN codegen_challenges cc ON cc.challenge_id = c.challenge_id
+            LEFT JOIN regression_challenges rc ON rc.challenge_id = c.challenge_id
+            WHERE c.challenge_id = ANY(%s)
+        """, (challenge_ids,))
+        return {
+            row[0]: {
+                'challenge_id': row[0],
+                'type': row[1],
+                'validator_hotkey': row[2],
+                'created_at': row[3],
+                'problem_statement': row[4],
+                'dynamic_checklist': json.loads(row[5]) if row[5] else None,
+                'repository_url': row[6],
+                'commit_hash': row[7],
+                'context_file_paths': json.loads(row[8]) if row[8] else None,
+            }
+            for row in cursor.fetchall()
+        }
+
+    @staticmethod
+    def _change_feed_responses(cursor, keys: List[tuple]) -> Dict[tuple, Dict]:
+        if not keys:
+            return {}
+        cursor.execute("""
+            SELECT
+                r.challenge_key,
+                r.miner_key,
+                r.challenge_id,
+                r.miner_hotkey,
+                CASE WHEN cr.challenge_key IS NOT NULL THEN 'codegen' WHEN rr.challenge_key IS NOT NULL THEN 'regression' END,
+                r.node_id,
+                r.processing_time,
+                r.received_at,
+                r.completed_at,
+                r.evaluated,
+                r.score,
+                r.evaluated_at,
+                COALESCE(cr.response_patch, rr.response_patch),
+                COALESCE(cr.patch_hash, rr.patch_hash)
+            FROM responses r
+            LEFT JOIN codegen_responses cr ON cr.challenge_key = r.challenge_key AND cr.miner_key = r.miner_key
+            LEFT JOIN regression_responses rr ON rr.challenge_key = r.challenge_key AND rr.miner_key = r.miner_key
+            WHERE (r.challenge_key, r.miner_key) IN (SELECT * FROM unnest(%s::integer[], %s::integer[]))
+        """, ([key[0] for key in keys], [key[1] for key in keys]))
+        return {
+            (row[0], row[1]): {
+                'challenge_id': row[2],
+                'miner_hotkey': row[3],
+                'type': row[4],
+                'node_id': row[5],
+                'processing_time': row[6],
+                'received_at': row[7],
+                'completed_at': row[8],
+                'evaluated': row[9],
+                'score': row[10],
+                'evaluated_at': row[11],
+                'response_patch': row[12],
+                'patch_hash': row[13],
+            }
+            for row in cursor.fetchall()
+        }
+
+    @staticmethod
+    def _change_feed_scores(cursor, score_ids: List[int]) -> Dict[int, Dict]:
+        if not score_ids:
+            return {}
+        cursor.execute("""
+            SELECT id, type, validator_hotkey, miner_hotkey, score, created_at, challenge_id
+            FROM scores
+            WHERE id = ANY(%s)
+        """, (score_ids,))
+        return {
+            row[0]: {
+                'id': row[0],
+                'type': row[1],
+                'validator_hotkey': row[2],
+                'miner_hotkey': row[3],
+                'score': row[4],
+                'created_at': row[5],
+                'challenge_id': row[6],
+            }
+            for row in cursor.fetchall()
+        }
@@ -0,0 +1,85 @@
+"""
+Content-addressed storage helpers for response patches.
+Patches are stored once in the response_patches table, keyed by the SHA-256 of their text,
+and response rows reference them by hash. Large patches can optionally be zlib-compressed.
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from cachetools import LRUCache
+
+# Patches smaller than this are always stored as plain text
+PATCH_COMPRESSION_MIN_BYTES = 1024
+
+# Only the first this many characters of a patch are tokenized for full-text search
+# (tsvector positions stop at 16383 anyway, and tsvectors are capped at 1MB)
+SEARCH_TEXT_LIMIT = 100_000
+
+
+def patch_hash(patch: str) -> str:
+    """SHA-256 hex digest of a patch; matches encode(sha256(convert_to(patch, 'UTF8')), 'hex') in Postgres."""
+    return hashlib.sha256(patch.encode('utf-8')).hexdigest()
+
+
+def encode_patch(patch: str, compression: Optional[str] = None) -> Tuple[Optional[str], Optional[bytes]]:
+    """Return the (patch, compressed_patch) column values for storing a patch.
+    Exactly one of the two is set; compression is only kept when it actually saves space.
+    compression defaults to the PATCH_COMPRESSION env var ('zlib' or 'none').
+    """
+    if compression is None:
+        compression = os.getenv('PATCH_COMPRESSION', 'none')
+    if compression == 'zlib':
+        raw = patch.encode('utf-8')
+        if len(raw) >= PATCH_COMPRESSION_MIN_BYTES:
+            compressed = zlib.compress(raw, 6)
+            if len(compressed) < len(raw):
+                return None, compressed
+    return patch, None
+
+
+def search_text(patch: str) -> str:
+    """The part of a patch that is indexed for full-text search."""
+    return patch[:SEARCH_TEXT_LIMIT]
+
+
+def decode_patch(patch: Optional[str], compressed_patch: Optional[bytes]) -> Optional[str]:
+    """Inverse of encode_patch."""
+    if compressed_patch is not None:
+        return zlib.decompress(bytes(compressed_patch)).decode('utf-8')
+    return patch
+
+
+class PatchCache:
+    """Thread-safe LRU of decoded patches, bounded by total characters.
+    Patches are immutable once stored (their key is their content hash), so entries never go stale.
+    """
+
+    def __init__(self, max_chars: int = 64 * 1024 * 1024):
+        self._cache = LRUCache(maxsize=max_chars, getsizeof=len)
+        self._lock = threading.Lock()
+
+    def get_many(self, patch_hashes: Iterable[str]) -> Dict[str, str]:
+        with self._lock:
+            return {key: self._cache[key] for key in patch_hashes if key in self._cache}
+
+    def set_many(self, patches: Dict[str, str]) -> None:
+        with self._lock:
+            for key, patch in patches.items():
+                if len(patch) <= self._cache.maxsize:
+                    self._cache[key] = patch
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'patches': len(self._cache),
+                'chars': self._cache.currsize,
+                'max_chars': self._cache.maxsize,
+            }
+
+
+# Global decoded patch cache
+patch_cache = PatchCache()
@@ -1,11 +1,101 @@
 -- PostgreSQL schema for platform_db, functionally identical to schema.py
 
+-- Change sequence for the /retrieval/changes feed; must keep CACHE 1 (values handed out in time order)
+CREATE SEQUENCE IF NOT EXISTS change_seq;
+
+-- Dictionaries of hotkeys and challenge IDs: the hot tables store, index and join on these integer
+-- keys (see src/utils/interning.py). Keys are never reassigned or deleted.
+CREATE TABLE IF NOT EXISTS hotkeys (
+    id SERIAL PRIMARY KEY,
+    hotkey TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS challenge_keys (
+    id SERIAL PRIMARY KEY,
+    challenge_id TEXT NOT NULL UNIQUE
+);
+
+-- Keys for rows inserted without them (DatabaseManager supplies them; other writers may not)
+CREATE OR REPLACE FUNCTION intern_hotkey(value TEXT) RETURNS INTEGER AS $$
+DECLARE
+    key INTEGER;
+BEGIN
+    IF value IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT id INTO key FROM hotkeys WHERE hotkey = value;
+    IF key IS NULL THEN
+        INSERT INTO hotkeys (hotkey) VALUES (value) ON CONFLICT (hotkey) DO NOTHING RETURNING id INTO key;
+        IF key IS NULL THEN
+            SELECT id INTO key FROM hotkeys WHERE hotkey = value;
+        END IF;
+    END IF;
+    RETURN key;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION intern_challenge_id(value TEXT) RETURNS INTEGER AS $$
+DECLARE
+    key INTEGER;
+BEGIN
+    IF value IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT id INTO key FROM challenge_keys WHERE challenge_id = value;
+    IF key IS NULL THEN
+        INSERT INTO challenge_keys (challenge_id) VALUES (value) ON CONFLICT (challenge_id) DO NOTHING RETURNING id INTO key;
+        IF key IS NULL THEN
+            SELECT id INTO key FROM challenge_keys WHERE challenge_id = value;
+        END IF;
+    END IF;
+    RETURN key;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fill_response_keys() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.challenge_key IS NULL THEN
+        NEW.challenge_key := intern_challenge_id(NEW.challenge_id);
+    END IF;
+    IF NEW.miner_key IS NULL THEN
+        NEW.miner_key := intern_hotkey(NEW.miner_hotkey);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fill_score_keys() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.validator_key IS NULL THEN
+        NEW.validator_key := intern_hotkey(NEW.validator_hotkey);
+    END IF;
+    IF NEW.miner_key IS NULL THEN
+        NEW.miner_key := intern_hotkey(NEW.miner_hotkey);
+    END IF;
+    IF NEW.challenge_key IS NULL THEN
+        NEW.challenge_key := intern_challenge_id(NEW.challenge_id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fill_validator_version_keys() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.validator_key IS NULL THEN
+        NEW.validator_key := intern_hotkey(NEW.validator_hotkey);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Challenges table
 CREATE TABLE IF NOT EXISTS challenges (
     challenge_id TEXT PRIMARY KEY,  -- UUID for the challenge
     type TEXT NOT NULL CHECK(type IN ('codegen', 'regression')),
     validator_hotkey TEXT NOT NULL,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    change_seq BIGINT NOT NULL DEFAULT nextval('change_seq'),
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
 );
 
 -- Codegen challenges table
@@ -16,6 +106,10 @@ CREATE TABLE IF NOT EXISTS codegen_challenges (
     repository_url TEXT NOT NULL,     -- URL of the repository
     commit_hash TEXT,                 -- Optional commit hash for codegen challenges
     context_file_paths TEXT NOT NULL, -- JSON array of file paths relative to repo root
+    search_vector tsvector GENERATED ALWAYS AS (  -- Full-text search over problem statement and repository
+        setweight(to_tsvector('english', left(problem_statement, 100000)), 'A') ||
+        setweight(to_tsvector('simple', regexp_replace(repository_url, '[^[:alnum:]]+', ' ', 'g')), 'B')
+    ) STORED,
     FOREIGN KEY (challenge_id) REFERENCES challenges(challenge_id) ON DELETE CASCADE
 );
 
@@ -40,26 +134,54 @@ CREATE TABLE IF NOT EXISTS responses (
     evaluated BOOLEAN DEFAULT FALSE,
     score DOUBLE PRECISION,
     evaluated_at TIMESTAMP,
-    PRIMARY KEY (challenge_id, miner_hotkey),
+    change_seq BIGINT NOT NULL DEFAULT nextval('change_seq'),  -- Renumbered when re-evaluated
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    challenge_key INTEGER NOT NULL,  -- challenge_keys.id of challenge_id
+    miner_key INTEGER NOT NULL,      -- hotkeys.id of miner_hotkey
+    CONSTRAINT responses_keys_pkey PRIMARY KEY (challenge_key, miner_key),
     FOREIGN KEY (challenge_id) REFERENCES challenges(challenge_id)
 );
 
+-- Response patches table (content-addressed, each distinct patch stored once)
+CREATE TABLE IF NOT EXISTS response_patches (
+    patch_hash TEXT PRIMARY KEY,       -- SHA-256 hex of the UTF-8 patch text
+    patch TEXT,                        -- Patch text, NULL when stored compressed
+    compressed_patch BYTEA,            -- zlib-compressed patch text, NULL when stored as text
+    size INTEGER NOT NULL,             -- Uncompressed size in bytes
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector,            -- Full-text search over the patch, set on insert
+    CHECK ((patch IS NULL) <> (compressed_patch IS NULL))
+);
+
+-- MinHash signatures of response patches (near-duplicate detection, see src/utils/minhash.py)
+CREATE TABLE IF NOT EXISTS patch_minhashes (
+    patch_hash TEXT PRIMARY KEY REFERENCES response_patches(patch_hash),
+    signature BYTEA NOT NULL,  -- MinHash values as little-endian uint32
+    bands BIGINT[] NOT NULL    -- LSH bucket key per band
+);
+
 -- Codegen responses table
 CREATE TABLE IF NOT EXISTS codegen_responses (
     challenge_id TEXT NOT NULL,
     miner_hotkey TEXT NOT NULL,
-    response_patch TEXT NOT NULL,
-    PRIMARY KEY (challenge_id, miner_hotkey),
-    FOREIGN KEY (challenge_id, miner_hotkey) REFERENCES responses(challenge_id, miner_hotkey)
+    response_patch TEXT,  -- Only set for rows stored before patch_hash was introduced
+    patch_hash TEXT REFERENCES response_patches(patch_hash),
+    challenge_key INTEGER NOT NULL,
+    miner_key INTEGER NOT NULL,
+    CONSTRAINT codegen_responses_keys_pkey PRIMARY KEY (challenge_key, miner_key),
+    CONSTRAINT codegen_responses_keys_fkey FOREIGN KEY (challenge_key, miner_key) REFERENCES responses (challenge_key, miner_key)
 );
 
 -- Regression responses table
 CREATE TABLE IF NOT EXISTS regression_responses (
     challenge_id TEXT NOT NULL,
     miner_hotkey TEXT NOT NULL,
-    response_patch TEXT,  -- Nullable response patch for regression responses
-    PRIMARY KEY (challenge_id, miner_hotkey),
-    FOREIGN KEY (challenge_id, miner_hotkey) REFERENCES responses(challenge_id, miner_hotkey)
+    response_patch TEXT,  -- Only set for rows stored before patch_hash was introduced
+    patch_hash TEXT REFERENCES response_patches(patch_hash),  -- Nullable, regression patches are optional
+    challenge_key INTEGER NOT NULL,
+    miner_key INTEGER NOT NULL,
+    CONSTRAINT regression_responses_keys_pkey PRIMARY KEY (challenge_key, miner_key),
+    CONSTRAINT regression_responses_keys_fkey FOREIGN KEY (challenge_key, miner_key) REFERENCES responses (challenge_key, miner_key)
 );
 
 -- Agents table
@@ -79,7 +201,8 @@ CREATE TABLE IF NOT EXISTS validator_versions (
     id SERIAL PRIMARY KEY,
     validator_hotkey TEXT NOT NULL,
     version TEXT NOT NULL,
-    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    validator_key INTEGER NOT NULL  -- hotkeys.id of validator_hotkey
 );
 
 -- Scores table
@@ -90,5 +213,146 @@ CREATE TABLE IF NOT EXISTS scores (
     miner_hotkey TEXT NOT NULL,
     score DOUBLE PRECISION NOT NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    challenge_id TEXT DEFAULT NULL
-); 
+    challenge_id TEXT DEFAULT NULL,
+    change_seq BIGINT NOT NULL DEFAULT nextval('change_seq'),
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    validator_key INTEGER NOT NULL,  -- hotkeys.id of validator_hotkey
+    miner_key INTEGER NOT NULL,      -- hotkeys.id of miner_hotkey
+    challenge_key INTEGER            -- challenge_keys.id of challenge_id
+);
+
+-- Keys of rows inserted without them
+DROP TRIGGER IF EXISTS fill_response_keys ON responses;
+CREATE TRIGGER fill_response_keys BEFORE INSERT ON responses FOR EACH ROW EXECUTE FUNCTION fill_response_keys();
+DROP TRIGGER IF EXISTS fill_response_keys ON codegen_responses;
+CREATE TRIGGER fill_response_keys BEFORE INSERT ON codegen_responses FOR EACH ROW EXECUTE FUNCTION fill_response_keys();
+DROP TRIGGER IF EXISTS fill_response_keys ON regression_responses;
+CREATE TRIGGER fill_response_keys BEFORE INSERT ON regression_responses FOR EACH ROW EXECUTE FUNCTION fill_response_keys();
+DROP TRIGGER IF EXISTS fill_score_keys ON scores;
+CREATE TRIGGER fill_score_keys BEFORE INSERT ON scores FOR EACH ROW EXECUTE FUNCTION fill_score_keys();
+DROP TRIGGER IF EXISTS fill_validator_version_keys ON validator_versions;
+CREATE TRIGGER fill_validator_version_keys BEFORE INSERT ON validator_versions FOR EACH ROW EXECUTE FUNCTION fill_validator_version_keys();
+
+
+-- Supports time-window scans of evaluated responses (miner responses, rolling stats bootstrap)
+CREATE INDEX IF NOT EXISTS idx_responses_evaluated_completed_at
+    ON responses (completed_at)
+    WHERE evaluated = TRUE AND score IS NOT NULL;
+
+-- Full-text search
+CREATE INDEX IF NOT EXISTS idx_codegen_challenges_search ON codegen_challenges USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_response_patches_search ON response_patches USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_response_patches_unindexed ON response_patches (patch_hash) WHERE search_vector IS NULL;
+-- Maps matching patches back to the responses that submitted them
+CREATE INDEX IF NOT EXISTS idx_codegen_responses_patch_hash ON codegen_responses (patch_hash);
+
+-- Near-duplicate patch lookups by shared LSH bucket
+CREATE INDEX IF NOT EXISTS idx_patch_minhashes_bands ON patch_minhashes USING GIN (bands) WITH (fastupdate = off);
+-- A miner's recent responses (near-duplicate checks for one miner)
+CREATE INDEX IF NOT EXISTS idx_responses_miner_key_completed_at ON responses (miner_key, completed_at);
+
+-- Recent scores (validator agreement bootstrap)
+CREATE INDEX IF NOT EXISTS idx_scores_created_at ON scores (created_at);
+
+-- Change feed pages (index-only scans)
+CREATE INDEX IF NOT EXISTS idx_challenges_change_seq ON challenges (change_seq) INCLUDE (changed_at, challenge_id);
+CREATE INDEX IF NOT EXISTS idx_responses_change_seq_keys ON responses (change_seq) INCLUDE (changed_at, challenge_key, miner_key);
+CREATE INDEX IF NOT EXISTS idx_scores_change_seq ON scores (change_seq) INCLUDE (changed_at, id);
+
+-- Version counters bumped by writes, checked when restoring a cache snapshot
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO data_versions (name) VALUES ('challenges'), ('challenge_responses'), ('miner_responses')
+ON CONFLICT (name) DO NOTHING;
+
+-- Last run of each scheduled job that runs in one process at a time (src/utils/scheduler.py)
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    name TEXT PRIMARY KEY,
+    worker TEXT,
+    last_started_at TIMESTAMPTZ,
+    last_finished_at TIMESTAMPTZ,
+    last_status TEXT,
+    last_duration_ms DOUBLE PRECISION,
+    last_error TEXT,
+    runs BIGINT NOT NULL DEFAULT 0,
+    failures BIGINT NOT NULL DEFAULT 0
+);
+
+-- Score distribution of each challenge's evaluated responses, so challenge listings don't aggregate
+-- responses. DatabaseManager refreshes the challenges an upload touches (see _refresh_challenge_score_stats).
+CREATE TABLE IF NOT EXISTS challenge_score_stats (
+    challenge_key INTEGER PRIMARY KEY,                 -- challenge_keys.id
+    response_count INTEGER NOT NULL DEFAULT 0,         -- Evaluated responses with a score
+    mean_score DOUBLE PRECISION,
+    min_score DOUBLE PRECISION,
+    p10_score DOUBLE PRECISION,
+    p25_score DOUBLE PRECISION,
+    median_score DOUBLE PRECISION,
+    p75_score DOUBLE PRECISION,
+    p90_score DOUBLE PRECISION,
+    max_score DOUBLE PRECISION,
+    score_histogram INTEGER[] NOT NULL DEFAULT '{}',   -- Scores in 10 bins of width 0.1 from 0 to 1; scores outside it count in the end bins
+    median_processing_time DOUBLE PRECISION,           -- Of the same responses
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recompute the stats of the given challenges from their responses; returns the number of rows written
+CREATE OR REPLACE FUNCTION refresh_challenge_score_stats(keys INTEGER[]) RETURNS INTEGER AS $$
+    WITH graded AS (
+        SELECT k.key AS challenge_key, r.score, r.processing_time
+        FROM unnest(keys) AS k (key)
+        LEFT JOIN responses r ON r.challenge_key = k.key AND r.evaluated = TRUE AND r.score IS NOT NULL
+    ),
+    per_challenge AS (
+        SELECT
+            challenge_key,
+            COUNT(score) AS response_count,
+            AVG(score) AS mean_score,
+            MIN(score) AS min_score,
+            MAX(score) AS max_score,
+            percentile_cont(ARRAY[0.1, 0.25, 0.5, 0.75, 0.9]) WITHIN GROUP (ORDER BY score) AS percentiles,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY processing_time) AS median_processing_time,
+            array_agg(LEAST(GREATEST(width_bucket(score, 0, 1, 10), 1), 10)) FILTER (WHERE score IS NOT NULL) AS bins
+        FROM graded
+        GROUP BY challenge_key
+    ),
+    written AS (
+        INSERT INTO challenge_score_stats (
+            challenge_key, response_count, mean_score, min_score, p10_score, p25_score, median_score,
+            p75_score, p90_score, max_score, score_histogram, median_processing_time, updated_at
+        )
+        SELECT
+            challenge_key, response_count, mean_score, min_score, percentiles[1], percentiles[2], percentiles[3],
+            percentiles[4], percentiles[5], max_score,
+            ARRAY(
+                SELECT COUNT(bin)::integer
+                FROM generate_series(1, 10) AS i
+                LEFT JOIN unnest(bins) AS bin ON bin = i
+                GROUP BY i
+                ORDER BY i
+            ),
+            median_processing_time, CURRENT_TIMESTAMP
+        FROM per_challenge
+        ON CONFLICT (challenge_key) DO UPDATE SET
+            response_count = EXCLUDED.response_count,
+            mean_score = EXCLUDED.mean_score,
+            min_score = EXCLUDED.min_score,
+            p10_score = EXCLUDED.p10_score,
+            p25_score = EXCLUDED.p25_score,
+            median_score = EXCLUDED.median_score,
+            p75_score = EXCLUDED.p75_score,
+            p90_score = EXCLUDED.p90_score,
+            max_score = EXCLUDED.max_score,
+            score_histogram = EXCLUDED.score_histogram,
+            median_processing_time = EXCLUDED.median_processing_time,
+            updated_at = EXCLUDED.updated_at
+        RETURNING 1
+    )
+    SELECT COUNT(*)::integer FROM written;
+$$ LANGUAGE sql;
+
+-- Latest challenges first (challenge listings)
+CREATE INDEX IF NOT EXISTS idx_challenges_created_at ON challenges (created_at);
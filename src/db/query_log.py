@@ -0,0 +1,227 @@
+"""
+Slow-query log for the Ridges API.
+Pool connections use TracedCursor, which times every statement, adds it to the current request's trace
+as an "sql" span (see src/utils/tracing.py), and passes statements that took at least threshold_ms to
+the slow-query log. Each entry holds the statement (whitespace collapsed and shortened), the shape of its
+parameters (types and sizes, never values), the request it ran for and, for statements that can be
+explained, the plan from EXPLAIN. Each statement shape is explained at most once per explain_interval,
+so a burst of slow queries doesn't add a planning round trip to every one of them.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import psycopg2.extensions
+
+from src.utils.cancellation import cancelled
+from src.utils.logging import get_logger
+from src.utils.tracing import current_trace, record_span
+
+logger = get_logger(__name__)
+
+EXPLAINABLE = ("select", "with", "insert", "update", "delete", "values")
+MAX_STATEMENT_CHARS = 2000
+# Statements longer than this (e.g. execute_values pages with inlined rows) are logged but not explained
+MAX_EXPLAIN_CHARS = 64 * 1024
+MAX_PARAMETERS = 50
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))*")
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Types and sizes of a statement's parameters, e.g. ['str(64)', 'list[250]', 'int']."""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in list(parameters.items())[:MAX_PARAMETERS]}
+    shape = [_value_shape(value) for value in list(parameters)[:MAX_PARAMETERS]]
+    if len(parameters) > MAX_PARAMETERS:
+        shape.append(f"... {len(parameters)} parameters")
+    return shape
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def _text(query) -> str:
+    return query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+
+
+def fingerprint(statement: str) -> str:
+    """A short hash of a statement with its literals and value lists replaced, identifying its shape."""
+    normalized = _VALUE_LISTS.sub("(...)", _LITERALS.sub("?", statement))
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+class SlowQueryLog:
+    """Ring buffer of recent statements that took at least threshold_ms."""
+
+    def __init__(self, capacity: int = 200, threshold_ms: float = 250.0, explain_interval: float = 600.0):
+        """
+        Initialize the slow-query log.
+
+        Args:
+            capacity: Slow statements kept; older ones are dropped first (default: 200)
+            threshold_ms: Statements at least this slow are logged (default: 250)
+            explain_interval: Seconds before the same statement shape is explained again (default: 600)
+        """
+        self.capacity = capacity
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self._queries: deque = deque(maxlen=capacity)
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'statements': 0,
+            'slow': 0,
+            'explained': 0,
+            'explain_failed': 0,
+        }
+
+    def configure(self) -> None:
+        """Apply SLOW_QUERY_MS / SLOW_QUERY_CAPACITY overrides from the environment."""
+        self.threshold_ms = float(os.getenv('SLOW_QUERY_MS', self.threshold_ms))
+        self.capacity = int(os.getenv('SLOW_QUERY_CAPACITY', self.capacity))
+        with self._lock:
+            self._queries = deque(self._queries, maxlen=self.capacity)
+
+    def observe(self, cursor, query, parameters, start: float, end: float, rows: Optional[int], error: Optional[str] = None, explainable: bool = True) -> None:
+        """Record one executed statement: as a span of the current trace, and in the log if slow."""
+        duration_ms = (end - start) * 1000
+        if not isinstance(query, (str, bytes)):
+            # psycopg2.sql compositions
+            query = query.as_string(cursor)
+        with self._lock:
+            self._stats['statements'] += 1
+        if current_trace.get() is not None:
+            record_span("sql", start, end, statement=_WHITESPACE.sub(" ", _text(query[:200])).strip()[:120], rows=rows)
+        if duration_ms < self.threshold_ms:
+            return
+
+        statement = _WHITESPACE.sub(" ", _text(query)).strip()
+        shape = fingerprint(statement)
+        trace = current_trace.get()
+        entry = {
+            'at': time.time(),
+            'duration_ms': round(duration_ms, 3),
+            'fingerprint': shape,
+            'statement': statement[:MAX_STATEMENT_CHARS] + ("..." if len(statement) > MAX_STATEMENT_CHARS else ""),
+            'statement_chars': len(statement),
+            'parameters': parameter_shape(parameters),
+            'rows': rows,
+            'error': error,
+            'trace_id': trace.trace_id if trace is not None else None,
+            'path': trace.path if trace is not None else None,
+            'plan': None,
+        }
+        if error is None and explainable and self._should_explain(statement, shape):
+            entry['plan'] = self._explain(cursor.connection, query, parameters)
+        with self._lock:
+            self._stats['slow'] += 1
+            self._queries.append(entry)
+        logger.warning(f"Slow query ({duration_ms:.0f}ms, {shape}): {entry['statement'][:200]}")
+
+    def _should_explain(self, statement: str, shape: str) -> bool:
+        if len(statement) > MAX_EXPLAIN_CHARS or statement.split(" ", 1)[0].lower() not in EXPLAINABLE:
+            return False
+        now = time.time()
+        with self._lock:
+            if now - self._explained_at.get(shape, 0.0) < self.explain_interval:
+                return False
+            if len(self._explained_at) >= 10 * self.capacity:
+                self._explained_at.clear()
+            self._explained_at[shape] = now
+        return True
+
+    def _explain(self, connection, query, parameters) -> Optional[Any]:
+        """EXPLAIN (not ANALYZE) the statement on its own connection, inside a savepoint when in a
+        transaction so a statement that can't be explained doesn't abort the caller's work."""
+        prefix = b"EXPLAIN (FORMAT JSON) " if isinstance(query, bytes) else "EXPLAIN (FORMAT JSON) "
+        savepoint = not connection.autocommit
+        try:
+            with connection.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                if savepoint:
+                    cursor.execute("SAVEPOINT slow_query_explain")
+                try:
+                    cursor.execute(prefix + query, parameters)
+                    plan = cursor.fetchone()[0]
+                finally:
+                    if savepoint:
+                        cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            with self._lock:
+                self._stats['explained'] += 1
+            return plan if not isinstance(plan, str) else json.loads(plan)
+        except Exception as e:
+            with self._lock:
+                self._stats['explain_failed'] += 1
+            logger.warning(f"Could not EXPLAIN slow query: {str(e)}")
+            return None
+
+    def recent(self, limit: int = 50, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """The most recent slow statements, newest first."""
+        with self._lock:
+            queries = [entry for entry in self._queries if entry['duration_ms'] >= min_ms]
+        return queries[::-1][:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queries.clear()
+            self._explained_at.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                'kept': len(self._queries),
+                'capacity': self.capacity,
+                'threshold_ms': self.threshold_ms,
+                'explain_interval': self.explain_interval,
+            }
+
+
+class TracedCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that reports every statement to the slow-query log (and the current trace).
+    Statements of a cancelled request (see src/utils/cancellation.py) fail without reaching the server."""
+
+    def execute(self, query, vars=None):
+        if cancelled():
+            raise psycopg2.extensions.QueryCanceledError("canceling statement: the request was cancelled")
+        start = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception as e:
+            slow_query_log.observe(self, query, vars, start, time.perf_counter(), None, error=type(e).__name__)
+            raise
+        slow_query_log.observe(self, query, vars, start, time.perf_counter(), self.rowcount)
+        return result
+
+    def executemany(self, query, vars_list):
+        if cancelled():
+            raise psycopg2.extensions.QueryCanceledError("canceling statement: the request was cancelled")
+        vars_list = list(vars_list)
+        start = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        except Exception as e:
+            slow_query_log.observe(self, query, [f"{len(vars_list)} parameter sets"], start, time.perf_counter(), None, error=type(e).__name__, explainable=False)
+            raise
+        slow_query_log.observe(self, query, [f"{len(vars_list)} parameter sets"], start, time.perf_counter(), self.rowcount, explainable=False)
+        return result
+
+
+# Global slow-query log instance
+slow_query_log = SlowQueryLog(capacity=200, threshold_ms=250.0)
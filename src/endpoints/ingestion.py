@@ -1,20 +1,21 @@
-from typing import List, Union
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Callable, List, Type, Union
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, ValidationError
 from src.utils.logging import get_logger
 from datetime import datetime
 from src.utils.auth import verify_request
+from src.utils.bulkhead import ingestion_bulkhead
+from src.utils.cache import cache_warmer
+from src.utils.dependencies import get_db
+from src.utils.wire_formats import IngestionRequest, IngestionRoute
 from src.db.models import CodegenChallenge, CodegenResponse, RegressionChallenge, RegressionResponse, ValidatorVersion, Score
 from src.db.operations import DatabaseManager
 
 logger = get_logger(__name__)
 
-logger.info("Ingestion endpoint initialized")
-
-# Global database manager instance (singleton)
-db = DatabaseManager()
-
-async def post_codegen_challenges(data: List[CodegenChallenge], validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY"):
-    result = db.store_codegen_challenges(data)
+async def post_codegen_challenges(data: List[CodegenChallenge], validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    result = await ingestion_bulkhead.run(db.store_codegen_challenges, data)
 
     if result == 0:
         raise HTTPException(status_code=500, detail="An error occurred while storing codegen challenges")
@@ -33,15 +34,15 @@ async def post_codegen_challenges(data: List[CodegenChallenge], validator_hotkey
         version=validator_version,
         timestamp=datetime.now()
     )
-    db.store_validator_version(validator_version_object)
+    await ingestion_bulkhead.run(db.store_validator_version, validator_version_object)
 
     return {
         "status": "success",
         "message": f"Successfully stored codegen challenges",
     }
 
-async def post_regression_challenges(data: List[RegressionChallenge], validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY"):
-    result = db.store_regression_challenges(data)
+async def post_regression_challenges(data: List[RegressionChallenge], validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    result = await ingestion_bulkhead.run(db.store_regression_challenges, data)
 
     if result == 0:
         raise HTTPException(status_code=500, detail="An error occurred while storing regression challenges")
@@ -60,15 +61,15 @@ async def post_regression_challenges(data: List[RegressionChallenge], validator_
         version=validator_version,
         timestamp=datetime.now()
     )
-    db.store_validator_version(validator_version_object)
+    await ingestion_bulkhead.run(db.store_validator_version, validator_version_object)
 
     return {
         "status": "success",
         "message": f"Successfully stored regression challenges",
     }
 
-async def post_codegen_responses(data: List[CodegenResponse], validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY"):
-    result = db.store_codegen_responses(data)
+async def post_codegen_responses(data: List[CodegenResponse], validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    result = await ingestion_bulkhead.run(db.store_codegen_responses, data)
 
     if result == 0:
         raise HTTPException(status_code=500, detail="An error occurred while storing codegen responses")
@@ -80,15 +81,15 @@ async def post_codegen_responses(data: List[CodegenResponse], validator_hotkey:
         version=validator_version,
         timestamp=datetime.now()
     )
-    db.store_validator_version(validator_version_object)
+    await ingestion_bulkhead.run(db.store_validator_version, validator_version_object)
 
     return {
         "status": "success",
         "message": f"Successfully stored codegen responses",
     }
 
-async def post_regression_responses(data: List[RegressionResponse], validator_hotkey = "LEGACY VALIDATOR", validator_version: str = "LEGACY"):
-    result = db.store_regression_responses(data)
+async def post_regression_responses(data: List[RegressionResponse], validator_hotkey = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    result = await ingestion_bulkhead.run(db.store_regression_responses, data)
 
     if result == 0:
         raise HTTPException(status_code=500, detail="An error occurred while storing regression responses")
@@ -100,35 +101,178 @@ async def post_regression_responses(data: List[RegressionResponse], validator_ho
         version=validator_version,
         timestamp=datetime.now()
     )
-    db.store_validator_version(validator_version_object)
+    await ingestion_bulkhead.run(db.store_validator_version, validator_version_object)
 
     return {
         "status": "success",
         "message": f"Successfully stored regression responses",
     }
  
-async def post_scores(data: List[Score]):
+async def post_scores(data: List[Score], db: DatabaseManager = Depends(get_db)):
     if not data:
         return {
             "status": "failure",
             "message": "no scores to store",
         }
     
-    db.store_scores(data)
+    result = await ingestion_bulkhead.run(db.store_scores, data)
+
+    if result == 0:
+        raise HTTPException(status_code=500, detail="An error occurred while storing scores")
+
+    logger.info(f"Successfully stored {len(data)} scores")
 
     return {
         "status": "success",
         "message": f"Successfully stored {len(data)} scores",
     }
 
-router = APIRouter()
+STREAM_CHUNK_SIZE = 500
+
+async def store_streamed_items(request: IngestionRequest, model: Type[BaseModel], store: Callable, chunk_size: int = STREAM_CHUNK_SIZE, defer_warming: bool = True):
+    """Store a JSON (or MessagePack) array request body as it arrives: items are parsed out of the stream, validated one
+    at a time and written chunk_size at a time, the next chunk being parsed while the previous one is
+    written, so memory is bounded by about two chunks however large the upload.
+    Chunks are stored as they complete; on an error the response reports how many items were stored,
+    and the whole upload can be retried since storing is idempotent.
+    With defer_warming, store is called with warm_caches=False and invalidated caches are warmed once the
+    upload ends, rather than after every chunk.
+    Returns (number of items stored, first item).
+    """
+    reader = request.array_reader()
+    chunk, first, parsed, stored = [], None, 0, 0
+    writing = None
+    store_options = {"warm_caches": False} if defer_warming else {}
+
+    async def write(items):
+        # Anything but the store methods' 1 for success (0, or None from a store that doesn't report) fails the chunk
+        if await ingestion_bulkhead.run(store, items, **store_options) != 1:
+            raise HTTPException(
+                status_code=500,
+                detail={"status": "fail", "message": "An error occurred while storing a chunk of the upload"}
+            )
+        return len(items)
+
+    def parse_error(status_code: int, message: str, **extra):
+        return HTTPException(status_code=status_code, detail={"status": "fail", "message": message, **extra})
+
+    async def add(raw_items):
+        nonlocal first, parsed, writing, stored, chunk
+        for raw_item in raw_items:
+            try:
+                item = model.model_validate(raw_item)
+            except ValidationError as e:
+                raise parse_error(422, f"Item {parsed} is invalid", errors=e.errors(include_url=False, include_input=False, include_context=False))
+            if first is None:
+                first = item
+            parsed += 1
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                if writing is not None:
+                    stored += await writing
+                writing = asyncio.ensure_future(write(chunk))
+                chunk = []
+
+    try:
+        async for body in request.stream():
+            try:
+                raw_items = reader.feed(body)
+            except ValueError as e:
+                raise parse_error(400, str(e))
+            await add(raw_items)
+        try:
+            raw_items = reader.close()
+        except ValueError as e:
+            raise parse_error(400, str(e))
+        await add(raw_items)
+        if writing is not None:
+            stored += await writing
+            writing = None
+        if chunk:
+            stored += await write(chunk)
+    except HTTPException as e:
+        if writing is not None:
+            try:
+                stored += await writing
+            except HTTPException:
+                pass
+        if not isinstance(e.detail, dict):
+            # Errors raised while reading the request (e.g. a corrupt compressed body)
+            e.detail = {"status": "fail", "message": e.detail}
+        e.detail["stored"] = stored
+        raise
+    finally:
+        if defer_warming and stored:
+            cache_warmer.warm(reason="streamed upload")
+
+    if not stored:
+        raise HTTPException(status_code=400, detail={"status": "fail", "message": "No items to store", "stored": 0})
+    return stored, first
+
+async def post_codegen_challenges_stream(request: Request, validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    count, first = await store_streamed_items(request, CodegenChallenge, db.store_codegen_challenges)
+
+    val_hotkey = validator_hotkey if validator_hotkey != "LEGACY VALIDATOR" else first.validator_hotkey or "LEGACY VALIDATOR"
+    await ingestion_bulkhead.run(db.store_validator_version, ValidatorVersion(validator_hotkey=val_hotkey, version=validator_version, timestamp=datetime.now()))
+
+    return {
+        "status": "success",
+        "message": f"Successfully stored {count} codegen challenges",
+    }
+
+async def post_regression_challenges_stream(request: Request, validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    count, first = await store_streamed_items(request, RegressionChallenge, db.store_regression_challenges)
+
+    val_hotkey = validator_hotkey if validator_hotkey != "LEGACY VALIDATOR" else first.validator_hotkey or "LEGACY VALIDATOR"
+    await ingestion_bulkhead.run(db.store_validator_version, ValidatorVersion(validator_hotkey=val_hotkey, version=validator_version, timestamp=datetime.now()))
+
+    return {
+        "status": "success",
+        "message": f"Successfully stored {count} regression challenges",
+    }
+
+async def post_codegen_responses_stream(request: Request, validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    count, _ = await store_streamed_items(request, CodegenResponse, db.store_codegen_responses)
+
+    await ingestion_bulkhead.run(db.store_validator_version, ValidatorVersion(validator_hotkey=validator_hotkey, version=validator_version, timestamp=datetime.now()))
+
+    return {
+        "status": "success",
+        "message": f"Successfully stored {count} codegen responses",
+    }
+
+async def post_regression_responses_stream(request: Request, validator_hotkey: str = "LEGACY VALIDATOR", validator_version: str = "LEGACY", db: DatabaseManager = Depends(get_db)):
+    count, _ = await store_streamed_items(request, RegressionResponse, db.store_regression_responses)
+
+    await ingestion_bulkhead.run(db.store_validator_version, ValidatorVersion(validator_hotkey=validator_hotkey, version=validator_version, timestamp=datetime.now()))
+
+    return {
+        "status": "success",
+        "message": f"Successfully stored {count} regression responses",
+    }
+
+async def post_scores_stream(request: Request, db: DatabaseManager = Depends(get_db)):
+    count, _ = await store_streamed_items(request, Score, db.store_scores, defer_warming=False)
+
+    return {
+        "status": "success",
+        "message": f"Successfully stored {count} scores",
+    }
+
+router = APIRouter(route_class=IngestionRoute)
 
 routes = [
     ("/codegen-challenges", post_codegen_challenges), 
     ("/regression-challenges", post_regression_challenges),
     ("/codegen-responses", post_codegen_responses),
     ("/regression-responses", post_regression_responses),
-    ("/scores-list", post_scores)
+    ("/scores-list", post_scores),
+    # Same JSON array bodies, parsed and stored incrementally (for uploads of thousands of items)
+    ("/codegen-challenges/stream", post_codegen_challenges_stream),
+    ("/regression-challenges/stream", post_regression_challenges_stream),
+    ("/codegen-responses/stream", post_codegen_responses_stream),
+    ("/regression-responses/stream", post_regression_responses_stream),
+    ("/scores-list/stream", post_scores_stream)
 ]
 
 for path, endpoint in routes:
@@ -1,19 +1,60 @@
+import base64
+import binascii
+import math
+from datetime import datetime, timezone
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from src.utils.logging import get_logger
-from typing import Optional
+from typing import Dict, List, Optional
 
 from src.utils.auth import verify_request
+from src.utils.bulkhead import admin_bulkhead, bulkheads, retrieval_bulkhead
 from src.utils.cache import cache_manager, invalidate_cache_pattern
-from src.db.operations import DatabaseManager
+from src.utils.cancellation import query_cancellations
+from src.utils.events import EVENT_TYPES, event_hub
+from src.utils.hot_set import response_hot_set
+from src.utils.idempotency import ingestion_replay_cache
+from src.utils.minhash import patch_minhasher
+from src.utils.rolling_stats import rolling_miner_stats
+from src.utils.score_agreement import score_agreement
+from src.utils.scheduler import job_scheduler
+from src.utils.serialization import FastJSONResponse
+from src.utils.tracing import slow_requests
+from src.utils.dependencies import get_db
+from src.db.operations import CHANGE_FEED_KINDS, DatabaseManager
+from src.db.query_log import slow_query_log
 
 logger = get_logger(__name__)
 
-# Global database manager instance (singleton)
-db = DatabaseManager()
+# Bumped if the cursor format of /retrieval/changes ever changes
+CHANGE_CURSOR_VERSION = "c1"
 
-async def get_codegen_challenge(challenge_id: str):
-    challenge = db.get_codegen_challenges(challenge_id=challenge_id)
+def resolve_patches(db: DatabaseManager, response_lists: List[List[Dict]], dedupe_patches: bool) -> Optional[Dict[str, str]]:
+    """Resolve content-addressed patches for lists of response rows, in place on each list.
+    With dedupe_patches, rows keep only their patch_hash and the distinct patches are returned
+    as a patch_hash -> patch dict. Otherwise each row gets its response_patch filled in and None
+    is returned. Rows are copied before filling, since they may be shared with the cache.
+    """
+    patch_hashes = {
+        response["patch_hash"]
+        for responses in response_lists
+        for response in responses
+        if response.get("patch_hash")
+    }
+    patches = db.get_response_patches(list(patch_hashes)) if patch_hashes else {}
+    if dedupe_patches:
+        return patches
+
+    for responses in response_lists:
+        responses[:] = [
+            {**response, "response_patch": patches.get(response["patch_hash"])} if response.get("patch_hash") else response
+            for response in responses
+        ]
+    return None
+
+async def get_codegen_challenge(challenge_id: str, dedupe_patches: bool = False, db: DatabaseManager = Depends(get_db)):
+    challenge = await retrieval_bulkhead.run(db.get_codegen_challenges, challenge_id=challenge_id)
 
     if not challenge:
         raise HTTPException(
@@ -26,17 +67,20 @@ async def get_codegen_challenge(challenge_id: str):
             }
         )
     
-    responses = db.get_codegen_challenge_responses(challenge_id=challenge_id)
-    print(len(responses))
+    responses = list(await retrieval_bulkhead.run(db.get_codegen_challenge_responses, challenge_id=challenge_id))
+    patches = await retrieval_bulkhead.run(resolve_patches, db, [responses], dedupe_patches)
 
-    return {
+    content = {
         "status": "success",
         "message": f"Codegen challenge {challenge_id} retrieved successfully",
         "challenge": challenge[0],
         "responses": responses
     }
+    if dedupe_patches:
+        content["patches"] = patches
+    return FastJSONResponse(content=content)
 
-async def get_codegen_challenges(max_challenges: int = 5):
+async def get_codegen_challenges(max_challenges: int = 5, db: DatabaseManager = Depends(get_db)):
     if max_challenges > 150:
         raise HTTPException(
             status_code=400,
@@ -48,7 +92,8 @@ async def get_codegen_challenges(max_challenges: int = 5):
             }
         )
 
-    challenges = db.get_codegen_challenges()
+    # The latest challenges with evaluated responses, newest first
+    challenges = await retrieval_bulkhead.run(db.get_latest_codegen_challenges, max_challenges=max_challenges)
 
     if not challenges:
         raise HTTPException(
@@ -61,18 +106,24 @@ async def get_codegen_challenges(max_challenges: int = 5):
             }
         )
 
-    challenges = [challenge for challenge in challenges if challenge["response_count"] > 0]
-    challenges.sort(key=lambda x: x["created_at"], reverse=True)
-    challenges = challenges[:max_challenges]
-
-    return {
+    return FastJSONResponse(content={
         "status": "success",
         "message": f"Codegen challenges retrieved successfully",
         "challenge_count": len(challenges),
         "challenges": challenges,
-    }
+    })
 
-async def get_miner_responses(min_score: float = 0, min_response_count: int = 0, sort_by_score: bool = False, max_miners: int = 5):
+def matches_selection(miners: List[Dict], selected: List) -> bool:
+    """Whether the database's aggregates for the miners selected from the rolling stats are the ones they were selected on."""
+    expected = {miner.miner_hotkey: miner for miner in selected}
+    return len(miners) == len(expected) and all(
+        miner["miner_hotkey"] in expected
+        and miner["response_count"] == expected[miner["miner_hotkey"]].response_count
+        and math.isclose(miner["average_score"], expected[miner["miner_hotkey"]].average_score, rel_tol=1e-9, abs_tol=1e-12)
+        for miner in miners
+    )
+
+async def get_miner_responses(min_score: float = 0, min_response_count: int = 0, sort_by_score: bool = False, max_miners: int = 5, hours: int = 24, dedupe_patches: bool = False, db: DatabaseManager = Depends(get_db)):
     if max_miners > 150:
         raise HTTPException(
             status_code=400,
@@ -84,12 +135,65 @@ async def get_miner_responses(min_score: float = 0, min_response_count: int = 0,
             }
         )
 
-    miners = db.get_miner_responses(
-        min_score=min_score,
-        min_response_count=min_response_count,
-        sort_by_score=sort_by_score,
-        max_miners=max_miners
-    )
+    if hours != -1 and hours < 1:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": "Hours must be a positive number of hours, or -1 for all time",
+                "miner_count": 0,
+                "miners": []
+            }
+        )
+
+    if response_hot_set.covers(hours):
+        # Answer the whole query from the in-memory columns of recent graded responses
+        miners = await retrieval_bulkhead.run(
+            response_hot_set.query,
+            hours=hours,
+            min_score=min_score,
+            min_response_count=min_response_count,
+            sort_by_score=sort_by_score,
+            max_miners=max_miners
+        )
+    elif rolling_miner_stats.covers(hours):
+        # Select miners from the in-memory hourly buckets, then only aggregate responses for those miners.
+        # The filters aren't applied again in SQL: they would drop selected miners without bringing in the
+        # ones that should replace them. If a response written after the buckets were read changed a
+        # selected miner's aggregates, the selection may be wrong, so fall back to the full query
+        selected = rolling_miner_stats.query(
+            hours=hours,
+            min_score=min_score,
+            min_response_count=min_response_count,
+            sort_by_score=sort_by_score,
+            max_miners=max_miners
+        )
+        miners = await retrieval_bulkhead.run(
+            db.get_miner_responses,
+            sort_by_score=sort_by_score,
+            max_miners=len(selected),
+            hours=hours,
+            miner_hotkeys=[miner.miner_hotkey for miner in selected]
+        ) if selected else []
+        if not matches_selection(miners, selected):
+            logger.debug(f"Rolling stats selection for the last {hours} hours disagrees with the database, using the full query")
+            miners = await retrieval_bulkhead.run(
+                db.get_miner_responses,
+                min_score=min_score,
+                min_response_count=min_response_count,
+                sort_by_score=sort_by_score,
+                max_miners=max_miners,
+                hours=hours
+            )
+    else:
+        miners = await retrieval_bulkhead.run(
+            db.get_miner_responses,
+            min_score=min_score,
+            min_response_count=min_response_count,
+            sort_by_score=sort_by_score,
+            max_miners=max_miners,
+            hours=hours
+        )
 
     if not miners:
         raise HTTPException(
@@ -101,15 +205,24 @@ async def get_miner_responses(min_score: float = 0, min_response_count: int = 0,
             }
         )
 
-    return {
+    miners = [{**miner, "responses": list(miner["responses"])} for miner in miners]
+    patches = await retrieval_bulkhead.run(resolve_patches, db, [miner["responses"] for miner in miners], dedupe_patches)
+
+    content = {
         "status": "success",
         "message": "Graded miner responses retrieved successfully" if miners else "No graded miner responses found with the given parameters",
         "miner_count": len(miners),
         "miners": miners
     }
+    if dedupe_patches:
+        content["patches"] = patches
+    return FastJSONResponse(content=content)
 
-async def get_single_miner_responses(miner_hotkey: str):
-    responses_obj = db.get_miner_responses(miner_hotkey=miner_hotkey)
+async def get_single_miner_responses(miner_hotkey: str, dedupe_patches: bool = False, db: DatabaseManager = Depends(get_db)):
+    if response_hot_set.covers(24):
+        responses_obj = await retrieval_bulkhead.run(response_hot_set.query, hours=24, max_miners=1, miner_hotkeys=[miner_hotkey])
+    else:
+        responses_obj = await retrieval_bulkhead.run(db.get_miner_responses, miner_hotkey=miner_hotkey)
 
     if not responses_obj:
         raise HTTPException(
@@ -121,17 +234,377 @@ async def get_single_miner_responses(miner_hotkey: str):
             }
         )
     
-    responses = responses_obj[0]['responses']
+    responses = list(responses_obj[0]['responses'])
+    patches = await retrieval_bulkhead.run(resolve_patches, db, [responses], dedupe_patches)
 
-    return {
+    details = {
+        "miner_hotkey": miner_hotkey,
+        "response_count": len(responses),
+        "responses": responses
+    }
+    if dedupe_patches:
+        details["patches"] = patches
+    return FastJSONResponse(content={
         "status": "success",
         "message": f"Miner graded responses retrieved",
-        "details": {
+        "details": details
+    })
+
+MAX_BATCH_SIZE = 150
+
+def parse_batch(values: str, name: str) -> List[str]:
+    """Split a comma-separated batch parameter, rejecting empty or oversized batches."""
+    items = list(dict.fromkeys(value.strip() for value in values.split(",") if value.strip()))
+    if not items or len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": f"{name} must be a comma-separated list of 1 to {MAX_BATCH_SIZE} values"
+            }
+        )
+    return items
+
+def load_codegen_challenge_batch(db: DatabaseManager, challenge_ids: List[str], dedupe_patches: bool):
+    """Challenges, their graded responses and patches for a page of challenge IDs, in three queries
+    (each skipped for entries already cached) instead of three per challenge."""
+    challenges = db.get_codegen_challenges_by_ids(challenge_ids)
+    found = [challenge_id for challenge_id in challenge_ids if challenges[challenge_id]]
+    responses = db.get_codegen_challenge_responses_by_ids(found) if found else {}
+    items = [
+        {"challenge": challenges[challenge_id], "responses": list(responses[challenge_id])}
+        for challenge_id in found
+    ]
+    patches = resolve_patches(db, [item["responses"] for item in items], dedupe_patches)
+    missing = [challenge_id for challenge_id in challenge_ids if not challenges[challenge_id]]
+    return items, missing, patches
+
+async def get_codegen_challenge_batch(challenge_ids: str, dedupe_patches: bool = False, db: DatabaseManager = Depends(get_db)):
+    """Batch form of /codegen-challenge: challenge_ids is a comma-separated list of up to 150 IDs.
+    IDs that don't exist are listed under "missing"."""
+    challenge_ids = parse_batch(challenge_ids, "challenge_ids")
+    items, missing, patches = await retrieval_bulkhead.run(load_codegen_challenge_batch, db, challenge_ids, dedupe_patches)
+
+    if not items:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "status": "fail",
+                "message": "None of the codegen challenges were found",
+                "challenges": [],
+                "missing": missing
+            }
+        )
+
+    content = {
+        "status": "success",
+        "message": f"{len(items)} codegen challenges retrieved successfully",
+        "challenge_count": len(items),
+        "challenges": items,
+        "missing": missing
+    }
+    if dedupe_patches:
+        content["patches"] = patches
+    return FastJSONResponse(content=content)
+
+def load_single_miner_batch(db: DatabaseManager, miner_hotkeys: List[str], dedupe_patches: bool):
+    """Graded responses and patches for a page of miners, in two queries instead of two per miner
+    (one, for patches, when the hot set covers the default 24 hour window)."""
+    if response_hot_set.covers(24):
+        found = {miner["miner_hotkey"]: miner for miner in response_hot_set.query(hours=24, max_miners=len(miner_hotkeys), miner_hotkeys=miner_hotkeys)}
+        miners = {miner_hotkey: found.get(miner_hotkey) for miner_hotkey in miner_hotkeys}
+    else:
+        miners = db.get_miner_responses_by_hotkeys(miner_hotkeys)
+    items = [
+        {
             "miner_hotkey": miner_hotkey,
-            "response_count": len(responses),
-            "responses": responses
+            "response_count": len(miners[miner_hotkey]["responses"]),
+            "responses": list(miners[miner_hotkey]["responses"])
         }
+        for miner_hotkey in miner_hotkeys
+        if miners[miner_hotkey]
+    ]
+    patches = resolve_patches(db, [item["responses"] for item in items], dedupe_patches)
+    missing = [miner_hotkey for miner_hotkey in miner_hotkeys if not miners[miner_hotkey]]
+    return items, missing, patches
+
+async def get_single_miner_responses_batch(miner_hotkeys: str, dedupe_patches: bool = False, db: DatabaseManager = Depends(get_db)):
+    """Batch form of /single-miner-responses: miner_hotkeys is a comma-separated list of up to 150 hotkeys.
+    Miners without graded responses are listed under "missing"."""
+    miner_hotkeys = parse_batch(miner_hotkeys, "miner_hotkeys")
+    items, missing, patches = await retrieval_bulkhead.run(load_single_miner_batch, db, miner_hotkeys, dedupe_patches)
+
+    if not items:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "status": "fail",
+                "message": "No miner graded responses found for any of the miners",
+                "miners": [],
+                "missing": missing
+            }
+        )
+
+    content = {
+        "status": "success",
+        "message": f"Miner graded responses retrieved",
+        "miner_count": len(items),
+        "miners": items,
+        "missing": missing
     }
+    if dedupe_patches:
+        content["patches"] = patches
+    return FastJSONResponse(content=content)
+
+def find_near_duplicates(db: DatabaseManager, challenge_id: Optional[str], miner_hotkey: Optional[str], threshold: float, hours: int) -> List[List[Dict]]:
+    """Near-duplicate response clusters for a challenge, or clusters pairing a miner's recent responses
+    with other miners' responses. Candidates come from shared LSH buckets, never a full pairwise scan."""
+    if challenge_id:
+        return patch_minhasher.clusters(db.get_response_minhashes(challenge_id=challenge_id), threshold)
+
+    responses = db.get_response_minhashes(miner_hotkey=miner_hotkey, hours=hours)
+    if not responses:
+        return []
+    bands = {key for response in responses for key in response["bands"]}
+    candidates = db.get_responses_sharing_bands(list(bands), exclude_miner_hotkey=miner_hotkey)
+    return patch_minhasher.clusters(responses + candidates, threshold, anchor=miner_hotkey)
+
+async def get_near_duplicates(challenge_id: Optional[str] = None, miner_hotkey: Optional[str] = None, threshold: float = 0.8, hours: int = 168, db: DatabaseManager = Depends(get_db)):
+    if bool(challenge_id) == bool(miner_hotkey) or not 0.5 <= threshold <= 1 or (hours != -1 and hours < 1):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": "Provide exactly one of challenge_id or miner_hotkey, a threshold between 0.5 and 1, and hours as a positive number or -1 for all time",
+                "cluster_count": 0,
+                "clusters": []
+            }
+        )
+
+    clusters = await retrieval_bulkhead.run(find_near_duplicates, db, challenge_id, miner_hotkey, threshold, hours)
+
+    return FastJSONResponse(content={
+        "status": "success",
+        "message": f"Found {len(clusters)} near-duplicate clusters" if clusters else "No near-duplicate patches found",
+        "threshold": threshold,
+        "cluster_count": len(clusters),
+        "clusters": [
+            {
+                "size": len(members),
+                "miner_count": len({member["miner_hotkey"] for member in members}),
+                "members": members
+            }
+            for members in clusters
+        ]
+    })
+
+async def get_events(types: Optional[str] = None, miner_hotkey: Optional[str] = None, challenge_id: Optional[str] = None, last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """Server-Sent Events stream of new challenges, stored and evaluated responses and scores.
+    types is a comma-separated subset of challenge, response, response_evaluated and score.
+    Each worker streams from its own hub: writes made through other workers arrive from the change feed,
+    up to IN_MEMORY_SYNC_INTERVAL seconds later, and a Last-Event-ID can only be resumed from on the worker
+    that sent it. A 'resync' event means events were dropped for a slow client, or could not be replayed
+    after a reconnect to another worker; the client should refetch."""
+    event_types = [event_type.strip() for event_type in types.split(",") if event_type.strip()] if types else None
+    if event_types and not set(event_types) <= set(EVENT_TYPES):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": f"types must be a comma-separated subset of {', '.join(EVENT_TYPES)}"
+            }
+        )
+
+    subscription = event_hub.subscribe(event_types, miner_hotkey, challenge_id, last_event_id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "fail",
+                "message": "Too many live event subscribers, retry shortly"
+            },
+            headers={"Retry-After": "5"}
+        )
+
+    return StreamingResponse(
+        event_hub.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def encode_change_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"{CHANGE_CURSOR_VERSION}:{seq}".encode()).decode().rstrip("=")
+
+def decode_change_cursor(cursor: str) -> int:
+    """The change_seq position in an opaque cursor from /retrieval/changes. Raises ValueError if invalid."""
+    try:
+        version, seq = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("invalid cursor")
+    if version != CHANGE_CURSOR_VERSION or not seq.isdigit():
+        raise ValueError("invalid cursor")
+    return int(seq)
+
+async def get_changes(cursor: Optional[str] = None, limit: int = 500, types: Optional[str] = None, dedupe_patches: bool = True, db: DatabaseManager = Depends(get_db)):
+    """Challenges, responses and scores created or re-evaluated since `cursor`, oldest first.
+    Start without a cursor, then pass each page's next_cursor to the following request; an empty page
+    keeps the same cursor, so consumers can poll with it. A re-evaluated response appears again with
+    its new score. types is a comma-separated subset of challenge, response and score. Patches are
+    sent once per page in `patches` (keyed by patch_hash) unless dedupe_patches is false."""
+    if limit < 1 or limit > 2000:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": "limit must be between 1 and 2000"
+            }
+        )
+    kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else None
+    if kinds and not set(kinds) <= set(CHANGE_FEED_KINDS):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": f"types must be a comma-separated subset of {', '.join(CHANGE_FEED_KINDS)}"
+            }
+        )
+    try:
+        after_seq = decode_change_cursor(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": "cursor must be a next_cursor returned by /retrieval/changes"
+            }
+        )
+
+    page = await retrieval_bulkhead.run(db.get_changes, after_seq=after_seq, limit=limit, kinds=kinds)
+    if page is None:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "fail",
+                "message": "Changes could not be read, retry shortly"
+            },
+            headers={"Retry-After": "5"}
+        )
+
+    responses = [change["data"] for change in page["changes"] if change["kind"] == "response"]
+    patches = await retrieval_bulkhead.run(resolve_patches, db, [responses], dedupe_patches) if responses else {}
+    if not dedupe_patches:
+        responses = iter(responses)
+        page["changes"] = [
+            {"kind": "response", "data": next(responses)} if change["kind"] == "response" else change
+            for change in page["changes"]
+        ]
+
+    content = {
+        "status": "success",
+        "message": f"{len(page['changes'])} changes retrieved successfully",
+        "changes": page["changes"],
+        "next_cursor": encode_change_cursor(page["last_seq"]),
+        "has_more": page["has_more"]
+    }
+    if dedupe_patches:
+        content["patches"] = patches
+    return FastJSONResponse(content=content)
+
+async def get_validator_agreement(score_type: str = "weight", hours: int = 24, min_validators: int = 2, outlier_threshold: float = 3.5, max_miners: int = 50):
+    """How closely validators agree on miner scores of one type over the last `hours` hours, using each
+    validator's latest score per miner. Miners are ordered by dispersion (most disputed first), validators
+    by how far they deviate from the per-miner median consensus; outliers are flagged by modified z-score."""
+    if not 1 <= hours <= score_agreement.retention_hours or min_validators < 2 or outlier_threshold <= 0 or not 1 <= max_miners <= 1000:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": f"hours must be between 1 and {score_agreement.retention_hours}, min_validators at least 2, outlier_threshold positive and max_miners between 1 and 1000"
+            }
+        )
+    if not score_agreement.loaded:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "fail",
+                "message": "Validator scores are still loading, retry shortly"
+            },
+            headers={"Retry-After": "5"}
+        )
+
+    agreement = await retrieval_bulkhead.run(score_agreement.analyze, score_type, hours, min_validators, outlier_threshold)
+    if not agreement or not agreement["validator_count"]:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "status": "fail",
+                "message": f"No {score_type} scores from at least {min_validators} validators for the same miner in the last {hours} hours",
+                "score_types": score_agreement.score_types()
+            }
+        )
+
+    return FastJSONResponse(content={
+        "status": "success",
+        "message": f"{agreement['validator_count']} validators scored {agreement['miner_count']} miners, {len(agreement['outliers'])} outliers",
+        "score_type": score_type,
+        "hours": hours,
+        "validator_count": agreement["validator_count"],
+        "miner_count": agreement["miner_count"],
+        "outliers": agreement["outliers"],
+        "validators": agreement["validators"],
+        "miners": agreement["miners"][:max_miners]
+    })
+
+SEARCH_SCOPES = ("challenges", "responses")
+
+async def search(q: str, scope: str = "challenges", validator_hotkey: Optional[str] = None, miner_hotkey: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 20, offset: int = 0, include_patches: bool = False, dedupe_patches: bool = False, db: DatabaseManager = Depends(get_db)):
+    if len(q.strip()) < 2 or scope not in SEARCH_SCOPES or not 1 <= limit <= 100 or not 0 <= offset <= 1000:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "fail",
+                "message": f"Query must be at least 2 characters, scope one of {', '.join(SEARCH_SCOPES)}, limit between 1 and 100 and offset between 0 and 1000",
+                "result_count": 0,
+                "results": []
+            }
+        )
+
+    # Timestamps are stored as naive UTC
+    since, until = [
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value and value.tzinfo else value
+        for value in (since, until)
+    ]
+    search_method = db.search_challenges if scope == "challenges" else db.search_responses
+    # Fetch one extra row to know whether there is another page
+    results = await retrieval_bulkhead.run(
+        search_method,
+        q,
+        validator_hotkey=validator_hotkey,
+        miner_hotkey=miner_hotkey,
+        since=since,
+        until=until,
+        limit=limit + 1,
+        offset=offset
+    )
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    patches = None
+    if scope == "responses" and (include_patches or dedupe_patches):
+        patches = await retrieval_bulkhead.run(resolve_patches, db, [results], dedupe_patches)
+
+    content = {
+        "status": "success",
+        "message": f"Found {len(results)} matching {scope}" if results else f"No {scope} match the query",
+        "scope": scope,
+        "result_count": len(results),
+        "has_more": has_more,
+        "next_offset": offset + limit if has_more else None,
+        "results": results
+    }
+    if dedupe_patches and patches is not None:
+        content["patches"] = patches
+    return FastJSONResponse(content=content)
 
 async def get_cache_stats():
     """Get cache statistics for monitoring."""
@@ -142,9 +615,98 @@ async def get_cache_stats():
         "cache_stats": stats
     }
 
+async def get_db_stats(db: DatabaseManager = Depends(get_db)):
+    """Get database connection pool and key cache statistics for monitoring."""
+    return {
+        "status": "success",
+        "message": "Database statistics retrieved successfully",
+        "pool_stats": db.get_pool_stats(),
+        "interning_stats": db.get_interning_stats()
+    }
+
+async def get_bulkhead_stats():
+    """Get per-workload concurrency, queueing and load shedding statistics."""
+    return {
+        "status": "success",
+        "message": "Bulkhead statistics retrieved successfully",
+        "bulkhead_stats": {name: bulkhead.get_stats() for name, bulkhead in bulkheads.items()}
+    }
+
+async def get_hot_set_stats():
+    """Get response hot set size, memory footprint and query counts."""
+    return {
+        "status": "success",
+        "message": "Hot set statistics retrieved successfully",
+        "hot_set_stats": response_hot_set.get_stats()
+    }
+
+async def get_idempotency_stats():
+    """Get counts of replayed and coalesced ingestion requests."""
+    return {
+        "status": "success",
+        "message": "Idempotency statistics retrieved successfully",
+        "idempotency_stats": ingestion_replay_cache.get_stats()
+    }
+
+async def get_slow_traces(limit: int = 20, path: Optional[str] = None):
+    """Get the slowest recent requests with their spans (endpoint, cache, DB methods, SQL, serialization)."""
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    return {
+        "status": "success",
+        "message": "Slow requests retrieved successfully",
+        "tracing_stats": slow_requests.get_stats(),
+        "requests": slow_requests.slowest(limit=limit, path=path)
+    }
+
+async def get_cancellation_stats():
+    """Get counts of retrieval requests cancelled by client disconnects or the deadline, and of their cancelled queries."""
+    return {
+        "status": "success",
+        "message": "Cancellation statistics retrieved successfully",
+        "cancellation_stats": query_cancellations.get_stats()
+    }
+
+async def get_scheduler_jobs(db: DatabaseManager = Depends(get_db)):
+    """Get the status and timings of the background jobs in this worker, and the last run of each
+    exclusive job by any worker."""
+    return {
+        "status": "success",
+        "message": "Scheduled jobs retrieved successfully",
+        "scheduler_stats": job_scheduler.get_stats(),
+        "exclusive_runs": await admin_bulkhead.run(db.get_scheduled_jobs)
+    }
+
+async def get_slow_queries(limit: int = 50, min_ms: float = 0):
+    """Get recent slow SQL statements with their parameter shapes and EXPLAIN plans."""
+    if limit < 1 or limit > 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+    return {
+        "status": "success",
+        "message": "Slow queries retrieved successfully",
+        "slow_query_stats": slow_query_log.get_stats(),
+        "queries": slow_query_log.recent(limit=limit, min_ms=min_ms)
+    }
+
+async def get_score_agreement_stats():
+    """Get validator agreement matrix sizes and analysis counts."""
+    return {
+        "status": "success",
+        "message": "Score agreement statistics retrieved successfully",
+        "score_agreement_stats": score_agreement.get_stats()
+    }
+
+async def get_event_stats():
+    """Get live event feed subscriber and delivery statistics."""
+    return {
+        "status": "success",
+        "message": "Event statistics retrieved successfully",
+        "event_stats": event_hub.get_stats()
+    }
+
 async def clear_cache():
     """Clear all cache entries (admin endpoint)."""
-    cache_manager.clear()
+    await admin_bulkhead.run(cache_manager.clear)
     return {
         "status": "success",
         "message": "Cache cleared successfully"
@@ -161,7 +723,7 @@ async def invalidate_cache(pattern: str):
             }
         )
     
-    count = invalidate_cache_pattern(pattern)
+    count = await admin_bulkhead.run(invalidate_cache_pattern, pattern)
     return {
         "status": "success",
         "message": f"Invalidated {count} cache entries matching pattern: {pattern}",
@@ -172,9 +734,16 @@ router = APIRouter()
 
 routes = [
     ("/codegen-challenge", get_codegen_challenge),
+    ("/codegen-challenge/batch", get_codegen_challenge_batch),
     ("/codegen-challenges", get_codegen_challenges),
     ("/miner-responses", get_miner_responses),
     ("/single-miner-responses", get_single_miner_responses),
+    ("/single-miner-responses/batch", get_single_miner_responses_batch),
+    ("/search", search),
+    ("/near-duplicates", get_near_duplicates),
+    ("/events", get_events),
+    ("/changes", get_changes),
+    ("/validator-agreement", get_validator_agreement),
 ]
 
 # Cache management routes (admin endpoints)
@@ -184,6 +753,20 @@ cache_routes = [
     ("/cache/invalidate", invalidate_cache),
 ]
 
+# Monitoring routes (admin endpoints)
+admin_routes = [
+    ("/db/stats", get_db_stats),
+    ("/bulkheads/stats", get_bulkhead_stats),
+    ("/events/stats", get_event_stats),
+    ("/hot-set/stats", get_hot_set_stats),
+    ("/score-agreement/stats", get_score_agreement_stats),
+    ("/idempotency/stats", get_idempotency_stats),
+    ("/traces/slow", get_slow_traces),
+    ("/slow-queries", get_slow_queries),
+    ("/cancellations/stats", get_cancellation_stats),
+    ("/scheduler/jobs", get_scheduler_jobs),
+]
+
 for path, endpoint in routes:
     router.add_api_route(
         path,
@@ -222,3 +805,13 @@ for path, endpoint in cache_routes:
             dependencies=[Depends(verify_request)],
             methods=["POST"]
         )
+
+# Add monitoring routes
+for path, endpoint in admin_routes:
+    router.add_api_route(
+        path,
+        endpoint,
+        tags=["admin"],
+        dependencies=[Depends(verify_request)],
+        methods=["GET"]
+    )
@@ -1,20 +1,146 @@
+import asyncio
+import itertools
+import os
+import threading
+from typing import Callable, List, Tuple
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from src.db.operations import DatabaseManager
+from src.db.query_log import slow_query_log
+from src.utils.bulkhead import connection_budgets, shutdown_bulkheads, start_bulkheads
+from src.utils.cache import cache_manager, cache_snapshots, cache_warmer
+from src.utils.cancellation import RequestCancellationMiddleware, query_cancellations
+from src.utils.config import load_env
+from src.utils.events import event_hub
+from src.utils.idempotency import IdempotencyMiddleware
+from src.utils.logging import get_logger
+from src.utils.hot_set import response_hot_set
+from src.utils.rolling_stats import rolling_miner_stats
+from src.utils.scheduler import job_scheduler
+from src.utils.traffic_recorder import TrafficRecorderMiddleware, traffic_recorder
+from src.utils.tracing import TracingMiddleware, slow_requests
 
 from src.endpoints.ingestion import router as ingestion_router
 from src.endpoints.retrieval import router as retrieval_router
 
+logger = get_logger(__name__)
+
+# Seconds between rounds of retrying startup loads that failed; the last wait repeats until they all succeed
+BOOTSTRAP_RETRY_DELAYS = (5, 15, 30, 60)
+
+
+def bootstrap(loads: List[Tuple[str, Callable[[], int]]], stop: threading.Event) -> None:
+    """Run the startup loads one after another, so together they hold a single admin pool connection.
+    Each returns -1 on failure (e.g. the database was unreachable, or no connection came free); the failed
+    ones are retried in later rounds until they succeed or the process shuts down."""
+    pending = loads
+    for attempt in itertools.count():
+        pending = [(name, load) for name, load in pending if load() == -1]
+        if not pending:
+            return
+        delay = BOOTSTRAP_RETRY_DELAYS[min(attempt, len(BOOTSTRAP_RETRY_DELAYS) - 1)]
+        logger.warning(f"Startup loads failed ({', '.join(name for name, _ in pending)}); retrying in {delay}s")
+        if stop.wait(delay):
+            return
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database connection pool
-    db_manager = DatabaseManager()
+    # Startup: Load configuration and initialize this worker's database connection pool.
+    # Nothing connects at import time, so each forked worker opens its own connections here.
+    load_env()
+    # Separate executors and connection pools per workload class, so ingestion and retrieval can't starve each other
+    start_bulkheads()
+    db_manager = DatabaseManager(pool_budgets=connection_budgets())
+    if not db_manager.open():
+        logger.error("Database connection pool could not be opened; retrying on first request")
+    app.state.db = db_manager
+    # Deliver events published by the store methods to /retrieval/events subscribers on this loop
+    event_hub.configure()
+    # Thresholds for the slow request and slow-query logs (/retrieval/traces/slow, /retrieval/slow-queries)
+    slow_requests.configure()
+    slow_query_log.configure()
+    # Deadline after which retrieval requests (and their queries) are cancelled
+    query_cancellations.configure()
+    event_hub.attach(asyncio.get_running_loop())
+    # Optionally record anonymized request shapes for benchmarks/replay.py
+    if os.getenv('TRAFFIC_RECORD_PATH'):
+        traffic_recorder.start(os.getenv('TRAFFIC_RECORD_PATH'))
+    # Load the in-memory stores and run the backfills in the background; requests fall back to SQL until
+    # each store is loaded
+    bootstrap_stop = threading.Event()
+    asyncio.get_running_loop().run_in_executor(None, bootstrap, [
+        # The hot set of the last day's graded responses, which answers the default miner queries without SQL
+        ("response hot set", db_manager.load_response_hot_set),
+        # The rolling miner stats, for longer miner query windows
+        ("rolling miner stats", db_manager.load_rolling_miner_stats),
+        # Each validator's latest scores, for /retrieval/validator-agreement
+        ("score agreement", db_manager.load_score_agreement),
+        # Index any stored patches that have no search vector yet (compressed patches from before full-text search)
+        ("patch search vectors", db_manager.backfill_patch_search_vectors),
+        # Compute MinHash signatures for patches stored before near-duplicate detection
+        ("patch minhashes", db_manager.backfill_patch_minhashes),
+    ], bootstrap_stop)
+    # Warm the default dashboard queries so the first users after a deploy don't hit cold queries
+    cache_warmer.register(DatabaseManager.get_latest_codegen_challenges, db_manager, max_challenges=5)
+    cache_warmer.register(
+        DatabaseManager.get_miner_responses, db_manager,
+        min_score=0, min_response_count=0, sort_by_score=False, max_miners=5, hours=24
+    )
+    # Memory cap and compaction threshold of the query cache
+    cache_manager.configure()
+    # Restore the cache saved by the previous process, minus entries whose data has been written to since,
+    # so only what's missing is warmed
+    cache_snapshots.configure()
+    await asyncio.get_running_loop().run_in_executor(None, cache_snapshots.restore, db_manager.get_data_versions)
+    cache_warmer.warm(reason="startup")
+    snapshot_task = asyncio.create_task(cache_snapshots.run_periodically(db_manager.get_data_versions))
+    # Periodic precomputation and housekeeping. The default dashboard responses are recomputed before
+    # their entries expire, so no request pays for them; the rest moves work off the request path.
+    job_scheduler.configure()
+    job_scheduler.register(
+        "precompute-defaults", lambda: cache_warmer.refresh_pinned(within=cache_manager.ttl / 2),
+        interval=cache_manager.ttl / 4, initial_delay=cache_manager.ttl / 4
+    )
+    job_scheduler.register("purge-expired-cache", cache_manager.purge_expired, interval=60)
+    job_scheduler.register(
+        "prune-in-memory-stats", lambda: {'rolling_stats_buckets': rolling_miner_stats.prune(), 'hot_set_rows': response_hot_set.prune()},
+        interval=300
+    )
+    # Ingestion served by other workers reaches this worker's rolling stats, hot set and agreement matrices
+    # through the change feed
+    job_scheduler.register(
+        "sync-in-memory-stores", db_manager.sync_in_memory_stores,
+        interval=float(os.getenv('IN_MEMORY_SYNC_INTERVAL', 10))
+    )
+    # Keeps the visibility maps of the change feed tables current, for its index-only scans
+    job_scheduler.register(
+        "vacuum-change-feed-tables", db_manager.vacuum_tables,
+        interval=6 * 3600, exclusive=True, initial_delay=300
+    )
+    job_scheduler.start(db_manager.run_scheduled_job)
     yield
-    # Shutdown: Close all database connections
+    # Shutdown: End live event streams, stop startup load retries, scheduled jobs and warming, save the cache, stop recording and the bulkhead executors,
+    # then close all database connections
+    event_hub.close()
+    bootstrap_stop.set()
+    job_scheduler.shutdown()
+    cache_warmer.shutdown()
+    snapshot_task.cancel()
+    await asyncio.get_running_loop().run_in_executor(None, cache_snapshots.save, db_manager.get_data_versions)
+    traffic_recorder.stop()
+    shutdown_bulkheads()
     db_manager.close_all_connections()
 
 app = FastAPI(lifespan=lifespan)
 
+# Replayed ingestion requests are answered before they reach the endpoints (still recorded as traffic)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(TrafficRecorderMiddleware)
+# Cancels retrieval requests, and their database queries, when the client disconnects or the deadline passes
+app.add_middleware(RequestCancellationMiddleware)
+# Outermost, so the trace ID is set for everything that logs while serving a request
+app.add_middleware(TracingMiddleware)
+
 # Include ingestion routes
 app.include_router(
     ingestion_router,
@@ -0,0 +1,209 @@
+"""
+Bulkhead isolation for the Ridges API.
+Each workload class (validator ingestion, public retrieval, admin/cache) gets its own executor,
+concurrency limit, admission queue and database connection budget, so a spike in one class
+sheds its own excess load instead of starving the others.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from src.utils.cancellation import CancelScope, current_cancel_scope
+from src.utils.logging import get_logger
+from src.utils.tracing import span
+
+logger = get_logger(__name__)
+
+# Workload class of the code currently running; DatabaseManager uses it to pick a connection pool.
+# Work outside any bulkhead (cache warming, startup jobs, scripts) counts as admin.
+current_workload: contextvars.ContextVar[str] = contextvars.ContextVar('current_workload', default='admin')
+
+
+class Bulkhead:
+    """Admission control and a dedicated executor for one workload class.
+
+    At most max_concurrent calls run at once, each on this bulkhead's own threads and holding at
+    most one connection from its pool. Up to max_queue further calls wait for a slot for at most
+    queue_timeout seconds; beyond that calls are rejected immediately with reject_status and a
+    Retry-After header rather than piling up until clients time out.
+
+    If the request awaiting a call of a cancellable bulkhead is cancelled (its client disconnected or
+    its deadline passed, see src/utils/cancellation.py), the call's running queries are cancelled too.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float, reject_status: int = 503, cancellable: bool = False):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reject_status = reject_status
+        self.cancellable = cancellable
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._stats = {
+            'completed': 0,
+            'failed': 0,
+            'rejected_queue_full': 0,
+            'rejected_timeout': 0,
+            'peak_active': 0,
+            'peak_queued': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def configure(self) -> None:
+        """Apply BULKHEAD_<NAME>_CONCURRENCY / _QUEUE / _TIMEOUT overrides from the environment."""
+        prefix = f"BULKHEAD_{self.name.upper()}_"
+        self.max_concurrent = int(os.getenv(prefix + 'CONCURRENCY', self.max_concurrent))
+        self.max_queue = int(os.getenv(prefix + 'QUEUE', self.max_queue))
+        self.queue_timeout = float(os.getenv(prefix + 'TIMEOUT', self.queue_timeout))
+
+    def start(self) -> None:
+        """Create the executor and semaphore on the running event loop."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix=f"bulkhead-{self.name}")
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    def _reject(self, reason: str) -> HTTPException:
+        return HTTPException(
+            status_code=self.reject_status,
+            detail={
+                "status": "fail",
+                "message": f"Too many concurrent {self.name} requests ({reason}), retry shortly"
+            },
+            headers={"Retry-After": "1"}
+        )
+
+    def _call(self, func: Callable, args: tuple, kwargs: dict, wait_ms: float, scope: Optional[CancelScope]) -> Any:
+        token = current_workload.set(self.name)
+        scope_token = current_cancel_scope.set(scope)
+        try:
+            with span(getattr(func, '__qualname__', 'call'), bulkhead=self.name, queue_wait_ms=round(wait_ms, 3)):
+                return func(*args, **kwargs)
+        finally:
+            current_cancel_scope.reset(scope_token)
+            current_workload.reset(token)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function on this bulkhead's executor once a slot is free."""
+        if self._executor is None:
+            self.start()
+
+        if self._queued >= self.max_queue and self._semaphore.locked():
+            self._stats['rejected_queue_full'] += 1
+            raise self._reject("queue full")
+
+        queued_at = time.monotonic()
+        self._queued += 1
+        self._stats['peak_queued'] = max(self._stats['peak_queued'], self._queued)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats['rejected_timeout'] += 1
+            raise self._reject("queue timeout")
+        finally:
+            self._queued -= 1
+
+        wait_ms = (time.monotonic() - queued_at) * 1000
+        self._stats['total_wait_ms'] += wait_ms
+        self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+        self._active += 1
+        self._stats['peak_active'] = max(self._stats['peak_active'], self._active)
+
+        semaphore = self._semaphore
+        scope = CancelScope() if self.cancellable else None
+        # Run in a copy of the caller's context, so the request's trace follows it onto the thread
+        context = contextvars.copy_context()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, context.run, self._call, func, args, kwargs, wait_ms, scope)
+
+        def release(done):
+            # Release only when the thread is done, even if the awaiting request was cancelled,
+            # so the number of running calls never exceeds the connection budget
+            self._active -= 1
+            if done.cancelled() or done.exception() is not None:
+                self._stats['failed'] += 1
+            else:
+                self._stats['completed'] += 1
+            semaphore.release()
+
+        future.add_done_callback(release)
+        try:
+            # Shielded, so a cancelled request leaves the future (and the slot) to the running thread
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if scope is not None:
+                scope.cancel(getattr(func, '__qualname__', 'call'))
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        admitted = self._stats['completed'] + self._stats['failed'] + self._active
+        return {
+            **{key: value for key, value in self._stats.items() if key != 'total_wait_ms'},
+            'mean_wait_ms': self._stats['total_wait_ms'] / admitted if admitted else 0.0,
+            'active': self._active,
+            'queued': self._queued,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'queue_timeout': self.queue_timeout,
+        }
+
+
+# Global bulkheads, one per workload class. Validators retry ingestion on 503; public dashboard
+# clients are told to back off with 429.
+ingestion_bulkhead = Bulkhead('ingestion', max_concurrent=8, max_queue=200, queue_timeout=30.0, reject_status=503)
+retrieval_bulkhead = Bulkhead('retrieval', max_concurrent=8, max_queue=100, queue_timeout=10.0, reject_status=429, cancellable=True)
+admin_bulkhead = Bulkhead('admin', max_concurrent=4, max_queue=20, queue_timeout=10.0, reject_status=503)
+
+bulkheads = {bulkhead.name: bulkhead for bulkhead in (ingestion_bulkhead, retrieval_bulkhead, admin_bulkhead)}
+
+
+def start_bulkheads() -> None:
+    for bulkhead in bulkheads.values():
+        bulkhead.configure()
+        bulkhead.start()
+
+
+def shutdown_bulkheads() -> None:
+    for bulkhead in bulkheads.values():
+        bulkhead.shutdown()
+
+
+# Connections added to the admin pool for work running outside any bulkhead (DB_BACKGROUND_CONNECTIONS):
+# the startup loads, run one after another (bootstrap in src/main.py), cache snapshots and the two cache
+# warmer threads. Scheduled jobs (up to two connections each: the job's and, for an exclusive job, the
+# one holding its advisory lock) share the rest of the pool; checkouts wait for a free connection.
+BACKGROUND_CONNECTIONS = 4
+
+
+def connection_budgets() -> Dict[str, int]:
+    """Connections per workload class: one per concurrent call, so a full bulkhead never waits for its pool.
+    Every worker opens up to the total, so it has to fit RDS max_connections once per worker; if
+    DB_MAX_CONNECTIONS is set, a total above it raises ValueError and the worker doesn't start."""
+    budgets = {name: bulkhead.max_concurrent for name, bulkhead in bulkheads.items()}
+    budgets['admin'] += int(os.getenv('DB_BACKGROUND_CONNECTIONS', BACKGROUND_CONNECTIONS))
+    max_connections = os.getenv('DB_MAX_CONNECTIONS')
+    if max_connections and sum(budgets.values()) > int(max_connections):
+        raise ValueError(
+            f"Connection budgets {budgets} total {sum(budgets.values())}, above DB_MAX_CONNECTIONS={max_connections}; "
+            "lower BULKHEAD_<CLASS>_CONCURRENCY or DB_BACKGROUND_CONNECTIONS"
+        )
+    return budgets
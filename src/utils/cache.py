@@ -1,65 +1,195 @@
 """
 Cache utilities for the Ridges API.
 Provides TTL-based caching for database operations to reduce load and improve response times.
+The cache is bounded by the estimated memory of its entries as well as their number, and stores
+large results compactly (see src/utils/compact.py).
+The cache can be snapshotted to a local file and restored by the next process, so a restart or deploy
+doesn't start with every query cold (see CacheManager.snapshot).
 """
 
+import asyncio
 import hashlib
 import json
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.cancellation import cancelled
+from src.utils.compact import compact, estimate_size, expand
 from src.utils.logging import get_logger
+from src.utils.tracing import span
 from functools import wraps
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 from cachetools import TTLCache
 import threading
 
 logger = get_logger(__name__)
 
+SNAPSHOT_FORMAT = 2
+
+
+class CacheEntry:
+    """A cached value with its wall-clock expiry (which a restored entry keeps from the process that
+    cached it), its estimated size in bytes, whether it is stored compacted, and its hits."""
+
+    __slots__ = ('value', 'expires_at', 'size', 'compacted', 'hits')
+
+    def __init__(self, value: Any, expires_at: float, size: int, compacted: bool):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.compacted = compacted
+        self.hits = 0
+
+
+class SizedTTLCache(TTLCache):
+    """TTLCache bounded by the estimated bytes of its entries rather than their number. When full,
+    it evicts expired entries and then the entries with the fewest hits per byte, so one huge,
+    rarely read result goes before many small popular ones."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        super().__init__(maxsize=max_bytes, ttl=ttl, getsizeof=lambda entry: entry.size)
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def popitem(self):
+        self.expire()
+        if not len(self):
+            raise KeyError(f"{type(self).__name__} is empty")
+        key = min(self.items(), key=lambda item: (item[1].hits + 1) / max(item[1].size, 1))[0]
+        entry = self.pop(key)
+        self.evictions += 1
+        self.evicted_bytes += entry.size
+        return key, entry
+
+
 class CacheManager:
-    """Thread-safe cache manager with TTL support."""
+    """Thread-safe cache manager with TTL support, bounded by entry count and by estimated memory.
+    Entries of at least compact_bytes are stored in the compact form of src/utils/compact.py and
+    expanded into fresh rows on each hit."""
     
-    def __init__(self, ttl: int = 60, maxsize: int = 1000):
+    def __init__(self, ttl: int = 60, maxsize: int = 1000, max_bytes: int = 256 * 1024 * 1024, compact_bytes: int = 1024 * 1024):
         """
         Initialize cache manager.
         
         Args:
             ttl: Time-to-live in seconds (default: 60)
             maxsize: Maximum number of cached items (default: 1000)
+            max_bytes: Maximum estimated memory of all cached items (default: 256 MB)
+            compact_bytes: Items at least this large are stored compacted (default: 1 MB)
         """
         self.ttl = ttl
         self.maxsize = maxsize
-        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.max_bytes = max_bytes
+        self.compact_bytes = compact_bytes
+        # The TTLCache's own expiry is the upper bound of each entry's expires_at
+        self._cache = SizedTTLCache(max_bytes=max_bytes, ttl=ttl)
         self._lock = threading.RLock()
         self._stats = {
             'hits': 0,
             'misses': 0,
             'sets': 0,
-            'evictions': 0
+            'compacted': 0,
+            'too_large': 0,
         }
+        self._snapshots = {
+            'saved': 0,
+            'last_saved_at': None,
+            'last_saved_entries': 0,
+            'restored': 0,
+            'discarded_stale': 0,
+            'discarded_expired': 0,
+        }
+
+    def configure(self) -> None:
+        """Apply CACHE_MAX_MB / CACHE_COMPACT_KB overrides from the environment."""
+        max_bytes = int(float(os.getenv('CACHE_MAX_MB', self.max_bytes / (1024 * 1024))) * 1024 * 1024)
+        self.compact_bytes = int(float(os.getenv('CACHE_COMPACT_KB', self.compact_bytes / 1024)) * 1024)
+        with self._lock:
+            if max_bytes != self.max_bytes:
+                self.max_bytes = max_bytes
+                entries = list(self._cache.items())
+                self._cache = SizedTTLCache(max_bytes=max_bytes, ttl=self.ttl)
+                for key, entry in entries:
+                    self._store(key, entry)
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            del self._cache[key]
+            return None
+        return entry
+
+    def _entry(self, value: Any, expires_at: float) -> CacheEntry:
+        """Measure a value, compacting it if it is large."""
+        size = estimate_size(value)
+        if size < self.compact_bytes:
+            return CacheEntry(value, expires_at, size, False)
+        value = compact(value)
+        return CacheEntry(value, expires_at, estimate_size(value), True)
+
+    def _store(self, key: str, entry: CacheEntry) -> bool:
+        """Add an entry, evicting others to stay within maxsize and max_bytes.
+        Returns False if the entry alone is larger than max_bytes (it isn't cached)."""
+        if entry.size > self.max_bytes:
+            self._stats['too_large'] += 1
+            logger.warning(f"Not caching {key}: about {entry.size / (1024 * 1024):.0f} MB exceeds the cache's {self.max_bytes / (1024 * 1024):.0f} MB")
+            self._cache.pop(key, None)
+            return False
+        while key not in self._cache and len(self._cache) >= self.maxsize:
+            self._cache.popitem()
+        self._cache[key] = entry
+        return True
 
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache."""
         with self._lock:
-            try:
-                value = self._cache[key]
-                self._stats['hits'] += 1
-                logger.debug(f"Cache hit for key: {key}")
-                return value
-            except KeyError:
+            entry = self._lookup(key)
+            if entry is None:
                 self._stats['misses'] += 1
                 logger.debug(f"Cache miss for key: {key}")
                 return None
+            entry.hits += 1
+            self._stats['hits'] += 1
+            logger.debug(f"Cache hit for key: {key}")
+        # Compacted values are immutable, so they are expanded outside the lock
+        return expand(entry.value) if entry.compacted else entry.value
 
     def set(self, key: str, value: Any) -> None:
         """Set value in cache."""
+        # Sizing and compacting a large value takes a while, so it happens outside the lock
+        entry = self._entry(value, time.time() + self.ttl)
         with self._lock:
-            old_size = len(self._cache)
-            self._cache[key] = value
-            self._stats['sets'] += 1
-            
-            # Track evictions
-            if len(self._cache) < old_size:
-                self._stats['evictions'] += 1
-                
-            logger.debug(f"Cache set for key: {key}")
+            if self._store(key, entry):
+                self._stats['sets'] += 1
+                self._stats['compacted'] += int(entry.compacted)
+                logger.debug(f"Cache set for key: {key}")
+
+    def contains(self, key: str) -> bool:
+        """Check whether a key is cached without touching hit/miss statistics."""
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until a cached key expires, or None if it isn't cached."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            return max(entry.expires_at - time.time(), 0.0)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries now rather than when they are next looked up or pushed out,
+        so they stop holding memory. Returns the number of entries dropped."""
+        with self._lock:
+            size = len(self._cache)
+            self._cache.expire()
+            now = time.time()
+            for key in [key for key, entry in self._cache.items() if entry.expires_at <= now]:
+                del self._cache[key]
+            return size - len(self._cache)
 
     def delete(self, key: str) -> bool:
         """Delete specific key from cache."""
@@ -83,14 +213,104 @@ class CacheManager:
             total_requests = self._stats['hits'] + self._stats['misses']
             hit_rate = self._stats['hits'] / total_requests if total_requests > 0 else 0
             
+            prefixes: Dict[str, Dict[str, int]] = {}
+            for key, entry in self._cache.items():
+                prefix = prefixes.setdefault(key.rsplit('_', 1)[0], {'entries': 0, 'bytes': 0, 'compacted': 0, 'hits': 0})
+                prefix['entries'] += 1
+                prefix['bytes'] += entry.size
+                prefix['compacted'] += int(entry.compacted)
+                prefix['hits'] += entry.hits
+
             return {
                 **self._stats,
+                'evictions': self._cache.evictions,
+                'evicted_bytes': self._cache.evicted_bytes,
                 'hit_rate': hit_rate,
                 'cache_size': len(self._cache),
                 'max_size': self.maxsize,
-                'ttl': self.ttl
+                'bytes': self._cache.currsize,
+                'max_bytes': self.max_bytes,
+                'compact_bytes': self.compact_bytes,
+                'prefixes': prefixes,
+                'ttl': self.ttl,
+                'snapshots': {**self._snapshots, **cache_snapshots.get_stats()},
+                'warmer': cache_warmer.get_stats()
             }
 
+    def snapshot(self, path: str, data_versions: Dict[str, int]) -> int:
+        """
+        Write the still-valid entries to a local file for the next process to restore.
+
+        Each entry is saved as stored (compacted or not) with its expiry and tagged with the current version of every data
+        set its key depends on (the names in data_versions its key contains, e.g. "challenges"),
+        so restore can tell which entries were computed before a later write. Read data_versions
+        just before calling: store methods bump a version before invalidating the entries it
+        covers, so an entry still cached afterwards was computed from that version. The file is replaced atomically and readable only by the
+        owner, since restore unpickles it.
+
+        Returns the number of entries saved.
+        """
+        now = time.time()
+        with self._lock:
+            entries = [
+                (key, entry.value, entry.compacted, entry.expires_at, {name: version for name, version in data_versions.items() if name in key})
+                for key, entry in list(self._cache.items())
+                if entry.expires_at > now
+            ]
+        payload = {'format': SNAPSHOT_FORMAT, 'saved_at': now, 'entries': entries}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        temporary = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'wb') as output:
+            pickle.dump(payload, output, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+        with self._lock:
+            self._snapshots['saved'] += 1
+            self._snapshots['last_saved_at'] = now
+            self._snapshots['last_saved_entries'] = len(entries)
+        logger.info(f"Saved {len(entries)} cache entries to {path}")
+        return len(entries)
+
+    def restore(self, path: str, data_versions: Dict[str, int]) -> int:
+        """
+        Load the entries of a snapshot written by snapshot(), keeping each one's remaining TTL.
+        Entries that have expired, or whose data version tags don't match data_versions (the
+        data was written to after they were computed), are discarded. Keys already cached are
+        left alone. Returns the number of entries restored; 0 if there is no usable snapshot.
+        """
+        try:
+            with open(path, 'rb') as snapshot_file:
+                payload = pickle.load(snapshot_file)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"Could not read cache snapshot {path}: {str(e)}")
+            return 0
+        if not isinstance(payload, dict) or payload.get('format') != SNAPSHOT_FORMAT:
+            logger.warning(f"Ignoring cache snapshot {path} in an unknown format")
+            return 0
+
+        now = time.time()
+        restored = stale = expired = 0
+        with self._lock:
+            for key, value, compacted, expires_at, versions in payload['entries']:
+                if expires_at <= now:
+                    expired += 1
+                elif any(data_versions.get(name) != version for name, version in versions.items()):
+                    stale += 1
+                elif key not in self._cache:
+                    # Never keep an entry longer than this process's TTL
+                    entry = CacheEntry(value, min(expires_at, now + self.ttl), estimate_size(value), compacted)
+                    if self._store(key, entry):
+                        restored += 1
+            self._snapshots['restored'] += restored
+            self._snapshots['discarded_stale'] += stale
+            self._snapshots['discarded_expired'] += expired
+        logger.info(f"Restored {restored} cache entries from {path} ({stale} stale, {expired} expired)")
+        return restored
+
     def generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate a cache key from function arguments."""
         # Create a deterministic string from args and kwargs
@@ -103,8 +323,248 @@ class CacheManager:
         return f"{prefix}_{key_hash}"
 
 
+class WarmCall:
+    """A cached call that can be replayed to re-populate its cache entry."""
+
+    __slots__ = ('key', 'func', 'args', 'kwargs', 'requests', 'pinned')
+
+    def __init__(self, key: str, func: Callable, args: tuple, kwargs: dict, pinned: bool = False):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.requests = 0
+        self.pinned = pinned
+
+
+class CacheWarmer:
+    """Records the most requested cache keys and re-executes them in the background
+    at startup and after invalidation, so users don't pay for cold queries."""
+
+    def __init__(self, max_workers: int = 2, max_tracked: int = 200, max_keys_per_run: int = 20):
+        """
+        Initialize cache warmer.
+
+        Args:
+            max_workers: Concurrent warm-up calls, kept low so warming can't starve the DB pool (default: 2)
+            max_tracked: Maximum number of distinct calls remembered (default: 200)
+            max_keys_per_run: Most-requested calls replayed per warm-up run (default: 20)
+        """
+        self.max_workers = max_workers
+        self.max_tracked = max_tracked
+        self.max_keys_per_run = max_keys_per_run
+        self._calls: Dict[str, WarmCall] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-warmer")
+        self._local = threading.local()
+        self._in_flight = set()
+        self._run = {
+            'reason': None,
+            'started_at': None,
+            'finished_at': None,
+            'total': 0,
+            'completed': 0,
+            'failed': 0,
+        }
+        self._stats = {
+            'runs': 0,
+            'warmed': 0,
+            'failed': 0,
+            'last_duration': None,
+        }
+
+    @property
+    def is_warming(self) -> bool:
+        """Whether the current thread is executing a warm-up call."""
+        return getattr(self._local, 'warming', False)
+
+    def record(self, key: str, func: Callable, args: tuple, kwargs: dict) -> None:
+        """Count a request for a cache key, remembering how to recompute it."""
+        if self.is_warming:
+            return
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                if len(self._calls) >= self.max_tracked:
+                    self._evict_least_requested()
+                call = self._calls[key] = WarmCall(key, func, args, kwargs)
+            call.requests += 1
+
+    def register(self, func: Callable, *args, **kwargs) -> None:
+        """Pin a call to always be warmed, e.g. the default dashboard queries."""
+        key = func.cache_key(*args, **kwargs)
+        with self._lock:
+            self._calls[key] = WarmCall(key, func, args, kwargs, pinned=True)
+
+    def _evict_least_requested(self) -> None:
+        candidates = [call for call in self._calls.values() if not call.pinned]
+        if candidates:
+            del self._calls[min(candidates, key=lambda call: call.requests).key]
+
+    def warm(self, pattern: Optional[str] = None, reason: str = "manual") -> int:
+        """Re-execute the most requested calls whose key contains `pattern` (all calls if None)
+        and are not currently cached. Returns the number of calls scheduled."""
+        with self._lock:
+            calls = [
+                call for call in self._calls.values()
+                if (pattern is None or pattern in call.key) and call.key not in self._in_flight
+            ]
+            calls.sort(key=lambda call: (not call.pinned, -call.requests))
+            calls = calls[:self.max_keys_per_run]
+            if not calls:
+                return 0
+
+            if not self._in_flight:
+                self._run.update({
+                    'reason': reason,
+                    'started_at': time.time(),
+                    'finished_at': None,
+                    'total': 0,
+                    'completed': 0,
+                    'failed': 0,
+                })
+                self._stats['runs'] += 1
+            self._run['total'] += len(calls)
+            for call in calls:
+                self._in_flight.add(call.key)
+                self._executor.submit(self._execute, call)
+
+        logger.info(f"Warming {len(calls)} cache entries ({reason})")
+        return len(calls)
+
+    def _execute(self, call: WarmCall) -> None:
+        self._local.warming = True
+        failed = False
+        try:
+            if not cache_manager.contains(call.key):
+                call.func(*call.args, **call.kwargs)
+        except Exception as e:
+            failed = True
+            logger.warning(f"Cache warm-up failed for key {call.key}: {str(e)}")
+        finally:
+            self._local.warming = False
+            with self._lock:
+                self._in_flight.discard(call.key)
+                self._run['failed' if failed else 'completed'] += 1
+                self._stats['failed' if failed else 'warmed'] += 1
+                if not self._in_flight:
+                    self._run['finished_at'] = time.time()
+                    self._stats['last_duration'] = self._run['finished_at'] - self._run['started_at']
+
+    def refresh_pinned(self, within: float) -> int:
+        """Recompute the pinned calls whose entries are missing or expire within `within` seconds,
+        replacing each entry only once its new value is ready, so requests never see them cold.
+        Runs on the calling thread. Returns the number of calls refreshed."""
+        with self._lock:
+            calls = [call for call in self._calls.values() if call.pinned]
+        refreshed = 0
+        self._local.warming = True
+        try:
+            for call in calls:
+                expires_in = cache_manager.expires_in(call.key)
+                if expires_in is not None and expires_in > within:
+                    continue
+                try:
+                    cache_manager.set(call.key, call.func.__wrapped__(*call.args, **call.kwargs))
+                    refreshed += 1
+                except Exception as e:
+                    logger.warning(f"Cache refresh failed for key {call.key}: {str(e)}")
+        finally:
+            self._local.warming = False
+        return refreshed
+
+    def shutdown(self) -> None:
+        """Stop accepting warm-up work and drop anything queued."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get warm-up progress and statistics."""
+        with self._lock:
+            run = dict(self._run)
+            if run['started_at'] is not None:
+                end = run['finished_at'] or time.time()
+                run['duration'] = end - run['started_at']
+            run['in_progress'] = bool(self._in_flight)
+            return {
+                **self._stats,
+                'tracked_keys': len(self._calls),
+                'max_workers': self.max_workers,
+                'current_run': run,
+            }
+
+
+class CacheSnapshots:
+    """Saves the cache to a local file at shutdown and every `interval` seconds (for crashes),
+    and restores it at startup. Disabled unless a path is configured."""
+
+    def __init__(self, path: Optional[str] = None, interval: float = 30.0):
+        """
+        Initialize cache snapshots.
+
+        Args:
+            path: Snapshot file; None disables snapshots (default: None)
+            interval: Seconds between periodic snapshots; 0 saves only at shutdown (default: 30)
+        """
+        self.path = path
+        self.interval = interval
+        self._failures = 0
+
+    def configure(self) -> None:
+        """Apply CACHE_SNAPSHOT_PATH / CACHE_SNAPSHOT_INTERVAL overrides from the environment."""
+        self.path = os.getenv('CACHE_SNAPSHOT_PATH', self.path) or None
+        self.interval = float(os.getenv('CACHE_SNAPSHOT_INTERVAL', self.interval))
+
+    def restore(self, load_versions: Callable[[], Optional[Dict[str, int]]]) -> int:
+        """Restore the last snapshot. load_versions returns the current data versions (None if they
+        can't be read, in which case nothing is restored). Returns the number of entries restored."""
+        if not self.path:
+            return 0
+        versions = load_versions()
+        if versions is None:
+            logger.warning("Data versions unavailable; not restoring the cache snapshot")
+            return 0
+        return cache_manager.restore(self.path, versions)
+
+    def save(self, load_versions: Callable[[], Optional[Dict[str, int]]]) -> int:
+        """Snapshot the cache now. Returns the number of entries saved, or -1 on failure."""
+        if not self.path:
+            return 0
+        versions = load_versions()
+        if versions is None:
+            logger.warning("Data versions unavailable; not saving a cache snapshot")
+            return -1
+        try:
+            return cache_manager.snapshot(self.path, versions)
+        except Exception as e:
+            self._failures += 1
+            logger.warning(f"Could not save cache snapshot to {self.path}: {str(e)}")
+            return -1
+
+    async def run_periodically(self, load_versions: Callable[[], Optional[Dict[str, int]]]) -> None:
+        """Save a snapshot every interval seconds until cancelled."""
+        if not self.path or self.interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            await loop.run_in_executor(None, self.save, load_versions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'interval': self.interval,
+            'failures': self._failures,
+        }
+
+
 # Global cache instance
-cache_manager = CacheManager(ttl=60, maxsize=1000)
+cache_manager = CacheManager(ttl=60, maxsize=1000, max_bytes=256 * 1024 * 1024, compact_bytes=1024 * 1024)
+
+# Global cache snapshot settings
+cache_snapshots = CacheSnapshots(path=None, interval=30.0)
+
+# Global cache warmer instance
+cache_warmer = CacheWarmer(max_workers=2, max_tracked=200, max_keys_per_run=20)
 
 
 def cached(prefix: str, ttl: Optional[int] = None):
@@ -125,17 +585,22 @@ def cached(prefix: str, ttl: Optional[int] = None):
         def wrapper(*args, **kwargs):
             # Generate cache key
             cache_key = cache_manager.generate_key(prefix, *args, **kwargs)
+            cache_warmer.record(cache_key, wrapper, args, kwargs)
             
-            # Try to get from cache
-            cached_result = cache_manager.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result)
-            
-            return result
+            with span("cache", prefix=prefix) as attrs:
+                # Try to get from cache
+                cached_result = cache_manager.get(cache_key)
+                attrs["hit"] = cached_result is not None
+                if cached_result is not None:
+                    return cached_result
+                
+                # Execute function and cache result (unless the request was cancelled part way through,
+                # when the result is whatever the function returns on error)
+                result = func(*args, **kwargs)
+                if not cancelled():
+                    cache_manager.set(cache_key, result)
+                
+                return result
         
         # Add cache management methods to the wrapper
         wrapper.cache_clear = lambda: cache_manager.clear()
@@ -143,11 +608,51 @@ def cached(prefix: str, ttl: Optional[int] = None):
         wrapper.cache_delete = lambda *args, **kwargs: cache_manager.delete(
             cache_manager.generate_key(prefix, *args, **kwargs)
         )
-        
+        wrapper.cache_key = lambda *args, **kwargs: cache_manager.generate_key(prefix, *args, **kwargs)
+
         return wrapper
     return decorator
 
 
+def get_many(func: Callable, owner: Any, argument: str, values: List[Any], fetch: Callable[[List[Any]], Dict[Any, Any]], default: Any = None) -> Dict[Any, Any]:
+    """
+    Multi-get for a @cached single-key method.
+
+    Looks up func(owner, **{argument: value}) in the cache for every value, calls fetch once
+    with the values that missed (fetch should answer them all with one set-based query and
+    return a value -> result dict), and stores each fetched result under the same key the
+    single-key call uses, so later single lookups hit. Values fetch doesn't return get default.
+
+    Args:
+        func: The @cached method, e.g. DatabaseManager.get_codegen_challenges
+        owner: The instance it is called on
+        argument: Keyword argument the single-key call takes, e.g. "challenge_id"
+        values: Keys to look up (duplicates are ignored)
+        fetch: Loads the missing keys, e.g. with WHERE challenge_id = ANY(%s)
+        default: Result for keys that don't exist (cached too, as the single call would)
+
+    Returns a value -> result dict in the order of values.
+    """
+    results = {}
+    missing = []
+    for value in dict.fromkeys(values):
+        result = cache_manager.get(func.cache_key(owner, **{argument: value}))
+        if result is None:
+            missing.append(value)
+        else:
+            results[value] = result
+
+    if missing:
+        fetched = fetch(missing)
+        for value in missing:
+            result = fetched.get(value, default)
+            if not cancelled():
+                cache_manager.set(func.cache_key(owner, **{argument: value}), result)
+            results[value] = result
+
+    return {value: results[value] for value in dict.fromkeys(values)}
+
+
 def cache_key_for_challenges(challenge_id: Optional[str] = None) -> str:
     """Generate cache key for challenge queries."""
     if challenge_id:
@@ -164,9 +669,10 @@ def cache_key_for_miner_responses(**kwargs) -> str:
     return f"miner_responses_{key_hash}"
 
 
-def invalidate_cache_pattern(pattern: str) -> int:
+def invalidate_cache_pattern(pattern: str, warm: bool = True) -> int:
     """
     Invalidate cache entries matching a pattern.
+    Unless warm is False, the most requested matching entries are recomputed in the background.
     Returns number of entries removed.
     """
     with cache_manager._lock:
@@ -176,5 +682,8 @@ def invalidate_cache_pattern(pattern: str) -> int:
         
         if keys_to_remove:
             logger.info(f"Invalidated {len(keys_to_remove)} cache entries matching pattern: {pattern}")
-        
-        return len(keys_to_remove)
\ No newline at end of file
+
+    if warm:
+        cache_warmer.warm(pattern, reason=f"invalidation:{pattern}")
+
+    return len(keys_to_remove)
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+Query cancellation for the Ridges API.
+A retrieval request whose client disconnects, or that runs past its deadline, is cancelled: the ASGI
+middleware cancels the endpoint, and the bulkhead call it was waiting on cancels its database work.
+Each cancellable bulkhead call runs in a CancelScope, which the DatabaseManager registers its pool
+connections with; cancelling the scope sends a cancel request for the statement running on each
+(psycopg2's connection.cancel(), the driver's pg_cancel_backend), and statements the call tries to
+start afterwards fail at once. The call's own error handling then returns its connection to the pool.
+Results computed by a cancelled call are not cached (see cached in src/utils/cache.py).
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CANCELLABLE_PREFIXES = ("/retrieval/",)
+# Long-lived streams that handle disconnects themselves and have no deadline
+UNCANCELLED_PATHS = ("/retrieval/events",)
+
+
+class CancelScope:
+    """The database connections one bulkhead call is using, and whether the call has been cancelled.
+    cancel() is called from the event loop while the call runs on a bulkhead thread."""
+
+    def __init__(self):
+        self.cancelled = False
+        self.call: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+        self._connections = set()
+        self._lock = threading.Lock()
+        # Set once the cancel requests have been sent; detach() waits for it
+        self._cancels_sent = threading.Event()
+
+    def attach(self, conn) -> None:
+        with self._lock:
+            self._connections.add(conn)
+
+    def detach(self, conn) -> None:
+        with self._lock:
+            self._connections.discard(conn)
+            cancelled_at = self.cancelled_at
+        if cancelled_at is not None:
+            # Keep the connection out of the pool, and away from another request whose statement a
+            # late cancel request would cancel instead, until the cancel requests have gone out
+            self._cancels_sent.wait()
+            query_cancellations.record_release(time.monotonic() - cancelled_at)
+
+    def cancel(self, call: str) -> None:
+        """Cancel the statements running on the scope's connections for `call` (a name for logging).
+        Sending a cancel request opens a connection to the server, so on the event loop the requests
+        are sent from the loop's default executor; elsewhere they are sent before returning."""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.call = call
+            self.cancelled_at = time.monotonic()
+            connections = list(self._connections)
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._send_cancels, connections)
+        except RuntimeError:
+            # No running loop, or its executor has been shut down
+            self._send_cancels(connections)
+
+    def _send_cancels(self, connections) -> None:
+        signalled = 0
+        try:
+            for conn in connections:
+                try:
+                    conn.cancel()
+                    signalled += 1
+                except Exception as e:
+                    logger.warning(f"Could not cancel query of {self.call}: {str(e)}")
+        finally:
+            self._cancels_sent.set()
+        query_cancellations.record_cancel(signalled)
+
+
+current_cancel_scope: ContextVar[Optional[CancelScope]] = ContextVar('current_cancel_scope', default=None)
+
+
+def cancelled() -> bool:
+    """Whether the bulkhead call running on this thread has been cancelled."""
+    scope = current_cancel_scope.get()
+    return scope is not None and scope.cancelled
+
+
+class QueryCancellations:
+    """Request deadline setting and counters for cancelled requests and queries."""
+
+    def __init__(self, deadline: float = 30.0):
+        """
+        Initialize query cancellation.
+
+        Args:
+            deadline: Seconds a retrieval request may run before it is cancelled with 504; 0 disables (default: 30)
+        """
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests_disconnected': 0,
+            'requests_timed_out': 0,
+            'calls_cancelled': 0,
+            'queries_cancelled': 0,
+            'connections_released': 0,
+            'total_release_ms': 0.0,
+            'max_release_ms': 0.0,
+        }
+
+    def configure(self) -> None:
+        """Apply the RETRIEVAL_DEADLINE override from the environment."""
+        self.deadline = float(os.getenv('RETRIEVAL_DEADLINE', self.deadline))
+
+    def record_request(self, reason: str) -> None:
+        with self._lock:
+            self._stats['requests_disconnected' if reason == 'disconnect' else 'requests_timed_out'] += 1
+
+    def record_cancel(self, queries: int) -> None:
+        with self._lock:
+            self._stats['calls_cancelled'] += 1
+            self._stats['queries_cancelled'] += queries
+
+    def record_release(self, seconds: float) -> None:
+        """A connection of a cancelled call went back to its pool, `seconds` after the cancel."""
+        with self._lock:
+            self._stats['connections_released'] += 1
+            self._stats['total_release_ms'] += seconds * 1000
+            self._stats['max_release_ms'] = max(self._stats['max_release_ms'], seconds * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            released = self._stats['connections_released']
+            return {
+                **{key: value for key, value in self._stats.items() if key != 'total_release_ms'},
+                'mean_release_ms': self._stats['total_release_ms'] / released if released else 0.0,
+                'deadline': self.deadline,
+            }
+
+
+class RequestCancellationMiddleware:
+    """ASGI middleware that cancels a retrieval request when its client disconnects or its deadline passes.
+    A request past its deadline is answered with 504 if its response hasn't started."""
+
+    def __init__(self, app, cancellations: "QueryCancellations" = None):
+        self.app = app
+        self.cancellations = cancellations or query_cancellations
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(CANCELLABLE_PREFIXES) or scope["path"] in UNCANCELLED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the (normally empty) body up front, so the disconnect listener owns receive from here on
+        messages = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                self.cancellations.record_request("disconnect")
+                return
+            messages.append(message)
+            if not message.get("more_body", False):
+                break
+        disconnected = asyncio.Event()
+
+        async def replay_receive():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        response = {"started": False, "finished": False}
+
+        async def tracked_send(message):
+            if message["type"] == "http.response.start":
+                response["started"] = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response["finished"] = True
+            await send(message)
+
+        async def listen_for_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        app_task = asyncio.ensure_future(self.app(scope, replay_receive, tracked_send))
+        listener = asyncio.ensure_future(listen_for_disconnect())
+        try:
+            done, _ = await asyncio.wait(
+                {app_task, listener},
+                timeout=self.cancellations.deadline or None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            # The server also reports a disconnect once the response has been sent
+            if app_task in done or response["finished"]:
+                await app_task
+                return
+
+            reason = "disconnect" if listener in done else "deadline"
+            self.cancellations.record_request(reason)
+            app_task.cancel()
+            try:
+                await app_task
+            except asyncio.CancelledError:
+                pass
+            logger.info(f"Cancelled {scope['path']} ({reason})")
+            if reason == "deadline" and not response["started"]:
+                body = json.dumps({"detail": {
+                    "status": "fail",
+                    "message": f"Request exceeded the {self.cancellations.deadline:g}s deadline"
+                }}).encode()
+                await send({"type": "http.response.start", "status": 504, "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ]})
+                await send({"type": "http.response.body", "body": body})
+        finally:
+            listener.cancel()
+            if not app_task.done():
+                app_task.cancel()
+
+
+# Global query cancellation settings and counters
+query_cancellations = QueryCancellations(deadline=30.0)
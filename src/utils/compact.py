@@ -0,0 +1,123 @@
+"""
+Compact in-memory representation of cached query results.
+Cached results are lists of row dicts, possibly nested (e.g. miners, each with a list of response
+rows). A dict per row costs several hundred bytes for its hash table alone, and every row carries
+its own copies of repeated strings (hotkeys, challenge IDs). compact() stores each run of rows that
+share their keys as one CompactRows (the keys once, then a tuple of values per row) and stores
+equal strings once per result; expand() rebuilds plain dicts and lists. estimate_size() gives the
+approximate memory footprint of a value, for the cache's memory cap.
+"""
+
+import sys
+from typing import Any, Dict, List, Tuple
+
+# Rows in a list before it is stored as CompactRows; shorter lists aren't worth the expansion work
+MIN_COMPACT_ROWS = 8
+# Items measured in a long list or dict; the rest are assumed to be like them
+SIZE_SAMPLE = 32
+# Values stored as they are
+LEAF_TYPES = frozenset((int, float, bool, type(None), bytes))
+
+
+class CompactRows:
+    """A list of dicts with the same keys, as the keys once and a tuple of values per row.
+    nested records whether any value is a list or dict, which expand() then has to rebuild."""
+
+    __slots__ = ('keys', 'rows', 'nested')
+
+    def __init__(self, keys: Tuple[str, ...], rows: List[tuple], nested: bool):
+        self.keys = keys
+        self.rows = rows
+        self.nested = nested
+
+    def __getstate__(self):
+        return self.keys, self.rows, self.nested
+
+    def __setstate__(self, state):
+        self.keys, self.rows, self.nested = state
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def compact(value: Any) -> Any:
+    """The compact form of a cached value; values other than lists and dicts are returned as-is."""
+    return _compact(value, {})
+
+
+def _compact(value: Any, strings: Dict[str, str]) -> Any:
+    if type(value) is str:
+        return strings.setdefault(value, value)
+    if type(value) in LEAF_TYPES:
+        return value
+    if isinstance(value, dict):
+        return {key: _compact(item, strings) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) >= MIN_COMPACT_ROWS and type(value[0]) is dict:
+            keys = tuple(value[0])
+            if all(type(row) is dict and len(row) == len(keys) and tuple(row) == keys for row in value):
+                rows = []
+                nested = False
+                for row in value:
+                    items = []
+                    for item in row.values():
+                        if type(item) is str:
+                            items.append(strings.setdefault(item, item))
+                        elif type(item) in LEAF_TYPES:
+                            items.append(item)
+                        else:
+                            nested = True
+                            items.append(_compact(item, strings))
+                    rows.append(tuple(items))
+                return CompactRows(tuple(strings.setdefault(key, key) for key in keys), rows, nested)
+        return [_compact(item, strings) for item in value]
+    return value
+
+
+def expand(value: Any) -> Any:
+    """Inverse of compact: fresh dicts and lists (so callers may modify them), sharing the leaf values."""
+    if isinstance(value, CompactRows):
+        keys = value.keys
+        if not value.nested:
+            return [dict(zip(keys, row)) for row in value.rows]
+        return [dict(zip(keys, [expand(item) for item in row])) for row in value.rows]
+    if isinstance(value, dict):
+        return {key: expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [expand(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(expand(item) for item in value)
+    return value
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate bytes held by value and everything it references (objects referenced more than
+    once are counted once). Long lists and dicts are sampled: SIZE_SAMPLE evenly spaced items are
+    measured and the rest are assumed to be like them."""
+    return _estimate(value, set())
+
+
+def _estimate(value: Any, seen: set) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, CompactRows):
+        return size + _estimate(value.keys, seen) + _estimate(value.rows, seen)
+    if isinstance(value, dict):
+        items = list(value.items())
+        return size + _sampled(items, lambda item: _estimate(item[0], seen) + _estimate(item[1], seen))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + _sampled(list(value), lambda item: _estimate(item, seen))
+    return size
+
+
+def _sampled(items: list, measure) -> int:
+    count = len(items)
+    if count <= SIZE_SAMPLE:
+        return sum(measure(item) for item in items)
+    step = count / SIZE_SAMPLE
+    sample = sum(measure(items[int(index * step)]) for index in range(SIZE_SAMPLE))
+    return int(sample * count / SIZE_SAMPLE)
@@ -1 +1,19 @@
+import threading
+from dotenv import load_dotenv
+
 PROBLEM_TYPES = ["codegen", "regression"]
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+def load_env() -> None:
+    """Load variables from .env once per process.
+    Called lazily by whatever first needs configuration, so importing modules stays side-effect free.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
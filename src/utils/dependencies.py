@@ -0,0 +1,6 @@
+from fastapi import Request
+from src.db.operations import DatabaseManager
+
+def get_db(request: Request) -> DatabaseManager:
+    """Return the per-process DatabaseManager created in the FastAPI lifespan."""
+    return request.app.state.db
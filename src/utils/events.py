@@ -0,0 +1,333 @@
+"""
+Live event feed for the Ridges API.
+DatabaseManager publishes compact events (new challenges, stored or evaluated responses, scores)
+after each successful store, and EventHub fans them out on the event loop to the Server-Sent Events
+subscribers of /retrieval/events, so dashboards can update incrementally instead of polling.
+Each worker has its own hub. Writes made through other workers reach it from the change feed in the
+sync-in-memory-stores job (see DatabaseManager.sync_in_memory_stores), about IN_MEMORY_SYNC_INTERVAL seconds later.
+"""
+
+import asyncio
+import os
+import secrets
+import threading
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pydantic_core import to_json
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+EVENT_TYPES = ("challenge", "response", "response_evaluated", "score")
+
+# Subscribers woken per event loop iteration, so a large fan-out doesn't starve other requests
+WAKE_SLICE = 200
+
+
+class Event:
+    """A published event, rendered once as an SSE frame and shared by every subscriber."""
+
+    __slots__ = ('id', 'type', 'miner_hotkey', 'challenge_id', 'frame')
+
+    def __init__(self, hub_id: str, event_id: int, event_type: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.type = event_type
+        self.miner_hotkey = data.get('miner_hotkey')
+        self.challenge_id = data.get('challenge_id')
+        self.frame = b"id: %s.%d\nevent: %s\ndata: %s\n\n" % (hub_id.encode(), event_id, event_type.encode(), to_json(data))
+
+
+def fingerprint(event_type: str, data: Dict[str, Any]) -> Tuple:
+    """What an event says, for recognising the same change read back from the change feed."""
+    return (event_type, data.get('type'), data.get('challenge_id'), data.get('miner_hotkey'), data.get('validator_hotkey'), data.get('score'))
+
+
+class Channel:
+    """Subscribers sharing the same filters. Events are matched once per channel, not per subscriber,
+    so thousands of dashboards watching the same feed cost one match and one joined chunk per batch."""
+
+    __slots__ = ('key', 'types', 'miner_hotkey', 'challenge_id', 'subscribers')
+
+    def __init__(self, key: Tuple, types: Optional[frozenset], miner_hotkey: Optional[str], challenge_id: Optional[str]):
+        self.key = key
+        self.types = types
+        self.miner_hotkey = miner_hotkey
+        self.challenge_id = challenge_id
+        self.subscribers: set = set()
+
+    def matches(self, event: Event) -> bool:
+        return (
+            (self.types is None or event.type in self.types)
+            and (self.miner_hotkey is None or event.miner_hotkey == self.miner_hotkey)
+            and (self.challenge_id is None or event.challenge_id == self.challenge_id)
+        )
+
+
+class Subscription:
+    """One connected client: its channel and a bounded buffer of chunks not yet sent.
+    When the client reads slower than events arrive, the oldest chunks are dropped and the client
+    is sent a 'resync' event so it can refetch instead of silently missing updates.
+    """
+
+    __slots__ = ('channel', 'buffer', 'buffered', 'buffer_size', 'dropped', 'heartbeat', 'wakeup', 'closed')
+
+    def __init__(self, channel: Channel, buffer_size: int):
+        self.channel = channel
+        self.buffer: deque = deque()
+        self.buffered = 0
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self.heartbeat = False
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def push(self, chunk: bytes, count: int) -> int:
+        """Buffer a chunk of count events; returns how many older events that pushed out."""
+        self.buffer.append((chunk, count))
+        self.buffered += count
+        dropped = 0
+        while self.buffered > self.buffer_size and len(self.buffer) > 1:
+            _, old_count = self.buffer.popleft()
+            self.buffered -= old_count
+            dropped += old_count
+        self.dropped += dropped
+        return dropped
+
+    def drain(self) -> bytes:
+        chunk = b"".join(chunk for chunk, _ in self.buffer)
+        self.buffer.clear()
+        self.buffered = 0
+        return chunk
+
+
+class EventHub:
+    """In-process fan-out of events to SSE subscribers.
+
+    publish() may be called from any thread (store methods run on bulkhead threads); events are
+    handed to the event loop in one call per batch and buffered there, so subscribers need no locks.
+    Subscribers are woken flush_seconds later, in slices of WAKE_SLICE per loop iteration: batches
+    published close together reach each client as one write, and the ingestion request that published
+    them is answered before the fan-out starts. An idle subscriber costs a deque and an asyncio.Event;
+    one hub-wide timer wakes them all for heartbeats. The last history_size events are kept so a
+    reconnecting client can resume from its Last-Event-ID.
+
+    Event IDs are "<hub>.<n>", where hub is drawn when the hub is attached in a worker. A Last-Event-ID
+    from another worker's hub (or an earlier run) can't be resumed from, so that client gets a resync.
+    The fingerprints of the last seen_size events are kept, so publish_changes() can skip changes this
+    hub already published when they were stored.
+    """
+
+    def __init__(self, max_subscribers: int = 5000, buffer_size: int = 256, history_size: int = 1000, heartbeat_seconds: float = 15.0, flush_seconds: float = 0.05, seen_size: int = 20000):
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.flush_seconds = flush_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._channels: Dict[Tuple, Channel] = {}
+        self._subscriber_count = 0
+        self._pending: set = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._heartbeat_handle: Optional[asyncio.TimerHandle] = None
+        self._history: deque = deque(maxlen=history_size)
+        self._hub_id = ''
+        self._last_id = 0
+        self.seen_size = seen_size
+        self._seen: OrderedDict = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._stats = {
+            'published': 0,
+            'published_from_changes': 0,
+            'delivered': 0,
+            'dropped': 0,
+            'rejected_subscribers': 0,
+            'peak_subscribers': 0,
+        }
+
+    def configure(self) -> None:
+        """Apply EVENTS_MAX_SUBSCRIBERS / EVENTS_BUFFER_SIZE overrides from the environment."""
+        self.max_subscribers = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', self.max_subscribers))
+        self.buffer_size = int(os.getenv('EVENTS_BUFFER_SIZE', self.buffer_size))
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start delivering events on this loop (called from the FastAPI lifespan)."""
+        self._hub_id = secrets.token_hex(4)
+        self._loop = loop
+        self._heartbeat_handle = loop.call_later(self.heartbeat_seconds, self._heartbeat)
+
+    def close(self) -> None:
+        """Stop delivering and end every open stream."""
+        self._loop = None
+        for handle in (self._flush_handle, self._heartbeat_handle):
+            if handle is not None:
+                handle.cancel()
+        self._flush_handle = self._heartbeat_handle = None
+        for channel in self._channels.values():
+            for subscription in channel.subscribers:
+                subscription.closed = True
+                subscription.wakeup.set()
+        self._channels.clear()
+        self._pending.clear()
+        self._subscriber_count = 0
+
+    def publish(self, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Publish (event_type, data) pairs. Thread-safe; a no-op before attach(), e.g. in scripts."""
+        loop = self._loop
+        if loop is None or not events:
+            return
+        self._remember(events)
+        try:
+            loop.call_soon_threadsafe(self._dispatch, events)
+        except RuntimeError:
+            # Loop already closed during shutdown
+            pass
+
+    def publish_changes(self, events: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Publish (event_type, data) pairs read from the change feed, except those this hub has already
+        published, e.g. when this worker stored them. Thread-safe. Returns the number published."""
+        if self._loop is None or not events:
+            return 0
+        with self._seen_lock:
+            events = [(event_type, data) for event_type, data in events if fingerprint(event_type, data) not in self._seen]
+        self._stats['published_from_changes'] += len(events)
+        self.publish(events)
+        return len(events)
+
+    def _remember(self, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        with self._seen_lock:
+            for event_type, data in events:
+                key = fingerprint(event_type, data)
+                self._seen[key] = None
+                self._seen.move_to_end(key)
+            while len(self._seen) > self.seen_size:
+                self._seen.popitem(last=False)
+
+    def _dispatch(self, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        published = []
+        for event_type, data in events:
+            self._last_id += 1
+            event = Event(self._hub_id, self._last_id, event_type, data)
+            self._history.append(event)
+            published.append(event)
+        self._stats['published'] += len(published)
+
+        for channel in self._channels.values():
+            matched = [event for event in published if channel.matches(event)]
+            if not matched:
+                continue
+            chunk = b"".join(event.frame for event in matched)
+            for subscription in channel.subscribers:
+                dropped = subscription.push(chunk, len(matched))
+                self._stats['delivered'] += len(matched) - dropped
+                self._stats['dropped'] += dropped
+            self._pending.update(channel.subscribers)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._pending and self._flush_handle is None and self._loop is not None:
+            self._flush_handle = self._loop.call_later(self.flush_seconds, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        pending, self._pending = list(self._pending), set()
+        self._wake(pending, 0)
+
+    def _wake(self, pending: List[Subscription], start: int) -> None:
+        for subscription in pending[start:start + WAKE_SLICE]:
+            subscription.wakeup.set()
+        if start + WAKE_SLICE < len(pending) and self._loop is not None:
+            self._loop.call_soon(self._wake, pending, start + WAKE_SLICE)
+
+    def _heartbeat(self) -> None:
+        for channel in self._channels.values():
+            for subscription in channel.subscribers:
+                subscription.heartbeat = True
+            self._pending.update(channel.subscribers)
+        self._schedule_flush()
+        if self._loop is not None:
+            self._heartbeat_handle = self._loop.call_later(self.heartbeat_seconds, self._heartbeat)
+
+    def subscribe(self, types: Optional[Iterable[str]] = None, miner_hotkey: Optional[str] = None, challenge_id: Optional[str] = None, last_event_id: Optional[str] = None) -> Optional[Subscription]:
+        """Register a subscriber, or return None when the hub is full. With last_event_id, events
+        published after it are replayed from history (or a resync is signalled if they have aged out,
+        or the ID is not one of this hub's)."""
+        if self._subscriber_count >= self.max_subscribers:
+            self._stats['rejected_subscribers'] += 1
+            return None
+        types = frozenset(types) if types else None
+        key = (types, miner_hotkey, challenge_id)
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = Channel(key, types, miner_hotkey, challenge_id)
+        subscription = Subscription(channel, self.buffer_size)
+
+        if last_event_id is not None:
+            hub_id, _, position = last_event_id.partition('.')
+            if hub_id != self._hub_id or not position.isdigit():
+                # Another worker's (or an earlier run's) event: nothing here to resume from
+                subscription.dropped = 1
+                subscription.wakeup.set()
+                last_event_id = None
+            else:
+                last_event_id = int(position)
+
+        if last_event_id is not None and last_event_id < self._last_id:
+            if not self._history or self._history[0].id > last_event_id + 1:
+                subscription.dropped = 1
+            matched = [event for event in self._history if event.id > last_event_id and channel.matches(event)]
+            if matched:
+                subscription.push(b"".join(event.frame for event in matched), len(matched))
+            subscription.wakeup.set()
+
+        channel.subscribers.add(subscription)
+        self._subscriber_count += 1
+        self._stats['peak_subscribers'] = max(self._stats['peak_subscribers'], self._subscriber_count)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        channel = subscription.channel
+        if subscription not in channel.subscribers:
+            return
+        channel.subscribers.discard(subscription)
+        self._pending.discard(subscription)
+        self._subscriber_count -= 1
+        if not channel.subscribers and self._channels.get(channel.key) is channel:
+            del self._channels[channel.key]
+
+    async def stream(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        """SSE frames for one subscriber until it disconnects or the hub closes. Idle streams get a
+        comment line on each hub heartbeat, so proxies keep the connection open and a client that
+        went away is noticed on the write."""
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                await subscription.wakeup.wait()
+                subscription.wakeup.clear()
+                if subscription.closed:
+                    break
+                if subscription.dropped:
+                    dropped, subscription.dropped = subscription.dropped, 0
+                    yield b"event: resync\ndata: %s\n\n" % to_json({'dropped': dropped})
+                if subscription.buffer:
+                    yield subscription.drain()
+                elif subscription.heartbeat:
+                    yield b": keepalive\n\n"
+                subscription.heartbeat = False
+        finally:
+            self.unsubscribe(subscription)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'subscribers': self._subscriber_count,
+            'channels': len(self._channels),
+            'hub_id': self._hub_id,
+            'last_event_id': self._last_id,
+            'max_subscribers': self.max_subscribers,
+            'buffer_size': self.buffer_size,
+        }
+
+
+# Global event hub instance
+event_hub = EventHub()
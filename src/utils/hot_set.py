@@ -0,0 +1,387 @@
+"""
+In-memory columnar hot set of recent evaluated codegen responses for the Ridges API.
+Holds every graded response completed within the last retention_hours as NumPy columns, so the
+miner responses query (filter on count and average score, sort, limit, responses per miner) is
+answered with vectorized operations instead of the miner responses CTE. Only patch text still
+comes from the database, through get_response_patches.
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECONDS_PER_HOUR = 3600 * 1_000_000
+
+# Sentinels for NULL in integer columns (float columns use NaN)
+NULL_TIMESTAMP = np.iinfo(np.int64).min
+NULL_NODE_ID = np.iinfo(np.int32).min
+
+COLUMNS = {
+    'miner': np.int32,
+    'challenge': np.int32,
+    'patch': np.int32,
+    'node_id': np.int32,
+    'score': np.float64,
+    'processing_time': np.float64,
+    'received_at': np.int64,
+    'completed_at': np.int64,
+    'evaluated_at': np.int64,
+    'live': np.bool_,
+}
+
+# (challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, score, evaluated_at, patch_hash, response_patch)
+ResponseRow = Tuple[str, str, Optional[int], Optional[float], Optional[datetime], Optional[datetime], Optional[float], Optional[datetime], Optional[str], Optional[str]]
+
+
+def _to_micros(timestamp: Optional[datetime]) -> int:
+    """Microseconds since the epoch; naive timestamps are UTC, like the TIMESTAMP columns in Postgres."""
+    if timestamp is None:
+        return NULL_TIMESTAMP
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def _to_json_timestamps(micros: np.ndarray) -> List[Optional[str]]:
+    """Format like Postgres' json output for TIMESTAMP (ISO 8601, fractional seconds without trailing zeros).
+    NULL_TIMESTAMP is NaT as datetime64, which becomes None."""
+    texts = np.datetime_as_string(micros.astype('datetime64[us]'), unit='us').tolist()
+    return [None if text == 'NaT' else text.rstrip('0').rstrip('.') for text in texts]
+
+
+def _key(challenge: int, miner: int) -> int:
+    """Index key for a (challenge, miner) pair of interned ids; an int is much smaller than a tuple of strings."""
+    return challenge << 32 | miner
+
+
+def _now_micros() -> int:
+    return int(time.time() * 1_000_000)
+
+
+class Interner:
+    """Maps strings to dense integer ids for the integer columns."""
+
+    __slots__ = ('ids', 'values')
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = list(values)
+        self.ids: Dict[str, int] = {value: index for index, value in enumerate(self.values)}
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def nbytes(self) -> int:
+        return sum(sys.getsizeof(value) for value in self.values) + sys.getsizeof(self.ids) + sys.getsizeof(self.values)
+
+
+class ResponseHotSet:
+    """Thread-safe columnar store of graded codegen responses completed in the last retention_hours.
+
+    Rows are appended as responses are stored and bootstrapped from the database at startup.
+    Re-evaluations update score and evaluated_at in place, as the responses upsert does; rows that
+    age out of the window or lose their score are marked dead and compacted away periodically.
+    """
+
+    def __init__(self, retention_hours: int = 24, initial_capacity: int = 4096, prune_interval: float = 60.0):
+        """
+        Initialize the hot set.
+
+        Args:
+            retention_hours: Look-back covered, in hours (default: 24, the default dashboard window)
+            initial_capacity: Rows allocated up front; columns double when full (default: 4096)
+            prune_interval: Minimum seconds between sweeps for rows that aged out (default: 60)
+        """
+        self.retention_hours = retention_hours
+        self.prune_interval = prune_interval
+        self._lock = threading.RLock()
+        self._columns = {name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self._dead = 0
+        self._miners = Interner()
+        self._challenges = Interner()
+        self._patches = Interner()
+        # Patch text for rows stored before content addressing (no patch_hash)
+        self._inline_patches: Dict[int, str] = {}
+        # _key(challenge, miner) -> row
+        self._index: Dict[int, int] = {}
+        self._hotkeys: Optional[np.ndarray] = None
+        self._covered_from: Optional[int] = None
+        self._last_pruned = 0.0
+        self._stats = {
+            'recorded': 0,
+            'updated': 0,
+            'queries': 0,
+            'compactions': 0,
+        }
+
+    def covers(self, hours: int) -> bool:
+        """Whether a window of `hours` can be answered from memory."""
+        if hours is None or hours < 1 or hours > self.retention_hours:
+            return False
+        with self._lock:
+            if self._covered_from is None:
+                return False
+            return _now_micros() - hours * MICROSECONDS_PER_HOUR >= self._covered_from
+
+    def load(self, rows: Iterable[ResponseRow], since: datetime) -> int:
+        """Replace the contents with rows loaded from the database and mark the window since `since` as covered."""
+        with self._lock:
+            self.clear()
+            count = self.record_many(rows)
+            self._covered_from = _to_micros(since)
+            logger.info(f"Response hot set loaded {count} responses completed since {since.isoformat()}")
+            return count
+
+    def record_many(self, rows: Iterable[ResponseRow]) -> int:
+        """Record stored responses. Rows without a score (not evaluated) remove any earlier row for the
+        same response. New rows are collected per column and appended in one slice assignment each.
+        Returns the number of rows appended."""
+        pending = {name: [] for name in COLUMNS}
+        with self._lock:
+            oldest = _now_micros() - self.retention_hours * MICROSECONDS_PER_HOUR
+            for challenge_id, miner_hotkey, node_id, processing_time, received_at, completed_at, score, evaluated_at, patch_hash, response_patch in rows:
+                challenge = self._challenges.ids.get(challenge_id)
+                miner = self._miners.ids.get(miner_hotkey)
+                key = _key(challenge, miner) if challenge is not None and miner is not None else None
+                row = self._index.get(key) if key is not None else None
+                if row is not None:
+                    # Already held (possibly appended earlier in this batch): apply the upsert in place
+                    column, offset = (self._columns, row) if row < self._size else (pending, row - self._size)
+                    if score is None:
+                        del self._index[key]
+                        column['live'][offset] = False
+                        self._inline_patches.pop(row, None)
+                        self._dead += 1
+                    else:
+                        column['score'][offset] = score
+                        column['evaluated_at'][offset] = _to_micros(evaluated_at)
+                        self._stats['updated'] += 1
+                    continue
+
+                completed = _to_micros(completed_at)
+                if score is None or completed == NULL_TIMESTAMP or completed < oldest:
+                    continue
+
+                row = self._size + len(pending['live'])
+                challenge = self._challenges.intern(challenge_id)
+                miner = self._miners.intern(miner_hotkey)
+                pending['miner'].append(miner)
+                pending['challenge'].append(challenge)
+                pending['patch'].append(self._patches.intern(patch_hash) if patch_hash else -1)
+                pending['node_id'].append(NULL_NODE_ID if node_id is None else node_id)
+                pending['score'].append(score)
+                pending['processing_time'].append(np.nan if processing_time is None else processing_time)
+                pending['received_at'].append(_to_micros(received_at))
+                pending['completed_at'].append(completed)
+                pending['evaluated_at'].append(_to_micros(evaluated_at))
+                pending['live'].append(True)
+                if not patch_hash and response_patch is not None:
+                    self._inline_patches[row] = response_patch
+                self._index[_key(challenge, miner)] = row
+
+            appended = len(pending['live'])
+            if appended:
+                while self._size + appended > len(self._columns['live']):
+                    self._grow()
+                for name, values in pending.items():
+                    self._columns[name][self._size:self._size + appended] = values
+                self._size += appended
+            self._stats['recorded'] += appended
+        return appended
+
+    def _grow(self) -> None:
+        for name, column in self._columns.items():
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def prune(self) -> int:
+        """Drop rows that have aged out of the window, compacting the columns once at least half
+        the rows are dead. Returns the number of rows dropped."""
+        with self._lock:
+            self._last_pruned = time.monotonic()
+            size = self._size
+            columns = self._columns
+            expired = np.flatnonzero(columns['live'][:size] & (columns['completed_at'][:size] < _now_micros() - self.retention_hours * MICROSECONDS_PER_HOUR))
+            for row, challenge, miner in zip(expired.tolist(), columns['challenge'][expired].tolist(), columns['miner'][expired].tolist()):
+                del self._index[_key(challenge, miner)]
+                self._inline_patches.pop(row, None)
+            columns['live'][expired] = False
+            self._dead += len(expired)
+            if self._dead and self._dead * 2 >= self._size:
+                self._compact()
+            return len(expired)
+
+    def _compact(self) -> None:
+        """Rewrite the columns with only live rows, re-interning miners, challenges and patches."""
+        size = self._size
+        live = np.flatnonzero(self._columns['live'][:size])
+        columns = {name: column[:size][live] for name, column in self._columns.items()}
+
+        miner_ids, columns['miner'] = np.unique(columns['miner'], return_inverse=True)
+        self._miners = Interner(self._miners.values[index] for index in miner_ids.tolist())
+        columns['miner'] = columns['miner'].astype(np.int32)
+        self._hotkeys = None
+
+        challenge_ids, columns['challenge'] = np.unique(columns['challenge'], return_inverse=True)
+        self._challenges = Interner(self._challenges.values[index] for index in challenge_ids.tolist())
+        columns['challenge'] = columns['challenge'].astype(np.int32)
+
+        has_patch = columns['patch'] >= 0
+        patch_ids, patch_inverse = np.unique(columns['patch'][has_patch], return_inverse=True)
+        self._patches = Interner(self._patches.values[index] for index in patch_ids.tolist())
+        columns['patch'][has_patch] = patch_inverse
+
+        self._inline_patches = {
+            position: self._inline_patches[row]
+            for position, row in enumerate(live.tolist())
+            if row in self._inline_patches
+        }
+
+        capacity = max(len(live) * 2, 1024)
+        for name, dtype in COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            column[:len(live)] = columns[name]
+            self._columns[name] = column
+        self._size = len(live)
+        self._dead = 0
+        keys = (columns['challenge'].astype(np.int64) << 32) | columns['miner'].astype(np.int64)
+        self._index = dict(zip(keys.tolist(), range(len(live))))
+        self._stats['compactions'] += 1
+
+    def _hotkey_array(self) -> np.ndarray:
+        if self._hotkeys is None or len(self._hotkeys) != len(self._miners.values):
+            self._hotkeys = np.array(self._miners.values, dtype=str) if self._miners.values else np.array([], dtype=str)
+        return self._hotkeys
+
+    def query(self, hours: int, min_score: float = 0, min_response_count: int = 0, sort_by_score: bool = False, max_miners: int = 5, miner_hotkeys: Optional[List[str]] = None) -> List[Dict]:
+        """Answer the miner responses query from memory, returning the same rows as
+        DatabaseManager.get_miner_responses: miner_hotkey, response_count, average_score and
+        responses (newest first, with patch_hash but no patch text)."""
+        with self._lock:
+            self._stats['queries'] += 1
+            if time.monotonic() - self._last_pruned >= self.prune_interval:
+                self.prune()
+
+            size = self._size
+            columns = self._columns
+            miner_count = len(self._miners.values)
+            mask = columns['live'][:size] & (columns['completed_at'][:size] >= _now_micros() - hours * MICROSECONDS_PER_HOUR)
+            if miner_hotkeys is not None:
+                allowed = np.zeros(miner_count, dtype=bool)
+                allowed[[self._miners.ids[hotkey] for hotkey in miner_hotkeys if hotkey in self._miners.ids]] = True
+                mask &= allowed[columns['miner'][:size]]
+            rows = np.flatnonzero(mask)
+            miners = columns['miner'][rows]
+
+            counts = np.bincount(miners, minlength=miner_count)
+            sums = np.bincount(miners, weights=columns['score'][rows], minlength=miner_count)
+            candidates = np.flatnonzero(counts >= max(min_response_count, 1))
+            averages = sums[candidates] / counts[candidates]
+            keep = averages >= min_score
+            candidates, averages = candidates[keep], averages[keep]
+
+            # Ties and the default order go by code point, matching the query's ORDER BY hotkey COLLATE "C"
+            hotkeys = self._hotkey_array()[candidates]
+            order = np.lexsort((hotkeys, -averages)) if sort_by_score else np.argsort(hotkeys, kind='stable')
+            order = order[:max_miners]
+            selected = candidates[order]
+
+            is_selected = np.zeros(miner_count, dtype=bool)
+            is_selected[selected] = True
+            selected_rows = rows[is_selected[miners]]
+            selected_rows = selected_rows[np.lexsort((-columns['completed_at'][selected_rows], columns['miner'][selected_rows]))]
+
+            values = {name: columns[name][selected_rows].tolist() for name in ('miner', 'challenge', 'patch', 'node_id', 'score', 'processing_time')}
+            for name in ('received_at', 'completed_at', 'evaluated_at'):
+                values[name] = _to_json_timestamps(columns[name][selected_rows])
+            inline_patches = [self._inline_patches.get(row) for row in selected_rows.tolist()] if self._inline_patches else [None] * len(selected_rows)
+            # Interners only ever append (compaction replaces them), so these lists stay valid outside the lock
+            challenge_values, hotkey_values, patch_values = self._challenges.values, self._miners.values, self._patches.values
+            counts = counts[selected].tolist()
+            averages = averages[order].tolist()
+
+        responses: Dict[int, List[Dict]] = {miner: [] for miner in selected.tolist()}
+        for miner, challenge, patch, node_id, score, processing_time, received_at, completed_at, evaluated_at, response_patch in zip(
+            values['miner'], values['challenge'], values['patch'], values['node_id'], values['score'], values['processing_time'],
+            values['received_at'], values['completed_at'], values['evaluated_at'], inline_patches
+        ):
+            responses[miner].append({
+                'challenge_id': challenge_values[challenge],
+                'miner_hotkey': hotkey_values[miner],
+                'node_id': None if node_id == NULL_NODE_ID else node_id,
+                'processing_time': None if processing_time != processing_time else processing_time,
+                'received_at': received_at,
+                'completed_at': completed_at,
+                'evaluated': True,
+                'score': score,
+                'evaluated_at': evaluated_at,
+                'response_patch': response_patch,
+                'patch_hash': patch_values[patch] if patch >= 0 else None,
+            })
+
+        return [
+            {
+                'miner_hotkey': hotkey_values[miner],
+                'response_count': count,
+                'average_score': average,
+                'responses': responses[miner],
+            }
+            for miner, count, average in zip(selected.tolist(), counts, averages)
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._columns = {name: np.zeros(len(column), dtype=column.dtype) for name, column in self._columns.items()}
+            self._size = 0
+            self._dead = 0
+            self._miners = Interner()
+            self._challenges = Interner()
+            self._patches = Interner()
+            self._inline_patches.clear()
+            self._index.clear()
+            self._hotkeys = None
+            self._covered_from = None
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held, by component."""
+        with self._lock:
+            return {
+                'columns': sum(column.nbytes for column in self._columns.values()),
+                'strings': self._miners.nbytes() + self._challenges.nbytes() + self._patches.nbytes()
+                    + sum(sys.getsizeof(text) for text in self._inline_patches.values()),
+                'index': sys.getsizeof(self._index) + sum(sys.getsizeof(key) for key in self._index),
+            }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            memory = self.memory_usage()
+            return {
+                **self._stats,
+                'rows': self._size - self._dead,
+                'dead_rows': self._dead,
+                'capacity': len(self._columns['live']),
+                'miners': len(self._miners.values),
+                'challenges': len(self._challenges.values),
+                'memory_bytes': memory,
+                'total_memory_mb': sum(memory.values()) / (1024 * 1024),
+                'retention_hours': self.retention_hours,
+                'loaded': self._covered_from is not None,
+            }
+
+
+# Global response hot set instance
+response_hot_set = ResponseHotSet(retention_hours=24)
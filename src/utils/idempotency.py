@@ -0,0 +1,257 @@
+"""
+Idempotent ingestion for the Ridges API.
+Validators retry uploads that timed out or failed, re-sending the same batch. Each ingestion request is
+identified by its Idempotency-Key header, or by a fingerprint of its body when there is none; successful
+responses are remembered for a while and a replay of the same request gets the stored response back
+without touching the database. A retry that arrives while the original is still being stored waits for
+it instead of storing the batch a second time.
+
+Only the routes that upsert (challenges and responses) fall back to the body fingerprint. Scores and
+validator versions are appended as a time series, where the same body sent again next round is a new
+row rather than a retry, so /ingestion/scores-list is only deduplicated by an explicit Idempotency-Key.
+
+Streaming routes (/ingestion/*/stream) are not buffered, so they are only recognized as replays when
+they carry an Idempotency-Key; their body is fingerprinted as it is read.
+
+The cache is per process. Replays that reach another worker, or arrive after the entry expired, are
+still cheap: the store methods skip rows that are already stored unchanged.
+"""
+
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+IDEMPOTENT_PREFIXES = ("/ingestion/",)
+# Routes where storing the same body twice changes nothing, so a repeated body is treated as a retry
+FINGERPRINTED_PATHS = frozenset((
+    "/ingestion/codegen-challenges",
+    "/ingestion/regression-challenges",
+    "/ingestion/codegen-responses",
+    "/ingestion/regression-responses",
+))
+# Routes that read their body incrementally
+STREAMING_SUFFIX = "/stream"
+IDEMPOTENCY_KEY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+
+# (body fingerprint, status, headers, body)
+StoredResponse = Tuple[str, int, List[Tuple[bytes, bytes]], bytes]
+
+
+class IngestionReplayCache:
+    """Recently completed ingestion requests by key, and the requests currently being processed."""
+
+    def __init__(self, ttl: int = 3600, maxsize: int = 10000, max_body_bytes: int = 64 * 1024):
+        """
+        Initialize the replay cache.
+
+        Args:
+            ttl: Seconds a completed request is remembered (default: 3600)
+            maxsize: Maximum number of remembered requests (default: 10000)
+            max_body_bytes: Responses larger than this are not remembered (default: 64KB)
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_body_bytes = max_body_bytes
+        self._completed: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'replayed': 0,
+            'coalesced': 0,
+            'key_conflicts': 0,
+            'stored': 0,
+        }
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            return self._completed.get(key)
+
+    def begin(self, key: str) -> Optional[asyncio.Future]:
+        """Mark a request as in flight. Returns None if it wasn't already, else a future for the
+        original request's stored response (None if the original did not succeed)."""
+        with self._lock:
+            self._stats['requests'] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future
+            self._in_flight[key] = asyncio.get_running_loop().create_future()
+            return None
+
+    def finish(self, key: str, response: Optional[StoredResponse]) -> None:
+        """Complete an in-flight request, remembering its response if it succeeded."""
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+            if response is not None and len(response[3]) <= self.max_body_bytes:
+                self._completed[key] = response
+                self._stats['stored'] += 1
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._completed.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                'remembered': len(self._completed),
+                'in_flight': len(self._in_flight),
+                'max_size': self.maxsize,
+                'ttl': self.ttl,
+            }
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware that answers replayed ingestion requests from the replay cache."""
+
+    def __init__(self, app, cache: "IngestionReplayCache" = None):
+        self.app = app
+        self.cache = cache or ingestion_replay_cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(IDEMPOTENT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = dict(scope["headers"]).get(IDEMPOTENCY_KEY_HEADER)
+        if scope["path"].endswith(STREAMING_SUFFIX):
+            # Streamed bodies are never buffered, so only requests with an Idempotency-Key can be
+            # recognized before they are processed; the body is fingerprinted as it passes through
+            if idempotency_key is None:
+                await self.app(scope, receive, send)
+                return
+            await self._handle(scope, receive, send, f"{scope['path']}:key:{idempotency_key.decode('latin-1')}")
+            return
+        if idempotency_key is None and scope["path"] not in FINGERPRINTED_PATHS:
+            # Appending routes: an identical body is new data unless the client says it is a retry
+            await self.app(scope, receive, send)
+            return
+
+        # The endpoints parse the whole body anyway, so buffering it first costs nothing extra
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = bytes(body)
+
+        digest = self._digest(scope)
+        digest.update(body)
+        fingerprint = digest.hexdigest()
+        key = f"{scope['path']}:key:{idempotency_key.decode('latin-1')}" if idempotency_key else f"{scope['path']}:body:{fingerprint}"
+        await self._handle(scope, receive, send, key, body, fingerprint)
+
+    async def _handle(self, scope, receive, send, key: str, body: Optional[bytes] = None, fingerprint: Optional[str] = None) -> None:
+        """Replay the stored response for key, wait for an identical request in flight, or process the
+        request. Without a body (streamed requests) the fingerprint is computed from the stream."""
+        stored = self.cache.get(key)
+        if stored is None:
+            waiting = self.cache.begin(key)
+            if waiting is None:
+                await self._process(scope, body, receive, send, key, fingerprint)
+                return
+            stored = await waiting
+            if stored is None:
+                # The original failed; process this request as a retry in its own right
+                await self.app(scope, self._replay_body(body, receive), send)
+                return
+        else:
+            self.cache.count('requests')
+
+        if fingerprint is None:
+            digest = self._digest(scope)
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                digest.update(message.get("body", b""))
+                if not message.get("more_body", False):
+                    break
+            fingerprint = digest.hexdigest()
+
+        if stored[0] != fingerprint:
+            self.cache.count('key_conflicts')
+            await self._send(send, 422, [(b"content-type", b"application/json")], b'{"detail":"Idempotency-Key was already used for a different request"}')
+            return
+        self.cache.count('replayed')
+        await self._send(send, stored[1], stored[2] + [REPLAYED_HEADER], stored[3])
+
+    async def _process(self, scope, body: Optional[bytes], receive, send, key: str, fingerprint: Optional[str]) -> None:
+        response = {"status": 0, "headers": [], "body": bytearray()}
+
+        async def capturing_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["body"].extend(message.get("body", b""))
+            await send(message)
+
+        digest = self._digest(scope) if body is None else None
+
+        async def hashing_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                digest.update(message.get("body", b""))
+            return message
+
+        stored = None
+        try:
+            await self.app(scope, self._replay_body(body, receive) if body is not None else hashing_receive, capturing_send)
+            if 200 <= response["status"] < 300:
+                stored = (fingerprint or digest.hexdigest(), response["status"], response["headers"], bytes(response["body"]))
+        finally:
+            self.cache.finish(key, stored)
+
+    @staticmethod
+    def _digest(scope):
+        """A SHA-256 of the request path and query, to be updated with the body."""
+        digest = hashlib.sha256()
+        for part in (scope["path"].encode(), scope.get("query_string", b"")):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest
+
+    @staticmethod
+    def _replay_body(body: Optional[bytes], receive):
+        """A receive callable that yields the buffered body, then passes through (e.g. disconnects).
+        Streamed requests (no buffered body) read straight from the client."""
+        if body is None:
+            return receive
+        sent = False
+
+        async def replay_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay_receive
+
+    @staticmethod
+    async def _send(send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+# Global replay cache instance
+ingestion_replay_cache = IngestionReplayCache(ttl=3600, maxsize=10000)
@@ -0,0 +1,103 @@
+"""
+In-memory intern cache for the integer keys of hotkeys and challenge IDs.
+The hot tables (responses, codegen_responses, regression_responses, scores, validator_versions) store
+and join on compact integer keys assigned by the hotkeys and challenge_keys dictionary tables rather
+than on the long text identifiers. A KeyInterner caches one dictionary in both directions, so once it
+is warm DatabaseManager turns identifiers into keys on ingestion and retrieval (and keys back into
+identifiers) without asking the database. A key is never reassigned, so cached entries can't go stale;
+the cache is bounded only to cap its memory.
+"""
+
+import sys
+import threading
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class KeyInterner:
+    """Bidirectional cache of one dictionary table: value -> key and key -> value."""
+
+    def __init__(self, table: str, column: str, max_entries: int = 1_000_000):
+        """
+        Initialize the cache.
+
+        Args:
+            table: Dictionary table, with an integer `id` column
+            column: Its text column holding the values
+            max_entries: Values kept before the oldest quarter is dropped (default: 1,000,000)
+        """
+        self.table = table
+        self.column = column
+        self.max_entries = max_entries
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evicted': 0,
+        }
+
+    def keys_of(self, values: Iterable[Optional[str]]) -> Tuple[Dict[str, int], List[str]]:
+        """Cached keys of values, and the distinct values that aren't cached (None is skipped)."""
+        found: Dict[str, int] = {}
+        missing = set()
+        with self._lock:
+            for value in values:
+                if value is None or value in found or value in missing:
+                    continue
+                key = self._keys.get(value)
+                if key is None:
+                    missing.add(value)
+                else:
+                    found[value] = key
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(missing)
+        return found, sorted(missing)
+
+    def values_of(self, keys: Iterable[Optional[int]]) -> Tuple[Dict[int, str], List[int]]:
+        """Cached values of keys, and the distinct keys that aren't cached (None is skipped)."""
+        found: Dict[int, str] = {}
+        missing = set()
+        with self._lock:
+            for key in keys:
+                if key is None or key in found or key in missing:
+                    continue
+                value = self._values.get(key)
+                if value is None:
+                    missing.add(key)
+                else:
+                    found[key] = value
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(missing)
+        return found, sorted(missing)
+
+    def add(self, pairs: Iterable[Tuple[int, str]]) -> None:
+        """Cache (key, value) pairs read from the dictionary table."""
+        with self._lock:
+            for key, value in pairs:
+                self._keys[value] = key
+                self._values[key] = value
+            if len(self._keys) > self.max_entries:
+                # Dicts keep insertion order, so this drops the values cached first
+                dropped = list(islice(self._keys.items(), len(self._keys) - self.max_entries * 3 // 4))
+                for value, key in dropped:
+                    del self._keys[value]
+                    self._values.pop(key, None)
+                self._stats['evicted'] += len(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._values.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._keys),
+                'max_entries': self.max_entries,
+                'bytes': sys.getsizeof(self._keys) + sys.getsizeof(self._values) + sum(sys.getsizeof(value) for value in self._keys),
+            }
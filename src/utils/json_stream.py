@@ -0,0 +1,114 @@
+"""
+Incremental JSON array parsing for the Ridges API.
+Streaming ingestion routes read a request body of the form [item, item, ...] chunk by chunk and need each
+item as soon as it is complete, so it can be validated and dropped. Items are parsed with the C JSON
+decoder as whole values; only the text of the item currently being read is kept, however large the array.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, List
+
+WHITESPACE = re.compile(r'[ \t\r\n]*')
+NUMBER_CONTINUATION = '0123456789.eE+-'
+
+
+class JSONArrayItems:
+    """Parses a top-level JSON array, fed in arbitrary byte chunks, into its items.
+    Raises ValueError if the input is not a JSON array, an item is not valid JSON, or an item
+    exceeds max_item_bytes."""
+
+    def __init__(self, max_item_bytes: int = 16 * 1024 * 1024):
+        self.max_item_bytes = max_item_bytes
+        self.items = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._text = ''
+        self._pos = 0
+        self._pending: List[str] = []
+        self._pending_length = 0
+        self._state = 'start'
+        # An incomplete item is parsed again only once its text has doubled, keeping large items linear
+        self._retry_length = 0
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add the next chunk of the body and return the items it completed."""
+        self._append(chunk, final=False)
+        if len(self._text) - self._pos + self._pending_length < self._retry_length:
+            return []
+        self._join()
+        return self._parse(final=False)
+
+    def close(self) -> List[Any]:
+        """Finish the body, returning any items still pending, and check that the array was closed."""
+        self._append(b'', final=True)
+        self._join()
+        items = self._parse(final=True)
+        if self._state != 'done':
+            raise ValueError("Request body ended before the JSON array was closed")
+        return items
+
+    def _append(self, chunk: bytes, final: bool) -> None:
+        try:
+            text = self._decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            raise ValueError("Request body is not valid UTF-8")
+        self._pending.append(text)
+        self._pending_length += len(text)
+
+    def _join(self) -> None:
+        self._text = self._text[self._pos:] + ''.join(self._pending)
+        self._pos = 0
+        self._pending = []
+        self._pending_length = 0
+
+    def _parse(self, final: bool) -> List[Any]:
+        text, pos, items = self._text, self._pos, []
+        while True:
+            pos = WHITESPACE.match(text, pos).end()
+            if pos == len(text):
+                break
+            char = text[pos]
+
+            if self._state == 'start':
+                if char != '[':
+                    raise ValueError("Request body must be a JSON array")
+                pos += 1
+                self._state = 'first'
+            elif self._state == 'separator':
+                if char == ',':
+                    self._state = 'item'
+                elif char == ']':
+                    self._state = 'done'
+                else:
+                    raise ValueError(f"Expected ',' or ']' after item {self.items + len(items) - 1}")
+                pos += 1
+            elif self._state == 'done':
+                raise ValueError("Unexpected data after the JSON array")
+            elif self._state == 'first' and char == ']':
+                pos += 1
+                self._state = 'done'
+            else:
+                remaining = len(text) - pos
+                try:
+                    item, end = self._json.raw_decode(text, pos)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise ValueError(f"Item {self.items + len(items)} is not valid JSON: {e.msg}")
+                    if remaining > self.max_item_bytes:
+                        raise ValueError(f"Item {self.items + len(items)} is not valid JSON or exceeds {self.max_item_bytes} bytes")
+                    self._retry_length = 2 * remaining
+                    break
+                # A number at the end of the data so far (or cut at a '.', 'e' or sign) may continue in the next chunk
+                if not final and isinstance(item, (int, float)) and (end == len(text) or text[end] in NUMBER_CONTINUATION):
+                    self._retry_length = remaining + 1
+                    break
+                items.append(item)
+                pos = end
+                self._retry_length = 0
+                self._state = 'separator'
+
+        self._pos = pos
+        self.items += len(items)
+        return items
@@ -1,22 +1,40 @@
 import logging
 import os
-from dotenv import load_dotenv  
+import threading
 from datetime import datetime
-from posthog import Posthog
-
-load_dotenv()
-
-posthog = Posthog(os.getenv('POSTHOG_API_KEY'), host=os.getenv('POSTHOG_HOST'))
+from src.utils.config import load_env
+from src.utils.tracing import current_trace_id
+
+_posthog = None
+_posthog_lock = threading.Lock()
+
+def get_posthog():
+    """Create the Posthog client on first use rather than at import time."""
+    global _posthog
+    if _posthog is None:
+        with _posthog_lock:
+            if _posthog is None:
+                from posthog import Posthog
+                load_env()
+                _posthog = Posthog(os.getenv('POSTHOG_API_KEY'), host=os.getenv('POSTHOG_HOST'))
+    return _posthog
 
 class PosthogHandler(logging.Handler):
     def emit(self, record):
-        posthog.capture(
+        get_posthog().capture(
             'logging',
             event='log',
-            properties={'message': record.getMessage(), 'level': record.levelname, 'filename': record.filename, 'lineno': record.lineno, 'datetime': datetime.now()}
+            properties={'message': record.getMessage(), 'level': record.levelname, 'filename': record.filename, 'lineno': record.lineno, 'datetime': datetime.now(), 'trace_id': getattr(record, 'trace_id', None)}
         )
 
+class TraceIdFilter(logging.Filter):
+    """Adds the trace ID of the request being served (or '-') to each record as trace_id."""
+    def filter(self, record):
+        record.trace_id = current_trace_id() or '-'
+        return True
+
 posthog_handler = PosthogHandler()
+posthog_handler.addFilter(TraceIdFilter())
 
 def get_logger(name: str):
     # Configure the logger
@@ -26,9 +44,10 @@ def get_logger(name: str):
     # Create a console handler and set its level
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
+    console_handler.addFilter(TraceIdFilter())
 
     # Create a formatter and add it to the handler
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(trace_id)s - %(message)s')
     console_handler.setFormatter(formatter)
 
     # Add the handlers to the logger
@@ -0,0 +1,145 @@
+"""
+MinHash signatures and LSH banding for near-duplicate response patches.
+Used to spot miners submitting copies (or lightly edited copies) of each other's patches without
+comparing every pair: patches whose signatures agree on every row of any band land in the same
+bucket, and only those candidates are compared.
+
+Signatures are persisted (patch_minhashes table), so num_perm, bands, shingle_size and seed must
+not change without recomputing them.
+"""
+
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Only the first this many characters of the added lines are shingled
+MAX_SHINGLE_CHARS = 200_000
+
+
+def added_text(patch: str) -> str:
+    """The lines a diff adds, without the leading '+'. Context and removed lines come from the
+    challenge's repository and are shared by every solution, so they would inflate similarity.
+    Text that isn't a diff is used as-is."""
+    lines = [line[1:] for line in patch.splitlines() if line.startswith('+') and not line.startswith('+++')]
+    return '\n'.join(lines) if lines else patch
+
+
+class PatchMinHasher:
+    """MinHash over token shingles with banded LSH keys.
+
+    With 128 permutations in 16 bands of 8 rows, two patches become candidates with probability
+    1 - (1 - J^8)^16 for Jaccard similarity J: about 0.98 at J=0.8 and 0.05 at J=0.4.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: h(x) = (a * x + b) >> 32 over 64-bit words, with odd a
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._band_seeds = np.arange(1, bands + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+    def shingles(self, patch: str) -> np.ndarray:
+        """Distinct 32-bit hashes of the token shingles of the patch's added lines."""
+        tokens = TOKEN_PATTERN.findall(added_text(patch)[:MAX_SHINGLE_CHARS])
+        if not tokens:
+            return np.zeros(1, dtype=np.uint64)
+        token_hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens))
+        width = min(self.shingle_size, len(tokens))
+        count = len(tokens) - width + 1
+        combined = np.zeros(count, dtype=np.uint64)
+        for offset in range(width):
+            combined = combined * np.uint64(1099511628211) + token_hashes[offset:offset + count]
+        return np.unique(combined >> np.uint64(32))
+
+    def signature(self, patch: str) -> np.ndarray:
+        """MinHash signature of a patch as num_perm uint32 values."""
+        shingles = self.shingles(patch)
+        with np.errstate(over='ignore'):
+            hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """One signed 64-bit bucket key per band (distinct per band, so keys from different bands never collide)."""
+        rows = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        keys = self._band_seeds.copy()
+        with np.errstate(over='ignore'):
+            for column in range(self.rows):
+                keys = (keys ^ rows[:, column]) * np.uint64(0x100000001B3)
+        return keys.view(np.int64).tolist()
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.count_nonzero(first == second)) / len(first)
+
+    def to_bytes(self, signature: np.ndarray) -> bytes:
+        return signature.astype('<u4').tobytes()
+
+    def from_bytes(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype='<u4')
+
+    def clusters(self, items: Iterable[Dict], threshold: float = 0.8, anchor: Optional[str] = None) -> List[List[Dict]]:
+        """Group items (dicts with 'signature', 'bands' and 'completed_at') into near-duplicate clusters.
+        Pairs that share an LSH bucket and have estimated similarity >= threshold are linked, and
+        clusters are the connected components with more than one member. Members are ordered by
+        completed_at and get a 'similarity' to the earliest member, the likely original.
+        With anchor, only clusters pairing that miner_hotkey with at least one other miner are returned.
+        """
+        items = list(items)
+        parent = list(range(len(items)))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        buckets: Dict[int, List[int]] = {}
+        for index, item in enumerate(items):
+            for key in item['bands']:
+                buckets.setdefault(key, []).append(index)
+
+        compared = set()
+        for members in buckets.values():
+            for position, first in enumerate(members):
+                for second in members[position + 1:]:
+                    if (first, second) in compared or find(first) == find(second):
+                        continue
+                    compared.add((first, second))
+                    if self.similarity(items[first]['signature'], items[second]['signature']) >= threshold:
+                        parent[find(second)] = find(first)
+
+        groups: Dict[int, List[Dict]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(find(index), []).append(item)
+
+        clusters = []
+        for members in groups.values():
+            miners = {member.get('miner_hotkey') for member in members}
+            if len(members) < 2 or (anchor and (anchor not in miners or len(miners) < 2)):
+                continue
+            members.sort(key=lambda member: (member['completed_at'] is None, member['completed_at'] or ''))
+            original = members[0]['signature']
+            clusters.append([
+                {
+                    **{key: value for key, value in member.items() if key not in ('signature', 'bands')},
+                    'similarity': self.similarity(original, member['signature'])
+                }
+                for member in members
+            ])
+        clusters.sort(key=len, reverse=True)
+        return clusters
+
+
+# Global patch MinHasher instance
+patch_minhasher = PatchMinHasher()
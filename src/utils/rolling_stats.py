@@ -0,0 +1,261 @@
+"""
+Rolling-window miner statistics for the Ridges API.
+Keeps per-miner hourly buckets of evaluated response scores in memory so that
+arbitrary look-back windows can be answered by summing buckets instead of
+re-running the miner responses CTE against the database. Windows end now, like
+the CTE's `completed_at >= NOW() - INTERVAL`, not on an hour boundary: the
+oldest, partially covered bucket is trimmed by each response's completion time.
+"""
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SECONDS_PER_HOUR = 3600
+
+
+def _seconds_of(timestamp: datetime) -> float:
+    """Return seconds since the epoch for a timestamp.
+    Naive timestamps are treated as UTC, matching the TIMESTAMP columns in Postgres.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def _hour_of(timestamp: datetime) -> int:
+    """Return the hour bucket (hours since the epoch) for a timestamp."""
+    return int(_seconds_of(timestamp)) // SECONDS_PER_HOUR
+
+
+class HourBucket:
+    """Score aggregates for one miner over one hour."""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'scores', 'completed')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # challenge_id -> score, kept so re-evaluations can replace earlier scores
+        self.scores: Dict[str, float] = {}
+        # challenge_id -> completed_at in epoch seconds, used to trim a partially covered bucket
+        self.completed: Dict[str, float] = {}
+
+    def add(self, challenge_id: str, score: float, completed: float) -> None:
+        self.scores[challenge_id] = score
+        self.completed[challenge_id] = completed
+        self.count += 1
+        self.total += score
+        self.min = score if self.min is None else min(self.min, score)
+        self.max = score if self.max is None else max(self.max, score)
+
+    def remove(self, challenge_id: str) -> None:
+        score = self.scores.pop(challenge_id)
+        del self.completed[challenge_id]
+        self.count -= 1
+        self.total -= score
+        if self.count == 0:
+            self.total = 0.0
+            self.min = None
+            self.max = None
+        elif score == self.min or score == self.max:
+            self.min = min(self.scores.values())
+            self.max = max(self.scores.values())
+
+
+class MinerWindowStats:
+    """Aggregated statistics for one miner over a look-back window."""
+
+    __slots__ = ('miner_hotkey', 'response_count', 'score_sum', 'min_score', 'max_score')
+
+    def __init__(self, miner_hotkey: str):
+        self.miner_hotkey = miner_hotkey
+        self.response_count = 0
+        self.score_sum = 0.0
+        self.min_score = None
+        self.max_score = None
+
+    @property
+    def average_score(self) -> Optional[float]:
+        if self.response_count == 0:
+            return None
+        return self.score_sum / self.response_count
+
+    def add(self, count: int, total: float, low: float, high: float) -> None:
+        self.response_count += count
+        self.score_sum += total
+        self.min_score = low if self.min_score is None else min(self.min_score, low)
+        self.max_score = high if self.max_score is None else max(self.max_score, high)
+
+    def to_dict(self) -> Dict:
+        return {
+            'miner_hotkey': self.miner_hotkey,
+            'response_count': self.response_count,
+            'average_score': self.average_score,
+            'min_score': self.min_score,
+            'max_score': self.max_score,
+        }
+
+
+class RollingMinerStats:
+    """Thread-safe per-miner hourly score buckets covering a fixed retention window."""
+
+    def __init__(self, retention_hours: int = 24 * 7):
+        """
+        Initialize the rolling stats engine.
+
+        Args:
+            retention_hours: Number of hourly buckets kept per miner (default: 168, one week)
+        """
+        self.retention_hours = retention_hours
+        self._lock = threading.RLock()
+        # miner_hotkey -> hour -> HourBucket
+        self._buckets: Dict[str, Dict[int, HourBucket]] = {}
+        # (challenge_id, miner_hotkey) -> hour the response was recorded under
+        self._index: Dict[Tuple[str, str], int] = {}
+        # Only windows starting at or after this time (epoch seconds) are fully covered
+        self._covered_from: Optional[float] = None
+        self._last_pruned_hour: Optional[int] = None
+        self._stats = {
+            'recorded': 0,
+            'replaced': 0,
+            'queries': 0,
+        }
+
+    def _current_hour(self) -> int:
+        return _hour_of(datetime.now(timezone.utc))
+
+    def _oldest_hour(self) -> int:
+        # The bucket holding the start of a full retention window, which is usually only partly inside it
+        return self._current_hour() - self.retention_hours
+
+    def mark_loaded(self, since: datetime) -> None:
+        """Mark the engine as holding every evaluated response completed since `since`."""
+        with self._lock:
+            self._covered_from = _seconds_of(since)
+            logger.info(f"Rolling miner stats covering responses since {since.isoformat()}")
+
+    def covers(self, hours: int) -> bool:
+        """Whether a window of `hours` can be answered from memory."""
+        if hours is None or hours < 1 or hours > self.retention_hours:
+            return False
+        with self._lock:
+            if self._covered_from is None:
+                return False
+            return datetime.now(timezone.utc).timestamp() - hours * SECONDS_PER_HOUR >= self._covered_from
+
+    def record(self, challenge_id: str, miner_hotkey: str, completed_at: Optional[datetime], score: Optional[float]) -> None:
+        """Record an evaluated response. Re-recording the same response replaces its previous score."""
+        with self._lock:
+            key = (challenge_id, miner_hotkey)
+            previous_hour = self._index.pop(key, None)
+            if previous_hour is not None:
+                bucket = self._buckets[miner_hotkey][previous_hour]
+                bucket.remove(challenge_id)
+                if bucket.count == 0:
+                    del self._buckets[miner_hotkey][previous_hour]
+                self._stats['replaced'] += 1
+
+            if completed_at is None or score is None:
+                return
+
+            completed = _seconds_of(completed_at)
+            hour = int(completed) // SECONDS_PER_HOUR
+            if hour < self._oldest_hour():
+                return
+
+            miner_buckets = self._buckets.setdefault(miner_hotkey, {})
+            bucket = miner_buckets.get(hour)
+            if bucket is None:
+                bucket = miner_buckets[hour] = HourBucket()
+            bucket.add(challenge_id, score, completed)
+            self._index[key] = hour
+            self._stats['recorded'] += 1
+
+    def prune(self) -> int:
+        """Drop buckets that have fallen out of the retention window. Returns number of buckets removed."""
+        with self._lock:
+            self._last_pruned_hour = self._current_hour()
+            oldest_hour = self._oldest_hour()
+            removed = 0
+            for miner_hotkey in list(self._buckets):
+                miner_buckets = self._buckets[miner_hotkey]
+                for hour in [hour for hour in miner_buckets if hour < oldest_hour]:
+                    for challenge_id in miner_buckets[hour].scores:
+                        self._index.pop((challenge_id, miner_hotkey), None)
+                    del miner_buckets[hour]
+                    removed += 1
+                if not miner_buckets:
+                    del self._buckets[miner_hotkey]
+            return removed
+
+    def window(self, hours: int) -> Dict[str, MinerWindowStats]:
+        """Aggregate each miner's responses completed in the last `hours` hours, up to now.
+        Buckets after the one the window starts in are summed whole; the starting bucket only
+        contributes responses completed at or after the start, as in the SQL time filter."""
+        with self._lock:
+            self._stats['queries'] += 1
+            if self._last_pruned_hour != self._current_hour():
+                self.prune()
+            start = datetime.now(timezone.utc).timestamp() - hours * SECONDS_PER_HOUR
+            start_hour = int(start) // SECONDS_PER_HOUR
+            results = {}
+            for miner_hotkey, miner_buckets in self._buckets.items():
+                stats = None
+                for hour, bucket in miner_buckets.items():
+                    if hour < start_hour:
+                        continue
+                    if hour == start_hour:
+                        scores = [score for challenge_id, score in bucket.scores.items() if bucket.completed[challenge_id] >= start]
+                        if not scores:
+                            continue
+                        count, total, low, high = len(scores), sum(scores), min(scores), max(scores)
+                    else:
+                        count, total, low, high = bucket.count, bucket.total, bucket.min, bucket.max
+                    if stats is None:
+                        stats = MinerWindowStats(miner_hotkey)
+                    stats.add(count, total, low, high)
+                if stats is not None:
+                    results[miner_hotkey] = stats
+            return results
+
+    def query(self, hours: int, min_score: float = 0, min_response_count: int = 0, sort_by_score: bool = False, max_miners: int = 5) -> List[MinerWindowStats]:
+        """Select miners the same way the miner responses CTE does: filter on count and
+        average score, order by average score or hotkey, then limit."""
+        stats = [
+            miner for miner in self.window(hours).values()
+            if miner.response_count >= min_response_count and miner.average_score >= min_score
+        ]
+        # str comparison is by code point, like the query's ORDER BY hotkey COLLATE "C"
+        if sort_by_score:
+            stats.sort(key=lambda miner: (-miner.average_score, miner.miner_hotkey))
+        else:
+            stats.sort(key=lambda miner: miner.miner_hotkey)
+        return stats[:max_miners]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._index.clear()
+            self._covered_from = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'miners': len(self._buckets),
+                'responses': len(self._index),
+                'buckets': sum(len(miner_buckets) for miner_buckets in self._buckets.values()),
+                'retention_hours': self.retention_hours,
+                'loaded': self._covered_from is not None,
+            }
+
+
+# Global rolling stats instance
+rolling_miner_stats = RollingMinerStats(retention_hours=24 * 7)
@@ -0,0 +1,212 @@
+"""
+Background job scheduler for the Ridges API.
+Periodic work, such as keeping the default dashboard responses precomputed, purging expired cache
+entries or vacuuming tables, runs as registered jobs rather than on the request that happens to miss.
+Each job runs every `interval` seconds, stretched or shortened at random by up to `jitter` so workers
+started together don't fire together, on the scheduler's own threads (outside any bulkhead, so its
+connections come from the admin pool). Jobs that work on this process's memory run in every worker;
+exclusive jobs, which work on the shared database, run in one worker at a time and once per interval
+across all of them, by way of a Postgres advisory lock (see DatabaseManager.run_scheduled_job).
+"""
+
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ScheduledJob:
+    """A registered job, with its timing statistics in this process."""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float, exclusive: bool, initial_delay: Optional[float]):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.exclusive = exclusive
+        self.initial_delay = initial_delay
+        self.running = False
+        self.next_run_at: Optional[float] = None
+        self.last_started_at: Optional[float] = None
+        self.last_status: Optional[str] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+        self.stats = {
+            'runs': 0,
+            'failures': 0,
+            'skipped_locked': 0,
+            'skipped_recent': 0,
+            'errors': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        runs = self.stats['runs']
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'exclusive': self.exclusive,
+            'running': self.running,
+            'next_run_at': self.next_run_at,
+            'last_started_at': self.last_started_at,
+            'last_status': self.last_status,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'last_duration_ms': self.last_duration_ms,
+            **{key: value for key, value in self.stats.items() if key != 'total_ms'},
+            'mean_ms': self.stats['total_ms'] / runs if runs else 0.0,
+        }
+
+
+class JobScheduler:
+    """Runs registered jobs periodically from the FastAPI lifespan."""
+
+    def __init__(self, max_workers: int = 2, jitter: float = 0.1, enabled: bool = True):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_workers: Jobs that may run at once in this process (default: 2)
+            jitter: Largest random change to each wait, as a fraction of the job's interval (default: 0.1)
+            enabled: Whether start() runs any jobs (default: True)
+        """
+        self.max_workers = max_workers
+        self.jitter = jitter
+        self.enabled = enabled
+        self.disabled_jobs: set = set()
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._run_exclusive: Optional[Callable[..., str]] = None
+        self._lock = threading.Lock()
+
+    def configure(self) -> None:
+        """Apply SCHEDULER_ENABLED / SCHEDULER_DISABLED_JOBS / SCHEDULER_JITTER overrides from the environment."""
+        self.enabled = os.getenv('SCHEDULER_ENABLED', str(self.enabled)).lower() in ('1', 'true', 'yes')
+        self.disabled_jobs = {name.strip() for name in os.getenv('SCHEDULER_DISABLED_JOBS', '').split(',') if name.strip()}
+        self.jitter = float(os.getenv('SCHEDULER_JITTER', self.jitter))
+
+    def register(self, name: str, func: Callable[[], Any], interval: float, exclusive: bool = False, initial_delay: Optional[float] = None) -> None:
+        """
+        Register a job. Call before start().
+
+        Args:
+            name: Unique job name; also its advisory lock and scheduled_jobs row if exclusive
+            func: Called with no arguments on a scheduler thread; its return value is shown as last_result
+            interval: Seconds between runs
+            exclusive: Run in one worker at a time and at most once per interval across workers
+            initial_delay: Seconds before the first run (default: interval)
+        """
+        with self._lock:
+            self._jobs[name] = ScheduledJob(name, func, interval, exclusive, initial_delay)
+
+    def start(self, run_exclusive: Callable[..., str]) -> None:
+        """Schedule every enabled job on the running event loop. run_exclusive(name, min_interval, job, worker)
+        runs an exclusive job under its lock and returns its status (DatabaseManager.run_scheduled_job)."""
+        if not self.enabled:
+            logger.info("Job scheduler disabled")
+            return
+        self._run_exclusive = run_exclusive
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scheduler")
+        for job in self._jobs.values():
+            if job.name not in self.disabled_jobs:
+                self._tasks.append(asyncio.create_task(self._run_periodically(job)))
+        logger.info(f"Job scheduler started with {len(self._tasks)} jobs")
+
+    def _jittered(self, seconds: float) -> float:
+        return max(seconds * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+    async def _run_periodically(self, job: ScheduledJob) -> None:
+        loop = asyncio.get_running_loop()
+        delay = job.interval if job.initial_delay is None else job.initial_delay
+        while True:
+            delay = self._jittered(delay)
+            job.next_run_at = time.time() + delay
+            await asyncio.sleep(delay)
+            job.next_run_at = None
+            try:
+                await loop.run_in_executor(self._executor, self._execute, job)
+            except RuntimeError:
+                # The executor was shut down
+                return
+            delay = job.interval
+
+    def _execute(self, job: ScheduledJob) -> None:
+        job.running = True
+        start = time.perf_counter()
+        started_at = time.time()
+        result = None
+        error = None
+        try:
+            if job.exclusive:
+                def run():
+                    nonlocal result
+                    result = job.func()
+                # Another worker that ran the job a little earlier in this period counts as this period's run
+                status = self._run_exclusive(job.name, job.interval * (1 - self.jitter), run, self.worker)
+            else:
+                try:
+                    result = job.func()
+                    status = 'succeeded'
+                except Exception as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+                    logger.warning(f"Scheduled job {job.name} failed: {error}")
+                    status = 'failed'
+        finally:
+            job.running = False
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            job.last_status = status
+            if status in ('succeeded', 'failed'):
+                job.last_started_at = started_at
+                job.last_duration_ms = duration_ms
+                job.last_result = result
+                job.last_error = error
+                job.stats['runs'] += 1
+                job.stats['total_ms'] += duration_ms
+                job.stats['max_ms'] = max(job.stats['max_ms'], duration_ms)
+                if status == 'failed':
+                    job.stats['failures'] += 1
+            elif status == 'locked':
+                job.stats['skipped_locked'] += 1
+            elif status == 'recent':
+                job.stats['skipped_recent'] += 1
+            else:
+                job.stats['errors'] += 1
+        logger.debug(f"Scheduled job {job.name}: {status} in {duration_ms:.1f}ms")
+
+    def shutdown(self) -> None:
+        """Stop scheduling jobs and drop queued runs; a job already running finishes on its thread."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'worker': self.worker,
+                'jitter': self.jitter,
+                'jobs': [
+                    {**job.to_dict(), 'enabled': self.enabled and job.name not in self.disabled_jobs}
+                    for job in self._jobs.values()
+                ],
+            }
+
+
+# Global job scheduler instance
+job_scheduler = JobScheduler(max_workers=2, jitter=0.1)
@@ -0,0 +1,284 @@
+"""
+Cross-validator score agreement for the Ridges API.
+Keeps, per score type, a validator x miner matrix of each validator's latest score for each miner,
+fed by store_scores and bootstrapped from the scores table at startup. Agreement analytics (per-miner
+dispersion, per-validator bias against consensus, outlier validators) are computed over the matrix
+with vectorized NumPy operations, so validators can be audited without ad-hoc SQL over every score row.
+"""
+
+import threading
+import time
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.hot_set import Interner
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Iglewicz and Hoaglin's modified z-score: 0.6745 * (x - median) / MAD, with 3.5 as the usual outlier cut-off
+MAD_SCALE = 0.6745
+DEFAULT_OUTLIER_THRESHOLD = 3.5
+
+# (type, validator_hotkey, miner_hotkey, score, created_at as epoch seconds)
+ScoreRow = Tuple[str, str, str, float, float]
+
+
+class ScoreTypeMatrix:
+    """Latest score per (validator, miner) for one score type, as dense arrays that grow by doubling."""
+
+    def __init__(self, initial_validators: int = 64, initial_miners: int = 256):
+        self.validators = Interner()
+        self.miners = Interner()
+        self.scores = np.full((initial_validators, initial_miners), np.nan)
+        self.times = np.zeros((initial_validators, initial_miners))
+
+    def record(self, validator_hotkey: str, miner_hotkey: str, score: float, created_at: float) -> None:
+        validator = self.validators.intern(validator_hotkey)
+        miner = self.miners.intern(miner_hotkey)
+        if validator >= self.scores.shape[0] or miner >= self.scores.shape[1]:
+            self._grow(validator + 1, miner + 1)
+        # Scores can arrive out of order during bootstrap; keep the newest
+        if created_at >= self.times[validator, miner]:
+            self.scores[validator, miner] = score
+            self.times[validator, miner] = created_at
+
+    def _grow(self, validators: int, miners: int) -> None:
+        rows, columns = self.scores.shape
+        while rows < validators:
+            rows *= 2
+        while columns < miners:
+            columns *= 2
+        scores = np.full((rows, columns), np.nan)
+        times = np.zeros((rows, columns))
+        used_rows, used_columns = self.scores.shape
+        scores[:used_rows, :used_columns] = self.scores
+        times[:used_rows, :used_columns] = self.times
+        self.scores, self.times = scores, times
+
+    def window(self, since: float) -> Tuple[np.ndarray, List[str], List[str]]:
+        """Copy of the scores given since `since` (older cells are NaN), with validator and miner hotkeys."""
+        validators, miners = len(self.validators.values), len(self.miners.values)
+        scores = self.scores[:validators, :miners].copy()
+        scores[self.times[:validators, :miners] < since] = np.nan
+        return scores, list(self.validators.values), list(self.miners.values)
+
+    def prune(self, before: float) -> None:
+        """Forget scores older than `before`, dropping validators and miners left without any."""
+        validators, miners = len(self.validators.values), len(self.miners.values)
+        stale = self.times[:validators, :miners] < before
+        self.scores[:validators, :miners][stale] = np.nan
+        live = ~np.isnan(self.scores[:validators, :miners])
+        keep_validators = np.flatnonzero(live.any(axis=1))
+        keep_miners = np.flatnonzero(live.any(axis=0))
+        if len(keep_validators) == validators and len(keep_miners) == miners:
+            return
+        scores = self.scores[np.ix_(keep_validators, keep_miners)]
+        times = self.times[np.ix_(keep_validators, keep_miners)]
+        self.validators = Interner(self.validators.values[index] for index in keep_validators.tolist())
+        self.miners = Interner(self.miners.values[index] for index in keep_miners.tolist())
+        self.scores = np.full((max(len(keep_validators), 1), max(len(keep_miners), 1)), np.nan)
+        self.times = np.zeros_like(self.scores)
+        self.scores[:len(keep_validators), :len(keep_miners)] = scores
+        self.times[:len(keep_validators), :len(keep_miners)] = times
+
+
+def _robust_z(values: np.ndarray) -> np.ndarray:
+    """Modified z-scores; all zero when the values have no spread."""
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return np.zeros_like(values)
+    return MAD_SCALE * (values - median) / mad
+
+
+def analyze(scores: np.ndarray, validators: List[str], miners: List[str], min_validators: int = 2, outlier_threshold: float = DEFAULT_OUTLIER_THRESHOLD) -> Dict:
+    """Agreement statistics for a validator x miner score matrix (NaN where a validator has no score).
+
+    Consensus for a miner is the median of its validators' scores; only miners scored by at least
+    min_validators validators count. For each validator: bias is its mean signed deviation from
+    consensus, deviation its mean absolute deviation, correlation the Pearson correlation of its scores
+    with consensus. Validators whose deviation has a modified z-score above outlier_threshold are outliers.
+    """
+    scored = ~np.isnan(scores)
+    counts = scored.sum(axis=0)
+    keep = counts >= min_validators
+    scores, scored, counts = scores[:, keep], scored[:, keep], counts[keep]
+    miners = [miner for miner, kept in zip(miners, keep.tolist()) if kept]
+    active = scored.any(axis=1)
+    scores, scored = scores[active], scored[active]
+    validators = [validator for validator, kept in zip(validators, active.tolist()) if kept]
+    if not miners or not validators:
+        return {'validator_count': 0, 'miner_count': 0, 'validators': [], 'miners': [], 'outliers': []}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        consensus = np.nanmedian(scores, axis=0)
+        mean = np.nanmean(scores, axis=0)
+        std = np.nanstd(scores, axis=0)
+        low = np.nanmin(scores, axis=0)
+        high = np.nanmax(scores, axis=0)
+
+        deviations = np.where(scored, scores - consensus, 0.0)
+        miners_scored = scored.sum(axis=1)
+        bias = deviations.sum(axis=1) / miners_scored
+        deviation = np.abs(deviations).sum(axis=1) / miners_scored
+
+        # Pearson correlation with consensus over each validator's own miners, with masked sums
+        consensus_matrix = np.where(scored, consensus, 0.0)
+        values = np.where(scored, scores, 0.0)
+        value_mean = values.sum(axis=1) / miners_scored
+        consensus_mean = consensus_matrix.sum(axis=1) / miners_scored
+        value_centered = np.where(scored, values - value_mean[:, None], 0.0)
+        consensus_centered = np.where(scored, consensus_matrix - consensus_mean[:, None], 0.0)
+        denominator = np.sqrt((value_centered ** 2).sum(axis=1) * (consensus_centered ** 2).sum(axis=1))
+        correlation = np.where(denominator > 0, (value_centered * consensus_centered).sum(axis=1) / np.where(denominator > 0, denominator, 1), np.nan)
+
+    z_scores = _robust_z(deviation)
+    outliers = z_scores > outlier_threshold
+
+    validator_stats = [
+        {
+            'validator_hotkey': validator,
+            'miners_scored': count,
+            'bias': bias_value,
+            'mean_abs_deviation': deviation_value,
+            'correlation': None if correlation_value != correlation_value else correlation_value,
+            'deviation_z_score': z_value,
+            'outlier': outlier,
+        }
+        for validator, count, bias_value, deviation_value, correlation_value, z_value, outlier in zip(
+            validators, miners_scored.tolist(), bias.tolist(), deviation.tolist(), correlation.tolist(), z_scores.tolist(), outliers.tolist()
+        )
+    ]
+    validator_stats.sort(key=lambda validator: -validator['deviation_z_score'])
+
+    order = np.argsort(-std, kind='stable')
+    miner_stats = [
+        {
+            'miner_hotkey': miners[index],
+            'validators': counts[index].item(),
+            'consensus': consensus[index].item(),
+            'mean': mean[index].item(),
+            'std': std[index].item(),
+            'min': low[index].item(),
+            'max': high[index].item(),
+        }
+        for index in order.tolist()
+    ]
+
+    return {
+        'validator_count': len(validators),
+        'miner_count': len(miners),
+        'validators': validator_stats,
+        'miners': miner_stats,
+        'outliers': [validator['validator_hotkey'] for validator in validator_stats if validator['outlier']],
+    }
+
+
+class ScoreAgreement:
+    """Thread-safe score matrices per score type, with analysis results cached until new scores arrive."""
+
+    def __init__(self, retention_hours: int = 24 * 7, result_ttl: float = 60.0):
+        """
+        Initialize the score agreement engine.
+
+        Args:
+            retention_hours: Look-back kept in memory, and the longest window that can be analyzed (default: 168)
+            result_ttl: Seconds an analysis is reused while no new scores arrive; windows move with time (default: 60)
+        """
+        self.retention_hours = retention_hours
+        self.result_ttl = result_ttl
+        self._lock = threading.RLock()
+        self._matrices: Dict[str, ScoreTypeMatrix] = {}
+        self._version = 0
+        self._results: Dict[Tuple, Tuple[int, float, Dict]] = {}
+        self._loaded = False
+        self._last_pruned = 0.0
+        self._stats = {
+            'recorded': 0,
+            'analyses': 0,
+            'cached_analyses': 0,
+        }
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, rows: Iterable[ScoreRow]) -> int:
+        """Replace the matrices with scores loaded from the database."""
+        with self._lock:
+            self._matrices.clear()
+            count = self.record_many(rows)
+            self._loaded = True
+            logger.info(f"Score agreement loaded {count} latest validator scores")
+            return count
+
+    def record_many(self, rows: Iterable[ScoreRow]) -> int:
+        """Record scores as (type, validator_hotkey, miner_hotkey, score, created_at) rows."""
+        count = 0
+        with self._lock:
+            for score_type, validator_hotkey, miner_hotkey, score, created_at in rows:
+                matrix = self._matrices.get(score_type)
+                if matrix is None:
+                    matrix = self._matrices[score_type] = ScoreTypeMatrix()
+                matrix.record(validator_hotkey, miner_hotkey, score, created_at)
+                count += 1
+            if count:
+                self._version += 1
+                self._results.clear()
+            self._stats['recorded'] += count
+        return count
+
+    def score_types(self) -> List[str]:
+        with self._lock:
+            return sorted(self._matrices)
+
+    def analyze(self, score_type: str, hours: int, min_validators: int = 2, outlier_threshold: float = DEFAULT_OUTLIER_THRESHOLD) -> Optional[Dict]:
+        """Agreement statistics for one score type over the last `hours` hours (see analyze()),
+        or None if no scores of that type are held."""
+        key = (score_type, hours, min_validators, outlier_threshold)
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] == self._version and now - cached[1] < self.result_ttl:
+                self._stats['cached_analyses'] += 1
+                return cached[2]
+            if now - self._last_pruned > 3600:
+                self._last_pruned = now
+                for matrix in self._matrices.values():
+                    matrix.prune(now - self.retention_hours * 3600)
+            matrix = self._matrices.get(score_type)
+            if matrix is None:
+                return None
+            version = self._version
+            scores, validators, miners = matrix.window(now - hours * 3600)
+
+        result = analyze(scores, validators, miners, min_validators, outlier_threshold)
+        with self._lock:
+            self._stats['analyses'] += 1
+            if version == self._version:
+                self._results[key] = (version, now, result)
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'score_types': {
+                    score_type: {
+                        'validators': len(matrix.validators.values),
+                        'miners': len(matrix.miners.values),
+                        'matrix_bytes': matrix.scores.nbytes + matrix.times.nbytes,
+                    }
+                    for score_type, matrix in self._matrices.items()
+                },
+                'retention_hours': self.retention_hours,
+                'loaded': self._loaded,
+            }
+
+
+# Global score agreement instance
+score_agreement = ScoreAgreement(retention_hours=24 * 7)
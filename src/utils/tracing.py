@@ -0,0 +1,222 @@
+"""
+Request tracing for the Ridges API.
+Each HTTP request gets a trace: an ID, taken from the request's X-Trace-Id header or generated, that is
+returned in the response's X-Trace-Id header and added to every log line written while serving it, and
+timed spans recorded by the layers the request passes through: bulkhead calls into DatabaseManager
+methods, @cached lookups, pool checkouts, SQL statements (see src/db/query_log.py) and serialization.
+The trace follows the request onto bulkhead threads, since Bulkhead.run copies the context.
+Requests slower than a threshold are kept with their spans in a ring buffer, served by /retrieval/traces/slow.
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+TRACE_HEADER = b"x-trace-id"
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+# Long-lived streams would fill the slow request log
+UNTRACED_PATHS = ("/retrieval/events",)
+# Spans kept per trace; a request that runs thousands of statements keeps the first ones and a count
+MAX_SPANS = 200
+
+
+class Trace:
+    """One request's ID and spans. Spans may be added from several threads."""
+
+    def __init__(self, trace_id: str, method: str, path: str, query: str):
+        self.trace_id = trace_id
+        self.method = method
+        self.path = path
+        self.query = query
+        self.route: Optional[str] = None
+        self.status = 0
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration_ms = 0.0
+        self.spans: List[tuple] = []
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float, depth: int, attrs: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS:
+                self.dropped_spans += 1
+                return
+            self.spans.append((name, start, end, depth, attrs))
+
+    def finish(self, status: int, route: Optional[str]) -> None:
+        self.status = status
+        self.route = route
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The trace with spans in start order. Each span's self_ms excludes time in its child spans,
+        which is where the Python work of a layer shows (e.g. building models from rows), and
+        total_ms per span name adds up time by layer."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span[1])
+        spans_out = []
+        totals: Dict[str, float] = {}
+        for index, (name, start, end, depth, attrs) in enumerate(spans):
+            duration = (end - start) * 1000
+            children = sum(
+                (child[2] - child[1]) * 1000
+                for child in spans[index + 1:]
+                if child[3] == depth + 1 and child[1] >= start and child[2] <= end
+            )
+            spans_out.append({
+                'name': name,
+                'start_ms': round((start - self.start) * 1000, 3),
+                'duration_ms': round(duration, 3),
+                'self_ms': round(max(duration - children, 0.0), 3),
+                'depth': depth,
+                **attrs,
+            })
+            totals[name] = totals.get(name, 0.0) + duration
+        return {
+            'trace_id': self.trace_id,
+            'method': self.method,
+            'path': self.path,
+            'route': self.route,
+            'query': self.query,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration_ms, 3),
+            'total_ms_by_span': {name: round(total, 3) for name, total in sorted(totals.items(), key=lambda item: -item[1])},
+            'spans': spans_out,
+            'dropped_spans': self.dropped_spans,
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar('current_trace', default=None)
+_span_depth: ContextVar[int] = ContextVar('span_depth', default=0)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a span of the current request's trace. Yields a dict the block can add
+    attributes to (e.g. whether a cache lookup hit). A no-op outside a traced request."""
+    trace = current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    depth = _span_depth.get()
+    token = _span_depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        end = time.perf_counter()
+        _span_depth.reset(token)
+        trace.add_span(name, start, end, depth, attrs)
+
+
+def record_span(name: str, start: float, end: float, **attrs) -> None:
+    """Add an already timed block (perf_counter start and end) to the current trace, if any."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span(name, start, end, _span_depth.get(), attrs)
+
+
+class SlowRequestLog:
+    """Ring buffer of the most recent requests that took at least threshold_ms, with their traces."""
+
+    def __init__(self, capacity: int = 100, threshold_ms: float = 500.0):
+        """
+        Initialize the slow request log.
+
+        Args:
+            capacity: Slow requests kept; older ones are dropped first (default: 100)
+            threshold_ms: Requests at least this slow are kept (default: 500)
+        """
+        self.capacity = capacity
+        self.threshold_ms = threshold_ms
+        self._requests: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stats = {
+            'traced': 0,
+            'slow': 0,
+        }
+
+    def configure(self) -> None:
+        """Apply SLOW_REQUEST_MS / SLOW_REQUEST_CAPACITY overrides from the environment."""
+        self.threshold_ms = float(os.getenv('SLOW_REQUEST_MS', self.threshold_ms))
+        self.capacity = int(os.getenv('SLOW_REQUEST_CAPACITY', self.capacity))
+        with self._lock:
+            self._requests = deque(self._requests, maxlen=self.capacity)
+
+    def record(self, trace: Trace) -> None:
+        with self._lock:
+            self._stats['traced'] += 1
+            if trace.duration_ms >= self.threshold_ms:
+                self._stats['slow'] += 1
+                self._requests.append(trace)
+
+    def slowest(self, limit: int = 20, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The slowest kept requests (optionally only those whose path starts with `path`), slowest first."""
+        with self._lock:
+            traces = [trace for trace in self._requests if path is None or trace.path.startswith(path)]
+        traces.sort(key=lambda trace: -trace.duration_ms)
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._requests.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                'kept': len(self._requests),
+                'capacity': self.capacity,
+                'threshold_ms': self.threshold_ms,
+            }
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a trace for each HTTP request and files it with the slow request log."""
+
+    def __init__(self, app, log: "SlowRequestLog" = None):
+        self.app = app
+        self.log = log or slow_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested_id = dict(scope["headers"]).get(TRACE_HEADER, b"").decode("latin-1")
+        trace_id = requested_id if TRACE_ID_PATTERN.match(requested_id) else uuid.uuid4().hex[:16]
+        trace = Trace(trace_id, scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        status = {"code": 0}
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(TRACE_HEADER, trace_id.encode())]}
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            current_trace.reset(token)
+            route = scope.get("route")
+            trace.finish(status["code"], getattr(route, "path", None))
+            if scope["path"] not in UNTRACED_PATHS:
+                self.log.record(trace)
+
+
+# Global slow request log instance
+slow_requests = SlowRequestLog(capacity=100, threshold_ms=500.0)
@@ -0,0 +1,163 @@
+"""
+Traffic recorder for the Ridges API.
+Captures the shape and timing of ingestion and retrieval requests (never hotkeys, IDs or patch text)
+into a compact JSON-lines log that benchmarks/replay.py can re-issue against a local instance.
+
+Enable by setting TRAFFIC_RECORD_PATH; recording starts in the FastAPI lifespan.
+"""
+
+import hashlib
+import json
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+RECORDED_PREFIXES = ("/ingestion/", "/retrieval/")
+# Long-lived streams; replaying them would tie up a replay worker for the whole stream
+UNRECORDED_PATHS = ("/retrieval/events",)
+
+
+def anonymize(value: str) -> Any:
+    """Keep numbers and booleans (limits, scores, flags) and replace anything else with a short
+    stable token, so repeated hotkeys or IDs still look repeated without being identifiable."""
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return "~" + hashlib.blake2b(value.encode(), digest_size=4).hexdigest()
+
+
+def body_shape(body: bytes) -> Dict[str, Any]:
+    """Summarize a JSON request body: size in bytes, number of items and mean response_patch length."""
+    shape = {"b": len(body)}
+    if not body:
+        return shape
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return shape
+    if isinstance(data, list):
+        shape["n"] = len(data)
+        patch_sizes = [len(item.get("response_patch") or "") for item in data if isinstance(item, dict) and "response_patch" in item]
+        if patch_sizes:
+            shape["p"] = sum(patch_sizes) // len(patch_sizes)
+    return shape
+
+
+class TrafficRecorder:
+    """Buffers request records and writes them to disk from a background thread."""
+
+    def __init__(self, max_queue: int = 1000):
+        self.path: Optional[str] = None
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._stats = {
+            'recorded': 0,
+            'dropped': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self, path: str) -> None:
+        """Start appending records to `path`."""
+        if self.enabled:
+            return
+        self.path = path
+        self._started_at = time.monotonic()
+        self._writer = threading.Thread(target=self._write_loop, name="traffic-recorder", daemon=True)
+        self._writer.start()
+        logger.info(f"Recording traffic to {path}")
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        self.path = None
+        self._writer = None
+
+    def record(self, record: Dict) -> None:
+        """Queue a record without blocking the request; records are dropped if the writer falls behind."""
+        record["t"] = round(record.pop("start") - self._started_at, 4)
+        try:
+            self._queue.put_nowait(record)
+            self._stats['recorded'] += 1
+        except queue.Full:
+            self._stats['dropped'] += 1
+
+    def _write_loop(self) -> None:
+        with open(self.path, "a", buffering=1) as log:
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    return
+                # Parse bodies here rather than on the request path
+                record.update(body_shape(record.pop("body", b"")))
+                log.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, 'enabled': self.enabled, 'path': self.path}
+
+
+class TrafficRecorderMiddleware:
+    """ASGI middleware that records request shapes and timings when the recorder is enabled."""
+
+    def __init__(self, app, recorder: "TrafficRecorder" = None):
+        self.app = app
+        self.recorder = recorder or traffic_recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.recorder.enabled or not scope["path"].startswith(RECORDED_PREFIXES) or scope["path"] in UNRECORDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        body = bytearray()
+        response = {"status": 0, "bytes": 0}
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            query = scope.get("query_string", b"").decode()
+            self.recorder.record({
+                "start": start,
+                "m": scope["method"],
+                "u": scope["path"],
+                "q": {key: anonymize(value) for key, value in parse_qsl(query)},
+                "body": bytes(body),
+                "s": response["status"],
+                "ms": round((time.monotonic() - start) * 1000, 2),
+                "rb": response["bytes"],
+            })
+
+
+# Global traffic recorder instance
+traffic_recorder = TrafficRecorder()
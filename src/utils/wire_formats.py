@@ -0,0 +1,195 @@
+"""
+Request body encodings for the Ridges API ingestion routes.
+Validators can compress uploads (Content-Encoding: gzip or zstd) and can send them as MessagePack
+(Content-Type: application/msgpack) instead of JSON. IngestionRoute hands endpoints an IngestionRequest,
+which decompresses the body as it is read and decodes MessagePack into the same lists of dicts a JSON
+body parses to, so the endpoints and the models they validate against are unchanged.
+"""
+
+import zlib
+from typing import Any, Callable, Iterator, List, Optional
+
+import msgpack
+import zstandard
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from src.utils.json_stream import JSONArrayItems
+
+CONTENT_ENCODINGS = ("gzip", "x-gzip", "zstd")
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+# Compressed input is expanded a slice at a time, so the size cap is enforced before a small chunk of a
+# compression bomb can expand much past it (at most ~1MB per slice for gzip, ~32MB for zstd)
+DECOMPRESS_SLICE = 1024
+MAX_DECODED_BYTES = 512 * 1024 * 1024
+# Decompressed output is passed on in pieces of at least this size, like the messages of an uncompressed body
+DECODED_CHUNK_BYTES = 64 * 1024
+
+
+class Decompressor:
+    """Incremental gzip or zstd decompression of a request body that may hold several members/frames."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._decompressor = self._new()
+
+    def _new(self):
+        if self.encoding == "zstd":
+            return zstandard.ZstdDecompressor().decompressobj()
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        """Yield the decompressed output of data, a slice of input at a time.
+        Raises ValueError if the data is not valid for the encoding."""
+        try:
+            for start in range(0, len(data), DECOMPRESS_SLICE):
+                piece = data[start:start + DECOMPRESS_SLICE]
+                while piece:
+                    output = self._decompressor.decompress(piece)
+                    piece = b""
+                    if self._decompressor.eof and self._decompressor.unused_data:
+                        # Concatenated gzip members (or zstd frames) decompress to one body
+                        piece = self._decompressor.unused_data
+                        self._decompressor = self._new()
+                    if output:
+                        yield output
+        except (zlib.error, zstandard.ZstdError) as e:
+            raise ValueError(f"Request body is not valid {self.encoding}: {str(e)}")
+
+    def finish(self) -> None:
+        """Check that the body did not end part way through a member or frame."""
+        if not self._decompressor.eof:
+            raise ValueError(f"Request body ended before the end of its {self.encoding} stream")
+
+
+class MsgpackArrayItems:
+    """Parses a top-level MessagePack array, fed in arbitrary byte chunks, into its items.
+    The MessagePack counterpart of JSONArrayItems, with the same interface; raises ValueError if the
+    input is not a MessagePack array, an item is not valid MessagePack, or an item exceeds max_item_bytes."""
+
+    def __init__(self, max_item_bytes: int = 16 * 1024 * 1024):
+        self.max_item_bytes = max_item_bytes
+        self.items = 0
+        self._unpacker = msgpack.Unpacker(raw=False, max_buffer_size=2 * max_item_bytes)
+        self._fed = 0
+        # Items left in the array, once its header has been read
+        self._remaining: Optional[int] = None
+        # An incomplete item is unpacked again only once its buffered bytes have doubled
+        self._retry_length = 0
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add the next chunk of the body and return the items it completed."""
+        if self._fed - self._unpacker.tell() + len(chunk) > 2 * self.max_item_bytes:
+            raise ValueError(f"Item {self.items} exceeds {self.max_item_bytes} bytes")
+        self._unpacker.feed(chunk)
+        self._fed += len(chunk)
+        if self._fed - self._unpacker.tell() < self._retry_length:
+            return []
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """Finish the body, returning any items still pending, and check that the array was complete."""
+        items = self._parse()
+        if self._remaining != 0:
+            raise ValueError("Request body ended before the MessagePack array was complete")
+        return items
+
+    def _parse(self) -> List[Any]:
+        items = []
+        try:
+            if self._remaining is None:
+                self._remaining = self._unpacker.read_array_header()
+            while self._remaining:
+                items.append(self._unpacker.unpack())
+                self._remaining -= 1
+                self._retry_length = 0
+        except msgpack.OutOfData:
+            buffered = self._fed - self._unpacker.tell()
+            if buffered > self.max_item_bytes:
+                raise ValueError(f"Item {self.items + len(items)} exceeds {self.max_item_bytes} bytes")
+            self._retry_length = 2 * buffered
+        except ValueError:
+            if self._remaining is None:
+                raise ValueError("Request body must be a MessagePack array")
+            raise ValueError(f"Item {self.items + len(items)} is not valid MessagePack")
+
+        self.items += len(items)
+        if self._remaining == 0 and self._fed > self._unpacker.tell():
+            raise ValueError("Unexpected data after the MessagePack array")
+        return items
+
+
+class IngestionRequest(Request):
+    """A Request whose body is decompressed as it is read and whose json() also decodes MessagePack.
+    A MessagePack request presents a JSON content type, so FastAPI parses its body with json()."""
+
+    def __init__(self, scope, receive):
+        headers = dict(scope["headers"])
+        encoding = headers.get(b"content-encoding", b"identity").decode("latin-1").strip().lower()
+        content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower()
+        self.content_encoding = None if encoding == "identity" else encoding
+        self.msgpack = content_type in MSGPACK_CONTENT_TYPES
+
+        if self.content_encoding or self.msgpack:
+            scope = {**scope, "headers": [
+                (name, b"application/json" if self.msgpack and name == b"content-type" else value)
+                for name, value in scope["headers"]
+                if not (self.content_encoding and name in (b"content-encoding", b"content-length"))
+            ]}
+        super().__init__(scope, receive)
+
+    async def stream(self):
+        if self.content_encoding is None or hasattr(self, "_body"):
+            async for chunk in super().stream():
+                yield chunk
+            return
+
+        decompressor = Decompressor(self.content_encoding)
+        decoded = 0
+        pending, pending_bytes = [], 0
+        try:
+            async for chunk in super().stream():
+                for output in decompressor.decompress(chunk):
+                    decoded += len(output)
+                    if decoded > MAX_DECODED_BYTES:
+                        raise HTTPException(status_code=413, detail=f"Decompressed request body exceeds {MAX_DECODED_BYTES} bytes")
+                    pending.append(output)
+                    pending_bytes += len(output)
+                    if pending_bytes >= DECODED_CHUNK_BYTES:
+                        yield b"".join(pending)
+                        pending, pending_bytes = [], 0
+            decompressor.finish()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if pending:
+            yield b"".join(pending)
+        yield b""
+
+    async def json(self) -> Any:
+        if not self.msgpack:
+            return await super().json()
+        if not hasattr(self, "_json"):
+            try:
+                self._json = msgpack.unpackb(await self.body(), raw=False)
+            except (ValueError, msgpack.UnpackException):
+                raise HTTPException(status_code=400, detail="Request body is not valid MessagePack")
+        return self._json
+
+    def array_reader(self):
+        """An incremental reader for this request's body format (see store_streamed_items)."""
+        return MsgpackArrayItems() if self.msgpack else JSONArrayItems()
+
+
+class IngestionRoute(APIRoute):
+    """APIRoute whose endpoint gets an IngestionRequest, so it accepts compressed and MessagePack bodies."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def decoding_handler(request: Request) -> Response:
+            request = IngestionRequest(request.scope, request.receive)
+            if request.content_encoding is not None and request.content_encoding not in CONTENT_ENCODINGS:
+                raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {request.content_encoding}")
+            return await handler(request)
+
+        return decoding_handler
@@ -0,0 +1,154 @@
+"""
+Cancelling a retrieval bulkhead call while its query runs must cancel the statement and return the
+call's connection to its pool. The database is a stand-in: psycopg2's pool is replaced by one that
+hands out connections whose slow statement only ends when the connection's cancel() is called, as
+pg_sleep does under pg_cancel_backend.
+
+Run with: python -m unittest discover tests
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+import psycopg2.extensions
+
+from src.db import operations
+from src.db.operations import DatabaseManager
+from src.utils.bulkhead import Bulkhead
+from src.utils.cancellation import query_cancellations
+
+
+class SlowConnection:
+    """Stands in for a connection running a long statement (e.g. SELECT pg_sleep(60))."""
+
+    def __init__(self, cancel_delay: float = 0.0):
+        self.closed = 0
+        self.cancel_delay = cancel_delay
+        self.running = threading.Event()
+        self.cancel_started = threading.Event()
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        # Sending a cancel request connects to the server, which takes a while
+        self.cancel_started.set()
+        time.sleep(self.cancel_delay)
+        self.cancelled.set()
+
+    def run_slow_statement(self, ends_on_cancel_request: bool = True, timeout: float = 5.0):
+        self.running.set()
+        if not ends_on_cancel_request:
+            # The statement finishes by itself just as the cancel request starts going out
+            self.cancel_started.wait(timeout)
+            return 'finished'
+        if not self.cancelled.wait(timeout):
+            return 'finished'
+        raise psycopg2.extensions.QueryCanceledError("canceling statement due to user request")
+
+
+class StandInPool:
+    """Takes the place of psycopg2.pool.ThreadedConnectionPool."""
+
+    cancel_delay = 0.0
+    instances = []
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.handed_out = []
+        # (connection, whether its cancel request had been sent when it came back)
+        self.returned = []
+        StandInPool.instances.append(self)
+
+    def getconn(self):
+        conn = SlowConnection(self.cancel_delay)
+        self.handed_out.append(conn)
+        return conn
+
+    def putconn(self, conn):
+        self.returned.append((conn, conn.cancelled.is_set()))
+
+    def closeall(self):
+        pass
+
+
+def slow_query(db: DatabaseManager, **options):
+    conn = db.get_connection()
+    try:
+        return conn.run_slow_statement(**options)
+    except psycopg2.extensions.QueryCanceledError:
+        return None
+    finally:
+        db.return_connection(conn)
+
+
+class QueryCancellationTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        StandInPool.instances = []
+        StandInPool.cancel_delay = 0.0
+        patcher = mock.patch.object(operations.psycopg2.pool, 'ThreadedConnectionPool', StandInPool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = DatabaseManager(pool_budgets={'ingestion': 1, 'retrieval': 1, 'admin': 1})
+        self.assertTrue(self.db.open())
+        self.addCleanup(self.db.close_all_connections)
+        self.bulkhead = Bulkhead('retrieval', max_concurrent=1, max_queue=1, queue_timeout=1.0, reject_status=429, cancellable=True)
+        self.addCleanup(self.bulkhead.shutdown)
+
+    def retrieval_pool(self) -> StandInPool:
+        return self.db._pools['retrieval']
+
+    def in_use(self) -> int:
+        return self.db.get_pool_stats()['workloads']['retrieval']['in_use']
+
+    async def start_slow_call(self, **options):
+        task = asyncio.create_task(self.bulkhead.run(slow_query, self.db, **options))
+        await asyncio.to_thread(lambda: self.wait_until(lambda: self.retrieval_pool().handed_out and self.retrieval_pool().handed_out[0].running.is_set()))
+        self.assertEqual(self.in_use(), 1)
+        return task, self.retrieval_pool().handed_out[0]
+
+    @staticmethod
+    def wait_until(condition, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    async def test_cancelled_call_cancels_its_query_and_returns_its_connection(self):
+        before = query_cancellations.get_stats()
+        task, conn = await self.start_slow_call()
+
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertTrue(await asyncio.to_thread(self.wait_until, lambda: self.in_use() == 0))
+        self.assertTrue(conn.cancelled.is_set())
+        # return_connection put the connection back in its pool
+        self.assertEqual([returned for returned, _ in self.retrieval_pool().returned], [conn])
+        # CancelScope.detach recorded the release of the cancelled call's connection
+        after = query_cancellations.get_stats()
+        self.assertEqual(after['connections_released'], before['connections_released'] + 1)
+        self.assertEqual(after['queries_cancelled'], before['queries_cancelled'] + 1)
+
+    async def test_cancel_request_is_sent_off_the_loop_before_the_connection_returns(self):
+        StandInPool.cancel_delay = 0.5
+        task, conn = await self.start_slow_call(ends_on_cancel_request=False)
+
+        started = time.monotonic()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        # The request was cancelled without waiting for the cancel request on the event loop
+        self.assertLess(time.monotonic() - started, StandInPool.cancel_delay / 2)
+
+        self.assertTrue(await asyncio.to_thread(self.wait_until, lambda: self.in_use() == 0))
+        # The statement ended by itself first, but its connection only went back once the cancel request was sent
+        self.assertEqual(self.retrieval_pool().returned, [(conn, True)])
+
+
+if __name__ == '__main__':
+    unittest.main()